@@ -7,11 +7,25 @@ Générer le prompt Markdown morceaux.md depuis une liste de chansons
 
 import os
 import sys
+import json
+import shutil
+import argparse
+import tempfile
+import functools
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
+from instrumentation import span, compter
+from gabarit import charger_gabarit_chanson
+from normalisation import cle_morceau
+from outils_fichiers import ouvrir_atomique, ecrire_atomique
+# parse_song_line reste importable depuis l'étape 1
+from lecteurs_entree import (lire_morceaux, parse_song_line, detecter_format, decouper_tranches, lire_tranche,
+                             TAILLE_TRANCHE)
+
 def select_input_file():
     """Sélectionner le fichier d'entrée"""
     root = tk.Tk()
@@ -19,100 +33,201 @@ def select_input_file():
     
     file_path = filedialog.askopenfilename(
         title="Sélectionner le fichier liste des chansons",
-        filetypes=[("Fichiers texte", "*.txt"), ("Tous les fichiers", "*.*")],
+        filetypes=[("Listes de chansons", "*.txt *.csv *.tsv *.m3u *.m3u8"), ("Fichiers texte", "*.txt"),
+                   ("Exports CSV", "*.csv *.tsv"), ("Playlists M3U", "*.m3u *.m3u8"), ("Tous les fichiers", "*.*")],
         initialdir="data/input"
     )
     
     root.destroy()
     return file_path
 
-def parse_song_line(line):
-    """Parser une ligne de chanson"""
-    line = line.strip()
-    if not line or line.startswith('#'):
-        return None
-    
-    # Format attendu: "Artiste - Titre" ou "Titre par Artiste"
-    if ' - ' in line:
-        parts = line.split(' - ', 1)
-        artiste = parts[0].strip()
-        titre = parts[1].strip()
-    elif ' par ' in line:
-        parts = line.split(' par ', 1)
-        titre = parts[0].strip()
-        artiste = parts[1].strip()
-    else:
-        # Si pas de séparateur, considérer comme titre uniquement
-        titre = line
-        artiste = "Artiste Inconnu"
-    
-    return {
-        'titre': titre,
-        'artiste': artiste,
-        'bpm': 120,  # Valeur par défaut
-        'key': 'A',  # Valeur par défaut
-        'genre': ['Pop'],  # Valeur par défaut
-        'energie': 5,  # Valeur par défaut
-        'date_ajout': datetime.now().strftime('%Y-%m-%d'),
-        'tags': ['nouveau'],
-        'filename': f"{artiste} - {titre}".replace('/', '_').replace('\\', '_')
-    }
-
-def generate_markdown_from_list(input_file, output_file):
-    """Générer le fichier Markdown depuis la liste"""
+# Texte des sections à compléter dans chaque nouvelle fiche
+VALEURS_FICHE = {
+    'notes_personnelles': ["À compléter..."],
+    'idees_mix': ["À définir..."],
+    'liens': ["À ajouter..."],
+    'notes_personnelles_detaillees': "À compléter selon vos impressions...",
+    'idees_mix_detaillees': "À définir selon vos expériences de mix...",
+}
+
+SEPARATEUR = "\n\n" + "="*50 + "\n\n"
+# Processus de rendu pour les grandes listes texte (une seule plage: rendu en série)
+NB_PROCESSUS = os.cpu_count() or 1
+
+def _valeurs_fiches(songs, surcharges, bilan):
+    """Valeurs du gabarit pour chaque morceau, comptés au passage"""
+    for song in songs:
+        bilan['morceaux'] += 1
+        yield {
+            'titre': song['titre'],
+            'artiste': song['artiste'],
+            'bpm': song['bpm'],
+            'key': song['key'],
+            'genre_list': song['genre'],
+            'energie': song['energie'],
+            'date_ajout': song['date_ajout'],
+            'tags_list': song['tags'],
+            'filename': song['filename'],
+            **surcharges,
+        }
+
+def chemin_manifeste(output_file):
+    """Manifeste des morceaux déjà émis, à côté du fichier de sortie (.morceaux_manifeste.json)"""
+    output_file = Path(output_file)
+    return output_file.with_name(f".{output_file.stem}_manifeste.json")
+
+def charger_manifeste(chemin):
+    """Manifeste du dernier passage: clé normalisée → "Artiste - Titre" """
+    try:
+        with open(chemin, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {'genere_le': None, 'morceaux': {}}
+
+def _nouveaux_morceaux(songs, deja_emis, presents):
+    """Morceaux absents du manifeste; `presents` reçoit toutes les clés de la liste"""
+    for song in songs:
+        cle = cle_morceau(song['artiste'], song['titre'])
+        if cle in presents:
+            # Doublon dans la liste: une seule fiche
+            continue
+        presents[cle] = f"{song['artiste']} - {song['titre']}"
+        if cle not in deja_emis:
+            yield song
+
+def _cles_emises(songs, presents):
+    """Morceaux inchangés; `presents` reçoit la clé de chacun (passage complet qui refait le manifeste)"""
+    for song in songs:
+        presents.setdefault(cle_morceau(song['artiste'], song['titre']), f"{song['artiste']} - {song['titre']}")
+        yield song
+
+def _rendre_corps(songs, surcharges, chemin_corps):
+    """Rendre les morceaux dans un fichier du corps; renvoie le nombre de morceaux"""
+    gabarit = charger_gabarit_chanson()
+    bilan = {'morceaux': 0}
+    with open(chemin_corps, 'w', encoding='utf-8') as f:
+        gabarit.rendre_plusieurs(_valeurs_fiches(songs, surcharges, bilan), tampon=f,
+                                 separateur=SEPARATEUR, **VALEURS_FICHE)
+    return bilan['morceaux']
+
+def _rendre_tranche(input_file, date_ajout, surcharges, avec_cles, chemin_corps, debut, fin):
+    """Rendre une plage de la liste texte (exécuté dans un processus de travail)
+
+    Renvoie le nombre de morceaux rendus et, avec `avec_cles`, leurs clés pour le manifeste.
+    """
+    presents = {}
+    songs = lire_tranche(input_file, debut, fin, date_ajout)
+    if avec_cles:
+        songs = _cles_emises(songs, presents)
+    return _rendre_corps(songs, surcharges, chemin_corps), presents
+
+def generate_markdown_from_list(input_file, output_file, valeurs_fiche=None, format=None, nb_processus=1,
+                                taille_tranche=TAILLE_TRANCHE, incremental=False, refaire_manifeste=False):
+    """Générer le fichier Markdown depuis la liste
+
+    `valeurs_fiche` remplace des valeurs par défaut des fiches (notes, tags...).
+    `format` ('texte', 'csv', 'm3u') force le lecteur, détecté par défaut.
+    Les morceaux sont lus et rendus au fil de l'eau dans des fichiers temporaires
+    (le total de l'en-tête n'est connu qu'à la fin): la mémoire reste constante
+    quelle que soit la taille de la liste.
+
+    Avec `nb_processus` > 1, une liste texte est découpée en plages d'environ
+    `taille_tranche` octets alignées sur les lignes, rendues chacune par un
+    processus puis recopiées dans l'ordre: le résultat est identique au rendu
+    en série.
+
+    Avec `incremental`, seuls les morceaux absents du manifeste du passage
+    précédent (clés normalisées, voir chemin_manifeste) sont rendus: le
+    fichier de sortie ne contient que ces nouveaux morceaux, et l'étape 2
+    n'extrait qu'eux. Les morceaux retirés de la liste sont listés dans
+    l'en-tête. Ce mode lit la liste en série.
+
+    Avec `refaire_manifeste` (passage complet), tous les morceaux sont rendus,
+    en parallèle si possible, et le manifeste est réécrit depuis leurs clés:
+    les passages incrémentaux suivants partent de ce passage complet.
+    """
     try:
         # Créer le dossier de sortie
-        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
-        
-        # Lire le template
-        template_path = Path("templates/chanson_template.md")
-        if not template_path.exists():
-            raise FileNotFoundError(f"Template non trouvé: {template_path}")
-        
-        with open(template_path, 'r', encoding='utf-8') as f:
-            template = f.read()
+        output_dir = Path(output_file).parent
+        output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Lire le fichier d'entrée
-        with open(input_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        # Gabarit compilé une fois par processus (FileNotFoundError s'il manque)
+        charger_gabarit_chanson()
+        surcharges = valeurs_fiche or {}
+        format = format or detecter_format(input_file)
+        tranches = []
+        presents = {}
+        if incremental:
+            manifeste = charger_manifeste(chemin_manifeste(output_file))
+            deja_emis = manifeste['morceaux']
+        elif nb_processus > 1 and format == 'texte':
+            tranches = decouper_tranches(input_file, taille_tranche)
         
-        markdown_content = ""
-        processed_songs = 0
+        # Corps temporaires à côté de la sortie (pas dans un /tmp en mémoire)
+        with tempfile.TemporaryDirectory(prefix=".morceaux_", dir=output_dir) as dossier_corps:
+            if len(tranches) > 1:
+                # Même date d'ajout dans toutes les plages
+                date_ajout = datetime.now().strftime('%Y-%m-%d')
+                corps = [Path(dossier_corps) / f"{i:05d}.md" for i in range(len(tranches))]
+                rendre = functools.partial(_rendre_tranche, str(input_file), date_ajout, surcharges,
+                                           refaire_manifeste)
+                with span("lecture_rendu", processus=nb_processus, tranches=len(tranches)):
+                    processed_songs = 0
+                    with ProcessPoolExecutor(max_workers=min(nb_processus, len(tranches))) as executeur:
+                        # Clés fusionnées dans l'ordre des plages: même manifeste qu'en série
+                        for nombre, cles in executeur.map(rendre, corps, *zip(*tranches)):
+                            processed_songs += nombre
+                            for cle, nom in cles.items():
+                                presents.setdefault(cle, nom)
+                    compter('fichiers_lus')
+                    compter('octets_lus', os.path.getsize(input_file))
+                    compter('morceaux_rendus', processed_songs)
+            else:
+                corps = [Path(dossier_corps) / "00000.md"]
+                with span("lecture_rendu"):
+                    songs = lire_morceaux(input_file, format)
+                    if incremental:
+                        songs = _nouveaux_morceaux(songs, deja_emis, presents)
+                    elif refaire_manifeste:
+                        songs = _cles_emises(songs, presents)
+                    processed_songs = _rendre_corps(songs, surcharges, corps[0])
+                    compter('morceaux_rendus', processed_songs)
+            
+            entete_incremental = ""
+            if incremental:
+                retires = [nom for cle, nom in deja_emis.items() if cle not in presents]
+                depuis = f" depuis le {manifeste['genere_le']}" if manifeste['genere_le'] else ""
+                entete_incremental = (f"Mise à jour incrémentale{depuis}: {processed_songs} nouveau(x), "
+                                      f"{len(presents) - processed_songs} déjà présent(s), "
+                                      f"{len(retires)} retiré(s) de la liste\n\n")
+                if retires:
+                    entete_incremental += ("Morceaux retirés de la liste:\n"
+                                           + "".join(f"- {nom}\n" for nom in retires) + "\n")
+                print(f"🆕 {processed_songs} nouveau(x) morceau(x), {len(presents) - processed_songs} déjà présent(s)")
+                for nom in retires[:10]:
+                    print(f"➖ Retiré de la liste: {nom}")
+                if len(retires) > 10:
+                    print(f"   ... et {len(retires) - 10} autre(s) (voir l'en-tête de {Path(output_file).name})")
+            
+            # Écrire le fichier de sortie: en-tête puis corps recopiés dans l'ordre, par blocs
+            with span("ecriture"):
+                horodatage = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                with ouvrir_atomique(output_file) as f:
+                    f.write(f"# Morceaux DJ - Généré le {horodatage}\n\n")
+                    f.write(f"Total des morceaux traités: {processed_songs}\n\n")
+                    f.write(entete_incremental)
+                    f.write("="*50 + "\n\n")
+                    for chemin_corps in corps:
+                        with open(chemin_corps, 'r', encoding='utf-8') as partie:
+                            shutil.copyfileobj(partie, f)
+                compter('fichiers_ecrits')
+                compter('octets_ecrits', os.path.getsize(output_file))
         
-        for line in lines:
-            song = parse_song_line(line)
-            if song:
-                # Formater les listes
-                genre_list = '\n'.join([f"  - {g}" for g in song['genre']])
-                tags_list = '\n'.join([f"  - {t}" for t in song['tags']])
-                
-                # Formater le contenu
-                song_md = template.format(
-                    titre=song['titre'],
-                    artiste=song['artiste'],
-                    bpm=song['bpm'],
-                    key=song['key'],
-                    genre_list=genre_list,
-                    energie=song['energie'],
-                    date_ajout=song['date_ajout'],
-                    tags_list=tags_list,
-                    filename=song['filename'],
-                    notes_personnelles="  - À compléter...",
-                    idees_mix="  - À définir...",
-                    liens="  - À ajouter...",
-                    notes_personnelles_detaillees="À compléter selon vos impressions...",
-                    idees_mix_detaillees="À définir selon vos expériences de mix..."
-                )
-                
-                markdown_content += song_md + "\n\n" + "="*50 + "\n\n"
-                processed_songs += 1
-        
-        # Écrire le fichier de sortie
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(f"# Morceaux DJ - Généré le {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write(f"Total des morceaux traités: {processed_songs}\n\n")
-            f.write("="*50 + "\n\n")
-            f.write(markdown_content)
+        # Manifeste après la sortie: un arrêt entre les deux ré-émet le même delta
+        if incremental or refaire_manifeste:
+            ecrire_atomique(chemin_manifeste(output_file), json.dumps(
+                {'genere_le': horodatage, 'source': str(input_file), 'morceaux': presents},
+                ensure_ascii=False, indent=0))
         
         return processed_songs
         
@@ -121,6 +236,11 @@ def generate_markdown_from_list(input_file, output_file):
 
 def main():
     """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Générer morceaux.md depuis une liste de chansons")
+    parser.add_argument('--complet', action='store_true',
+                        help="Tout régénérer (par défaut, seuls les morceaux ajoutés depuis le dernier passage)")
+    args = parser.parse_args()
+    
     print("🎵 Assistant DJ - Étape 1: Génération Markdown depuis liste")
     print("="*60)
     
@@ -134,8 +254,11 @@ def main():
     output_file = "data/output/morceaux.md"
     
     try:
-        # Générer le Markdown
-        processed_songs = generate_markdown_from_list(input_file, output_file)
+        # Le mode incrémental lit la liste en série; --complet rend tout en parallèle et refait le manifeste
+        with span("etape1", fichier=str(input_file)):
+            processed_songs = generate_markdown_from_list(input_file, output_file, nb_processus=NB_PROCESSUS,
+                                                          incremental=not args.complet,
+                                                          refaire_manifeste=args.complet)
         
         print(f"✅ Génération terminée avec succès!")
         print(f"📁 Fichier de sortie: {output_file}")
@@ -8,11 +8,19 @@ Extraire les fiches Markdown par chanson en fichiers séparés
 import os
 import re
 import sys
+import json
+import hashlib
 from pathlib import Path
 from datetime import datetime
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
+from instrumentation import span, compter
+from normalisation import cle_morceau
+from outils_fichiers import ecrire_atomique
+from disposition_fiches import DispositionFiches
+from ecrivain_fiches import EcrivainFiches, JournalLimite, NB_THREADS, rapport
+
 def select_input_file():
     """Sélectionner le fichier Markdown d'entrée"""
     root = tk.Tk()
@@ -39,6 +47,7 @@ def extract_song_info(song_content):
         info['titre'] = titre_match.group(1).strip()
     if artiste_match:
         info['artiste'] = artiste_match.group(1).strip()
+    compter('correspondances_regex', len(info))
     
     # Générer nom de fichier sécurisé
     if 'titre' in info and 'artiste' in info:
@@ -54,15 +63,53 @@ def extract_song_info(song_content):
     
     return info, filename
 
-def split_markdown_file(input_file, output_dir):
-    """Diviser le fichier Markdown en fichiers séparés"""
+# Manifeste des sections déjà extraites, dans le dossier des fiches (ignoré par les scans: pas en .md)
+FICHIER_MANIFESTE = ".extraction_manifeste.json"
+# Début des notes saisies par l'utilisateur: listes de notes de l'en-tête, sinon corps après ---
+_DEBUT_NOTES = re.compile(r'^(?:Notes Personnelles:|---)[ \t]*$', re.M)
+
+def charger_manifeste(output_dir):
+    """Manifeste du dossier: identité de section → [empreinte du contenu, nom de la fiche]"""
+    try:
+        with open(Path(output_dir) / FICHIER_MANIFESTE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def fusionner_notes(section, existant):
+    """Nouvelles métadonnées de la section, notes de la fiche existante conservées"""
+    debut_section = _DEBUT_NOTES.search(section)
+    debut_existant = _DEBUT_NOTES.search(existant)
+    if not debut_section or not debut_existant:
+        return section
+    return section[:debut_section.start()] + existant[debut_existant.start():]
+
+def split_markdown_file(input_file, output_dir, nb_threads=NB_THREADS):
+    """Diviser le fichier Markdown en fichiers séparés
+
+    Les fiches sont écrites en arrière-plan par nb_threads threads
+    (fichier temporaire puis renommage atomique).
+
+    Un manifeste (FICHIER_MANIFESTE) associe l'identité de chaque section
+    (artiste/titre normalisés, rang parmi les sections de même identité) à
+    l'empreinte de son contenu et à sa fiche. Une section inchangée n'est pas
+    réécrite, une section modifiée met à jour sa fiche sans toucher aux notes
+    de l'utilisateur, seule une section inconnue crée une fiche. Une fiche
+    existante au nom attendu (dossier d'avant le manifeste) est reprise de la
+    même façon. Renvoie les fiches créées ou mises à jour.
+    """
     try:
-        # Créer le dossier de sortie
+        # Créer le dossier de sortie (plat ou réparti en sous-dossiers)
         Path(output_dir).mkdir(parents=True, exist_ok=True)
+        disposition = DispositionFiches(output_dir)
+        manifeste = charger_manifeste(output_dir)
         
         # Lire le fichier d'entrée
-        with open(input_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        with span("lecture"):
+            with open(input_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+            compter('fichiers_lus')
+            compter('octets_lus', os.path.getsize(input_file))
         
         # Diviser par le séparateur
         sections = content.split('=' * 50)
@@ -72,40 +119,80 @@ def split_markdown_file(input_file, output_dir):
             sections = sections[1:]
         
         extracted_files = []
+        stats = {'nouvelles': 0, 'mises_a_jour': 0, 'inchangees': 0}
+        rangs = {}
+        rangs_noms = {}
+        # Fiches déjà attribuées à une section: jamais reprises par une autre
+        noms_pris = {nom for _, nom in manifeste.values()}
+        manifeste_modifie = False
+        
+        with span("extraction"), EcrivainFiches(nb_threads, journal=JournalLimite(),
+                                                   prefixe="✅ Extrait: ") as ecrivain:
+            for i, section in enumerate(sections):
+                section = section.strip()
+                if not section:
+                    continue
+                
+                # Extraire les informations de la chanson
+                info, filename = extract_song_info(section)
+                
+                # Créer le nom de fichier final
+                if not filename:
+                    filename = f"chanson_{i+1:03d}"
+                
+                # Identité: même morceau normalisé, rang parmi ses doublons (fiches _01, _02...)
+                cle = cle_morceau(info.get('artiste'), info.get('titre', filename))
+                rang = rangs.get(cle, 0)
+                rangs[cle] = rang + 1
+                identite = f"{cle}#{rang}" if rang else cle
+                empreinte = hashlib.sha1(section.encode('utf-8')).hexdigest()
+                
+                # Nom qu'aurait donné une extraction dans un dossier vide (reprise sans manifeste)
+                rang_nom = rangs_noms.get(filename, 0)
+                rangs_noms[filename] = rang_nom + 1
+                connue = manifeste.get(identite)
+                nom = connue[1] if connue else (f"{filename}_{rang_nom:02d}.md" if rang_nom else f"{filename}.md")
+                output_path = disposition.chemin(nom)
+                if connue and connue[0] == empreinte and output_path.exists():
+                    stats['inchangees'] += 1
+                    continue
+                
+                existant = None
+                if connue or nom not in noms_pris:
+                    try:
+                        with open(output_path, 'r', encoding='utf-8') as f:
+                            existant = f.read()
+                    except FileNotFoundError:
+                        pass
+                manifeste_modifie = True
+                
+                if existant is None:
+                    # Chemin complet du fichier, sans conflit de nom (suffixes _01, _02...)
+                    output_path = disposition.chemin_libre(filename)
+                    stats['nouvelles'] += 1
+                else:
+                    section = fusionner_notes(section, existant)
+                    if section == existant:
+                        # Fiche déjà à jour (d'avant le manifeste, ou seules les notes diffèrent)
+                        manifeste[identite] = [empreinte, output_path.name]
+                        noms_pris.add(output_path.name)
+                        stats['inchangees'] += 1
+                        continue
+                    stats['mises_a_jour'] += 1
+                
+                # Écrire le fichier (en arrière-plan)
+                ecrivain.soumettre(output_path, section)
+                manifeste[identite] = [empreinte, output_path.name]
+                noms_pris.add(output_path.name)
+                extracted_files.append(output_path)
         
-        for i, section in enumerate(sections):
-            section = section.strip()
-            if not section:
-                continue
-            
-            # Extraire les informations de la chanson
-            info, filename = extract_song_info(section)
-            
-            # Créer le nom de fichier final
-            if filename:
-                output_filename = f"{filename}.md"
-            else:
-                output_filename = f"chanson_{i+1:03d}.md"
-            
-            # Chemin complet du fichier
-            output_path = Path(output_dir) / output_filename
-            
-            # Éviter les conflits de noms
-            counter = 1
-            base_path = output_path
-            while output_path.exists():
-                name = base_path.stem
-                suffix = base_path.suffix
-                output_path = base_path.parent / f"{name}_{counter:02d}{suffix}"
-                counter += 1
-            
-            # Écrire le fichier
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(section)
-            
-            extracted_files.append(output_path)
-            print(f"✅ Extrait: {output_path.name}")
+        # Rien d'écrit si rien n'a changé (pas même le manifeste)
+        if manifeste_modifie:
+            ecrire_atomique(Path(output_dir) / FICHIER_MANIFESTE, json.dumps(manifeste, ensure_ascii=False, indent=0))
         
+        print(rapport(ecrivain.stats))
+        print(f"🆕 {stats['nouvelles']} nouvelle(s), ✏️  {stats['mises_a_jour']} mise(s) à jour, "
+              f"⏭️  {stats['inchangees']} inchangée(s)")
         return extracted_files
         
     except Exception as e:
@@ -127,7 +214,8 @@ def main():
     
     try:
         # Extraire les fichiers
-        extracted_files = split_markdown_file(input_file, output_dir)
+        with span("etape2", fichier=str(input_file)):
+            extracted_files = split_markdown_file(input_file, output_dir)
         
         print(f"✅ Extraction terminée avec succès!")
         print(f"📁 Dossier de sortie: {output_dir}")
@@ -135,7 +223,7 @@ def main():
         
         # Afficher la liste des fichiers
         if extracted_files:
-            print("\n📋 Fichiers créés:")
+            print("\n📋 Fiches créées ou mises à jour:")
             for file_path in extracted_files[:10]:  # Montrer les 10 premiers
                 print(f"  • {file_path.name}")
             if len(extracted_files) > 10:
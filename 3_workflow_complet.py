@@ -9,10 +9,14 @@ import os
 import sys
 import subprocess
 import time
+import argparse
 from pathlib import Path
 import tkinter as tk
 from tkinter import messagebox
 
+import instrumentation
+from instrumentation import span
+
 def run_script(script_name, step_name, step_number):
     """Exécuter un script Python"""
     try:
@@ -116,8 +120,27 @@ def display_summary():
     
     print("\n🎉 Workflow terminé!")
 
+def parse_arguments():
+    """Options d'instrumentation du workflow"""
+    parser = argparse.ArgumentParser(description="Assistant DJ - Workflow complet")
+    parser.add_argument('--trace', nargs='?', const='', default=None, metavar='FICHIER',
+                        help="Écrire une trace JSON-lines des étapes (défaut: data/traces/trace_<date>.jsonl)")
+    parser.add_argument('--profile', nargs='?', const='data/traces/profils', default=None, metavar='DOSSIER',
+                        help="Écrire un fichier cProfile .pstats par étape")
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help="Mesurer les allocations mémoire de chaque étape")
+    return parser.parse_args()
+
 def main():
     """Fonction principale du workflow complet"""
+    args = parse_arguments()
+    
+    # Activer l'instrumentation (héritée par les scripts des étapes)
+    trace_path = None
+    if args.trace is not None or args.profile or args.tracemalloc:
+        trace_path = args.trace or instrumentation.chemin_trace_par_defaut()
+        instrumentation.configurer(trace_path, args.profile, args.tracemalloc)
+    
     print("🎵 Assistant DJ - Workflow Complet")
     print("="*60)
     print("Exécution séquentielle des étapes 1 à 5")
@@ -144,7 +167,8 @@ def main():
     successful_steps = 0
     
     for script_name, step_name, step_number in steps:
-        success = run_script(script_name, step_name, step_number)
+        with span(f"etape_{step_number}", script=script_name):
+            success = run_script(script_name, step_name, step_number)
         
         if success:
             successful_steps += 1
@@ -177,6 +201,13 @@ def main():
     print(f"\n⏱️  Temps total d'exécution: {total_time:.2f} secondes")
     print(f"✅ Étapes réussies: {successful_steps}/{len(steps)}")
     
+    # Rapport d'instrumentation par étape
+    if trace_path:
+        print()
+        instrumentation.afficher_rapport(trace_path)
+        if args.profile:
+            print(f"🔬 Profils cProfile: {args.profile}")
+    
     # Message final
     if successful_steps == len(steps):
         message = f"🎉 Workflow terminé avec succès!\n\nToutes les étapes ont été exécutées.\nTemps total: {total_time:.2f} secondes"
@@ -8,26 +8,57 @@ Générer le set DJ classé par genre depuis les fiches
 import os
 import re
 import sys
+import json
+import hashlib
 from pathlib import Path
 from datetime import datetime
 import tkinter as tk
 from tkinter import messagebox
-from collections import defaultdict
 
-def scan_songs_directory():
+from instrumentation import span, compter
+from outils_fichiers import ecrire_atomique
+import stockage_compact
+from disposition_fiches import lister_fiches
+from morceau import Morceau
+from index_bibliotheque import IndexBibliotheque
+
+# Niveau d'énergie de l'index → titre de section du set
+SECTIONS_ENERGIE = {
+    'faible': 'Faible (1-3)',
+    'moyenne': 'Moyenne (4-6)',
+    'elevee': 'Élevée (7-10)',
+    None: 'Non définie',
+}
+
+# Morceaux par page de genre ou de niveau d'énergie
+TAILLE_PAGE = 1000
+# Empreintes des pages écrites, dans le dossier des pages
+MANIFESTE_SET = ".set_manifeste.json"
+
+def scan_songs_directory(songs_dir="data/output/chansons"):
     """Scanner le dossier des chansons"""
-    songs_dir = Path("data/output/chansons")
+    songs_dir = Path(songs_dir)
     if not songs_dir.exists():
         raise FileNotFoundError(f"Dossier des chansons non trouvé: {songs_dir}")
     
-    return list(songs_dir.glob("*.md"))
+    # Racine et sous-dossiers de répartition (disposition_fiches.py)
+    return lister_fiches(songs_dir)
 
 def parse_song_file(file_path):
     """Parser un fichier de chanson"""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
-        
+            compter('octets_lus', os.fstat(f.fileno()).st_size)
+        compter('fichiers_lus')
+    except Exception as e:
+        print(f"⚠️  Erreur lors du parsing de {file_path}: {str(e)}")
+        return None
+    return parse_song_content(content, file_path)
+
+def parse_song_content(content, file_path):
+    """Parser le contenu d'une fiche (lue depuis le dossier ou le pack de fiches)"""
+    try:
         song_info = {}
         
         # Extraire les informations de base
@@ -69,142 +100,227 @@ def parse_song_file(file_path):
         else:
             song_info['tags'] = []
         
+        compter('correspondances_regex', len(song_info))
         song_info['file_path'] = file_path
-        return song_info
+        return Morceau.depuis_dict(song_info)
         
     except Exception as e:
         print(f"⚠️  Erreur lors du parsing de {file_path}: {str(e)}")
         return None
 
+def _sections(index, dimension, ordre, noms=None):
+    """Groupes de l'index en listes de morceaux, renommés pour l'affichage"""
+    return {(noms[valeur] if noms else valeur): [index.morceaux[i] for i in positions]
+            for valeur, positions in index.groupes(dimension, ordre).items()}
+
 def group_songs_by_genre(songs):
     """Grouper les chansons par genre"""
-    genre_groups = defaultdict(list)
-    
-    for song in songs:
-        if song and 'genres' in song:
-            for genre in song['genres']:
-                genre_groups[genre].append(song)
-    
-    return dict(genre_groups)
+    return _sections(IndexBibliotheque(song for song in songs if song), 'genre', 'saisie')
 
 def group_songs_by_energy(songs):
     """Grouper les chansons par niveau d'énergie"""
-    energy_groups = defaultdict(list)
-    
-    for song in songs:
-        if song and 'energie' in song:
+    return _sections(IndexBibliotheque(song for song in songs if song), 'energie', 'saisie', SECTIONS_ENERGIE)
+
+def _entree_genre(song):
+    """Entrée d'un morceau dans une page de genre"""
+    return (f"- **{song.get('artiste', 'Artiste inconnu')} - {song.get('titre', 'Titre inconnu')}**\n"
+            f"  - BPM: {song.get('bpm', 'N/A')} | Clé: {song.get('key', 'N/A')} | "
+            f"Énergie: {song.get('energie', 'N/A')}\n"
+            f"  - Fichier: `{song['file_path'].name}`\n\n")
+
+def _entree_energie(song):
+    """Entrée d'un morceau dans une page de niveau d'énergie"""
+    genres = ', '.join(song.get('genres', ['Non classé']))
+    return (f"- **{song.get('artiste', 'Artiste inconnu')} - {song.get('titre', 'Titre inconnu')}**\n"
+            f"  - BPM: {song.get('bpm', 'N/A')} | Genres: {genres}\n"
+            f"  - Fichier: `{song['file_path'].name}`\n\n")
+
+def dossier_pages(output_file):
+    """Dossier des pages d'un set: set_dj_classe.md → set_dj_classe_pages/"""
+    output_file = Path(output_file)
+    return output_file.with_name(f"{output_file.stem}_pages")
+
+def _noms_pages(prefixe, groupe, nb_pages, pris):
+    """Noms des pages d'un groupe (genre_House.md, genre_House_02.md...)
+
+    `pris` (noms de fichier en minuscules, toutes pages comprises) évite que
+    "Pop" et "pop" partagent un fichier sur un système de fichiers insensible
+    à la casse, et que le genre "Pop 02" reprenne la page 2 de "Pop".
+    """
+    base = re.sub(r'[<>:"/\\|?*#%()\[\]\s]+', '_', f"{prefixe}_{groupe}").strip('_')
+    nom, numero = base, 1
+    while True:
+        noms = [f"{nom}.md" if page == 1 else f"{nom}_{page:02d}.md" for page in range(1, nb_pages + 1)]
+        if not any(n.lower() in pris for n in noms):
+            break
+        numero += 1
+        nom = f"{base}~{numero}"
+    pris.update(n.lower() for n in noms)
+    return noms
+
+def _texte_page(titre, total, morceaux, rendre, index_set, noms, numero):
+    """Texte d'une page: titre, navigation puis entrées des morceaux"""
+    pagination = f" - page {numero}/{len(noms)}" if len(noms) > 1 else ""
+    liens = [f"[↑ Index](<../{index_set}>)"]
+    if numero > 1:
+        liens.append(f"[← Page précédente](<{noms[numero - 2]}>)")
+    if numero < len(noms):
+        liens.append(f"[Page suivante →](<{noms[numero]}>)")
+    return "".join([f"# {titre} ({total} morceaux){pagination}\n\n", " · ".join(liens), "\n\n",
+                    *map(rendre, morceaux)])
+
+def _charger_manifeste(dossier):
+    """Empreintes des pages écrites au dernier passage (vide si absent ou illisible)"""
+    try:
+        with open(Path(dossier) / MANIFESTE_SET, 'r', encoding='utf-8') as f:
+            return json.load(f).get('pages', {})
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Manifeste du set illisible, régénération complète: {str(e)}")
+        return {}
+
+class _Pages:
+    """Écriture des pages d'un set: seules les pages dont le contenu a changé sont réécrites
+
+    Une page est rendue depuis une tranche d'un groupe déjà trié; avec le
+    cache `sections` (surveillance), une page dont les morceaux n'ont pas
+    changé n'est même pas rendue à nouveau. Son empreinte est comparée à celle
+    du manifeste: une page identique n'est pas réécrite.
+    """
+
+    def __init__(self, dossier, index_set, taille_page, sections):
+        self.dossier = Path(dossier)
+        self.index_set = index_set
+        self.taille_page = max(1, taille_page)
+        self.precedentes = _charger_manifeste(dossier)
+        self.courantes = {}
+        self.pris = set()
+        # Le cache est reconstruit à chaque appel: les pages disparues en sortent
+        self.sections = sections
+        self.cache = dict(sections) if sections is not None else {}
+        if sections is not None:
+            sections.clear()
+        self.ecrites = 0
+
+    def groupe(self, prefixe, titre, morceaux, rendre):
+        """Écrire les pages d'un groupe; renvoie le nom de sa première page"""
+        taille = self.taille_page
+        noms = _noms_pages(prefixe, titre, max(1, -(-len(morceaux) // taille)), self.pris)
+        for numero, nom in enumerate(noms, 1):
+            tranche = morceaux[(numero - 1) * taille:numero * taille]
+            cle = (len(morceaux), len(noms), tuple(tranche))
+            precedente = self.cache.get(nom)
+            if precedente is None or precedente[0] != cle:
+                compter('sections_rendues')
+                texte = _texte_page(titre, len(morceaux), tranche, rendre, self.index_set, noms, numero)
+                precedente = (cle, texte, hashlib.sha1(texte.encode('utf-8')).hexdigest())
+            if self.sections is not None:
+                self.sections[nom] = precedente
+            _, texte, empreinte = precedente
+            chemin = self.dossier / nom
+            if self.precedentes.get(nom) != empreinte or not chemin.exists():
+                ecrire_atomique(chemin, texte)
+                compter('fichiers_ecrits')
+                self.ecrites += 1
+            self.courantes[nom] = empreinte
+        return noms[0], len(noms)
+
+    def terminer(self):
+        """Supprimer les pages des groupes disparus et écrire le manifeste"""
+        for nom in self.precedentes.keys() - self.courantes.keys():
             try:
-                energy = int(song['energie'])
-                if energy <= 3:
-                    energy_groups['Faible (1-3)'].append(song)
-                elif energy <= 6:
-                    energy_groups['Moyenne (4-6)'].append(song)
-                else:
-                    energy_groups['Élevée (7-10)'].append(song)
-            except ValueError:
-                energy_groups['Non définie'].append(song)
-        else:
-            energy_groups['Non définie'].append(song)
-    
-    return dict(energy_groups)
+                (self.dossier / nom).unlink()
+            except FileNotFoundError:
+                pass
+        ecrire_atomique(self.dossier / MANIFESTE_SET,
+                        json.dumps({'pages': self.courantes}, ensure_ascii=False, indent=2))
+
+def _lien_groupe(dossier, nom, premiere_page, nb_morceaux, nb_pages):
+    """Ligne de l'index vers la première page d'un groupe"""
+    pages = f", {nb_pages} pages" if nb_pages > 1 else ""
+    return f"- [{nom}](<{dossier}/{premiere_page}>) ({nb_morceaux} morceaux{pages})\n"
 
-def generate_set_by_genre(songs, output_file):
-    """Générer le set DJ classé par genre"""
+def _suggestions(songs):
+    """Cinq premiers morceaux d'une suggestion"""
+    return "".join(f"- {song.get('artiste', 'Artiste inconnu')} - {song.get('titre', 'Titre inconnu')}\n"
+                   for song in songs[:5])
+
+def generate_set_by_genre(songs, output_file, index=None, sections=None, taille_page=TAILLE_PAGE):
+    """Générer le set DJ classé par genre
+
+    `output_file` devient l'index du set: totaux, liens vers les pages et
+    suggestions. Chaque genre et chaque niveau d'énergie a ses pages
+    (au plus `taille_page` morceaux) dans le dossier voisin
+    set_dj_classe_pages/, rendues une à une depuis les groupes déjà triés d'un
+    IndexBibliotheque (partageable avec l'étape 5). Seules les pages dont le
+    contenu a changé depuis le dernier passage sont réécrites (manifeste
+    d'empreintes); avec un dictionnaire `sections` conservé d'un appel à
+    l'autre (surveillance), seules ces pages sont rendues à nouveau.
+    """
     try:
-        # Grouper par genre
-        genre_groups = group_songs_by_genre(songs)
+        if index is None:
+            index = IndexBibliotheque(song for song in songs if song)
+        songs = index.morceaux
+
+        # Grouper par genre (BPM puis énergie) et par énergie (genre puis BPM)
+        genre_groups = _sections(index, 'genre', 'canonique')
+        energy_groups = _sections(index, 'energie', 'genre_bpm', SECTIONS_ENERGIE)
+        # Les suggestions reprennent les premiers morceaux dans l'ordre de lecture
+        genre_suggestions = _sections(index, 'genre', 'saisie')
+        energy_suggestions = _sections(index, 'energie', 'saisie', SECTIONS_ENERGIE)
         
-        # Grouper par énergie
-        energy_groups = group_songs_by_energy(songs)
+        output_file = Path(output_file)
+        dossier = dossier_pages(output_file)
+        dossier.mkdir(parents=True, exist_ok=True)
+        pages = _Pages(dossier, output_file.name, taille_page, sections)
         
-        # Créer le dossier de sortie
-        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        parties = [f"# Set DJ Classé - Généré le {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n",
+                   f"Total des morceaux: {len(songs)}\n",
+                   f"Genres identifiés: {len(genre_groups)}\n\n"]
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(f"# Set DJ Classé - Généré le {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write(f"Total des morceaux: {len(songs)}\n")
-            f.write(f"Genres identifiés: {len(genre_groups)}\n\n")
-            
-            # Section par genre
-            f.write("## 🎵 Classification par Genre\n\n")
-            
-            for genre, genre_songs in sorted(genre_groups.items()):
-                f.write(f"### {genre} ({len(genre_songs)} morceaux)\n\n")
-                
-                # Trier par BPM puis par énergie
-                sorted_songs = sorted(genre_songs, key=lambda x: (
-                    int(x.get('bpm', 120)),
-                    int(x.get('energie', 5))
-                ))
-                
-                for song in sorted_songs:
-                    title = song.get('titre', 'Titre inconnu')
-                    artist = song.get('artiste', 'Artiste inconnu')
-                    bpm = song.get('bpm', 'N/A')
-                    key = song.get('key', 'N/A')
-                    energy = song.get('energie', 'N/A')
-                    
-                    f.write(f"- **{artist} - {title}**\n")
-                    f.write(f"  - BPM: {bpm} | Clé: {key} | Énergie: {energy}\n")
-                    f.write(f"  - Fichier: `{song['file_path'].name}`\n\n")
-            
-            f.write("\n" + "="*60 + "\n\n")
-            
-            # Section par énergie
-            f.write("## ⚡ Classification par Niveau d'Énergie\n\n")
-            
-            for energy_level, energy_songs in sorted(energy_groups.items()):
-                f.write(f"### {energy_level} ({len(energy_songs)} morceaux)\n\n")
-                
-                # Trier par genre puis par BPM
-                sorted_songs = sorted(energy_songs, key=lambda x: (
-                    x.get('genres', [''])[0] if x.get('genres') else '',
-                    int(x.get('bpm', 120))
-                ))
-                
-                for song in sorted_songs:
-                    title = song.get('titre', 'Titre inconnu')
-                    artist = song.get('artiste', 'Artiste inconnu')
-                    bpm = song.get('bpm', 'N/A')
-                    genres = ', '.join(song.get('genres', ['Non classé']))
-                    
-                    f.write(f"- **{artist} - {title}**\n")
-                    f.write(f"  - BPM: {bpm} | Genres: {genres}\n")
-                    f.write(f"  - Fichier: `{song['file_path'].name}`\n\n")
-            
-            f.write("\n" + "="*60 + "\n\n")
-            
-            # Suggestions de sets
-            f.write("## 🎛️ Suggestions de Sets DJ\n\n")
-            
-            # Set progression énergétique
-            f.write("### Set Progression Énergétique\n\n")
-            f.write("**Warm-up (Énergie faible):**\n")
-            if 'Faible (1-3)' in energy_groups:
-                for song in energy_groups['Faible (1-3)'][:5]:
-                    f.write(f"- {song.get('artiste', 'Artiste inconnu')} - {song.get('titre', 'Titre inconnu')}\n")
-            f.write("\n")
-            
-            f.write("**Build-up (Énergie moyenne):**\n")
-            if 'Moyenne (4-6)' in energy_groups:
-                for song in energy_groups['Moyenne (4-6)'][:5]:
-                    f.write(f"- {song.get('artiste', 'Artiste inconnu')} - {song.get('titre', 'Titre inconnu')}\n")
-            f.write("\n")
-            
-            f.write("**Peak-time (Énergie élevée):**\n")
-            if 'Élevée (7-10)' in energy_groups:
-                for song in energy_groups['Élevée (7-10)'][:5]:
-                    f.write(f"- {song.get('artiste', 'Artiste inconnu')} - {song.get('titre', 'Titre inconnu')}\n")
-            f.write("\n")
-            
-            # Sets par genre
-            f.write("### Sets par Genre\n\n")
-            for genre, genre_songs in sorted(genre_groups.items()):
-                if len(genre_songs) >= 3:
-                    f.write(f"**Set {genre}:**\n")
-                    for song in genre_songs[:5]:
-                        f.write(f"- {song.get('artiste', 'Artiste inconnu')} - {song.get('titre', 'Titre inconnu')}\n")
-                    f.write("\n")
+        # Pages par genre
+        parties.append("## 🎵 Classification par Genre\n\n")
+        for genre, genre_songs in sorted(genre_groups.items()):
+            premiere, nb_pages = pages.groupe('genre', genre, genre_songs, _entree_genre)
+            parties.append(_lien_groupe(dossier.name, genre, premiere, len(genre_songs), nb_pages))
+        
+        parties.append("\n" + "="*60 + "\n\n")
+        
+        # Pages par énergie
+        parties.append("## ⚡ Classification par Niveau d'Énergie\n\n")
+        for energy_level, energy_songs in sorted(energy_groups.items()):
+            premiere, nb_pages = pages.groupe('energie', energy_level, energy_songs, _entree_energie)
+            parties.append(_lien_groupe(dossier.name, energy_level, premiere, len(energy_songs), nb_pages))
+        
+        parties.append("\n" + "="*60 + "\n\n")
+        
+        # Suggestions de sets
+        parties.append("## 🎛️ Suggestions de Sets DJ\n\n")
+        
+        # Set progression énergétique
+        parties.append("### Set Progression Énergétique\n\n")
+        for titre, niveau in (("Warm-up (Énergie faible)", 'Faible (1-3)'),
+                              ("Build-up (Énergie moyenne)", 'Moyenne (4-6)'),
+                              ("Peak-time (Énergie élevée)", 'Élevée (7-10)')):
+            parties.append(f"**{titre}:**\n")
+            if niveau in energy_suggestions:
+                parties.append(_suggestions(energy_suggestions[niveau]))
+            parties.append("\n")
+        
+        # Sets par genre
+        parties.append("### Sets par Genre\n\n")
+        for genre, genre_songs in sorted(genre_suggestions.items()):
+            if len(genre_songs) >= 3:
+                parties.append(f"**Set {genre}:**\n")
+                parties.append(_suggestions(genre_songs))
+                parties.append("\n")
+        
+        # L'index est remplacé après ses pages: un lecteur (ou la surveillance)
+        # ne suit jamais un lien vers une page pas encore écrite
+        pages.terminer()
+        ecrire_atomique(output_file, "".join(parties))
+        compter('fichiers_ecrits')
         
         return len(songs), len(genre_groups)
         
@@ -218,27 +334,33 @@ def main():
     
     try:
         # Scanner les fichiers de chansons
-        song_files = scan_songs_directory()
-        print(f"📁 Fichiers trouvés: {len(song_files)}")
-        
-        if not song_files:
-            raise Exception("Aucun fichier de chanson trouvé dans data/output/chansons/")
-        
-        # Parser les fichiers
-        songs = []
-        for file_path in song_files:
-            song = parse_song_file(file_path)
-            if song:
-                songs.append(song)
-        
-        print(f"🎵 Chansons analysées: {len(songs)}")
-        
-        # Générer le set
-        output_file = "data/output/set_dj_classe.md"
-        total_songs, total_genres = generate_set_by_genre(songs, output_file)
+        with span("etape3"):
+            # Dossier de fiches, ou pack data/output/chansons.pack s'il n'y a pas de dossier
+            with span("scan"):
+                song_files = stockage_compact.ouvrir_fiches()
+            print(f"📁 Fichiers trouvés: {len(song_files)}")
+            
+            if not len(song_files):
+                raise Exception("Aucun fichier de chanson trouvé dans data/output/chansons/")
+            
+            # Parser les fichiers
+            with span("parsing"), song_files:
+                songs = []
+                for file_path, content in song_files:
+                    song = parse_song_content(content, file_path)
+                    if song:
+                        songs.append(song)
+            
+            print(f"🎵 Chansons analysées: {len(songs)}")
+            
+            # Générer le set
+            output_file = "data/output/set_dj_classe.md"
+            with span("generation"):
+                total_songs, total_genres = generate_set_by_genre(songs, output_file)
         
         print(f"✅ Génération terminée avec succès!")
         print(f"📁 Fichier de sortie: {output_file}")
+        print(f"📄 Pages par genre et par énergie: {dossier_pages(output_file)}")
         print(f"🎵 Morceaux traités: {total_songs}")
         print(f"🎶 Genres identifiés: {total_genres}")
         
@@ -9,6 +9,47 @@ import os
 import sys
 import subprocess
 from pathlib import Path
+from datetime import datetime
+
+from gabarit import charger_gabarit_chanson
+from lecteurs_entree import parse_song_line
+from outils_fichiers import ecrire_atomique
+
+def _valeurs_console(songs):
+    """Valeurs du gabarit pour les morceaux lus, marqués "console" """
+    for song in songs:
+        yield dict(song, genre_list=song['genre'], tags_list=['console'])
+
+def generer_markdown_console(input_file="data/input/exemple_chansons.txt", output_file="data/output/morceaux.md"):
+    """Étape 1 sans interface graphique (l'étape 1 ouvre un sélecteur de fichier Tk)"""
+    try:
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        gabarit = charger_gabarit_chanson()
+        
+        with open(input_file, 'r', encoding='utf-8') as f:
+            songs = [song for song in map(parse_song_line, f) if song]
+        
+        markdown_content = gabarit.rendre_plusieurs(
+            _valeurs_console(songs), separateur="\n\n" + "="*50 + "\n\n",
+            notes_personnelles=["Mode console..."],
+            idees_mix=["À définir..."],
+            liens=["À ajouter..."],
+            notes_personnelles_detaillees="Généré en mode console",
+            idees_mix_detaillees="À définir selon vos expériences de mix..."
+        ).getvalue()
+        
+        ecrire_atomique(output_file,
+                        f"# Morceaux DJ - Généré le {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+                        f"Total des morceaux traités: {len(songs)}\n\n"
+                        + "="*50 + "\n\n"
+                        + markdown_content)
+        
+        print(f"✅ Génération terminée avec succès!")
+        print(f"📁 Fichier de sortie: {output_file}")
+        print(f"🎵 Morceaux traités: {len(songs)}")
+        
+    except Exception as e:
+        print(f"❌ Erreur: {str(e)}")
 
 def run_script(script_name, step_name):
     """Exécuter un script Python en mode console"""
@@ -92,111 +133,7 @@ def main():
         if choice == "1":
             # Utiliser le fichier d'exemple par défaut
             print("\n📁 Utilisation du fichier d'exemple: data/input/exemple_chansons.txt")
-            # Créer un script temporaire qui utilise le fichier d'exemple
-            temp_script = """
-import sys
-sys.path.append('.')
-from pathlib import Path
-from datetime import datetime
-
-# Utiliser directement le fichier d'exemple
-input_file = "data/input/exemple_chansons.txt"
-output_file = "data/output/morceaux.md"
-
-# Importer les fonctions nécessaires
-def parse_song_line(line):
-    line = line.strip()
-    if not line or line.startswith('#'):
-        return None
-    
-    if ' - ' in line:
-        parts = line.split(' - ', 1)
-        artiste = parts[0].strip()
-        titre = parts[1].strip()
-    elif ' par ' in line:
-        parts = line.split(' par ', 1)
-        titre = parts[0].strip()
-        artiste = parts[1].strip()
-    else:
-        titre = line
-        artiste = "Artiste Inconnu"
-    
-    return {
-        'titre': titre,
-        'artiste': artiste,
-        'bpm': 120,
-        'key': 'A',
-        'genre': ['Pop'],
-        'energie': 5,
-        'date_ajout': datetime.now().strftime('%Y-%m-%d'),
-        'tags': ['console'],
-        'filename': f"{artiste} - {titre}".replace('/', '_').replace('\\\\', '_')
-    }
-
-# Exécuter la génération
-try:
-    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
-    
-    with open("templates/chanson_template.md", 'r', encoding='utf-8') as f:
-        template = f.read()
-    
-    with open(input_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    markdown_content = ""
-    processed_songs = 0
-    
-    for line in lines:
-        song = parse_song_line(line)
-        if song:
-            genre_list = '\\n'.join([f"  - {g}" for g in song['genre']])
-            tags_list = '\\n'.join([f"  - {t}" for t in song['tags']])
-            
-            song_md = template.format(
-                titre=song['titre'],
-                artiste=song['artiste'],
-                bpm=song['bpm'],
-                key=song['key'],
-                genre_list=genre_list,
-                energie=song['energie'],
-                date_ajout=song['date_ajout'],
-                tags_list=tags_list,
-                filename=song['filename'],
-                notes_personnelles="  - Mode console...",
-                idees_mix="  - À définir...",
-                liens="  - À ajouter...",
-                notes_personnelles_detaillees="Généré en mode console",
-                idees_mix_detaillees="À définir selon vos expériences de mix..."
-            )
-            
-            markdown_content += song_md + "\\n\\n" + "="*50 + "\\n\\n"
-            processed_songs += 1
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(f"# Morceaux DJ - Généré le {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\\n\\n")
-        f.write(f"Total des morceaux traités: {processed_songs}\\n\\n")
-        f.write("="*50 + "\\n\\n")
-        f.write(markdown_content)
-    
-    print(f"✅ Génération terminée avec succès!")
-    print(f"📁 Fichier de sortie: {output_file}")
-    print(f"🎵 Morceaux traités: {processed_songs}")
-    
-except Exception as e:
-    print(f"❌ Erreur: {str(e)}")
-"""
-            
-            # Écrire et exécuter le script temporaire
-            with open("/tmp/temp_step1.py", "w") as f:
-                f.write(temp_script)
-            
-            result = subprocess.run([sys.executable, "/tmp/temp_step1.py"], 
-                                  capture_output=True, text=True)
-            
-            if result.stdout:
-                print(result.stdout)
-            if result.stderr:
-                print(result.stderr)
+            generer_markdown_console()
             
         elif choice == "2":
             run_script("2_extraire_chansons_en_fichiers.py", "Extraction des fiches")
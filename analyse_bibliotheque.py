@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Analyse de la bibliothèque
+Charger les fiches dans des DataFrames pandas (colonnes catégorielles), les
+mettre en cache dans un format colonnaire compact et calculer les statistiques
+des playlists et du set par agrégations groupby
+
+Tables:
+  morceaux: une ligne par fiche (titre, artiste, bpm, key, energie, date_ajout, fichier_mp3)
+  genres:   une ligne par (morceau, genre)
+  tags:     une ligne par (morceau, tag)
+
+Cache: Feather (pyarrow) si disponible, sinon pickle compressé.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import pyarrow  # noqa: F401 (moteur Feather de pandas)
+    FORMAT_CACHE = 'feather'
+except ImportError:
+    FORMAT_CACHE = 'pickle'
+
+from instrumentation import span, compter
+from outils_fichiers import ecrire_atomique
+from genere_playlists1 import scan_songs_directory, parse_song_file
+from disposition_fiches import parcourir_fiches
+
+DOSSIER_CHANSONS = "data/output/chansons"
+DOSSIER_CACHE = "data/output/analyse"
+RAPPORT_PAR_DEFAUT = "data/output/analyse_bibliotheque.md"
+TABLES = ('morceaux', 'genres', 'tags')
+
+# Mêmes seuils que les playlists par énergie (genere_playlists1): <= 3, <= 6, au-delà
+SEUILS_ENERGIE = (3, 6)
+NOMS_NIVEAUX_ENERGIE = ['Low_Energy', 'Medium_Energy', 'High_Energy']
+
+
+def _verifier_pandas():
+    if pd is None:
+        raise Exception("pandas n'est pas installé. Installez-le avec: pip install pandas")
+
+
+def charger_dataframes(songs):
+    """Convertir les fiches parsées en tables pandas
+
+    Genre, clé et tags sont catégoriels: chaque valeur distincte n'est stockée
+    qu'une fois, les lignes ne portent qu'un code entier.
+    """
+    _verifier_pandas()
+    colonnes = {c: [] for c in ('titre', 'artiste', 'bpm', 'key', 'energie', 'date_ajout', 'fichier_mp3')}
+    genres_morceau, genres = [], []
+    tags_morceau, tags = [], []
+    for i, song in enumerate(songs):
+        colonnes['titre'].append(song.get('titre', 'Titre inconnu'))
+        colonnes['artiste'].append(song.get('artiste', 'Artiste inconnu'))
+        colonnes['bpm'].append(song.get('bpm', 120))
+        colonnes['key'].append(song.get('key', 'A'))
+        colonnes['energie'].append(song.get('energie', 5))
+        colonnes['date_ajout'].append(song.get('date_ajout'))
+        colonnes['fichier_mp3'].append(song.get('fichier_mp3', ''))
+        for genre in song.get('genres', ['Non classé']):
+            genres_morceau.append(i)
+            genres.append(genre)
+        for tag in song.get('tags', []):
+            tags_morceau.append(i)
+            tags.append(tag)
+
+    morceaux = pd.DataFrame({
+        'titre': pd.Series(colonnes['titre'], dtype='string'),
+        'artiste': pd.Series(colonnes['artiste'], dtype='category'),
+        'bpm': pd.to_numeric(pd.Series(colonnes['bpm']), errors='coerce').fillna(120).astype('int16'),
+        'key': pd.Series(colonnes['key'], dtype='category'),
+        'energie': pd.to_numeric(pd.Series(colonnes['energie']), errors='coerce').fillna(5).astype('int8'),
+        'date_ajout': pd.to_datetime(pd.Series(colonnes['date_ajout']), errors='coerce', format='%Y-%m-%d'),
+        'fichier_mp3': pd.Series(colonnes['fichier_mp3'], dtype='string'),
+    })
+    compter('lignes', len(morceaux))
+    return {
+        'morceaux': morceaux,
+        'genres': pd.DataFrame({'morceau': pd.Series(genres_morceau, dtype='int32'),
+                                'genre': pd.Series(genres, dtype='category')}),
+        'tags': pd.DataFrame({'morceau': pd.Series(tags_morceau, dtype='int32'),
+                              'tag': pd.Series(tags, dtype='category')}),
+    }
+
+
+def signature_dossier(songs_dir):
+    """Nombre de fiches, date de modification la plus récente et empreinte (invalidation du cache)
+
+    L'empreinte porte sur (chemin, date, taille) de chaque fiche: une fiche
+    renommée ou remplacée par une autre plus ancienne invalide aussi le cache.
+    """
+    nombre, derniere = 0, 0
+    fiches = []
+    for entree in parcourir_fiches(songs_dir):
+        etat = entree.stat()
+        nombre += 1
+        derniere = max(derniere, etat.st_mtime_ns)
+        fiches.append(f"{os.path.relpath(entree.path, songs_dir)}\0{etat.st_mtime_ns}\0{etat.st_size}")
+    fiches.sort()
+    empreinte = hashlib.sha1("\n".join(fiches).encode('utf-8', 'surrogateescape')).hexdigest()
+    return {'fiches': nombre, 'mtime_ns': derniere, 'empreinte': empreinte}
+
+
+def _chemin_table(cache_dir, table, format_cache):
+    extension = 'feather' if format_cache == 'feather' else 'pkl.gz'
+    return Path(cache_dir) / f"{table}.{extension}"
+
+
+def sauver_cache(tables, cache_dir=DOSSIER_CACHE, signature=None, format_cache=None):
+    """Écrire les tables en Feather compressé (zstd), ou en pickle gzip sans pyarrow"""
+    _verifier_pandas()
+    format_cache = format_cache or FORMAT_CACHE
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for table in TABLES:
+        chemin = _chemin_table(cache_dir, table, format_cache)
+        if format_cache == 'feather':
+            tables[table].to_feather(chemin, compression='zstd')
+        else:
+            tables[table].to_pickle(chemin, compression='gzip')
+        compter('fichiers_ecrits')
+    ecrire_atomique(cache_dir / "signature.json",
+                    json.dumps({'format': format_cache, **(signature or {})}, indent=2))
+
+
+def charger_cache(cache_dir=DOSSIER_CACHE, signature=None):
+    """Relire les tables du cache, ou None si absent ou périmé"""
+    _verifier_pandas()
+    cache_dir = Path(cache_dir)
+    try:
+        with open(cache_dir / "signature.json", 'r', encoding='utf-8') as f:
+            enregistree = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    format_cache = enregistree.pop('format', 'pickle')
+    if signature is not None and enregistree != signature:
+        return None
+    if format_cache == 'feather' and FORMAT_CACHE != 'feather':
+        return None
+    try:
+        if format_cache == 'feather':
+            return {t: pd.read_feather(_chemin_table(cache_dir, t, format_cache)) for t in TABLES}
+        return {t: pd.read_pickle(_chemin_table(cache_dir, t, format_cache), compression='gzip') for t in TABLES}
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Cache d'analyse illisible, reconstruction: {str(e)}")
+        return None
+
+
+def charger_bibliotheque(songs_dir=DOSSIER_CHANSONS, cache_dir=DOSSIER_CACHE, forcer=False):
+    """Tables de la bibliothèque: depuis le cache s'il est à jour, sinon depuis les fiches"""
+    _verifier_pandas()
+    if not Path(songs_dir).exists():
+        raise FileNotFoundError(f"Dossier des chansons non trouvé: {songs_dir}")
+    signature = signature_dossier(songs_dir)
+    if not forcer:
+        tables = charger_cache(cache_dir, signature)
+        if tables is not None:
+            return tables, True
+    songs = [s for s in map(parse_song_file, scan_songs_directory(songs_dir)) if s]
+    tables = charger_dataframes(songs)
+    sauver_cache(tables, cache_dir, signature)
+    return tables, False
+
+
+def _agreger(groupes):
+    """Nombre de morceaux, BPM et énergie (moyenne/min/max) par groupe"""
+    stats = groupes.agg(
+        morceaux=('bpm', 'size'),
+        bpm_moyen=('bpm', 'mean'), bpm_min=('bpm', 'min'), bpm_max=('bpm', 'max'),
+        energie_moyenne=('energie', 'mean'), energie_min=('energie', 'min'), energie_max=('energie', 'max'),
+    )
+    return stats[stats['morceaux'] > 0]
+
+
+def statistiques_genres(tables):
+    """Statistiques de chaque playlist par genre (un morceau compte dans chacun de ses genres)"""
+    morceaux = tables['morceaux']
+    paires = tables['genres']
+    # Jointure par indexation des tableaux: le numéro de morceau est sa position
+    positions = paires['morceau'].to_numpy()
+    lignes = pd.DataFrame({
+        'genre': paires['genre'],
+        'bpm': morceaux['bpm'].to_numpy()[positions],
+        'energie': morceaux['energie'].to_numpy()[positions],
+    })
+    return _agreger(lignes.groupby('genre', observed=True)).sort_index()
+
+
+def statistiques_energie(tables):
+    """Statistiques des playlists par niveau d'énergie"""
+    morceaux = tables['morceaux']
+    energie = morceaux['energie'].to_numpy()
+    bas, moyen = SEUILS_ENERGIE
+    codes = (energie > bas).astype('int8') + (energie > moyen)
+    niveaux = pd.Categorical.from_codes(codes, categories=NOMS_NIVEAUX_ENERGIE)
+    return _agreger(morceaux.groupby(niveaux, observed=True))
+
+
+def repartition_genres(tables):
+    """Nombre de morceaux par (playlist de genre, genre): la section "Genres" du Markdown"""
+    paires = tables['genres']
+    return paires.merge(paires, on='morceau', suffixes=('_playlist', '')).groupby(
+        ['genre_playlist', 'genre'], observed=True).size()
+
+
+def statistiques_bibliotheque(tables):
+    """Vue d'ensemble du set: totaux, clés et tags les plus fréquents"""
+    morceaux = tables['morceaux']
+    return {
+        'morceaux': len(morceaux),
+        'artistes': morceaux['artiste'].nunique(),
+        'genres': tables['genres']['genre'].nunique(),
+        'bpm_moyen': round(float(morceaux['bpm'].mean()), 1) if len(morceaux) else 0,
+        'energie_moyenne': round(float(morceaux['energie'].mean()), 1) if len(morceaux) else 0,
+        'cles': morceaux['key'].value_counts().head(12),
+        'tags': tables['tags']['tag'].value_counts().head(20),
+    }
+
+
+def _tableau(stats, titre_groupe):
+    """Tableau Markdown des statistiques par groupe"""
+    lignes = [f"| {titre_groupe} | Morceaux | BPM moy. | BPM min-max | Énergie moy. | Énergie min-max |\n",
+              "|---|---:|---:|---:|---:|---:|\n"]
+    for ligne in stats.itertuples():
+        lignes.append(f"| {ligne.Index} | {ligne.morceaux} | {ligne.bpm_moyen:.1f} | "
+                      f"{ligne.bpm_min}-{ligne.bpm_max} | {ligne.energie_moyenne:.1f} | "
+                      f"{ligne.energie_min}-{ligne.energie_max} |\n")
+    return "".join(lignes)
+
+
+def generer_rapport(tables, output_file=RAPPORT_PAR_DEFAUT):
+    """Écrire le rapport Markdown de la bibliothèque"""
+    try:
+        resume = statistiques_bibliotheque(tables)
+        parties = [
+            "# 📊 Analyse de la Bibliothèque\n\n",
+            f"- **Morceaux:** {resume['morceaux']}\n",
+            f"- **Artistes:** {resume['artistes']}\n",
+            f"- **Genres:** {resume['genres']}\n",
+            f"- **BPM moyen:** {resume['bpm_moyen']}\n",
+            f"- **Énergie moyenne:** {resume['energie_moyenne']}/10\n\n",
+            "## 🎼 Playlists par Genre\n\n", _tableau(statistiques_genres(tables), "Genre"), "\n",
+            "## ⚡ Playlists par Énergie\n\n", _tableau(statistiques_energie(tables), "Niveau"), "\n",
+            "## 🔑 Clés les plus fréquentes\n\n",
+        ]
+        parties.extend(f"- {cle}: {nombre}\n" for cle, nombre in resume['cles'].items())
+        parties.append("\n## 🏷️ Tags les plus fréquents\n\n")
+        parties.extend(f"- {tag}: {nombre}\n" for tag, nombre in resume['tags'].items())
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        ecrire_atomique(output_file, "".join(parties))
+        compter('fichiers_ecrits')
+        return output_file
+    except Exception as e:
+        raise Exception(f"Erreur lors de la génération du rapport d'analyse: {str(e)}")
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Analyser la bibliothèque avec pandas")
+    parser.add_argument('--chansons', default=DOSSIER_CHANSONS, help="Dossier des fiches")
+    parser.add_argument('--cache', default=DOSSIER_CACHE, help="Dossier du cache colonnaire")
+    parser.add_argument('--sortie', default=RAPPORT_PAR_DEFAUT, help="Rapport Markdown")
+    parser.add_argument('--forcer', action='store_true', help="Relire les fiches même si le cache est à jour")
+    args = parser.parse_args()
+
+    print("📊 Assistant DJ - Analyse de la bibliothèque")
+    print("="*50)
+
+    try:
+        with span("analyse_bibliotheque"):
+            with span("chargement"):
+                tables, depuis_cache = charger_bibliotheque(args.chansons, args.cache, args.forcer)
+            source = f"cache {FORMAT_CACHE}" if depuis_cache else "fiches"
+            print(f"📁 {len(tables['morceaux'])} morceaux chargés ({source})")
+            with span("rapport"):
+                rapport = generer_rapport(tables, args.sortie)
+        print(f"✅ Rapport généré: {rapport}")
+        return 0
+
+    except Exception as e:
+        print(f"❌ Erreur: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
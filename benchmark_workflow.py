@@ -0,0 +1,1259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Benchmark du workflow
+Mesurer la durée, le débit et la mémoire de chaque étape sur des bibliothèques synthétiques
+"""
+
+import io
+import os
+import sys
+import json
+import queue
+import hashlib
+import time
+import shutil
+import argparse
+import csv
+import platform
+import tempfile
+import importlib
+import itertools
+import contextlib
+import multiprocessing
+from pathlib import Path
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import bibliotheque_synthetique as synth
+
+REPERTOIRE_PROJET = Path(__file__).resolve().parent
+BASELINE_PAR_DEFAUT = "benchmarks/baseline.json"
+RESULTATS_PAR_DEFAUT = "benchmarks/resultats.json"
+ECHELLES_PAR_DEFAUT = ["1k", "10k"]
+TOLERANCE_PAR_DEFAUT = 0.20
+# En dessous de cet écart absolu, les variations sont du bruit de mesure
+ECART_MINIMAL_S = 0.05
+# Secondes entre deux vérifications que le processus de mesure est encore en vie
+ATTENTE_RESULTAT_S = 1.0
+
+
+def _module(nom):
+    """Importer un script d'étape (les noms commencent par un chiffre)"""
+    return importlib.import_module(nom)
+
+
+def _rss_max_mo():
+    """Pic de mémoire résidente du processus courant, en Mo"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: kilo-octets, macOS: octets
+    if sys.platform == 'darwin':
+        return round(rss / (1024 * 1024), 1)
+    return round(rss / 1024, 1)
+
+
+def _charger_bibliotheque(dossier_fiches):
+    """Scanner et parser les fiches (non chronométré)"""
+    step3 = _module("4_generer_set_classe_depuis_fiches")
+    return [s for s in map(step3.parse_song_file, step3.scan_songs_directory(dossier_fiches)) if s]
+
+
+def etape_liste_markdown(espace):
+    """Étape 1 : liste texte → morceaux.md"""
+    step1 = _module("1_generer_markdown_depuis_liste")
+    debut = time.perf_counter()
+    total = step1.generate_markdown_from_list(espace / "liste_chansons.txt", espace / "morceaux.md")
+    return time.perf_counter() - debut, total
+
+
+def etape_extraction(espace):
+    """Étape 2 : morceaux.md → fiches individuelles"""
+    step2 = _module("2_extraire_chansons_en_fichiers")
+    source = espace / "morceaux.md"
+    if not source.exists():
+        _module("1_generer_markdown_depuis_liste").generate_markdown_from_list(
+            espace / "liste_chansons.txt", source)
+    dossier = espace / "chansons_extraites"
+    shutil.rmtree(dossier, ignore_errors=True)
+    debut = time.perf_counter()
+    fichiers = step2.split_markdown_file(source, dossier)
+    return time.perf_counter() - debut, len(fichiers)
+
+
+def etape_parsing(espace):
+    """Scan + parsing des fiches"""
+    step3 = _module("4_generer_set_classe_depuis_fiches")
+    debut = time.perf_counter()
+    songs = [s for s in map(step3.parse_song_file, step3.scan_songs_directory(espace / "chansons")) if s]
+    return time.perf_counter() - debut, len(songs)
+
+
+def etape_set(espace):
+    """Étape 3 : génération du set classé"""
+    step3 = _module("4_generer_set_classe_depuis_fiches")
+    songs = _charger_bibliotheque(espace / "chansons")
+    debut = time.perf_counter()
+    total, _ = step3.generate_set_by_genre(songs, espace / "set_dj_classe.md")
+    return time.perf_counter() - debut, total
+
+
+def etape_playlists(espace):
+    """Étape 5 : génération des playlists"""
+    step5 = _module("genere_playlists1")
+    songs = _charger_bibliotheque(espace / "chansons")
+    output_dir = espace / "playlists"
+    shutil.rmtree(output_dir, ignore_errors=True)
+    output_dir.mkdir(parents=True)
+    debut = time.perf_counter()
+    lignes = step5.preparer_lignes(songs)
+    step5.create_playlists_by_genre(songs, output_dir, lignes)
+    step5.create_playlists_by_energy(songs, output_dir, lignes)
+    all_songs = sorted(lignes, key=lambda x: (x.artiste, x.titre))
+    step5.write_playlist(all_songs, "Playlist_Complete", output_dir)
+    return time.perf_counter() - debut, len(songs)
+
+
+# Étapes mesurées, dans l'ordre du workflow
+ETAPES = {
+    'liste_markdown': etape_liste_markdown,
+    'extraction': etape_extraction,
+    'parsing': etape_parsing,
+    'set': etape_set,
+    'playlists': etape_playlists,
+}
+
+
+def cas_rendu_playlists(espace, nb_morceaux, nb_playlists=200, graine=42):
+    """Rendu de nb_playlists playlists partageant les mêmes morceaux
+
+    Compare le rendu par format (chaque format re-normalise les morceaux)
+    au rendu depuis les lignes pré-sérialisées partagées.
+    """
+    import random
+    step5 = _module("genere_playlists1")
+    songs = synth.morceaux_comme_fiches(synth.generer_morceaux(nb_morceaux, graine))
+
+    # Chaque morceau apparaît en moyenne dans 5 playlists
+    rng = random.Random(graine)
+    taille = max(2, nb_morceaux * 5 // nb_playlists)
+    playlists = [sorted(rng.sample(range(nb_morceaux), min(taille, nb_morceaux)))
+                 for _ in range(nb_playlists)]
+
+    dossier_formats = espace / "rendu_par_format"
+    dossier_lignes = espace / "rendu_partage"
+    dossier_formats.mkdir(parents=True, exist_ok=True)
+    dossier_lignes.mkdir(parents=True, exist_ok=True)
+
+    debut = time.perf_counter()
+    for i, positions in enumerate(playlists):
+        membres = [songs[p] for p in positions]
+        step5.generate_m3u_playlist(membres, f"Playlist_{i:03d}", dossier_formats)
+        step5.generate_json_playlist(membres, f"Playlist_{i:03d}", dossier_formats)
+        step5.generate_markdown_playlist(membres, f"Playlist_{i:03d}", dossier_formats)
+    duree_par_format = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    lignes = step5.preparer_lignes(songs)
+    for i, positions in enumerate(playlists):
+        step5.write_playlist([lignes[p] for p in positions], f"Playlist_{i:03d}", dossier_lignes)
+    duree = time.perf_counter() - debut
+
+    return duree, sum(len(p) for p in playlists), {
+        'playlists': nb_playlists,
+        'duree_par_format_s': round(duree_par_format, 4),
+        'acceleration': round(duree_par_format / duree, 2) if duree else None,
+    }
+
+
+def cas_dedoublonnage(espace, nb_morceaux, graine=42):
+    """Détection des doublons sur nb_morceaux fiches (ex: --echelles 100k)
+
+    Une partie des morceaux reçoit une variante de titre ("(Official Video)",
+    casse, accents) pour exercer les quasi-doublons en plus des copies exactes.
+    """
+    import random
+    dedoublonnage = _module("dedoublonnage")
+    morceaux = synth.generer_morceaux(nb_morceaux, graine)
+    rng = random.Random(graine)
+    variantes = [" (Official Video)", " - Remastered 2011", " [HD]"]
+    for morceau in morceaux:
+        if rng.random() < 0.03:
+            morceau['titre'] = morceau['titre'].upper() + rng.choice(variantes)
+
+    statistiques = {}
+    debut = time.perf_counter()
+    dedoublonnage.trouver_doublons(morceaux, statistiques=statistiques)
+    duree = time.perf_counter() - debut
+
+    statistiques['paires_naives'] = nb_morceaux * (nb_morceaux - 1) // 2
+    return duree, nb_morceaux, statistiques
+
+
+def _genre_premier_trouve(title, description, genre_keywords):
+    """Ancien guess_genre_from_title: description mise en minuscules, un test par mot-clé"""
+    content = (title + " " + description).lower()
+    for genre, keywords in genre_keywords.items():
+        if any(keyword in content for keyword in keywords):
+            return genre
+    return 'Pop'
+
+
+def cas_classification_youtube(espace, nb_morceaux, graine=42):
+    """Parsing des titres et classification des genres de nb_morceaux vidéos
+
+    Mesure le parseur compilé et le classifieur en un passage (genres pondérés).
+    Pour comparaison: l'ancien guess_genre_from_title ("premier genre trouvé",
+    qui s'arrête au premier mot-clé) et le nouveau, sur toutes les vidéos puis
+    sur celles où aucun mot-clé Disco, premier genre testé, ne permet à
+    l'ancien de s'arrêter tôt.
+    """
+    youtube = _module("extraire_fiches_depuis_youtube1")
+    videos = synth.generer_videos(nb_morceaux, graine)
+    premier_genre = next(iter(youtube.GENRE_KEYWORDS))
+
+    def chronometrer(fonction, lot):
+        debut = time.perf_counter()
+        for video in lot:
+            fonction(video['title'], video['description'])
+        return time.perf_counter() - debut
+
+    def ancien(title, description):
+        return _genre_premier_trouve(title, description, youtube.GENRE_KEYWORDS)
+
+    tardives = [video for video in videos if ancien(video['title'], video['description']) != premier_genre]
+    duree_ancienne = chronometrer(ancien, videos)
+    duree_guess = chronometrer(youtube.guess_genre_from_title, videos)
+    duree_ancienne_tardives = chronometrer(ancien, tardives)
+    duree_guess_tardives = chronometrer(youtube.guess_genre_from_title, tardives)
+
+    multi_genres = 0
+    debut = time.perf_counter()
+    for video in videos:
+        youtube.parse_title_for_song_info(video['title'])
+        if len(youtube.classify_genres(video['title'], video['description'])) > 1:
+            multi_genres += 1
+    duree = time.perf_counter() - debut
+
+    return duree, nb_morceaux, {
+        'octets_descriptions': sum(len(v['description']) for v in videos),
+        'duree_guess_ancien_s': round(duree_ancienne, 4),
+        'duree_guess_s': round(duree_guess, 4),
+        'videos_sans_arret_tot': len(tardives),
+        'duree_guess_ancien_sans_arret_tot_s': round(duree_ancienne_tardives, 4),
+        'duree_guess_sans_arret_tot_s': round(duree_guess_tardives, 4),
+        'videos_multi_genres': multi_genres,
+    }
+
+
+def cas_export_dj(espace, nb_morceaux, graine=42, taille_lot=1000):
+    """Export Rekordbox et Traktor de nb_morceaux morceaux et 50 playlists
+
+    Les fiches sont générées par lots et consommées au fil de l'eau: le pic
+    de mémoire (RSS) ne grandit qu'avec l'ensemble des emplacements déjà vus,
+    pas avec le XML produit. La génération des lots est incluse dans la durée.
+    """
+    export_dj = _module("export_dj")
+
+    def morceaux():
+        for debut in range(0, nb_morceaux, taille_lot):
+            lot = synth.generer_morceaux(min(taille_lot, nb_morceaux - debut), graine + debut, 0)
+            yield from synth.morceaux_comme_fiches(lot)
+
+    # 50 playlists M3U d'un dixième de la bibliothèque chacune (préparation non chronométrée)
+    import random
+    rng = random.Random(graine)
+    dossier_playlists = espace / "playlists_export"
+    dossier_playlists.mkdir(parents=True, exist_ok=True)
+    fichiers_m3u = [open(dossier_playlists / f"Playlist_{numero:02d}.m3u", 'w', encoding='utf-8')
+                    for numero in range(50)]
+    for fiche in morceaux():
+        for f in rng.sample(fichiers_m3u, 5):
+            f.write(fiche['fichier_mp3'] + "\n")
+    for f in fichiers_m3u:
+        f.close()
+
+    debut = time.perf_counter()
+    total, _ = export_dj.exporter_rekordbox(
+        morceaux(), export_dj.playlists_generees(dossier_playlists), espace / "rekordbox.xml", espace)
+    duree_rekordbox = time.perf_counter() - debut
+    export_dj.exporter_traktor(
+        morceaux(), export_dj.playlists_generees(dossier_playlists), espace / "collection.nml", espace)
+    duree = time.perf_counter() - debut
+
+    return duree, total, {
+        'duree_rekordbox_s': round(duree_rekordbox, 4),
+        'taille_rekordbox_mo': round((espace / "rekordbox.xml").stat().st_size / (1024 * 1024), 1),
+        'taille_traktor_mo': round((espace / "collection.nml").stat().st_size / (1024 * 1024), 1),
+    }
+
+
+def cas_import_mp3(espace, nb_morceaux, graine=42):
+    """Import des tags de nb_morceaux fichiers MP3 (à froid, puis relance à chaud)
+
+    Le temps CPU du premier import est séparé en temps utilisateur (parsing
+    des tags, rendu des fiches) et temps système (ouvertures, créations de
+    fichiers): l'import est limité par les E/S quand le second domine. La relance ne
+    doit presque rien relire grâce au cache des dates de modification.
+    Sans mutagen, seul le parcours du dossier est mesuré.
+    """
+    importer_mp3 = _module("importer_mp3")
+    dossier_mp3 = espace / "mp3"
+    dossier_fiches = espace / "chansons_mp3"
+    cache = espace / "import_mp3_cache.json"
+    synth.ecrire_dossier_mp3(synth.generer_morceaux(nb_morceaux, graine, 0), dossier_mp3)
+
+    if importer_mp3.mutagen is None:
+        debut = time.perf_counter()
+        nb_fichiers = sum(1 for _ in importer_mp3.scanner_audio(dossier_mp3))
+        return time.perf_counter() - debut, nb_fichiers, {'mutagen': 'absent (parcours seul)'}
+
+    debut, temps = time.perf_counter(), os.times()
+    stats = importer_mp3.importer_dossier(dossier_mp3, dossier_fiches, cache)
+    duree, fin = time.perf_counter() - debut, os.times()
+
+    debut = time.perf_counter()
+    relance = importer_mp3.importer_dossier(dossier_mp3, dossier_fiches, cache)
+    duree_relance = time.perf_counter() - debut
+
+    return duree, stats['fichiers'], {
+        'fiches_creees': stats['creees'],
+        'cpu_utilisateur_s': round(fin.user - temps.user, 2),
+        'cpu_systeme_s': round(fin.system - temps.system, 2),
+        'duree_relance_s': round(duree_relance, 4),
+        'inchanges_relance': relance['inchanges'],
+    }
+
+
+def cas_liaison_mp3(espace, nb_morceaux, graine=42, taille_echantillon=20):
+    """Résolution des liens de nb_morceaux fiches contre nb_morceaux fichiers audio
+
+    Les fichiers sont rangés en sous-dossiers (tous les liens devinés sont donc
+    cassés), 3 % ont un nom modifié (casse, "(Official Video)") et 5 % sont
+    absents. Mesure l'index + la résolution (hors lecture des fiches); pour
+    comparaison, une recherche floue naïve fiche × fichiers est mesurée sur un
+    échantillon puis extrapolée.
+    """
+    import random
+    import difflib
+    lier_mp3 = _module("lier_mp3")
+    morceaux = synth.generer_morceaux(nb_morceaux, graine, 0)
+    fiches = synth.morceaux_comme_fiches(morceaux)
+    for fiche in fiches:
+        fiche['file_path'] = Path(fiche['fichier_mp3'])
+
+    rng = random.Random(graine)
+    presents = []
+    for morceau in morceaux:
+        tirage = rng.random()
+        if tirage < 0.05:
+            continue
+        if tirage < 0.08:
+            morceau = dict(morceau, titre=morceau['titre'].upper() + " (Official Video)")
+        presents.append(morceau)
+    synth.ecrire_dossier_mp3(presents, espace / "mp3", nb_trames=0)
+
+    debut = time.perf_counter()
+    index = lier_mp3.indexer_audio([espace / "mp3"])
+    statistiques = {}
+    lier_mp3.lier_fiches(fiches, index, statistiques=statistiques)
+    duree = time.perf_counter() - debut
+
+    noms = [Path(lien).stem for lien in index.liens]
+    echantillon = fiches[:taille_echantillon]
+    debut = time.perf_counter()
+    for fiche in echantillon:
+        difflib.get_close_matches(f"{fiche['artiste']} - {fiche['titre']}", noms, n=1, cutoff=0.8)
+    duree_naive = (time.perf_counter() - debut) * len(fiches) / max(1, len(echantillon))
+
+    statistiques['fichiers_audio'] = len(index)
+    statistiques['duree_naive_estimee_s'] = round(duree_naive, 2)
+    return duree, nb_morceaux, statistiques
+
+
+def _statistiques_boucles(lignes):
+    """Anciennes statistiques d'une playlist Markdown: boucles Python par playlist"""
+    genres = {}
+    for ligne in lignes:
+        for genre in ligne.genres:
+            genres[genre] = genres.get(genre, 0) + 1
+    bpms = [ligne.bpm for ligne in lignes]
+    energies = [ligne.energie for ligne in lignes]
+    return (genres, sum(bpms) // len(bpms), min(bpms), max(bpms),
+            sum(energies) // len(energies), min(energies), max(energies))
+
+
+def cas_analyse_bibliotheque(espace, nb_morceaux, graine=42):
+    """Statistiques des playlists par genre et par énergie sur nb_morceaux morceaux
+
+    Compare les agrégations groupby de analyse_bibliotheque (durée principale)
+    aux boucles Python par playlist du Markdown. Mesure aussi la conversion en
+    DataFrames et l'aller-retour du cache colonnaire. Sans pandas, seules les
+    boucles sont mesurées.
+    """
+    from collections import defaultdict
+    analyse = _module("analyse_bibliotheque")
+    playlists = _module("genere_playlists1")
+    songs = synth.morceaux_comme_fiches(synth.generer_morceaux(nb_morceaux, graine))
+    lignes = playlists.preparer_lignes(songs)
+
+    debut = time.perf_counter()
+    groupes = defaultdict(list)
+    for ligne in lignes:
+        for genre in ligne.genres:
+            groupes[genre].append(ligne)
+        niveau = 'Low_Energy' if ligne.energie <= 3 else 'Medium_Energy' if ligne.energie <= 6 else 'High_Energy'
+        groupes[niveau].append(ligne)
+    for membres in groupes.values():
+        _statistiques_boucles(membres)
+    duree_boucles = time.perf_counter() - debut
+
+    if analyse.pd is None:
+        return duree_boucles, nb_morceaux, {'pandas': 'absent (boucles seules)'}
+
+    debut = time.perf_counter()
+    tables = analyse.charger_dataframes(songs)
+    duree_conversion = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    analyse.statistiques_genres(tables)
+    analyse.statistiques_energie(tables)
+    analyse.repartition_genres(tables)
+    duree = time.perf_counter() - debut
+
+    cache_dir = espace / "analyse"
+    debut = time.perf_counter()
+    analyse.sauver_cache(tables, cache_dir)
+    duree_ecriture = time.perf_counter() - debut
+    debut = time.perf_counter()
+    analyse.charger_cache(cache_dir)
+    duree_lecture = time.perf_counter() - debut
+
+    return duree, nb_morceaux, {
+        'duree_boucles_s': round(duree_boucles, 4),
+        'acceleration': round(duree_boucles / duree, 2) if duree else None,
+        'duree_conversion_s': round(duree_conversion, 4),
+        'format_cache': analyse.FORMAT_CACHE,
+        'taille_cache_mo': round(sum(f.stat().st_size for f in cache_dir.iterdir()) / (1024 * 1024), 2),
+        'duree_ecriture_cache_s': round(duree_ecriture, 4),
+        'duree_lecture_cache_s': round(duree_lecture, 4),
+        'memoire_tables_mo': round(sum(t.memory_usage(deep=True).sum() for t in tables.values()) / (1024 * 1024), 1),
+    }
+
+
+def _fiches_comme_parsees(nb_morceaux, graine, taille_lot=10000):
+    """Dictionnaires comme ceux de l'ancien parse_song_file(): nombres en texte,
+    une copie des chaînes de genres/tags/clé par fiche, chemin Path"""
+    for debut in range(0, nb_morceaux, taille_lot):
+        lot = synth.generer_morceaux(min(taille_lot, nb_morceaux - debut), graine + debut, 0)
+        for fiche in synth.morceaux_comme_fiches(lot):
+            fiche['genres'] = [g.encode().decode() for g in fiche['genres']]
+            fiche['tags'] = [t.encode().decode() for t in fiche['tags']]
+            fiche['key'] = fiche['key'].encode().decode()
+            fiche['file_path'] = Path("data/output/chansons") / f"{fiche['artiste']} - {fiche['titre']}.md"
+            yield fiche
+
+
+def cas_morceau(espace, nb_morceaux, graine=42):
+    """Mémoire par morceau et tri canonique: Morceau (slots) face aux dictionnaires
+
+    La durée principale est le tri des Morceau par cle_tri; le tri des
+    dictionnaires avec conversions int() dans la clé est mesuré à côté.
+    """
+    import tracemalloc
+    from operator import attrgetter
+    morceau = _module("morceau")
+
+    tracemalloc.start()
+    avant = tracemalloc.get_traced_memory()[0]
+    dictionnaires = list(_fiches_comme_parsees(nb_morceaux, graine))
+    memoire_dicts = tracemalloc.get_traced_memory()[0] - avant
+    tracemalloc.stop()
+
+    debut = time.perf_counter()
+    sorted(dictionnaires, key=lambda x: (int(x.get('bpm', 120)), int(x.get('energie', 5))))
+    duree_dicts = time.perf_counter() - debut
+    del dictionnaires
+
+    tracemalloc.start()
+    avant = tracemalloc.get_traced_memory()[0]
+    morceaux = [morceau.Morceau.depuis_dict(f) for f in _fiches_comme_parsees(nb_morceaux, graine)]
+    memoire_morceaux = tracemalloc.get_traced_memory()[0] - avant
+    tracemalloc.stop()
+
+    debut = time.perf_counter()
+    sorted(morceaux, key=attrgetter('cle_tri'))
+    duree = time.perf_counter() - debut
+
+    return duree, nb_morceaux, {
+        'octets_par_morceau_dict': memoire_dicts // nb_morceaux,
+        'octets_par_morceau_slots': memoire_morceaux // nb_morceaux,
+        'duree_tri_dicts_s': round(duree_dicts, 4),
+        'acceleration_tri': round(duree_dicts / duree, 2) if duree else None,
+    }
+
+
+def cas_index_bibliotheque(espace, nb_morceaux, graine=42):
+    """Groupes triés du set et des playlists: un index partagé face aux regroupements et tris répétés
+
+    La durée principale est la construction de l'index (deux tris globaux,
+    un passage par dimension) puis les requêtes du set et des playlists;
+    l'ancienne méthode (regrouper puis trier chaque groupe) est mesurée à côté.
+    """
+    from collections import defaultdict
+    from operator import attrgetter
+    morceau = _module("morceau")
+    index_bibliotheque = _module("index_bibliotheque")
+    morceaux = [morceau.Morceau.depuis_dict(f) for f in _fiches_comme_parsees(nb_morceaux, graine)]
+    cle_tri = attrgetter('cle_tri')
+
+    debut = time.perf_counter()
+    par_genre, par_energie = defaultdict(list), defaultdict(list)
+    for m in morceaux:
+        for genre in m.genres:
+            par_genre[genre].append(m)
+        par_energie[index_bibliotheque.niveau_energie(m.energie)].append(m)
+    for groupe in par_genre.values():
+        groupe.sort(key=cle_tri)
+    for groupe in par_energie.values():
+        groupe.sort(key=lambda m: (m.genres[0], m.bpm_tri))
+    for niveaux in (('faible',), ('moyenne', None), ('elevee',)):
+        sorted((m for m in morceaux if index_bibliotheque.niveau_energie(m.energie) in niveaux), key=cle_tri)
+    sorted(morceaux, key=cle_tri)
+    duree_tris = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    index = index_bibliotheque.IndexBibliotheque(morceaux)
+    index.groupes('genre')
+    index.groupes('energie', 'genre_bpm')
+    for niveaux in (('faible',), ('moyenne', None), ('elevee',)):
+        index.positions('energie', niveaux)
+    index.ordre()
+    duree = time.perf_counter() - debut
+
+    return duree, nb_morceaux, {
+        'genres': len(index.groupes('genre')),
+        'duree_tris_repetes_s': round(duree_tris, 4),
+        'acceleration': round(duree_tris / duree, 2) if duree else None,
+    }
+
+
+def cas_surveillance(espace, nb_morceaux, graine=42, nb_editions=5):
+    """Rafraîchissement de la surveillance après l'édition d'une fiche
+
+    La durée principale est la moyenne de nb_editions rafraîchissements
+    (une fiche relue, set et playlists modifiées réécrits); le premier
+    chargement complet, équivalent des étapes 3 et 5, est mesuré à côté.
+    """
+    import re
+    surveillance = _module("surveillance")
+    chansons = espace / "chansons"
+    synth.ecrire_dossier_fiches(synth.generer_morceaux(nb_morceaux, graine), chansons)
+
+    veille = surveillance.SurveillanceBibliotheque(chansons, espace / "mp3", espace / "set_dj_classe.md",
+                                                   espace / "playlists", importer=False)
+    debut = time.perf_counter()
+    veille.charger()
+    duree_complete = time.perf_counter() - debut
+
+    fiches = list(veille.fiches)
+    duree = 0.0
+    for i in range(nb_editions):
+        chemin = fiches[i * len(fiches) // nb_editions]
+        with open(chemin, encoding='utf-8') as f:
+            contenu = f.read()
+        with open(chemin, 'w', encoding='utf-8') as f:
+            f.write(re.sub(r'^energie: .*$', f'energie: {i + 1}', contenu, count=1, flags=re.M))
+        veille.fiches = surveillance.instantane_fiches(chansons)
+        debut = time.perf_counter()
+        veille.rafraichir([chemin])
+        duree += time.perf_counter() - debut
+
+    return duree / nb_editions, nb_morceaux, {
+        'duree_chargement_complet_s': round(duree_complete, 4),
+        'acceleration': round(duree_complete * nb_editions / duree, 2) if duree else None,
+    }
+
+
+def cas_serveur_api(espace, nb_morceaux, graine=42, nb_requetes=4000, nb_clients=8):
+    """Débit de l'API locale sous un mélange de requêtes de tablette
+
+    La durée principale est celle des nb_requetes (clients à connexions
+    persistantes dans ce processus, serveur lancé sur nb_morceaux fiches).
+    """
+    serveur_api = _module("serveur_api")
+    charge = _module("charge_serveur_api")
+    chansons = espace / "chansons"
+    synth.ecrire_dossier_fiches(synth.generer_morceaux(nb_morceaux, graine), chansons)
+    serveur = serveur_api.demarrer(chansons, port=0, rechargement=False)
+    try:
+        mesure = charge.lancer_charge(f"http://127.0.0.1:{serveur.server_address[1]}", nb_clients, nb_requetes)
+    finally:
+        serveur.shutdown()
+        serveur.server_close()
+
+    return mesure['duree_s'], mesure['requetes'], {
+        'requetes_par_s': mesure['requetes_par_s'],
+        'latence_p95_ms': mesure['latence_p95_ms'],
+        'statuts': mesure['statuts'],
+    }
+
+
+def cas_gabarit(espace, nb_morceaux, graine=42):
+    """Rendu de nb_morceaux fiches: gabarit compilé (rendre_plusieurs) face à str.format
+
+    La durée principale est le rendu compilé dans un tampon; str.format avec
+    les jointures manuelles des listes, comme avant, est mesuré à côté.
+    """
+    gabarit = _module("gabarit")
+    modele = gabarit.charger_gabarit_chanson()
+    with open(gabarit.TEMPLATE_CHANSON, 'r', encoding='utf-8') as f:
+        template = f.read()
+    morceaux = synth.generer_morceaux(min(nb_morceaux, 10_000), graine)
+    communs = {
+        'notes_personnelles': ["À compléter..."],
+        'idees_mix': ["À définir..."],
+        'liens': ["À ajouter..."],
+        'notes_personnelles_detaillees': "À compléter selon vos impressions...",
+        'idees_mix_detaillees': "À définir selon vos expériences de mix...",
+    }
+    valeurs = [{
+        'titre': m['titre'], 'artiste': m['artiste'], 'bpm': m['bpm'], 'key': m['key'],
+        'genre_list': m['genre'], 'energie': m['energie'], 'date_ajout': m['date_ajout'],
+        'tags_list': m['tags'], 'filename': f"{m['artiste']} - {m['titre']}",
+    } for m in morceaux]
+    tours = [valeurs[i % len(valeurs)] for i in range(nb_morceaux)]
+
+    debut = time.perf_counter()
+    tampon = io.StringIO()
+    for v in tours:
+        tampon.write(template.format(
+            titre=v['titre'], artiste=v['artiste'], bpm=v['bpm'], key=v['key'],
+            genre_list='\n'.join(f"  - {g}" for g in v['genre_list']),
+            energie=v['energie'], date_ajout=v['date_ajout'],
+            tags_list='\n'.join(f"  - {t}" for t in v['tags_list']),
+            filename=v['filename'],
+            notes_personnelles="  - À compléter...", idees_mix="  - À définir...", liens="  - À ajouter...",
+            notes_personnelles_detaillees=communs['notes_personnelles_detaillees'],
+            idees_mix_detaillees=communs['idees_mix_detaillees']))
+    duree_format = time.perf_counter() - debut
+    # Empreintes plutôt que deux textes de ~1 Go en mémoire à 1M
+    attendu = hashlib.sha1(tampon.getvalue().encode('utf-8')).digest()
+    del tampon
+
+    debut = time.perf_counter()
+    tampon = modele.rendre_plusieurs(tours, **communs)
+    duree = time.perf_counter() - debut
+
+    return duree, nb_morceaux, {
+        'identique_a_format': hashlib.sha1(tampon.getvalue().encode('utf-8')).digest() == attendu,
+        'duree_str_format_s': round(duree_format, 4),
+        'acceleration': round(duree_format / duree, 2) if duree else None,
+    }
+
+
+def cas_stockage_compact(espace, nb_morceaux, graine=42):
+    """Lecture de toute la bibliothèque: pack de fiches face au dossier de fichiers .md
+
+    La durée principale est l'itération + parsing depuis le pack (mmap, zlib);
+    la même lecture depuis le dossier, l'empaquetage et les tailles sur disque
+    (blocs alloués) sont mesurés à côté.
+    """
+    stockage_compact = _module("stockage_compact")
+    step3 = _module("4_generer_set_classe_depuis_fiches")
+    chansons = espace / "chansons"
+    synth.ecrire_dossier_fiches(synth.generer_morceaux(nb_morceaux, graine), chansons)
+
+    debut = time.perf_counter()
+    stockage_compact.empaqueter(chansons)
+    duree_empaquetage = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    with stockage_compact.DossierFiches(chansons) as source:
+        depuis_dossier = [step3.parse_song_content(contenu, chemin) for chemin, contenu in source]
+    duree_dossier = time.perf_counter() - debut
+
+    pack = stockage_compact.chemin_pack(chansons)
+    debut = time.perf_counter()
+    with stockage_compact.StockageCompact(pack) as source:
+        depuis_pack = [step3.parse_song_content(contenu, chemin) for chemin, contenu in source]
+    duree = time.perf_counter() - debut
+
+    taille_dossier = sum(entree.stat().st_blocks * 512 for entree in os.scandir(chansons))
+    taille_pack = sum(os.stat(p).st_blocks * 512 for p in (pack, pack.with_name(pack.name + ".idx")))
+    return duree, nb_morceaux, {
+        'identique_au_dossier': depuis_pack == depuis_dossier,
+        'duree_dossier_s': round(duree_dossier, 4),
+        'acceleration': round(duree_dossier / duree, 2) if duree else None,
+        'duree_empaquetage_s': round(duree_empaquetage, 4),
+        'disque_dossier_mo': round(taille_dossier / 1e6, 1),
+        'disque_pack_mo': round(taille_pack / 1e6, 1),
+    }
+
+
+def cas_disposition_fiches(espace, nb_morceaux, graine=42, nb_sondes=2000):
+    """Scan et tests d'existence: dossier réparti par hachage face au dossier plat
+
+    La durée principale est le scan (scan_songs_directory) puis nb_sondes
+    recherches de nom libre (suffixes _01, _02...) dans le dossier réparti;
+    les mêmes opérations sur le dossier plat et la migration sont mesurées à côté.
+    """
+    disposition_fiches = _module("disposition_fiches")
+    step3 = _module("4_generer_set_classe_depuis_fiches")
+    chansons = espace / "chansons"
+    morceaux = synth.generer_morceaux(nb_morceaux, graine)
+    synth.ecrire_dossier_fiches(morceaux, chansons)
+    # Moitié de noms déjà pris, moitié de noms libres
+    sondes = [f"{m['artiste']} - {m['titre']}".replace('/', '_') for m in morceaux[:nb_sondes // 2]]
+    sondes += [f"Nouveau {i} - Inédit" for i in range(nb_sondes - len(sondes))]
+
+    def mesurer():
+        debut = time.perf_counter()
+        fichiers = step3.scan_songs_directory(chansons)
+        disposition = disposition_fiches.DispositionFiches(chansons)
+        for nom in sondes:
+            disposition.chemin_libre(nom)
+        return time.perf_counter() - debut, [f.name for f in fichiers]
+
+    duree_plat, noms_plat = mesurer()
+    debut = time.perf_counter()
+    disposition_fiches.migrer(chansons, 'hachage')
+    duree_migration = time.perf_counter() - debut
+    duree, noms = mesurer()
+
+    return duree, nb_morceaux, {
+        'identique_au_plat': noms == noms_plat,
+        'duree_plat_s': round(duree_plat, 4),
+        'acceleration': round(duree_plat / duree, 2) if duree else None,
+        'duree_migration_s': round(duree_migration, 4),
+    }
+
+
+def cas_ecrivain_fiches(espace, nb_morceaux, graine=42, latence_ms=10.0, taille_echantillon=500):
+    """Écriture de nb_morceaux fiches sur un support lent: pool de threads face à l'écriture fiche par fiche
+
+    Chaque écriture subit une latence simulée (partage réseau, clé USB). La
+    durée principale est l'écrivain en arrière-plan sur toutes les fiches;
+    l'écriture synchrone d'avant est mesurée sur un échantillon et comparée
+    en débit. Le débit sans latence (disque local) est mesuré aussi.
+    """
+    ecrivain_fiches = _module("ecrivain_fiches")
+    outils_fichiers = _module("outils_fichiers")
+    morceaux = synth.generer_morceaux(min(nb_morceaux, 10_000), graine)
+    fiches = [(f"{i:07d}.md", f"titre: {m['titre']}\nartiste: {m['artiste']}\nbpm: {m['bpm']}\n")
+              for i, m in zip(range(nb_morceaux), itertools.cycle(morceaux))]
+
+    def lent(chemin, contenu):
+        time.sleep(latence_ms / 1000)
+        outils_fichiers.ecrire_atomique(chemin, contenu)
+
+    synchrone = espace / "synchrone"
+    synchrone.mkdir()
+    echantillon = fiches[:taille_echantillon]
+    debut = time.perf_counter()
+    for nom, contenu in echantillon:
+        time.sleep(latence_ms / 1000)
+        with open(synchrone / nom, 'w', encoding='utf-8') as f:
+            f.write(contenu)
+    debit_synchrone = len(echantillon) / (time.perf_counter() - debut)
+
+    def ecrire_tout(dossier, ecrire):
+        dossier.mkdir()
+        with ecrivain_fiches.EcrivainFiches(ecrire=ecrire) as ecrivain:
+            for nom, contenu in fiches:
+                ecrivain.soumettre(dossier / nom, contenu)
+        return ecrivain.stats
+
+    local = ecrire_tout(espace / "local", outils_fichiers.ecrire_atomique)
+    debut = time.perf_counter()
+    stats = ecrire_tout(espace / "lent", lent)
+    duree = time.perf_counter() - debut
+
+    return duree, nb_morceaux, {
+        'latence_simulee_ms': latence_ms,
+        'fiches_par_s_synchrone': round(debit_synchrone, 1),
+        'fiches_par_s': stats['fiches_par_s'],
+        'acceleration': round(stats['fiches_par_s'] / debit_synchrone, 2),
+        'fiches_par_s_sans_latence': local['fiches_par_s'],
+    }
+
+
+def cas_lecteurs_entree(espace, nb_morceaux, graine=42):
+    """Étape 1 depuis une liste texte, un export CSV et une playlist M3U8 de nb_morceaux lignes
+
+    Les lecteurs produisent les morceaux au fil de l'eau et le rendu va dans
+    un fichier temporaire: le pic de mémoire ne doit pas suivre la taille de
+    la liste. La durée principale est la somme des trois formats.
+    """
+    step1 = _module("1_generer_markdown_depuis_liste")
+    morceaux = synth.generer_morceaux(min(nb_morceaux, 10_000), graine)
+
+    def lignes():
+        return zip(range(nb_morceaux), itertools.cycle(morceaux))
+
+    sources = {
+        'texte': espace / "liste.txt",
+        'csv': espace / "export.csv",
+        'm3u': espace / "set.m3u8",
+    }
+    with open(sources['texte'], 'w', encoding='utf-8') as f:
+        f.writelines(f"{m['artiste']} - {m['titre']}\n" for _, m in lignes())
+    with open(sources['csv'], 'w', encoding='utf-8', newline='') as f:
+        ecrivain = csv.writer(f)
+        ecrivain.writerow(["Track Name", "Artist Name(s)", "Genres", "Tempo", "Key", "Energy"])
+        ecrivain.writerows([m['titre'], m['artiste'], ",".join(m['genre']), m['bpm'], m['key'], m['energie']]
+                           for _, m in lignes())
+    with open(sources['m3u'], 'w', encoding='utf-8') as f:
+        f.write("#EXTM3U\n")
+        f.writelines(f'#EXTINF:-1 bpm="{m["bpm"]}" key="{m["key"]}",{m["artiste"]} - {m["titre"]}\n'
+                     f"mp3/{i:07d}.mp3\n" for i, m in lignes())
+
+    details = {}
+    duree = 0.0
+    for format, source in sources.items():
+        debut = time.perf_counter()
+        total = step1.generate_markdown_from_list(source, espace / f"morceaux_{format}.md")
+        ecoule = time.perf_counter() - debut
+        assert total == nb_morceaux, (format, total)
+        duree += ecoule
+        details[f'morceaux_par_s_{format}'] = round(nb_morceaux / ecoule, 1)
+        details[f'taille_source_{format}_mo'] = round(source.stat().st_size / 1e6, 1)
+        (espace / f"morceaux_{format}.md").unlink()
+    return duree, 3 * nb_morceaux, details
+
+
+def cas_etape1_parallele(espace, nb_morceaux, graine=42):
+    """Étape 1 sur une liste texte de nb_morceaux lignes: rendu en série face aux processus
+
+    La durée principale est le rendu avec un processus par cœur; le rendu en
+    série et chaque nombre de processus (2, 4... jusqu'au nombre de cœurs)
+    sont mesurés, et chaque sortie comparée octet par octet à la sortie en
+    série (hors ligne d'horodatage).
+    """
+    step1 = _module("1_generer_markdown_depuis_liste")
+    morceaux = synth.generer_morceaux(min(nb_morceaux, 10_000), graine)
+    source = espace / "liste.txt"
+    with open(source, 'w', encoding='utf-8') as f:
+        f.writelines(f"{m['artiste']} - {m['titre']}\n"
+                     for _, m in zip(range(nb_morceaux), itertools.cycle(morceaux)))
+
+    def corps(chemin):
+        empreinte = hashlib.sha1()
+        with open(chemin, 'rb') as f:
+            f.readline()
+            for bloc in iter(lambda: f.read(1024 * 1024), b""):
+                empreinte.update(bloc)
+        return empreinte.hexdigest()
+
+    # Plages de 1 Mo au plus, au moins 4 par processus sur les petites listes
+    nb_coeurs = os.cpu_count() or 1
+    taille_tranche = max(64 * 1024, min(1024 * 1024, source.stat().st_size // (4 * max(2, nb_coeurs))))
+    debut = time.perf_counter()
+    step1.generate_markdown_from_list(source, espace / "serie.md")
+    duree_serie = time.perf_counter() - debut
+    reference = corps(espace / "serie.md")
+
+    # 2, 4, 8... processus puis le nombre de cœurs (au moins 2: nb_processus=1 est le rendu en série)
+    paliers = sorted({2 ** i for i in range(1, nb_coeurs.bit_length() + 1) if 2 ** i <= nb_coeurs}
+                     | {max(2, nb_coeurs)})
+    details = {'coeurs': nb_coeurs, 'duree_serie_s': round(duree_serie, 3)}
+    for nb_processus in paliers:
+        debut = time.perf_counter()
+        step1.generate_markdown_from_list(source, espace / "parallele.md", nb_processus=nb_processus,
+                                          taille_tranche=taille_tranche)
+        duree = time.perf_counter() - debut
+        assert corps(espace / "parallele.md") == reference, nb_processus
+        details[f'acceleration_{nb_processus}_processus'] = round(duree_serie / duree, 2)
+    details['sortie_identique'] = True
+    return duree, nb_morceaux, details
+
+
+def cas_etape1_incrementale(espace, nb_morceaux, graine=42, nb_ajouts=20):
+    """Relance des étapes 1 et 2 après l'ajout de nb_ajouts lignes à une liste de nb_morceaux
+
+    La durée principale est la relance incrémentale (manifeste, seuls les
+    ajouts rendus puis extraits); la relance complète d'avant est mesurée
+    aussi, avec les fiches _01 qu'elle crée à l'étape 2.
+    """
+    step1 = _module("1_generer_markdown_depuis_liste")
+    step2 = _module("2_extraire_chansons_en_fichiers")
+    morceaux = synth.generer_morceaux(nb_morceaux + nb_ajouts, graine)
+    liste = espace / "liste.txt"
+    synth.ecrire_liste_chansons(morceaux[:nb_morceaux], liste)
+
+    mesures = {}
+    for mode, incremental in (('complete', False), ('incrementale', True)):
+        dossier = espace / mode
+        sortie = dossier / "morceaux.md"
+        with contextlib.redirect_stdout(io.StringIO()):
+            synth.ecrire_liste_chansons(morceaux[:nb_morceaux], liste)
+            step1.generate_markdown_from_list(liste, sortie, incremental=incremental)
+            step2.split_markdown_file(sortie, dossier / "chansons")
+            synth.ecrire_liste_chansons(morceaux, liste)
+            debut = time.perf_counter()
+            rendus = step1.generate_markdown_from_list(liste, sortie, incremental=incremental)
+            extraites = step2.split_markdown_file(sortie, dossier / "chansons")
+            mesures[mode] = (time.perf_counter() - debut, rendus, len(extraites))
+        mesures[mode] += (sum(1 for nom in os.listdir(dossier / "chansons") if "_01" in nom),)
+
+    duree, rendus, extraites, doublons = mesures['incrementale']
+    return duree, nb_morceaux + nb_ajouts, {
+        'morceaux_ajoutes': nb_ajouts,
+        'morceaux_rendus': rendus,
+        'fiches_extraites': extraites,
+        'fiches_01': doublons,
+        'duree_complete_s': round(mesures['complete'][0], 3),
+        'fiches_extraites_complete': mesures['complete'][2],
+        'fiches_01_complete': mesures['complete'][3],
+        'acceleration': round(mesures['complete'][0] / duree, 1),
+    }
+
+
+def cas_extraction_manifeste(espace, nb_morceaux, graine=42, nb_modifiees=100):
+    """Re-split de l'étape 2: morceaux.md inchangé, puis nb_modifiees sections modifiées
+
+    La durée principale est le re-split du fichier inchangé, qui ne doit
+    rien écrire (ni fiche ni manifeste); la première extraction et le
+    re-split après modification de quelques sections sont mesurés aussi.
+    """
+    step1 = _module("1_generer_markdown_depuis_liste")
+    step2 = _module("2_extraire_chansons_en_fichiers")
+    synth.ecrire_liste_chansons(synth.generer_morceaux(nb_morceaux, graine), espace / "liste.txt")
+    morceaux = espace / "morceaux.md"
+    step1.generate_markdown_from_list(espace / "liste.txt", morceaux)
+    dossier = espace / "chansons_extraites"
+
+    def extraire():
+        with contextlib.redirect_stdout(io.StringIO()):
+            debut = time.perf_counter()
+            ecrites = step2.split_markdown_file(morceaux, dossier)
+            return time.perf_counter() - debut, len(ecrites)
+
+    def dates():
+        return {entree.name: entree.stat().st_mtime_ns for entree in os.scandir(dossier)}
+
+    duree_premiere, creees = extraire()
+    avant = dates()
+    duree, ecrites = extraire()
+    assert dates() == avant and ecrites == 0
+
+    # Quelques BPM détectés: seules ces sections sont réécrites
+    texte = morceaux.read_text(encoding='utf-8')
+    morceaux.write_text(texte.replace("\nbpm: ", "\nbpm: 1", nb_modifiees), encoding='utf-8')
+    duree_modifiees, mises_a_jour = extraire()
+
+    return duree, nb_morceaux, {
+        'duree_premiere_extraction_s': round(duree_premiere, 3),
+        'fiches_creees': creees,
+        'fiches_ecrites_resplit': ecrites,
+        'duree_resplit_modifiees_s': round(duree_modifiees, 3),
+        'fiches_mises_a_jour': mises_a_jour,
+        'fichiers_dossier': len(avant),
+    }
+
+
+def cas_patch_fiches(espace, nb_morceaux, graine=42):
+    """Mise à jour du BPM et des genres de nb_morceaux fiches par lot de patches d'en-tête
+
+    La durée principale est le lot de patches (pool de threads, en-tête seul
+    décodé, corps recopié); la réécriture complète fiche par fiche d'avant
+    est mesurée sur les mêmes fiches, puis le lot est relancé: les fiches
+    déjà à jour ne doivent pas être réécrites.
+    """
+    patch_fiches = _module("patch_fiches")
+    outils_fichiers = _module("outils_fichiers")
+    dossier = espace / "chansons"
+    synth.ecrire_dossier_fiches(synth.generer_morceaux(nb_morceaux, graine), dossier)
+    fiches = sorted(dossier.glob("*.md"))
+
+    # Avant: lecture complète, remplacement, réécriture de toute la fiche
+    debut = time.perf_counter()
+    for i, chemin in enumerate(fiches):
+        with open(chemin, 'r', encoding='utf-8') as f:
+            contenu = f.read()
+        entete, separateur, notes = contenu.partition('\n---\n')
+        patch = {'bpm': 80 + i % 60, 'genre': ['Techno']}
+        outils_fichiers.ecrire_atomique(chemin, patch_fiches.patcher_entete(entete, patch) + separateur + notes)
+    duree_complete = time.perf_counter() - debut
+
+    patches = [(chemin, {'bpm': 90 + i % 60, 'genre': ['House', 'Deep House']}) for i, chemin in enumerate(fiches)]
+    debut = time.perf_counter()
+    stats = patch_fiches.appliquer_patches(patches)
+    duree = time.perf_counter() - debut
+    debut = time.perf_counter()
+    relance = patch_fiches.appliquer_patches(patches)
+    duree_relance = time.perf_counter() - debut
+    assert relance['modifiees'] == 0
+
+    return duree, len(patches), {
+        'fiches_modifiees': stats['modifiees'],
+        'fiches_par_s_reecriture_complete': round(len(fiches) / duree_complete, 1),
+        'fiches_par_s': round(len(patches) / duree, 1),
+        'duree_relance_a_jour_s': round(duree_relance, 3),
+        'fiches_reecrites_relance': relance['modifiees'],
+    }
+
+
+def cas_set_pagine(espace, nb_morceaux, graine=42):
+    """Set classé en index + pages par genre et par énergie, pages inchangées non réécrites
+
+    La durée principale est la première génération (toutes les pages
+    écrites); un passage identique puis un passage après le changement de
+    BPM d'un morceau sont mesurés à côté, avec le nombre de pages réécrites.
+    """
+    import dataclasses
+    morceau = _module("morceau")
+    step3 = _module("4_generer_set_classe_depuis_fiches")
+    songs = [morceau.Morceau.depuis_dict(f) for f in _fiches_comme_parsees(nb_morceaux, graine)]
+    sortie = espace / "set_dj_classe.md"
+    pages = step3.dossier_pages(sortie)
+
+    def dates():
+        return {e.name: e.stat().st_mtime_ns for e in os.scandir(pages) if e.name != step3.MANIFESTE_SET}
+
+    debut = time.perf_counter()
+    step3.generate_set_by_genre(songs, sortie)
+    duree = time.perf_counter() - debut
+    tailles = [e.stat().st_size for e in os.scandir(pages) if e.name != step3.MANIFESTE_SET]
+    avant = dates()
+
+    debut = time.perf_counter()
+    step3.generate_set_by_genre(songs, sortie)
+    duree_relance = time.perf_counter() - debut
+    assert dates() == avant
+
+    songs[len(songs) // 2] = dataclasses.replace(songs[len(songs) // 2], bpm=199)
+    debut = time.perf_counter()
+    step3.generate_set_by_genre(songs, sortie)
+    duree_modification = time.perf_counter() - debut
+    apres = dates()
+
+    return duree, nb_morceaux, {
+        'pages': len(tailles),
+        'octets_index': sortie.stat().st_size,
+        'octets_plus_grande_page': max(tailles),
+        'octets_rapport_complet': sum(tailles) + sortie.stat().st_size,
+        'duree_relance_identique_s': round(duree_relance, 3),
+        'duree_relance_un_bpm_s': round(duree_modification, 3),
+        'pages_reecrites_un_bpm': sum(1 for nom, date in apres.items() if avant.get(nom) != date),
+    }
+
+
+# Micro-benchmarks ciblés (--cas), mesurés à chaque échelle demandée
+CAS = {
+    'rendu_playlists': cas_rendu_playlists,
+    'dedoublonnage': cas_dedoublonnage,
+    'classification_youtube': cas_classification_youtube,
+    'export_dj': cas_export_dj,
+    'import_mp3': cas_import_mp3,
+    'liaison_mp3': cas_liaison_mp3,
+    'analyse_bibliotheque': cas_analyse_bibliotheque,
+    'morceau': cas_morceau,
+    'index_bibliotheque': cas_index_bibliotheque,
+    'surveillance': cas_surveillance,
+    'serveur_api': cas_serveur_api,
+    'gabarit': cas_gabarit,
+    'stockage_compact': cas_stockage_compact,
+    'disposition_fiches': cas_disposition_fiches,
+    'ecrivain_fiches': cas_ecrivain_fiches,
+    'lecteurs_entree': cas_lecteurs_entree,
+    'etape1_parallele': cas_etape1_parallele,
+    'etape1_incrementale': cas_etape1_incrementale,
+    'extraction_manifeste': cas_extraction_manifeste,
+    'patch_fiches': cas_patch_fiches,
+    'set_pagine': cas_set_pagine,
+}
+
+
+def _executer_etape(nom_etape, espace, nb_morceaux, file_resultats):
+    """Point d'entrée du processus enfant: exécuter une étape isolée"""
+    os.chdir(REPERTOIRE_PROJET)
+    sys.path.insert(0, str(REPERTOIRE_PROJET))
+    try:
+        # Les scripts affichent une ligne par fichier: on coupe la sortie
+        with contextlib.redirect_stdout(io.StringIO()):
+            if nom_etape in CAS:
+                mesure = CAS[nom_etape](Path(espace), nb_morceaux)
+            else:
+                mesure = ETAPES[nom_etape](Path(espace))
+        duree, elements = mesure[0], mesure[1]
+        resultat = {
+            'duree_s': round(duree, 4),
+            'elements': elements,
+            'debit_par_s': round(elements / duree, 1) if duree > 0 else None,
+            'rss_max_mo': _rss_max_mo(),
+        }
+        if len(mesure) > 2:
+            resultat['details'] = mesure[2]
+        file_resultats.put(resultat)
+    except Exception as e:
+        file_resultats.put({'erreur': str(e)})
+
+
+def mesurer_etape(nom_etape, espace, nb_morceaux):
+    """Mesurer une étape dans un processus neuf pour isoler le pic de mémoire"""
+    contexte = multiprocessing.get_context("spawn")
+    file_resultats = contexte.Queue()
+    processus = contexte.Process(target=_executer_etape,
+                                 args=(nom_etape, str(espace), nb_morceaux, file_resultats))
+    processus.start()
+    # Un enfant tué (mémoire épuisée, signal) n'écrit jamais dans la file: ne pas l'attendre indéfiniment
+    while True:
+        try:
+            resultat = file_resultats.get(timeout=ATTENTE_RESULTAT_S)
+            break
+        except queue.Empty:
+            if processus.is_alive():
+                continue
+        # Dernière lecture: le résultat a pu arriver juste avant la fin du processus
+        try:
+            resultat = file_resultats.get(timeout=ATTENTE_RESULTAT_S)
+        except queue.Empty:
+            processus.join()
+            resultat = {'erreur': f"code {processus.exitcode}"}
+        break
+    processus.join()
+    return resultat
+
+
+def preparer_espace(nb_morceaux, espace, graine=42):
+    """Générer la liste et le dossier de fiches synthétiques"""
+    morceaux = synth.generer_morceaux(nb_morceaux, graine)
+    synth.ecrire_liste_chansons(morceaux, espace / "liste_chansons.txt", graine)
+    synth.ecrire_dossier_fiches(morceaux, espace / "chansons",
+                                REPERTOIRE_PROJET / synth.TEMPLATE_PATH)
+
+
+def executer_benchmark(echelles, etapes, graine=42, dossier_travail=None, cas=()):
+    """Exécuter toutes les étapes demandées pour chaque échelle"""
+    resultats = {}
+
+    for echelle in echelles:
+        nb_morceaux = synth.parse_echelle(echelle)
+        print(f"\n{'='*60}")
+        print(f"📏 Échelle: {nb_morceaux} morceaux")
+        print(f"{'='*60}")
+
+        espace = Path(tempfile.mkdtemp(prefix=f"assistdj_bench_{nb_morceaux}_", dir=dossier_travail))
+        try:
+            if etapes:
+                debut = time.perf_counter()
+                preparer_espace(nb_morceaux, espace, graine)
+                print(f"🧪 Bibliothèque générée en {time.perf_counter() - debut:.2f}s")
+
+            resultats[str(nb_morceaux)] = {}
+            for nom_etape in list(etapes) + list(cas):
+                resultat = mesurer_etape(nom_etape, espace, nb_morceaux)
+                resultats[str(nb_morceaux)][nom_etape] = resultat
+                if 'erreur' in resultat:
+                    print(f"❌ {nom_etape}: {resultat['erreur']}")
+                else:
+                    print(f"⏱️  {nom_etape:<16} {resultat['duree_s']:>9.3f}s  "
+                          f"{resultat['debit_par_s'] or 0:>12.1f}/s  "
+                          f"RSS max: {resultat['rss_max_mo']} Mo")
+                    for cle, valeur in resultat.get('details', {}).items():
+                        print(f"      {cle}: {valeur}")
+        finally:
+            shutil.rmtree(espace, ignore_errors=True)
+
+    return resultats
+
+
+def comparer_baseline(resultats, baseline, tolerance=TOLERANCE_PAR_DEFAUT):
+    """Comparer les durées à la baseline et lister les régressions"""
+    regressions = []
+    reference = baseline.get('resultats', {})
+
+    print(f"\n{'='*60}")
+    print("📊 Comparaison avec la baseline")
+    print(f"{'='*60}")
+
+    for echelle, etapes in resultats.items():
+        for nom_etape, mesure in etapes.items():
+            base = reference.get(echelle, {}).get(nom_etape)
+            if not base or 'duree_s' not in base or 'duree_s' not in mesure:
+                continue
+            ratio = mesure['duree_s'] / base['duree_s'] if base['duree_s'] else 1.0
+            statut = "✅"
+            if ratio > 1 + tolerance and mesure['duree_s'] - base['duree_s'] > ECART_MINIMAL_S:
+                statut = "❌"
+                regressions.append((echelle, nom_etape, ratio))
+            print(f"{statut} {echelle:>8} {nom_etape:<16} x{ratio:.2f} "
+                  f"({base['duree_s']:.3f}s → {mesure['duree_s']:.3f}s)")
+
+    return regressions
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Benchmark du workflow Assistant DJ")
+    parser.add_argument('--echelles', nargs='+', default=ECHELLES_PAR_DEFAUT,
+                        help="Tailles de bibliothèque (ex: 1k 10k 100k 1M)")
+    parser.add_argument('--etapes', nargs='*', choices=list(ETAPES), default=None,
+                        help="Étapes à mesurer (par défaut: toutes, sauf si --cas est donné)")
+    parser.add_argument('--cas', nargs='+', choices=list(CAS), default=[],
+                        help="Micro-benchmarks ciblés à mesurer")
+    parser.add_argument('--resultats', default=RESULTATS_PAR_DEFAUT, help="Fichier JSON de résultats")
+    parser.add_argument('--baseline', default=BASELINE_PAR_DEFAUT, help="Fichier JSON de référence")
+    parser.add_argument('--enregistrer-baseline', action='store_true',
+                        help="Enregistrer les résultats comme nouvelle baseline")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE_PAR_DEFAUT,
+                        help="Ralentissement toléré avant de signaler une régression (0.20 = +20%%)")
+    parser.add_argument('--graine', type=int, default=42, help="Graine aléatoire")
+    parser.add_argument('--dossier-travail', default=None,
+                        help="Dossier des bibliothèques temporaires (par défaut: dossier temporaire système)")
+    args = parser.parse_args()
+
+    print("🎵 Assistant DJ - Benchmark du workflow")
+    print("="*60)
+
+    etapes = args.etapes
+    if etapes is None:
+        etapes = [] if args.cas else list(ETAPES)
+
+    resultats = executer_benchmark(args.echelles, etapes, args.graine, args.dossier_travail, args.cas)
+
+    rapport = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plateforme': platform.platform(),
+        'processeurs': os.cpu_count(),
+        'resultats': resultats,
+    }
+
+    chemin_resultats = Path(args.resultats)
+    chemin_resultats.parent.mkdir(parents=True, exist_ok=True)
+    with open(chemin_resultats, 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+    print(f"\n📁 Résultats: {chemin_resultats}")
+
+    chemin_baseline = Path(args.baseline)
+    if args.enregistrer_baseline:
+        chemin_baseline.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(chemin_resultats, chemin_baseline)
+        print(f"📌 Baseline enregistrée: {chemin_baseline}")
+        return 0
+
+    if not chemin_baseline.exists():
+        print(f"⚠️  Pas de baseline ({chemin_baseline}), comparaison ignorée.")
+        return 0
+
+    with open(chemin_baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = comparer_baseline(resultats, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} régression(s) détectée(s)")
+        return 1
+
+    print("\n✅ Aucune régression détectée")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Bibliothèque synthétique
+Générer des listes de chansons et des dossiers de fiches factices pour les benchmarks
+"""
+
+import sys
+import random
+import argparse
+from pathlib import Path
+from datetime import date, timedelta
+
+from gabarit import charger_gabarit_chanson, TEMPLATE_CHANSON
+import disposition_fiches
+
+# Vocabulaire volontairement varié (accents, alphabets non latins, ponctuation)
+PRENOMS = [
+    "Abba", "Aretha", "Björk", "Beyoncé", "Céline", "Chloé", "Daft", "Édith",
+    "Fatboy", "Gloria", "Héloïse", "Iñigo", "Jean-Michel", "Kraftwerk", "Léa",
+    "Motörhead", "Naïma", "Øyvind", "Prince", "Queen", "Rosalía", "Sigur",
+    "Stromae", "Zoé", "坂本", "Мумий", "Ζορμπάς", "محمد",
+]
+
+NOMS = [
+    "Franklin", "Gaynor", "Punk", "Slim", "Rós", "Jarre", "Piaf", "Summer",
+    "Houston", "Jackson", "Brown", "Wonder", "Guetta", "Knowles", "Dion",
+    "Aznavour", "Gainsbourg", "Müller", "Šťastný", "Ødegaard", "龍一", "Тролль",
+    "Θεοδωράκης", "منير", "& The Band", "feat. MC Solaar",
+]
+
+MOTS_TITRES = [
+    "Love", "Night", "Dance", "Fever", "Groove", "Soleil", "Nuit", "Paradis",
+    "Étoile", "Cœur", "Funk", "Électrique", "Sommer", "Corazón", "Amour",
+    "Freak", "Music", "Fire", "Lune", "Traum", "Ritmo", "東京", "Москва",
+    "Don't", "Stop", "Me", "Now", "Get", "Up", "Respect", "Superstition",
+]
+
+SUFFIXES_TITRES = [
+    "", "", "", "", "", " (Remix)", " (Live)", " (Radio Edit)", " (Extended Mix)",
+    " (Official Video)", " [Remastered 2011]", " - Single Version",
+]
+
+GENRES = [
+    "Disco", "Funk", "Pop", "Rock", "Electronic", "House", "Techno", "Hip-Hop",
+    "R&B", "Soul", "Jazz", "Reggae", "Latin", "Afrobeat", "Drum & Bass",
+    "Variété Française", "Non classé",
+]
+
+TAGS = [
+    "nouveau", "classic", "vocal", "instrumental", "warm-up", "peak-time",
+    "closing", "remix", "edit", "youtube", "extrait", "à écouter", "favori",
+]
+
+CLES = [
+    "A", "Am", "B", "Bm", "C", "Cm", "C#", "D", "Dm", "E", "Em", "F", "F#m",
+    "G", "Gm", "8A", "8B", "11A", "11B", "5A",
+]
+
+TEMPLATE_PATH = TEMPLATE_CHANSON
+
+# Gabarits de titres et de descriptions tels qu'on les trouve sur YouTube
+FORMATS_VIDEOS = [
+    "{artiste} - {titre}", "{artiste} - {titre} (Official Video)", "{artiste} - {titre} [HD]",
+    "{artiste} : {titre}", "{artiste} | {titre} (Lyrics)", "{titre} by {artiste}",
+    "{titre}", "{artiste} - {titre} (Official Music Video) [4K Remaster]",
+]
+
+# La plupart des phrases ne disent rien du genre, comme dans les vraies descriptions
+PHRASES_DESCRIPTIONS = [
+    "Listen to the new single now.", "Taken from the album out everywhere.",
+    "Subscribe for more music!", "Follow us on Instagram and TikTok.",
+    "Stream on Spotify, Apple Music, Deezer and Bandcamp.", "℗ 2021 Records Ltd. All rights reserved.",
+    "Directed by someone famous.", "Réalisé par le label, tous droits réservés.",
+    "Turn on notifications to never miss an upload.", "Merch available at the official store.",
+    "Produced, mixed and mastered at the studio.", "Tour dates and tickets on the website.",
+    "Lyrics: la la la, all night long.", "Executive producer: the management team.",
+    "The classic disco anthem remastered.", "Deep house mix for late nights.",
+    "Funky groove with a smooth soul vocal.", "Live at the festival with the full band.",
+    "Hip-hop beats for studying.",
+]
+
+
+def _nom_artiste(rng):
+    """Tirer un nom d'artiste"""
+    return f"{rng.choice(PRENOMS)} {rng.choice(NOMS)}"
+
+
+def _nom_titre(rng):
+    """Tirer un titre de chanson"""
+    nb_mots = rng.randint(1, 4)
+    titre = " ".join(rng.choice(MOTS_TITRES) for _ in range(nb_mots))
+    return titre + rng.choice(SUFFIXES_TITRES)
+
+
+def generer_morceaux(nb_morceaux, graine=42, taux_doublons=0.05):
+    """Générer une liste de morceaux synthétiques (dictionnaires)
+
+    Une fraction `taux_doublons` des morceaux reprend l'artiste et le titre
+    d'un morceau déjà tiré, pour reproduire les doublons des vraies listes.
+    """
+    rng = random.Random(graine)
+    date_base = date(2020, 1, 1)
+    morceaux = []
+
+    for i in range(nb_morceaux):
+        if morceaux and rng.random() < taux_doublons:
+            source = rng.choice(morceaux)
+            artiste, titre = source['artiste'], source['titre']
+        else:
+            artiste, titre = _nom_artiste(rng), _nom_titre(rng)
+
+        nb_genres = 1 if rng.random() < 0.7 else 2
+        nb_tags = rng.randint(0, 3)
+        morceaux.append({
+            'titre': titre,
+            'artiste': artiste,
+            'bpm': rng.randint(70, 175),
+            'key': rng.choice(CLES),
+            'genre': rng.sample(GENRES, nb_genres),
+            'energie': rng.randint(1, 10),
+            'date_ajout': (date_base + timedelta(days=rng.randint(0, 2000))).strftime('%Y-%m-%d'),
+            'tags': rng.sample(TAGS, nb_tags),
+        })
+
+    return morceaux
+
+
+def generer_videos(nb_videos, graine=42):
+    """Générer des métadonnées de vidéos YouTube (titre, description de 0,2 à 6 Ko)"""
+    rng = random.Random(graine)
+    videos = []
+    for _ in range(nb_videos):
+        titre = rng.choice(FORMATS_VIDEOS).format(artiste=_nom_artiste(rng), titre=_nom_titre(rng))
+        nb_phrases = rng.choice((4, 10, 30, 120))
+        description = "\n".join(rng.choice(PHRASES_DESCRIPTIONS) for _ in range(nb_phrases))
+        # Les vraies descriptions finissent souvent par une longue liste de liens
+        description += "\n" + "\n".join(f"https://example.com/link/{rng.randint(0, 10**9)}"
+                                         for _ in range(rng.randint(0, 40)))
+        videos.append({
+            'title': titre,
+            'description': description,
+            'duration': rng.randint(90, 600),
+            'upload_date': f"20{rng.randint(10, 24):02d}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}",
+        })
+    return videos
+
+
+def morceaux_comme_fiches(morceaux):
+    """Convertir les morceaux au format renvoyé par parse_song_file()
+
+    Permet de mesurer les étapes en aval sans écrire ni relire de fichiers.
+    """
+    fiches = []
+    for morceau in morceaux:
+        filename = f"{morceau['artiste']} - {morceau['titre']}"
+        fiches.append({
+            'titre': morceau['titre'],
+            'artiste': morceau['artiste'],
+            'bpm': str(morceau['bpm']),
+            'key': morceau['key'],
+            'energie': str(morceau['energie']),
+            'date_ajout': morceau['date_ajout'],
+            'genres': list(morceau['genre']),
+            'tags': list(morceau['tags']),
+            'fichier_mp3': f"mp3/{filename}.mp3",
+        })
+    return fiches
+
+
+def _taille_synchrosafe(taille):
+    """Taille ID3v2.4: 4 octets de 7 bits"""
+    return bytes((taille >> decalage) & 0x7F for decalage in (21, 14, 7, 0))
+
+
+def _tag_id3(cadres):
+    """Tag ID3v2.4 minimal avec des cadres texte UTF-8"""
+    corps = b''
+    for identifiant, valeur in cadres:
+        donnees = b'\x03' + valeur.encode('utf-8')
+        corps += identifiant.encode('ascii') + _taille_synchrosafe(len(donnees)) + b'\x00\x00' + donnees
+    return b'ID3\x04\x00\x00' + _taille_synchrosafe(len(corps)) + corps
+
+
+# Trame MPEG-1 Layer III 128 kbit/s 44,1 kHz silencieuse (417 octets, ~26 ms)
+_TRAME_MP3 = b'\xff\xfb\x90\x64' + bytes(413)
+
+
+def ecrire_dossier_mp3(morceaux, output_dir, nb_trames=40, profondeur=2):
+    """Écrire un MP3 silencieux tagué (artiste, titre, BPM, clé, genre) par morceau
+
+    Les fichiers sont répartis dans des sous-dossiers (comme une vraie collection
+    rangée par artiste) sans dépendre de mutagen pour l'écriture.
+    """
+    output_dir = Path(output_dir)
+    audio = _TRAME_MP3 * nb_trames
+    noms_utilises = set()
+    for i, morceau in enumerate(morceaux):
+        filename = f"{morceau['artiste']} - {morceau['titre']}"
+        for caractere in '<>:"/\\|?*':
+            filename = filename.replace(caractere, '_')
+        if filename in noms_utilises:
+            filename = f"{filename} ({i})"
+        noms_utilises.add(filename)
+
+        dossier = output_dir.joinpath(*(f"{(i >> (8 * n)) % 256:02x}" for n in range(profondeur)))
+        dossier.mkdir(parents=True, exist_ok=True)
+        tag = _tag_id3([
+            ('TPE1', morceau['artiste']),
+            ('TIT2', morceau['titre']),
+            ('TBPM', str(morceau['bpm'])),
+            ('TKEY', morceau['key']),
+            ('TCON', '; '.join(morceau['genre'])),
+        ])
+        with open(dossier / f"{filename}.mp3", 'wb') as f:
+            f.write(tag + audio)
+
+    return len(morceaux)
+
+
+def ecrire_liste_chansons(morceaux, output_file, graine=42):
+    """Écrire une liste texte au format attendu par l'étape 1
+
+    Mélange les formats "Artiste - Titre" et "Titre par Artiste", avec des
+    commentaires et des lignes vides comme dans data/input/exemple_chansons.txt.
+    """
+    rng = random.Random(graine)
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write("# Liste synthétique générée pour les benchmarks\n")
+        f.write("# Format: Artiste - Titre ou Titre par Artiste\n\n")
+        for i, morceau in enumerate(morceaux):
+            if i % 50 == 0:
+                f.write(f"\n# Section {i // 50 + 1}\n")
+            if rng.random() < 0.1 and ' - ' not in morceau['titre'] and ' par ' not in morceau['artiste']:
+                f.write(f"{morceau['titre']} par {morceau['artiste']}\n")
+            else:
+                f.write(f"{morceau['artiste']} - {morceau['titre']}\n")
+
+    return len(morceaux)
+
+
+def ecrire_dossier_fiches(morceaux, output_dir, template_path=TEMPLATE_PATH, disposition=None):
+    """Écrire une fiche Markdown par morceau dans le format du template
+
+    Les doublons reçoivent le suffixe _01, _02... comme le fait l'étape 2.
+    Les fiches suivent la disposition du dossier, ou `disposition` si elle est donnée.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    gabarit = charger_gabarit_chanson(template_path)
+    if disposition is not None:
+        disposition_fiches.migrer(output_dir, disposition)
+    disposition = disposition_fiches.DispositionFiches(output_dir)
+
+    noms_utilises = {}
+    for morceau in morceaux:
+        filename = f"{morceau['artiste']} - {morceau['titre']}"
+        for caractere in '<>:"/\\|?*':
+            filename = filename.replace(caractere, '_')
+
+        compteur = noms_utilises.get(filename, 0)
+        noms_utilises[filename] = compteur + 1
+        nom_fiche = filename if compteur == 0 else f"{filename}_{compteur:02d}"
+
+        contenu = gabarit.rendre(
+            titre=morceau['titre'],
+            artiste=morceau['artiste'],
+            bpm=morceau['bpm'],
+            key=morceau['key'],
+            genre_list=morceau['genre'],
+            energie=morceau['energie'],
+            date_ajout=morceau['date_ajout'],
+            tags_list=morceau['tags'],
+            filename=filename,
+            notes_personnelles=["À compléter..."],
+            idees_mix=["À définir..."],
+            liens=["À ajouter..."],
+            notes_personnelles_detaillees="À compléter selon vos impressions...",
+            idees_mix_detaillees="À définir selon vos expériences de mix..."
+        )
+
+        with open(disposition.preparer(f"{nom_fiche}.md"), 'w', encoding='utf-8') as f:
+            f.write(contenu)
+
+    return len(morceaux)
+
+
+def parse_echelle(valeur):
+    """Convertir une échelle du type 1k, 10k, 1M en nombre de morceaux"""
+    valeur = str(valeur).strip()
+    multiplicateurs = {'k': 1_000, 'K': 1_000, 'm': 1_000_000, 'M': 1_000_000}
+    if valeur and valeur[-1] in multiplicateurs:
+        return int(float(valeur[:-1]) * multiplicateurs[valeur[-1]])
+    return int(valeur)
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Générer une bibliothèque synthétique")
+    parser.add_argument('echelle', help="Nombre de morceaux (ex: 1000, 10k, 1M)")
+    parser.add_argument('--dossier', default="data/synthetique", help="Dossier de sortie")
+    parser.add_argument('--graine', type=int, default=42, help="Graine aléatoire")
+    parser.add_argument('--doublons', type=float, default=0.05, help="Taux de doublons")
+    parser.add_argument('--sans-fiches', action='store_true', help="Ne générer que la liste texte")
+    args = parser.parse_args()
+
+    nb_morceaux = parse_echelle(args.echelle)
+    print(f"🎵 Génération de {nb_morceaux} morceaux synthétiques...")
+
+    morceaux = generer_morceaux(nb_morceaux, args.graine, args.doublons)
+    dossier = Path(args.dossier)
+
+    liste = dossier / "liste_chansons.txt"
+    ecrire_liste_chansons(morceaux, liste, args.graine)
+    print(f"✅ Liste: {liste}")
+
+    if not args.sans_fiches:
+        ecrire_dossier_fiches(morceaux, dossier / "chansons")
+        print(f"✅ Fiches: {dossier / 'chansons'}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
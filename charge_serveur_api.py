@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Test de charge de l'API locale
+Plusieurs clients à connexions persistantes rejouent un mélange de requêtes
+de tablette (recherche, filtres BPM/clé/énergie, pages de playlists avec
+revalidation ETag) et mesurent débit et latences
+
+Sans --url, un serveur est lancé dans ce processus sur une bibliothèque
+synthétique (--morceaux fiches écrites dans un dossier temporaire).
+"""
+
+import sys
+import time
+import json
+import random
+import tempfile
+import argparse
+import threading
+import http.client
+from pathlib import Path
+from urllib.parse import urlsplit, quote
+
+import bibliotheque_synthetique as synth
+
+NB_CLIENTS = 8
+NB_REQUETES = 4000
+OBJECTIF_RPS = 200
+
+
+def _requetes(playlists, nb, graine=42):
+    """Mélange de requêtes de tablette: (chemin, revalider avec ETag)"""
+    rng = random.Random(graine)
+    mots = ['love', 'night', 'dance', 'the', 'fire', 'mix']
+    cles = ['8a', '9a', '5b', '11b']
+    requetes = []
+    for _ in range(nb):
+        tirage = rng.random()
+        if tirage < 0.3:
+            nom = rng.choice(playlists)
+            requetes.append((f"/api/playlists/{quote(nom)}?page={rng.randint(1, 3)}", True))
+        elif tirage < 0.55:
+            bpm = rng.randrange(90, 140, 2)
+            requetes.append((f"/api/morceaux?bpm_min={bpm}&bpm_max={bpm + 4}&page={rng.randint(1, 3)}", False))
+        elif tirage < 0.75:
+            requetes.append((f"/api/morceaux?q={rng.choice(mots)}&page={rng.randint(1, 5)}", False))
+        elif tirage < 0.9:
+            requetes.append((f"/api/morceaux?key={rng.choice(cles)}&energie_min={rng.randint(3, 8)}", False))
+        else:
+            requetes.append((rng.choice(["/api/playlists", "/api/genres", "/api/etat"]), False))
+    return requetes
+
+
+def _client(hote, port, requetes, gzip, resultats, verrou):
+    """Un client: une connexion persistante, requêtes enchaînées"""
+    connexion = http.client.HTTPConnection(hote, port, timeout=30)
+    etags = {}
+    latences, statuts = [], {}
+    for chemin, revalider in requetes:
+        entetes = {'Accept-Encoding': 'gzip'} if gzip else {}
+        if revalider and chemin in etags:
+            entetes['If-None-Match'] = etags[chemin]
+        debut = time.perf_counter()
+        try:
+            connexion.request("GET", chemin, headers=entetes)
+            reponse = connexion.getresponse()
+            reponse.read()
+        except (OSError, http.client.HTTPException):
+            connexion.close()
+            connexion = http.client.HTTPConnection(hote, port, timeout=30)
+            statuts['erreur'] = statuts.get('erreur', 0) + 1
+            continue
+        latences.append(time.perf_counter() - debut)
+        statuts[reponse.status] = statuts.get(reponse.status, 0) + 1
+        if reponse.getheader('ETag'):
+            etags[chemin] = reponse.getheader('ETag')
+    connexion.close()
+    with verrou:
+        resultats['latences'].extend(latences)
+        for statut, nombre in statuts.items():
+            resultats['statuts'][statut] = resultats['statuts'].get(statut, 0) + nombre
+
+
+def lancer_charge(url, nb_clients=NB_CLIENTS, nb_requetes=NB_REQUETES, gzip=True):
+    """Rejouer nb_requetes réparties sur nb_clients; renvoie débit, latences et statuts"""
+    adresse = urlsplit(url)
+    connexion = http.client.HTTPConnection(adresse.hostname, adresse.port, timeout=30)
+    connexion.request("GET", "/api/playlists")
+    playlists = [p['name'] for p in json.loads(connexion.getresponse().read())]
+    connexion.close()
+
+    requetes = _requetes(playlists, nb_requetes)
+    resultats = {'latences': [], 'statuts': {}}
+    verrou = threading.Lock()
+    clients = [threading.Thread(target=_client, args=(adresse.hostname, adresse.port, requetes[i::nb_clients],
+                                                      gzip, resultats, verrou))
+               for i in range(nb_clients)]
+    debut = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    duree = time.perf_counter() - debut
+
+    latences = sorted(resultats['latences'])
+    def centile(p):
+        return round(latences[min(len(latences) - 1, int(len(latences) * p))] * 1000, 2) if latences else None
+    return {
+        'requetes': len(latences),
+        'duree_s': round(duree, 3),
+        'requetes_par_s': round(len(latences) / duree, 1) if duree else None,
+        'latence_p50_ms': centile(0.50),
+        'latence_p95_ms': centile(0.95),
+        'latence_p99_ms': centile(0.99),
+        'statuts': {str(k): v for k, v in sorted(resultats['statuts'].items(), key=str)},
+    }
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Test de charge de l'API locale")
+    parser.add_argument('--url', default=None, help="API déjà lancée (ex: http://127.0.0.1:8765)")
+    parser.add_argument('--morceaux', type=int, default=10000,
+                        help="Taille de la bibliothèque synthétique (sans --url)")
+    parser.add_argument('--clients', type=int, default=NB_CLIENTS, help="Clients simultanés")
+    parser.add_argument('--requetes', type=int, default=NB_REQUETES, help="Nombre total de requêtes")
+    parser.add_argument('--sans-gzip', action='store_true', help="Ne pas demander de réponses compressées")
+    parser.add_argument('--objectif', type=float, default=OBJECTIF_RPS,
+                        help="Débit minimal attendu (requêtes/s), code de sortie 1 en dessous")
+    args = parser.parse_args()
+
+    print("🏋️ Assistant DJ - Test de charge de l'API")
+    print("="*50)
+
+    serveur = None
+    dossier = None
+    try:
+        url = args.url
+        if url is None:
+            import serveur_api
+            dossier = tempfile.TemporaryDirectory()
+            chansons = Path(dossier.name) / "chansons"
+            synth.ecrire_dossier_fiches(synth.generer_morceaux(args.morceaux, 42), chansons)
+            serveur = serveur_api.demarrer(chansons, port=0, rechargement=False)
+            url = f"http://127.0.0.1:{serveur.server_address[1]}"
+            print(f"📡 Serveur local sur {url} ({args.morceaux} morceaux synthétiques)")
+
+        mesure = lancer_charge(url, args.clients, args.requetes, not args.sans_gzip)
+        print(f"✅ {mesure['requetes']} requêtes en {mesure['duree_s']}s → {mesure['requetes_par_s']} req/s")
+        print(f"⏱️  Latences p50 {mesure['latence_p50_ms']} ms | p95 {mesure['latence_p95_ms']} ms "
+              f"| p99 {mesure['latence_p99_ms']} ms")
+        print(f"📊 Statuts: {mesure['statuts']}")
+
+        if 'erreur' in mesure['statuts'] or mesure['requetes_par_s'] < args.objectif:
+            print(f"❌ Objectif non atteint ({args.objectif} req/s sans erreur)")
+            return 1
+        return 0
+
+    except Exception as e:
+        print(f"❌ Erreur: {str(e)}")
+        return 1
+    finally:
+        if serveur is not None:
+            serveur.shutdown()
+            serveur.server_close()
+        if dossier is not None:
+            dossier.cleanup()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Dédoublonnage des fiches
+Détecter les fiches en double (copies _01/_02, variantes "(Official Video)", fautes de frappe)
+et les regrouper, ou fusionner chaque groupe dans une seule fiche
+
+Le travail reste quasi linéaire:
+  1. blocage par clé normalisée: les variantes d'un même morceau tombent dans le même bloc
+  2. voisinage trié: dans chaque artiste, un titre n'est comparé qu'à ses voisins
+     dans l'ordre alphabétique (et dans l'ordre des titres inversés, pour les fautes
+     en début de titre), au lieu de toutes les paires
+"""
+
+import re
+import sys
+import shutil
+import argparse
+from pathlib import Path
+from difflib import SequenceMatcher
+from collections import defaultdict
+
+from instrumentation import span, compter
+from normalisation import cle_morceau
+from disposition_fiches import lister_fiches
+from outils_fichiers import ecrire_atomique
+from patch_fiches import remplacer_liste
+
+DOSSIER_CHANSONS = "data/output/chansons"
+DOSSIER_ARCHIVE = "data/output/doublons"
+SEUIL_SIMILARITE = 0.90
+SEUIL_MOT = 0.75
+FENETRE = 4
+
+_SUFFIXE_COPIE = re.compile(r'_\d{2}$')
+_CHIFFRES = re.compile(r'\d+')
+_MOTS_VERSION = re.compile(r'\b(?:remix|mix|live|edit|dub|instrumental|acoustic|acapella|rework|bootleg|vip)\b')
+_ENTETE = re.compile(r'^(titre|artiste|bpm):\s*(.*)$')
+
+# Listes de l'en-tête remplies par l'utilisateur, reprises des doublons à la fusion
+LISTES_UTILISATEUR = ('Notes Personnelles', 'Idées de Mix', 'Liens')
+# Valeurs des gabarits: jamais reprises d'un doublon, remplacées par les vraies valeurs
+VALEURS_A_REMPLIR = {'À compléter...', 'À définir...', 'À ajouter...'}
+
+
+def lire_entete(file_path):
+    """Lire titre, artiste et bpm d'une fiche sans parser le reste du fichier"""
+    fiche = {'file_path': Path(file_path)}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            if ligne.startswith(('genre:', '---')):
+                break
+            match = _ENTETE.match(ligne)
+            if match:
+                fiche[match.group(1)] = match.group(2).strip()
+    compter('fichiers_lus')
+    return fiche
+
+
+def charger_fiches(songs_dir=DOSSIER_CHANSONS):
+    """Lire l'en-tête de toutes les fiches d'un dossier"""
+    songs_dir = Path(songs_dir)
+    if not songs_dir.exists():
+        raise FileNotFoundError(f"Dossier des chansons non trouvé: {songs_dir}")
+
+    chemins = lister_fiches(songs_dir)
+
+    fiches = []
+    for chemin in chemins:
+        try:
+            fiches.append(lire_entete(chemin))
+        except Exception as e:
+            print(f"⚠️  Erreur lors de la lecture de {chemin}: {str(e)}")
+    return fiches
+
+
+def similarite(a, b, seuil=SEUIL_SIMILARITE):
+    """Score de similarité entre deux titres normalisés (0 si sous le seuil)
+
+    Les bornes rapides de SequenceMatcher écartent la plupart des paires avant
+    le calcul complet. Deux titres dont les numéros ou les mentions de version
+    diffèrent ("Part 1"/"Part 2", "Remix"/"Live") ne sont jamais des doublons,
+    pas plus que deux titres qui diffèrent d'un mot entier ("Fever"/"Me Fever"):
+    seule une faute de frappe dans un mot est tolérée.
+    """
+    longueur = len(a) + len(b)
+    if not longueur or 2 * min(len(a), len(b)) / longueur < seuil:
+        return 0.0
+    if _CHIFFRES.findall(a) != _CHIFFRES.findall(b):
+        return 0.0
+    if set(_MOTS_VERSION.findall(a)) != set(_MOTS_VERSION.findall(b)):
+        return 0.0
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    if matcher.real_quick_ratio() < seuil or matcher.quick_ratio() < seuil:
+        return 0.0
+    score = matcher.ratio()
+    if score < seuil:
+        return 0.0
+
+    mots_a, mots_b = a.split(), b.split()
+    if len(mots_a) != len(mots_b):
+        # "dont stop" / "dontstop": seuls les espaces diffèrent
+        return score if ''.join(mots_a) == ''.join(mots_b) else 0.0
+    differents = [(x, y) for x, y in zip(mots_a, mots_b) if x != y]
+    if len(differents) > 1:
+        return 0.0
+    for x, y in differents:
+        if SequenceMatcher(None, x, y, autojunk=False).ratio() < SEUIL_MOT:
+            return 0.0
+    return score
+
+
+def trouver_doublons(morceaux, seuil=SEUIL_SIMILARITE, fenetre=FENETRE, statistiques=None):
+    """Regrouper les morceaux en double
+
+    `morceaux` est une liste de dictionnaires avec 'artiste' et 'titre'.
+    Renvoie la liste des groupes (listes d'indices, au moins deux éléments).
+    """
+    parents = list(range(len(morceaux)))
+
+    def racine(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    def unir(i, j):
+        ri, rj = racine(i), racine(j)
+        if ri != rj:
+            parents[max(ri, rj)] = min(ri, rj)
+
+    # 1. Blocage: même clé normalisée → même morceau
+    par_cle = defaultdict(list)
+    for i, morceau in enumerate(morceaux):
+        par_cle[cle_morceau(morceau.get('artiste', ''), morceau.get('titre', ''))].append(i)
+    for membres in par_cle.values():
+        for j in membres[1:]:
+            unir(membres[0], j)
+
+    # 2. Quasi-doublons: voisinage trié des titres distincts de chaque artiste
+    par_artiste = defaultdict(dict)
+    for cle, membres in par_cle.items():
+        artiste, titre = cle.split('|', 1)
+        par_artiste[artiste][titre] = membres[0]
+
+    comparaisons = 0
+    for titres in par_artiste.values():
+        if len(titres) < 2:
+            continue
+        for ordre in (sorted(titres), sorted(titres, key=lambda t: t[::-1])):
+            for k, titre in enumerate(ordre):
+                for autre in ordre[k + 1:k + 1 + fenetre]:
+                    comparaisons += 1
+                    if similarite(titre, autre, seuil):
+                        unir(titres[titre], titres[autre])
+    compter('comparaisons', comparaisons)
+
+    groupes = defaultdict(list)
+    for i in range(len(morceaux)):
+        groupes[racine(i)].append(i)
+    resultat = [membres for membres in groupes.values() if len(membres) > 1]
+
+    if statistiques is not None:
+        statistiques['blocs'] = len(par_cle)
+        statistiques['comparaisons'] = comparaisons
+        statistiques['groupes'] = len(resultat)
+        statistiques['doublons'] = sum(len(g) - 1 for g in resultat)
+    return resultat
+
+
+def choisir_reference(fiches):
+    """Fiche conservée d'un groupe: l'originale (sans _01/_02), puis la plus complète"""
+    def priorite(fiche):
+        nom = fiche['file_path'].stem
+        return (bool(_SUFFIXE_COPIE.search(nom)), not fiche.get('bpm'), len(nom), nom)
+    return min(fiches, key=priorite)
+
+
+def _elements_liste(entete, champ):
+    """Valeurs des lignes "  - valeur" d'une liste de l'en-tête"""
+    match = re.search(rf'^{re.escape(champ)}:[ \t]*\r?\n((?:[ \t]+-[^\n]*\n?)*)', entete, re.M)
+    if not match:
+        return []
+    return [ligne.strip()[1:].strip() for ligne in match.group(1).splitlines() if ligne.strip()]
+
+
+def _fusionner_listes(entete, entetes_doublons):
+    """En-tête de référence complété des éléments de listes propres aux doublons"""
+    for champ in LISTES_UTILISATEUR:
+        elements = _elements_liste(entete, champ)
+        ajouts = [element for autre in entetes_doublons for element in _elements_liste(autre, champ)
+                  if element not in VALEURS_A_REMPLIR]
+        nouveaux = [element for element in dict.fromkeys(ajouts) if element not in elements]
+        if nouveaux:
+            valeurs = [element for element in elements if element not in VALEURS_A_REMPLIR] + nouveaux
+            entete = remplacer_liste(entete, champ, valeurs)
+    return entete
+
+
+def _notes(contenu):
+    """Partie libre d'une fiche (après le séparateur ---)"""
+    _, separateur, notes = contenu.partition('\n---\n')
+    return notes.strip() if separateur else ''
+
+
+def _destination_libre(archive_dir, nom):
+    """Chemin d'archive qui n'écrase pas une fiche déjà archivée"""
+    destination = archive_dir / nom
+    compteur = 1
+    while destination.exists():
+        destination = archive_dir / f"{Path(nom).stem}.{compteur}{Path(nom).suffix}"
+        compteur += 1
+    return destination
+
+
+def fusionner_groupe(fiches, archive_dir=DOSSIER_ARCHIVE):
+    """Fusionner un groupe dans sa fiche de référence
+
+    Les notes personnelles propres à un doublon sont ajoutées à la fiche
+    conservée, comme les éléments de ses listes d'en-tête (Notes Personnelles,
+    Idées de Mix, Liens); les doublons sont déplacés dans le dossier d'archive
+    (jamais supprimés).
+    """
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+
+    reference = choisir_reference(fiches)
+    with open(reference['file_path'], 'r', encoding='utf-8') as f:
+        contenu = f.read()
+    entete, separateur, corps = contenu.partition('\n---\n')
+
+    # Seules les lignes de notes absentes de la fiche conservée sont reprises
+    connues = {ligne.strip() for ligne in contenu.splitlines()}
+    ajouts = []
+    entetes_doublons = []
+    for fiche in fiches:
+        if fiche is reference:
+            continue
+        with open(fiche['file_path'], 'r', encoding='utf-8') as f:
+            contenu_doublon = f.read()
+        entetes_doublons.append(contenu_doublon.partition('\n---\n')[0] + '\n')
+        propres = [ligne for ligne in _notes(contenu_doublon).splitlines()
+                   if ligne.strip() and ligne.strip() not in connues]
+        if propres:
+            connues.update(ligne.strip() for ligne in propres)
+            ajouts.append(f"\n\n## 🔀 Fusionné depuis {fiche['file_path'].stem}\n\n" + '\n'.join(propres) + "\n")
+
+    # Listes de l'en-tête (notes, idées de mix, liens) complétées par celles des doublons
+    nouvel_entete = _fusionner_listes(entete + '\n', entetes_doublons)[:-1]
+    if nouvel_entete != entete:
+        contenu = nouvel_entete + separateur + corps
+    if ajouts:
+        contenu = contenu.rstrip('\n') + ''.join(ajouts)
+    if ajouts or nouvel_entete != entete:
+        ecrire_atomique(reference['file_path'], contenu)
+
+    for fiche in fiches:
+        if fiche is not reference:
+            shutil.move(str(fiche['file_path']), str(_destination_libre(archive_dir, fiche['file_path'].name)))
+            compter('fichiers_archives')
+
+    return reference
+
+
+def afficher_groupes(fiches, groupes, limite=None):
+    """Afficher le rapport des groupes de doublons"""
+    for numero, groupe in enumerate(groupes[:limite], 1):
+        membres = [fiches[i] for i in groupe]
+        reference = choisir_reference(membres)
+        print(f"\n🔁 Groupe {numero}: {reference.get('artiste', '?')} - {reference.get('titre', '?')}")
+        for fiche in sorted(membres, key=lambda f: f['file_path'].name):
+            marque = "✅" if fiche is reference else "  "
+            print(f"   {marque} {fiche['file_path'].name}")
+    if limite is not None and len(groupes) > limite:
+        print(f"\n... et {len(groupes) - limite} autres groupes")
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Détecter et fusionner les fiches en double")
+    parser.add_argument('--dossier', default=DOSSIER_CHANSONS, help="Dossier des fiches")
+    parser.add_argument('--fusionner', action='store_true',
+                        help="Fusionner chaque groupe et archiver les doublons")
+    parser.add_argument('--archive', default=DOSSIER_ARCHIVE, help="Dossier d'archive des doublons")
+    parser.add_argument('--seuil', type=float, default=SEUIL_SIMILARITE,
+                        help="Similarité minimale des titres (0-1)")
+    parser.add_argument('--limite', type=int, default=50, help="Nombre de groupes affichés")
+    args = parser.parse_args()
+
+    print("🔍 Assistant DJ - Dédoublonnage des fiches")
+    print("="*50)
+
+    try:
+        with span("dedoublonnage"):
+            with span("lecture"):
+                fiches = charger_fiches(args.dossier)
+            print(f"📁 {len(fiches)} fiches lues dans {args.dossier}")
+
+            statistiques = {}
+            with span("detection"):
+                groupes = trouver_doublons(fiches, args.seuil, statistiques=statistiques)
+
+            if not groupes:
+                print("✅ Aucun doublon détecté")
+                return 0
+
+            afficher_groupes(fiches, groupes, args.limite)
+            print(f"\n📊 {statistiques['groupes']} groupes, {statistiques['doublons']} doublons "
+                  f"({statistiques['comparaisons']} comparaisons)")
+
+            if args.fusionner:
+                with span("fusion"):
+                    for groupe in groupes:
+                        fusionner_groupe([fiches[i] for i in groupe], args.archive)
+                print(f"🗂️  {statistiques['doublons']} doublons archivés dans {args.archive}")
+            else:
+                print("💡 Relancez avec --fusionner pour archiver les doublons")
+        return 0
+
+    except Exception as e:
+        print(f"❌ Erreur: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
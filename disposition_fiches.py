@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Disposition du dossier des fiches
+Répartir data/output/chansons/ en sous-dossiers pour les grandes bibliothèques
+
+Un dossier plat de 100k fiches ralentit chaque scan, chaque test d'existence
+(suffixes _01, _02...) et les outils de synchronisation. Dispositions :
+- plat     : toutes les fiches à la racine (défaut)
+- lettre   : par initiale normalisée (é → e, chiffres dans 0-9, le reste dans _)
+- hachage  : par préfixe de 2 chiffres hexadécimaux (256 sous-dossiers équilibrés)
+
+La disposition est notée dans chansons/.disposition; les scripts qui créent
+des fiches la suivent, ceux qui les lisent parcourent racine et sous-dossiers
+quelle que soit la disposition (un dossier en cours de migration reste lisible).
+"""
+
+import os
+import re
+import sys
+import hashlib
+import argparse
+from pathlib import Path
+from operator import attrgetter
+
+from instrumentation import compter
+from normalisation import retirer_accents
+from outils_fichiers import ecrire_atomique
+
+DOSSIER_CHANSONS = "data/output/chansons"
+FICHIER_DISPOSITION = ".disposition"
+# Noms des sous-dossiers possibles: a-z, 0-9, _ (lettre) ou 00-ff (hachage)
+_SOUS_DOSSIER = re.compile(r'^(?:[a-z]|0-9|_|[0-9a-f]{2})$')
+
+
+def _par_lettre(nom_fichier):
+    initiale = retirer_accents(nom_fichier[:1].casefold())[:1]
+    if 'a' <= initiale <= 'z':
+        return initiale
+    if '0' <= initiale <= '9':
+        return '0-9'
+    return '_'
+
+
+def _par_hachage(nom_fichier):
+    return hashlib.md5(nom_fichier.encode('utf-8')).hexdigest()[:2]
+
+
+# Disposition → sous-dossier d'une fiche d'après son nom de fichier (None: racine)
+DISPOSITIONS = {
+    'plat': None,
+    'lettre': _par_lettre,
+    'hachage': _par_hachage,
+}
+
+
+def lire_disposition(songs_dir=DOSSIER_CHANSONS):
+    """Disposition notée dans le dossier ('plat' sans fichier .disposition)"""
+    try:
+        with open(Path(songs_dir) / FICHIER_DISPOSITION, 'r', encoding='utf-8') as f:
+            nom = f.read().strip()
+    except FileNotFoundError:
+        return 'plat'
+    if nom not in DISPOSITIONS:
+        raise ValueError(f"Disposition inconnue dans {songs_dir}: {nom}")
+    return nom
+
+
+class DispositionFiches:
+    """Emplacement des fiches d'un dossier selon sa disposition"""
+
+    def __init__(self, songs_dir=DOSSIER_CHANSONS, nom=None):
+        self.dossier = Path(songs_dir)
+        self.nom = nom or lire_disposition(songs_dir)
+        self._sous_dossier = DISPOSITIONS[self.nom]
+        self._prets = set()
+        self._reserves = set()
+
+    def chemin(self, nom_fichier):
+        """Chemin d'une fiche d'après son nom (qu'elle existe ou non)"""
+        if self._sous_dossier is None:
+            return self.dossier / nom_fichier
+        return self.dossier / self._sous_dossier(nom_fichier) / nom_fichier
+
+    def preparer(self, nom_fichier):
+        """Chemin d'une fiche à écrire, son sous-dossier créé au besoin"""
+        chemin = self.chemin(nom_fichier)
+        parent = chemin.parent
+        if parent not in self._prets:
+            parent.mkdir(parents=True, exist_ok=True)
+            self._prets.add(parent)
+        return chemin
+
+    def chemin_libre(self, nom_base, extension=".md"):
+        """Premier chemin libre parmi nom, nom_01, nom_02... (même règle que l'étape 2)
+
+        Le chemin renvoyé est réservé: une fiche pas encore écrite (écriture en
+        arrière-plan) n'est pas attribuée deux fois.
+        """
+        chemin = self.preparer(f"{nom_base}{extension}")
+        compteur = 1
+        while chemin in self._reserves or chemin.exists():
+            chemin = self.preparer(f"{nom_base}_{compteur:02d}{extension}")
+            compteur += 1
+        self._reserves.add(chemin)
+        return chemin
+
+
+def parcourir_fiches(songs_dir=DOSSIER_CHANSONS):
+    """Entrées os.scandir des fiches .md, à la racine puis dans les sous-dossiers de répartition"""
+    with os.scandir(songs_dir) as entrees:
+        for entree in entrees:
+            if entree.name.endswith('.md'):
+                if entree.is_file():
+                    yield entree
+            elif _SOUS_DOSSIER.match(entree.name) and entree.is_dir():
+                with os.scandir(entree.path) as sous_entrees:
+                    for sous_entree in sous_entrees:
+                        if sous_entree.name.endswith('.md') and sous_entree.is_file():
+                            yield sous_entree
+
+
+def lister_fiches(songs_dir=DOSSIER_CHANSONS):
+    """Chemins de toutes les fiches d'un dossier, quelle que soit sa disposition
+
+    Triés par nom de fichier: l'ordre (et donc les ex aequo du set et des
+    playlists) ne dépend ni de la disposition ni du système de fichiers.
+    Path.iterdir() construit les chemins enfants sans réanalyser le texte,
+    bien moins cher que Path(entree.path) sur 100k fiches.
+    """
+    fichiers = []
+    sous_dossiers = []
+    for chemin in Path(songs_dir).iterdir():
+        nom = chemin.name
+        if nom.endswith('.md'):
+            fichiers.append(chemin)
+        elif _SOUS_DOSSIER.match(nom) and chemin.is_dir():
+            sous_dossiers.append(chemin)
+    for sous_dossier in sous_dossiers:
+        fichiers.extend(chemin for chemin in sous_dossier.iterdir() if chemin.name.endswith('.md'))
+    fichiers.sort(key=attrgetter('name'))
+    compter('fichiers_scannes', len(fichiers))
+    return fichiers
+
+
+def migrer(songs_dir=DOSSIER_CHANSONS, nom='hachage'):
+    """Déplacer les fiches existantes vers une disposition (renommages sur place)
+
+    La disposition est notée avant les déplacements: les fiches créées pendant
+    la migration vont directement au bon endroit, et une migration interrompue
+    se termine en relançant la commande.
+    """
+    if nom not in DISPOSITIONS:
+        raise ValueError(f"Disposition inconnue: {nom} ({', '.join(DISPOSITIONS)})")
+    songs_dir = Path(songs_dir)
+    if not songs_dir.exists():
+        raise FileNotFoundError(f"Dossier des chansons non trouvé: {songs_dir}")
+
+    ecrire_atomique(songs_dir / FICHIER_DISPOSITION, f"{nom}\n")
+    disposition = DispositionFiches(songs_dir, nom)
+    stats = {'deplacees': 0, 'en_place': 0, 'conflits': 0}
+    for entree in list(parcourir_fiches(songs_dir)):
+        destination = disposition.chemin(entree.name)
+        if str(destination) == entree.path:
+            stats['en_place'] += 1
+            continue
+        if destination.exists():
+            # Même nom à la racine et dans un sous-dossier: on ne choisit pas à la place de l'utilisateur
+            print(f"⚠️  Conflit, fiche laissée en place: {entree.path} ({destination} existe)")
+            stats['conflits'] += 1
+            continue
+        os.rename(entree.path, disposition.preparer(entree.name))
+        stats['deplacees'] += 1
+
+    # Sous-dossiers vidés par la migration (os.rmdir refuse un dossier non vide)
+    with os.scandir(songs_dir) as entrees:
+        for entree in entrees:
+            if _SOUS_DOSSIER.match(entree.name) and entree.is_dir():
+                try:
+                    os.rmdir(entree.path)
+                except OSError:
+                    pass
+    return stats
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Répartir les fiches en sous-dossiers")
+    parser.add_argument('--chansons', default=DOSSIER_CHANSONS, help="Dossier des fiches")
+    parser.add_argument('--migrer', choices=list(DISPOSITIONS), default=None,
+                        help="Déplacer les fiches vers cette disposition")
+    args = parser.parse_args()
+
+    print("🗂️  Assistant DJ - Disposition des fiches")
+    print("="*50)
+
+    try:
+        if args.migrer:
+            stats = migrer(args.chansons, args.migrer)
+            print(f"✅ Disposition '{args.migrer}': {stats['deplacees']} fiche(s) déplacée(s), "
+                  f"{stats['en_place']} déjà en place, {stats['conflits']} conflit(s)")
+            return 1 if stats['conflits'] else 0
+
+        if not Path(args.chansons).exists():
+            raise FileNotFoundError(f"Dossier des chansons non trouvé: {args.chansons}")
+        fiches = lister_fiches(args.chansons)
+        sous_dossiers = {chemin.parent for chemin in fiches} - {Path(args.chansons)}
+        print(f"📁 {args.chansons}: disposition '{lire_disposition(args.chansons)}', "
+              f"{len(fiches)} fiches, {len(sous_dossiers)} sous-dossier(s)")
+        print("💡 Relancez avec --migrer lettre|hachage|plat pour changer de disposition")
+        return 0
+
+    except Exception as e:
+        print(f"❌ Erreur: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
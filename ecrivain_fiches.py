@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Écriture des fiches en arrière-plan
+Les fiches rendues passent par une file bornée et sont écrites par un petit
+pool de threads, chacune dans un fichier temporaire renommé atomiquement
+
+Sur un partage réseau ou une clé USB lente, chaque open()/write()/close()
+attend le support: écrire plusieurs fiches à la fois recouvre ces attentes.
+La file bornée garde la mémoire constante (le producteur attend si les
+threads sont en retard) et la console n'affiche qu'un nombre limité de
+lignes par seconde.
+"""
+
+import time
+import queue
+import threading
+
+from instrumentation import compter
+from outils_fichiers import ecrire_atomique
+
+NB_THREADS = 16
+TAILLE_FILE = 256
+LIGNES_PAR_SECONDE = 5
+_FIN = object()
+
+
+class JournalLimite:
+    """Affichage limité à quelques lignes par seconde; les lignes en trop sont comptées"""
+
+    def __init__(self, lignes_par_seconde=LIGNES_PAR_SECONDE, afficher=print):
+        self.intervalle = 1.0 / lignes_par_seconde if lignes_par_seconde else 0.0
+        self.afficher = afficher
+        self.prochain = 0.0
+        self.masquees = 0
+        self._verrou = threading.Lock()
+
+    def __call__(self, texte):
+        with self._verrou:
+            maintenant = time.monotonic()
+            if maintenant < self.prochain:
+                self.masquees += 1
+                return
+            self.prochain = maintenant + self.intervalle
+            masquees, self.masquees = self.masquees, 0
+        if masquees:
+            texte = f"{texte}  (+{masquees} ligne(s) non affichée(s))"
+        self.afficher(texte)
+
+    def terminer(self):
+        """Signaler les lignes masquées depuis le dernier affichage"""
+        with self._verrou:
+            masquees, self.masquees = self.masquees, 0
+        if masquees:
+            self.afficher(f"   ... et {masquees} autre(s)")
+
+
+class EcrivainFiches:
+    """File bornée de fiches (chemin, contenu) écrites par un pool de threads
+
+    S'utilise comme gestionnaire de contexte: à la sortie, la file est vidée,
+    les threads arrêtés et `stats` contient le bilan (fiches, erreurs, débit).
+    Les erreurs d'écriture sont collectées puis levées par fermer(). Chaque
+    fiche écrite est annoncée au `journal` (JournalLimite, ou print).
+    """
+
+    def __init__(self, nb_threads=NB_THREADS, taille_file=TAILLE_FILE, journal=None, prefixe="✅ Écrit: ",
+                 ecrire=ecrire_atomique):
+        self.ecrire = ecrire
+        self.journal = journal
+        self.prefixe = prefixe
+        self.file = queue.Queue(maxsize=taille_file)
+        self.erreurs = []
+        self.stats = {'fiches': 0, 'erreurs': 0, 'duree_s': 0.0, 'fiches_par_s': None}
+        self._verrou = threading.Lock()
+        self._debut = time.perf_counter()
+        self._threads = [threading.Thread(target=self._travailler, name=f"ecrivain-{i}", daemon=True)
+                         for i in range(max(1, nb_threads))]
+        for thread in self._threads:
+            thread.start()
+
+    def _travailler(self):
+        while True:
+            element = self.file.get()
+            if element is _FIN:
+                return
+            chemin, contenu = element
+            try:
+                self.ecrire(chemin, contenu)
+            except Exception as e:
+                with self._verrou:
+                    self.erreurs.append((chemin, e))
+                    self.stats['erreurs'] += 1
+                continue
+            with self._verrou:
+                self.stats['fiches'] += 1
+            if self.journal is not None:
+                self.journal(f"{self.prefixe}{chemin.name}")
+
+    def soumettre(self, chemin, contenu):
+        """Mettre une fiche en file (attend si la file est pleine)"""
+        if self._threads is None:
+            raise Exception("Écrivain de fiches déjà fermé")
+        self.file.put((chemin, contenu))
+
+    def fermer(self):
+        """Attendre l'écriture de toutes les fiches en file; renvoie les statistiques"""
+        if self._threads is None:
+            return self.stats
+        for _ in self._threads:
+            self.file.put(_FIN)
+        for thread in self._threads:
+            thread.join()
+        self._threads = None
+        duree = time.perf_counter() - self._debut
+        self.stats['duree_s'] = round(duree, 3)
+        self.stats['fiches_par_s'] = round(self.stats['fiches'] / duree, 1) if duree else None
+        # Compteurs du span courant, mis à jour depuis ce thread seulement
+        compter('fichiers_ecrits', self.stats['fiches'])
+        if self.journal is not None and hasattr(self.journal, 'terminer'):
+            self.journal.terminer()
+        if self.erreurs:
+            chemin, erreur = self.erreurs[0]
+            raise Exception(f"{len(self.erreurs)} fiche(s) non écrite(s), dont {chemin}: {str(erreur)}")
+        return self.stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.fermer()
+        else:
+            # Erreur côté producteur: on termine les écritures en cours sans masquer l'exception
+            try:
+                self.fermer()
+            except Exception:
+                pass
+
+
+def rapport(stats):
+    """Ligne de bilan d'un écrivain fermé"""
+    return (f"💾 {stats['fiches']} fiche(s) écrite(s) en {stats['duree_s']}s "
+            f"({stats['fiches_par_s']} fiches/s)")
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Export vers les logiciels DJ
+Écrire la bibliothèque et les playlists générées en XML Rekordbox (DJ_PLAYLISTS)
+et en collection Traktor (NML)
+
+Les fichiers sont écrits au fil de l'eau avec XMLGenerator: aucun arbre XML
+n'est construit en mémoire, un morceau est parsé, écrit puis oublié. Les
+sections dont l'en-tête porte un nombre d'entrées (COLLECTION, playlists)
+passent par un fichier temporaire le temps de les compter.
+"""
+
+import io
+import re
+import sys
+import uuid
+import argparse
+import tempfile
+from pathlib import Path
+from xml.sax.saxutils import XMLGenerator
+
+from instrumentation import span, compter
+from outils_fichiers import ouvrir_atomique
+from genere_playlists1 import scan_songs_directory, parse_song_file
+
+DOSSIER_CHANSONS = "data/output/chansons"
+DOSSIER_PLAYLISTS = "data/playlists"
+DOSSIER_EXPORT = "data/export"
+FICHIER_REKORDBOX = "rekordbox.xml"
+FICHIER_TRAKTOR = "collection.nml"
+# La playlist complète double la collection: inutile de l'importer
+PLAYLISTS_EXCLUES = {"Playlist_Complete"}
+
+# Caractères interdits en XML 1.0 (un titre YouTube peut en contenir)
+_CARACTERES_INVALIDES = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+# Lecteur Windows en tête de chemin ("C:/...")
+_LECTEUR = re.compile(r'^[A-Za-z]:(?=/|$)')
+
+
+class _TableURI(dict):
+    """Table str.translate() d'encodage URI, remplie au premier usage de chaque caractère"""
+    _SURS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789/:._~-")
+
+    def __missing__(self, code):
+        caractere = chr(code)
+        if caractere in self._SURS:
+            valeur = caractere
+        else:
+            valeur = ''.join(f"%{octet:02X}" for octet in caractere.encode('utf-8', 'surrogatepass'))
+        self[code] = valeur
+        return valeur
+
+
+_ENCODAGE_URI = _TableURI()
+
+# Notation Traktor: 0-11 majeur (C, C#...), 12-23 mineur (Cm, C#m...)
+_NOTES = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+_CLE = re.compile(r'^([A-Ga-g])([#b♯♭]?)\s*(m|min|minor|mineur)?$')
+_CAMELOT = re.compile(r'^(1[0-2]|[1-9])([ABab])$')
+# Camelot "nA"/"nB" → valeur Traktor
+_CAMELOT_MINEUR = {1: 20, 2: 15, 3: 22, 4: 17, 5: 12, 6: 19, 7: 14, 8: 21, 9: 16, 10: 23, 11: 18, 12: 13}
+_CAMELOT_MAJEUR = {1: 11, 2: 6, 3: 1, 4: 8, 5: 3, 6: 10, 7: 5, 8: 0, 9: 7, 10: 2, 11: 9, 12: 4}
+
+
+def cle_traktor(key):
+    """Convertir une clé ("Am", "F#", "8A") en valeur MUSICAL_KEY Traktor (None si inconnue)"""
+    key = (key or '').strip()
+    match = _CAMELOT.match(key)
+    if match:
+        numero = int(match.group(1))
+        return (_CAMELOT_MINEUR if match.group(2).upper() == 'A' else _CAMELOT_MAJEUR)[numero]
+    match = _CLE.match(key)
+    if not match:
+        return None
+    valeur = _NOTES[match.group(1).upper()]
+    if match.group(2) in ('#', '♯'):
+        valeur += 1
+    elif match.group(2) in ('b', '♭'):
+        valeur -= 1
+    return valeur % 12 + (12 if match.group(3) else 0)
+
+
+def _texte(valeur):
+    """Valeur d'attribut XML sûre"""
+    return _CARACTERES_INVALIDES.sub('', str(valeur))
+
+
+class _EcrivainXML:
+    """XMLGenerator indenté: chaque élément est écrit puis oublié
+
+    Les nombreux petits write() de XMLGenerator vont dans un tampon mémoire
+    vidé dans le fichier par blocs d'environ 64 Ko.
+    """
+
+    TAILLE_TAMPON = 1 << 16
+
+    def __init__(self, flux, niveau=0):
+        self._flux = flux
+        self._tampon = io.StringIO()
+        self._xml = XMLGenerator(self._tampon, encoding='utf-8', short_empty_elements=True)
+        self._pile = []  # [nom, a_des_enfants]
+        self._niveau = niveau
+        self._vierge = niveau == 0
+
+    @property
+    def profondeur(self):
+        return self._niveau + len(self._pile)
+
+    def _indenter(self):
+        if self._pile:
+            self._pile[-1][1] = True
+        if self._vierge:
+            # L'élément racine suit directement la déclaration XML
+            self._vierge = False
+            return
+        self._xml.ignorableWhitespace('\n' + '  ' * self.profondeur)
+
+    def debut_document(self):
+        self._xml.startDocument()
+
+    def ouvrir(self, nom, attributs=None):
+        self._indenter()
+        self._xml.startElement(nom, {cle: _texte(v) for cle, v in (attributs or {}).items()})
+        self._pile.append([nom, False])
+
+    def fermer(self):
+        nom, enfants = self._pile.pop()
+        if enfants:
+            self._xml.ignorableWhitespace('\n' + '  ' * self.profondeur)
+        self._xml.endElement(nom)
+        if self._tampon.tell() >= self.TAILLE_TAMPON:
+            self.vider()
+
+    def vide(self, nom, attributs=None):
+        self.ouvrir(nom, attributs)
+        self.fermer()
+
+    def section_comptee(self, nom, attributs, attribut_compte, ecrire_corps):
+        """Écrire un élément dont l'en-tête annonce son nombre d'enfants
+
+        Le corps est d'abord écrit dans un fichier temporaire (mémoire constante),
+        puis recopié après l'en-tête une fois le total connu.
+        """
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as tampon:
+            corps = _EcrivainXML(tampon, niveau=self.profondeur + 1)
+            total = ecrire_corps(corps)
+            corps.vider()
+            self.ouvrir(nom, {**attributs, attribut_compte: total})
+            tampon.seek(0)
+            for bloc in iter(lambda: tampon.read(self.TAILLE_TAMPON), ''):
+                self._pile[-1][1] = True
+                self._xml.ignorableWhitespace(bloc)
+                self.vider()
+            self.fermer()
+        return total
+
+    def vider(self):
+        """Écrire le tampon dans le fichier"""
+        self._flux.write(self._tampon.getvalue())
+        self._tampon.seek(0)
+        self._tampon.truncate()
+
+    def fin_document(self):
+        self._xml.ignorableWhitespace('\n')
+        self._xml.endDocument()
+        self.vider()
+
+
+def fichier_morceau(song):
+    """Chemin du MP3 d'un morceau, tel qu'écrit dans les playlists M3U"""
+    return song.get('fichier_mp3') or f"mp3/{song.get('artiste', 'Artiste inconnu')} - {song.get('titre', 'Titre inconnu')}.mp3"
+
+
+def chemin_absolu(fichier, racine_musique):
+    """Chemin absolu d'un MP3 (les fiches stockent des chemins relatifs à la racine musique)
+
+    `racine_musique` est un chemin déjà résolu, en notation POSIX.
+    """
+    fichier = fichier.replace('\\', '/')
+    if _LECTEUR.match(fichier) or fichier.startswith('/'):
+        return fichier
+    return racine_musique.rstrip('/') + '/' + fichier
+
+
+def location_rekordbox(chemin):
+    """URI file://localhost/... attendue par Rekordbox"""
+    if not chemin.startswith('/'):
+        chemin = '/' + chemin  # C:/Musique → /C:/Musique
+    return "file://localhost" + chemin.translate(_ENCODAGE_URI)
+
+
+def location_traktor(chemin):
+    """Découper un chemin absolu en VOLUME, DIR ("/:dossier/:") et FILE comme Traktor"""
+    volume = ''
+    lecteur = _LECTEUR.match(chemin)
+    if lecteur:
+        volume, chemin = lecteur.group(0), chemin[lecteur.end():]
+    dossiers, _, fichier = chemin.rpartition('/')
+    parties = [p for p in dossiers.split('/') if p]
+    dir_traktor = '/:' + ''.join(f"{p}/:" for p in parties)
+    return volume, dir_traktor, fichier
+
+
+def _genres(song):
+    return ', '.join(song.get('genres') or ['Non classé'])
+
+
+def _commentaire(song):
+    """Énergie et tags, seules informations sans champ dédié côté logiciel DJ"""
+    parties = [f"Énergie {song['energie']}/10"] if song.get('energie') else []
+    if song.get('tags'):
+        parties.append(' '.join(f"#{t}" for t in song['tags']))
+    return ' | '.join(parties)
+
+
+def _bpm(song):
+    try:
+        return float(song.get('bpm', 0))
+    except ValueError:
+        return 0.0
+
+
+def _entrees_playlist(fichiers, racine_musique, vus):
+    """Chemins absolus des morceaux d'une playlist présents dans la collection
+
+    Les copies _01/_02 d'une fiche apparaissent plusieurs fois dans les M3U:
+    chaque MP3 n'est gardé qu'une fois par playlist.
+    """
+    deja = set()
+    for fichier in fichiers:
+        chemin = chemin_absolu(fichier, racine_musique)
+        if chemin in vus and chemin not in deja:
+            deja.add(chemin)
+            yield chemin
+
+
+def exporter_rekordbox(morceaux, playlists, output_path, racine_musique="."):
+    """Écrire une bibliothèque Rekordbox (DJ_PLAYLISTS)
+
+    `morceaux`: itérable de fiches parsées (parcouru une seule fois)
+    `playlists`: itérable de (nom, fonction renvoyant les fichiers MP3 de la playlist)
+    Les playlists référencent les morceaux par leur emplacement (KeyType="1").
+    """
+    racine_musique = Path(racine_musique).resolve().as_posix()
+    vus = set()
+
+    def ecrire_collection(xml):
+        for song in morceaux:
+            chemin = chemin_absolu(fichier_morceau(song), racine_musique)
+            # Les copies _01/_02 d'une fiche pointent vers le même MP3
+            if chemin in vus:
+                continue
+            vus.add(chemin)
+            xml.vide('TRACK', {
+                'TrackID': len(vus),
+                'Name': song.get('titre', 'Titre inconnu'),
+                'Artist': song.get('artiste', 'Artiste inconnu'),
+                'Genre': _genres(song),
+                'Kind': 'MP3 File',
+                'AverageBpm': f"{_bpm(song):.2f}",
+                'Tonality': song.get('key', ''),
+                'DateAdded': song.get('date_ajout', ''),
+                'Comments': _commentaire(song),
+                'Location': location_rekordbox(chemin),
+            })
+            compter('morceaux_exportes')
+        return len(vus)
+
+    with ouvrir_atomique(output_path) as flux:
+        xml = _EcrivainXML(flux)
+        xml.debut_document()
+        xml.ouvrir('DJ_PLAYLISTS', {'Version': '1.0.0'})
+        xml.vide('PRODUCT', {'Name': 'Assistant DJ', 'Version': '1.0', 'Company': ''})
+        total = xml.section_comptee('COLLECTION', {}, 'Entries', ecrire_collection)
+
+        def ecrire_playlists(racine):
+            nb_playlists = 0
+            for nom, fichiers in playlists:
+                def ecrire_entrees(corps):
+                    nb = 0
+                    for chemin in _entrees_playlist(fichiers(), racine_musique, vus):
+                        corps.vide('TRACK', {'Key': location_rekordbox(chemin)})
+                        nb += 1
+                    return nb
+                racine.section_comptee('NODE', {'Name': nom, 'Type': 1, 'KeyType': 1}, 'Entries', ecrire_entrees)
+                nb_playlists += 1
+            return nb_playlists
+
+        xml.ouvrir('PLAYLISTS')
+        nb_playlists = xml.section_comptee('NODE', {'Type': 0, 'Name': 'ROOT'}, 'Count', ecrire_playlists)
+        xml.fermer()
+        xml.fermer()
+        xml.fin_document()
+
+    return total, nb_playlists
+
+
+def exporter_traktor(morceaux, playlists, output_path, racine_musique="."):
+    """Écrire une collection Traktor (NML) avec ses playlists
+
+    Mêmes entrées que exporter_rekordbox(); les playlists référencent les
+    morceaux par leur clé primaire VOLUME/:DIR/:FILE.
+    """
+    racine_musique = Path(racine_musique).resolve().as_posix()
+    vus = set()
+
+    def ecrire_collection(xml):
+        for song in morceaux:
+            chemin = chemin_absolu(fichier_morceau(song), racine_musique)
+            if chemin in vus:
+                continue
+            vus.add(chemin)
+            volume, dossier, fichier = location_traktor(chemin)
+            xml.ouvrir('ENTRY', {
+                'TITLE': song.get('titre', 'Titre inconnu'),
+                'ARTIST': song.get('artiste', 'Artiste inconnu'),
+            })
+            xml.vide('LOCATION', {'DIR': dossier, 'FILE': fichier, 'VOLUME': volume, 'VOLUMEID': volume})
+            # Traktor écrit les dates sans zéros: 2024/3/7
+            date = '/'.join(str(int(p)) for p in song.get('date_ajout', '').split('-') if p.isdigit())
+            xml.vide('INFO', {'GENRE': _genres(song), 'KEY': song.get('key', ''),
+                              'COMMENT': _commentaire(song), 'IMPORT_DATE': date})
+            xml.vide('TEMPO', {'BPM': f"{_bpm(song):.6f}", 'BPM_QUALITY': "100.000000"})
+            valeur_cle = cle_traktor(song.get('key'))
+            if valeur_cle is not None:
+                xml.vide('MUSICAL_KEY', {'VALUE': valeur_cle})
+            xml.fermer()
+            compter('morceaux_exportes')
+        return len(vus)
+
+    with ouvrir_atomique(output_path) as flux:
+        xml = _EcrivainXML(flux)
+        xml.debut_document()
+        xml.ouvrir('NML', {'VERSION': 19})
+        xml.vide('HEAD', {'COMPANY': 'www.native-instruments.com', 'PROGRAM': 'Traktor'})
+        total = xml.section_comptee('COLLECTION', {}, 'ENTRIES', ecrire_collection)
+
+        def ecrire_playlists(sous_noeuds):
+            nb_playlists = 0
+            for nom, fichiers in playlists:
+                def ecrire_entrees(corps):
+                    nb = 0
+                    for chemin in _entrees_playlist(fichiers(), racine_musique, vus):
+                        corps.ouvrir('ENTRY')
+                        corps.vide('PRIMARYKEY', {'TYPE': 'TRACK', 'KEY': ''.join(location_traktor(chemin))})
+                        corps.fermer()
+                        nb += 1
+                    return nb
+                sous_noeuds.ouvrir('NODE', {'TYPE': 'PLAYLIST', 'NAME': nom})
+                # UUID stable: un nouvel export ne duplique pas les playlists dans Traktor
+                sous_noeuds.section_comptee('PLAYLIST', {'TYPE': 'LIST', 'UUID': uuid.uuid5(uuid.NAMESPACE_URL, nom).hex},
+                                            'ENTRIES', ecrire_entrees)
+                sous_noeuds.fermer()
+                nb_playlists += 1
+            return nb_playlists
+
+        xml.ouvrir('PLAYLISTS')
+        xml.ouvrir('NODE', {'TYPE': 'FOLDER', 'NAME': '$ROOT'})
+        nb_playlists = xml.section_comptee('SUBNODES', {}, 'COUNT', ecrire_playlists)
+        xml.fermer()
+        xml.fermer()
+        xml.fermer()
+        xml.fin_document()
+
+    return total, nb_playlists
+
+
+def iterer_bibliotheque(songs_dir=DOSSIER_CHANSONS):
+    """Parser les fiches une par une"""
+    for file_path in scan_songs_directory(songs_dir):
+        song = parse_song_file(file_path)
+        if song:
+            yield song
+
+
+def lire_m3u(m3u_path):
+    """Chemins des morceaux d'une playlist M3U, lus ligne par ligne"""
+    with open(m3u_path, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            ligne = ligne.strip()
+            if ligne and not ligne.startswith('#'):
+                yield ligne
+
+
+def playlists_generees(playlists_dir=DOSSIER_PLAYLISTS):
+    """Playlists M3U écrites par genere_playlists1.py: (nom, fonction des fichiers)"""
+    playlists_dir = Path(playlists_dir)
+    if not playlists_dir.exists():
+        return
+    for m3u_path in sorted(playlists_dir.glob("*.m3u")):
+        if m3u_path.stem not in PLAYLISTS_EXCLUES:
+            yield m3u_path.stem, (lambda chemin=m3u_path: lire_m3u(chemin))
+
+
+# Formats disponibles: nom → (fonction d'export, fichier de sortie)
+FORMATS_EXPORT = {
+    'rekordbox': (exporter_rekordbox, FICHIER_REKORDBOX),
+    'traktor': (exporter_traktor, FICHIER_TRAKTOR),
+}
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Exporter la bibliothèque vers Rekordbox et Traktor")
+    parser.add_argument('--format', choices=sorted(FORMATS_EXPORT) + ['tous'], default='tous',
+                        help="Format d'export")
+    parser.add_argument('--chansons', default=DOSSIER_CHANSONS, help="Dossier des fiches")
+    parser.add_argument('--playlists', default=DOSSIER_PLAYLISTS, help="Dossier des playlists M3U générées")
+    parser.add_argument('--racine-musique', default=".", help="Dossier de base des chemins mp3/... des fiches")
+    parser.add_argument('--sortie', default=DOSSIER_EXPORT, help="Dossier de sortie")
+    args = parser.parse_args()
+
+    print("🎧 Assistant DJ - Export Rekordbox / Traktor")
+    print("="*50)
+
+    try:
+        Path(args.sortie).mkdir(parents=True, exist_ok=True)
+        formats = sorted(FORMATS_EXPORT) if args.format == 'tous' else [args.format]
+        for nom_format in formats:
+            exporter, nom_fichier = FORMATS_EXPORT[nom_format]
+            output_path = Path(args.sortie) / nom_fichier
+            with span(f"export_{nom_format}"):
+                total, nb_playlists = exporter(iterer_bibliotheque(args.chansons),
+                                               playlists_generees(args.playlists),
+                                               output_path, args.racine_musique)
+            print(f"✅ {nom_format}: {output_path} ({total} morceaux, {nb_playlists} playlists)")
+        return 0
+
+    except Exception as e:
+        print(f"❌ Erreur: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
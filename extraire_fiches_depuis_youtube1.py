@@ -9,12 +9,18 @@ import os
 import re
 import sys
 import json
+import string
 from pathlib import Path
 from datetime import datetime
 import tkinter as tk
 from tkinter import messagebox, simpledialog
 import subprocess
 
+from instrumentation import span, compter
+from gabarit import charger_gabarit_chanson, GABARIT_CHANSON_PAR_DEFAUT
+from disposition_fiches import DispositionFiches
+from ecrivain_fiches import EcrivainFiches, JournalLimite, rapport
+
 def get_youtube_url():
     """Demander l'URL YouTube à l'utilisateur"""
     root = tk.Tk()
@@ -91,58 +97,139 @@ def extract_detailed_metadata(video_id):
     except Exception:
         return None
 
+# Patterns courants pour les titres YouTube, compilés une fois
+# (séparateur testé avant le regex: la plupart des titres n'en contiennent qu'un)
+_MENTIONS = r'(?:\s*\([^)]*\))?(?:\s*\[[^\]]*\])?$'
+TITLE_PATTERNS = [
+    ('-', re.compile(r'(.+?)\s*-\s*(.+?)' + _MENTIONS, re.IGNORECASE), False),    # Artiste - Titre
+    (':', re.compile(r'(.+?)\s*:\s*(.+?)' + _MENTIONS, re.IGNORECASE), False),    # Artiste : Titre
+    ('|', re.compile(r'(.+?)\s*\|\s*(.+?)' + _MENTIONS, re.IGNORECASE), False),  # Artiste | Titre
+    ('by', re.compile(r'(.+?)\s+by\s+(.+?)' + _MENTIONS, re.IGNORECASE), True),   # Titre by Artiste
+]
+
 def parse_title_for_song_info(title):
     """Parser le titre pour extraire artiste et titre"""
     title = title.strip()
+    title_lower = title.lower()
     
-    # Patterns courants pour les titres YouTube
-    patterns = [
-        r'(.+?)\s*-\s*(.+?)(?:\s*\([^)]*\))?(?:\s*\[[^\]]*\])?$',  # Artiste - Titre
-        r'(.+?)\s*:\s*(.+?)(?:\s*\([^)]*\))?(?:\s*\[[^\]]*\])?$',  # Artiste : Titre
-        r'(.+?)\s*\|\s*(.+?)(?:\s*\([^)]*\))?(?:\s*\[[^\]]*\])?$',  # Artiste | Titre
-        r'(.+?)\s*by\s*(.+?)(?:\s*\([^)]*\))?(?:\s*\[[^\]]*\])?$', # Titre by Artiste
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, title, re.IGNORECASE)
+    for separateur, pattern, inverse in TITLE_PATTERNS:
+        if separateur not in title_lower:
+            continue
+        match = pattern.match(title)
         if match:
-            part1, part2 = match.groups()
-            part1, part2 = part1.strip(), part2.strip()
+            part1, part2 = match.group(1).strip(), match.group(2).strip()
             
-            # Détecter si c'est "Titre by Artiste"
-            if 'by' in pattern:
+            # "Titre by Artiste"
+            if inverse:
                 return part2, part1  # Artiste, Titre
-            else:
-                return part1, part2  # Artiste, Titre
+            return part1, part2  # Artiste, Titre
     
     # Si aucun pattern ne correspond, utiliser tout comme titre
     return "Artiste Inconnu", title
 
-def guess_genre_from_title(title, description=""):
-    """Deviner le genre à partir du titre et de la description"""
-    content = (title + " " + description).lower()
-    
-    genre_keywords = {
-        'Disco': ['disco', 'boogie', 'funk', 'groove'],
-        'Pop': ['pop', 'hit', 'chart', 'mainstream'],
-        'Rock': ['rock', 'metal', 'guitar', 'band'],
-        'Electronic': ['electronic', 'edm', 'techno', 'house', 'trance', 'dance'],
-        'Hip-Hop': ['hip hop', 'rap', 'beats', 'urban'],
-        'R&B': ['r&b', 'rnb', 'soul', 'smooth'],
-        'Jazz': ['jazz', 'swing', 'blues'],
-        'Classical': ['classical', 'orchestra', 'symphony'],
-        'Reggae': ['reggae', 'jamaica', 'dub'],
-        'Country': ['country', 'folk', 'acoustic']
-    }
-    
+GENRE_KEYWORDS = {
+    'Disco': ['disco', 'boogie', 'funk', 'groove'],
+    'Pop': ['pop', 'hit', 'chart', 'mainstream'],
+    'Rock': ['rock', 'metal', 'guitar', 'band'],
+    'Electronic': ['electronic', 'edm', 'techno', 'house', 'trance', 'dance'],
+    'Hip-Hop': ['hip hop', 'rap', 'beats', 'urban'],
+    'R&B': ['r&b', 'rnb', 'soul', 'smooth'],
+    'Jazz': ['jazz', 'swing', 'blues'],
+    'Classical': ['classical', 'orchestra', 'symphony'],
+    'Reggae': ['reggae', 'jamaica', 'dub'],
+    'Country': ['country', 'folk', 'acoustic']
+}
+
+GENRE_PAR_DEFAUT = 'Pop'
+# Un mot-clé dans le titre pèse plus que dans la description
+POIDS_TITRE = 3
+POIDS_DESCRIPTION = 1
+
+# Une seule table de traduction met en minuscules et remplace les séparateurs de mots par un
+# espace: ponctuation (sauf "&" de "r&b"), blancs et octets non ASCII de l'UTF-8 ("“disco”" → " disco ")
+_SEPARATEURS = (string.punctuation.replace('&', '') + string.whitespace).encode('ascii') + bytes(range(128, 256))
+_VERS_MINUSCULES_ESPACES = bytes.maketrans(_SEPARATEURS + string.ascii_uppercase.encode('ascii'),
+                                           b' ' * len(_SEPARATEURS) + string.ascii_lowercase.encode('ascii'))
+
+def _compiler_mots_cles(genre_keywords):
+    """Table mot-clé → genre et alternance précompilée de tous les mots-clés
+
+    Le texte est parcouru une seule fois par le moteur de regex, quel que
+    soit le nombre de mots-clés; les alternatives sont regroupées par
+    initiale pour n'essayer que celles qui commencent comme le mot lu.
+    """
+    genre_par_mot = {}
     for genre, keywords in genre_keywords.items():
-        if any(keyword in content for keyword in keywords):
-            return genre
+        for keyword in keywords:
+            genre_par_mot.setdefault(keyword.encode('ascii'), genre)
+    par_initiale = {}
+    for keyword in sorted(genre_par_mot, key=len, reverse=True):
+        par_initiale.setdefault(keyword[:1], []).append(re.escape(keyword[1:]))
+    alternance = b'|'.join(re.escape(initiale) + b'(?:' + b'|'.join(suites) + b')'
+                           for initiale, suites in par_initiale.items())
+    # Mots entiers (texte bordé d'espaces), pluriel toléré: "band" ne trouve pas "bandcamp.com",
+    # "hip hop" trouve aussi "hip-hop"
+    return genre_par_mot, re.compile(b' (' + alternance + rb')(?:e?s)?(?= )')
+
+GENRE_PAR_MOT, MOTIF_MOTS_CLES = _compiler_mots_cles(GENRE_KEYWORDS)
+
+def _mots_cles_presents(texte):
+    """Mots-clés présents dans un texte, en un seul passage du motif compilé"""
+    return set(MOTIF_MOTS_CLES.findall(b' ' + texte.encode('utf-8', 'replace').translate(_VERS_MINUSCULES_ESPACES) + b' '))
+
+def score_genres(title, description=""):
+    """Scorer tous les genres en un seul passage sur le titre et la description
+
+    Chaque mot-clé ne compte qu'une fois par texte: une description qui répète
+    "house" vingt fois ne domine pas un titre qui dit "disco".
+    """
+    scores = {}
+    if title:
+        for keyword in _mots_cles_presents(title):
+            genre = GENRE_PAR_MOT[keyword]
+            scores[genre] = scores.get(genre, 0) + POIDS_TITRE
+    if description:
+        for keyword in _mots_cles_presents(description):
+            genre = GENRE_PAR_MOT[keyword]
+            scores[genre] = scores.get(genre, 0) + POIDS_DESCRIPTION
+    compter('genres_scores', len(scores))
+    return scores
+
+# À score égal, l'ordre de GENRE_KEYWORDS départage (comme l'ancien premier trouvé)
+ORDRE_GENRES = {genre: i for i, genre in enumerate(GENRE_KEYWORDS)}
+
+def classify_genres(title, description="", max_genres=3, part_minimale=0.25):
+    """Genres pondérés, du plus probable au moins probable
+
+    Renvoie une liste de (genre, poids) dont les poids somment à 1; un genre
+    n'est retenu que s'il pèse au moins `part_minimale` du total.
+    """
+    scores = score_genres(title, description)
+    if not scores:
+        return [(GENRE_PAR_DEFAUT, 1.0)]
     
-    return 'Pop'  # Genre par défaut
+    classes = sorted(scores.items(), key=lambda x: (-x[1], ORDRE_GENRES[x[0]]))
+    total = sum(scores.values())
+    retenus = [(genre, score) for genre, score in classes[:max_genres] if score / total >= part_minimale]
+    # Le genre le plus probable est toujours gardé, même s'il pèse moins de part_minimale
+    retenus = retenus or classes[:1]
+    total_retenu = sum(score for _, score in retenus)
+    return [(genre, round(score / total_retenu, 3)) for genre, score in retenus]
+
+def guess_genre_from_title(title, description=""):
+    """Deviner le genre à partir du titre et de la description"""
+    scores = score_genres(title, description)
+    if not scores:
+        return GENRE_PAR_DEFAUT
+    return min(scores, key=lambda genre: (-scores[genre], ORDRE_GENRES[genre]))
+
+def generate_song_file(video_data, output_dir, disposition=None, ecrivain=None):
+    """Générer un fichier de chanson depuis les métadonnées YouTube
 
-def generate_song_file(video_data, output_dir):
-    """Générer un fichier de chanson depuis les métadonnées YouTube"""
+    Avec un `ecrivain` (EcrivainFiches), la fiche est écrite en arrière-plan;
+    la même `disposition` doit alors servir à toutes les fiches pour que les
+    noms réservés mais pas encore écrits ne soient pas attribués deux fois.
+    """
     try:
         # Extraire les informations de base
         title = video_data.get('title', 'Titre inconnu')
@@ -153,8 +240,8 @@ def generate_song_file(video_data, output_dir):
         # Parser le titre pour extraire artiste et titre
         artiste, titre = parse_title_for_song_info(title)
         
-        # Deviner le genre
-        genre = guess_genre_from_title(title, description)
+        # Deviner les genres (pondérés, le plus probable en premier)
+        genres = classify_genres(title, description)
         
         # Estimer le BPM (très approximatif)
         bpm = 120  # Valeur par défaut
@@ -166,9 +253,10 @@ def generate_song_file(video_data, output_dir):
         
         # Estimer l'énergie
         energie = 5  # Valeur par défaut
-        if 'party' in title.lower() or 'dance' in title.lower():
+        title_lower = title.lower()
+        if 'party' in title_lower or 'dance' in title_lower:
             energie = 8
-        elif 'chill' in title.lower() or 'slow' in title.lower():
+        elif 'chill' in title_lower or 'slow' in title_lower:
             energie = 3
         
         # Formater la date
@@ -185,73 +273,36 @@ def generate_song_file(video_data, output_dir):
         filename = f"{artiste} - {titre}".replace('/', '_').replace('\\', '_')
         filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
         
-        # Lire le template
-        template_path = Path("templates/chanson_template.md")
-        if template_path.exists():
-            with open(template_path, 'r', encoding='utf-8') as f:
-                template = f.read()
-        else:
-            # Template de base si le fichier n'existe pas
-            template = """titre: {titre}
-artiste: {artiste}
-bpm: {bpm}
-key: {key}
-genre:
-{genre_list}
-energie: {energie}
-date_ajout: {date_ajout}
-tags:
-{tags_list}
-fichier_mp3: [[mp3/{filename}.mp3]]
-Notes Personnelles:
-{notes_personnelles}
-Idées de Mix:
-{idees_mix}
-Liens:
-{liens}
----
-
-## 🎵 Notes Personnelles
-
-{notes_personnelles_detaillees}
-
-## 🎛️ Idées de Mix
-
-{idees_mix_detaillees}
-"""
+        # Gabarit compilé une seule fois par processus (texte par défaut si le fichier manque)
+        gabarit = charger_gabarit_chanson(defaut=GABARIT_CHANSON_PAR_DEFAUT)
         
         # Formater le contenu
-        content = template.format(
+        content = gabarit.rendre(
             titre=titre,
             artiste=artiste,
             bpm=bpm,
             key='A',  # Valeur par défaut
-            genre_list=f"  - {genre}",
+            genre_list=[genre for genre, _ in genres],
             energie=energie,
             date_ajout=date_ajout,
-            tags_list="  - youtube\n  - extrait",
+            tags_list=["youtube", "extrait"],
             filename=filename,
-            notes_personnelles="  - Extrait depuis YouTube",
-            idees_mix="  - À définir après écoute",
-            liens="  - À ajouter après analyse",
+            notes_personnelles=["Extrait depuis YouTube"],
+            idees_mix=["À définir après écoute"],
+            liens=["À ajouter après analyse"],
             notes_personnelles_detaillees=f"Extrait depuis YouTube: {title}",
             idees_mix_detaillees="À définir après écoute et analyse du BPM/clé"
         )
         
-        # Écrire le fichier
-        output_path = Path(output_dir) / f"{filename}.md"
+        # Écrire le fichier (sous-dossier selon la disposition, suffixes _01, _02... en cas de conflit)
+        output_path = (disposition or DispositionFiches(output_dir)).chemin_libre(filename)
         
-        # Éviter les conflits de noms
-        counter = 1
-        base_path = output_path
-        while output_path.exists():
-            name = base_path.stem
-            suffix = base_path.suffix
-            output_path = base_path.parent / f"{name}_{counter:02d}{suffix}"
-            counter += 1
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        if ecrivain is not None:
+            ecrivain.soumettre(output_path, content)
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            compter('fichiers_ecrits')
         
         return output_path
         
@@ -277,7 +328,9 @@ def main():
         print(f"🔍 URL: {url}")
         
         # Extraire les métadonnées
-        videos = extract_youtube_metadata(url)
+        with span("metadonnees"):
+            videos = extract_youtube_metadata(url)
+            compter('videos', len(videos))
         print(f"📹 Vidéos trouvées: {len(videos)}")
         
         if not videos:
@@ -287,21 +340,24 @@ def main():
         output_dir = "data/output/chansons"
         Path(output_dir).mkdir(parents=True, exist_ok=True)
         
-        # Traiter chaque vidéo
+        # Traiter chaque vidéo; les fiches sont écrites en arrière-plan
         generated_files = []
-        for i, video in enumerate(videos):
-            print(f"🎵 Traitement {i+1}/{len(videos)}: {video.get('title', 'Titre inconnu')}")
-            
-            # Extraire les métadonnées détaillées si nécessaire
-            if 'id' in video:
-                detailed_data = extract_detailed_metadata(video['id'])
-                if detailed_data:
-                    video.update(detailed_data)
-            
-            # Générer le fichier
-            output_path = generate_song_file(video, output_dir)
-            generated_files.append(output_path)
-            print(f"✅ Généré: {output_path.name}")
+        disposition = DispositionFiches(output_dir)
+        journal = JournalLimite()
+        with span("generation"), EcrivainFiches(journal=journal, prefixe="✅ Généré: ") as ecrivain:
+            for i, video in enumerate(videos):
+                journal(f"🎵 Traitement {i+1}/{len(videos)}: {video.get('title', 'Titre inconnu')}")
+                
+                # Extraire les métadonnées détaillées si nécessaire
+                if 'id' in video:
+                    detailed_data = extract_detailed_metadata(video['id'])
+                    if detailed_data:
+                        video.update(detailed_data)
+                
+                # Générer le fichier
+                output_path = generate_song_file(video, output_dir, disposition, ecrivain)
+                generated_files.append(output_path)
+        print(rapport(ecrivain.stats))
         
         print(f"✅ Extraction terminée avec succès!")
         print(f"📁 Dossier de sortie: {output_dir}")
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Gabarits
+Rendu des fiches depuis templates/chanson_template.md, partagé par tous les
+scripts qui créent des fiches
+
+Le gabarit est lu et compilé une seule fois: découpé en segments littéraux
+et champs, ses noms de champs sont vérifiés au chargement, puis il devient
+une fonction f-string générée (bien plus rapide que str.format, qui réanalyse
+le texte à chaque appel). Les champs liste (genres, tags, notes...) acceptent
+directement une liste, rendue en lignes "  - valeur".
+"""
+
+import io
+import os
+import string
+import functools
+import keyword
+from pathlib import Path
+
+TEMPLATE_CHANSON = Path("templates/chanson_template.md")
+
+# Champs du gabarit de chanson; ceux de CHAMPS_LISTE_CHANSON acceptent une liste
+CHAMPS_CHANSON = (
+    'titre', 'artiste', 'bpm', 'key', 'genre_list', 'energie', 'date_ajout', 'tags_list', 'filename',
+    'notes_personnelles', 'idees_mix', 'liens', 'notes_personnelles_detaillees', 'idees_mix_detaillees',
+)
+CHAMPS_LISTE_CHANSON = ('genre_list', 'tags_list', 'notes_personnelles', 'idees_mix', 'liens')
+
+# Gabarit livré à côté des scripts: texte par défaut quand le dossier courant n'a pas
+# de templates/chanson_template.md (extraction YouTube lancée d'ailleurs)
+TEMPLATE_CHANSON_LIVRE = Path(__file__).resolve().parent / TEMPLATE_CHANSON
+try:
+    GABARIT_CHANSON_PAR_DEFAUT = TEMPLATE_CHANSON_LIVRE.read_text(encoding='utf-8')
+except FileNotFoundError:
+    GABARIT_CHANSON_PAR_DEFAUT = None
+
+_cache = {}
+
+
+def liste_yaml(valeurs):
+    """Lignes "  - valeur" d'un champ liste (une chaîne est gardée telle quelle)"""
+    if isinstance(valeurs, str):
+        return valeurs
+    return '\n'.join([f"  - {valeur}" for valeur in valeurs])
+
+
+class Gabarit:
+    """Gabarit compilé: segments (littéral, champ, conversion, format) et fonction de rendu"""
+
+    def __init__(self, texte, listes=(), nom="<gabarit>"):
+        self.nom = nom
+        self.segments = []
+        for litteral, champ, format_spec, conversion in string.Formatter().parse(texte):
+            if champ is not None:
+                self._verifier_champ(champ, format_spec)
+            self.segments.append((litteral, champ, conversion, format_spec))
+        # Noms dans l'ordre de première apparition
+        self.champs = tuple(dict.fromkeys(champ for _, champ, _, _ in self.segments if champ is not None))
+        self.listes = tuple(champ for champ in listes if champ in self.champs)
+        self._rendre = self._compiler()
+
+    def _verifier_champ(self, champ, format_spec):
+        if not champ.isidentifier() or keyword.iskeyword(champ) or champ.startswith('_'):
+            raise ValueError(f"{self.nom}: champ invalide '{{{champ}}}' (nom de champ simple attendu)")
+        if format_spec and '{' in format_spec:
+            raise ValueError(f"{self.nom}: format imbriqué non supporté dans '{{{champ}:{format_spec}}}'")
+
+    def _compiler(self):
+        """Générer la fonction f-string équivalente au gabarit"""
+        corps = []
+        for litteral, champ, conversion, format_spec in self.segments:
+            corps.append(litteral.replace('{', '{{').replace('}', '}}'))
+            if champ is not None:
+                corps.append('{' + champ + (f'!{conversion}' if conversion else '')
+                             + (f':{format_spec}' if format_spec else '') + '}')
+        lignes = [f"def _rendre({''.join(c + ', ' for c in self.champs)}**_ignores):"]
+        # Test de type en ligne: une chaîne déjà formatée ne coûte pas d'appel de fonction
+        lignes += [f"    if {champ}.__class__ is not str: {champ} = _liste({champ})" for champ in self.listes]
+        lignes.append(f"    return f{''.join(corps)!r}")
+        espace = {'_liste': liste_yaml}
+        exec(compile('\n'.join(lignes), self.nom, 'exec'), espace)
+        return espace['_rendre']
+
+    def verifier(self, champs_connus):
+        """Refuser un gabarit qui utilise des champs que l'appelant ne fournit pas"""
+        inconnus = [champ for champ in self.champs if champ not in champs_connus]
+        if inconnus:
+            raise ValueError(f"{self.nom}: champs inconnus {', '.join(inconnus)}")
+        return self
+
+    def rendre(self, **valeurs):
+        """Rendre le gabarit (les valeurs en trop sont ignorées, comme avec str.format)"""
+        try:
+            return self._rendre(**valeurs)
+        except TypeError:
+            manquants = [champ for champ in self.champs if champ not in valeurs]
+            if manquants:
+                raise KeyError(manquants[0])
+            raise
+
+    def rendre_plusieurs(self, valeurs_morceaux, tampon=None, separateur="", **communs):
+        """Rendre une suite de morceaux dans un tampon (StringIO par défaut, ou fichier ouvert)
+
+        `communs` complète chaque morceau (notes par défaut...); ses listes sont
+        formatées une seule fois pour toute la série. Renvoie le tampon.
+        """
+        if tampon is None:
+            tampon = io.StringIO()
+        ecrire = tampon.write
+        rendre = self._rendre
+        if communs:
+            rendre = functools.partial(rendre, **{champ: liste_yaml(valeur) if champ in self.listes else valeur
+                                                  for champ, valeur in communs.items()})
+        for valeurs in valeurs_morceaux:
+            ecrire(rendre(**valeurs))
+            if separateur:
+                ecrire(separateur)
+        return tampon
+
+
+def charger_gabarit(chemin, defaut=None, listes=(), champs=None):
+    """Gabarit compilé depuis un fichier, recompilé seulement si le fichier change
+
+    Sans fichier, le texte `defaut` est utilisé s'il est fourni; sinon
+    FileNotFoundError. Avec `champs`, les noms du gabarit sont vérifiés
+    (ils font partie de la clé du cache: un gabarit chargé sans vérification
+    n'est jamais rendu tel quel à un appelant qui en demande une).
+    """
+    chemin = Path(chemin)
+    if champs is not None:
+        champs = tuple(champs)
+    try:
+        signature = os.stat(chemin).st_mtime_ns
+    except FileNotFoundError:
+        if defaut is None:
+            raise FileNotFoundError(f"Template non trouvé: {chemin}")
+        signature = None
+
+    cle = (str(chemin), signature, listes, champs)
+    gabarit = _cache.get(cle)
+    if gabarit is None:
+        if signature is None:
+            texte = defaut
+        else:
+            with open(chemin, 'r', encoding='utf-8') as f:
+                texte = f.read()
+        gabarit = Gabarit(texte, listes, str(chemin))
+        if champs is not None:
+            gabarit.verifier(champs)
+        _cache[cle] = gabarit
+    return gabarit
+
+
+def charger_gabarit_chanson(chemin=TEMPLATE_CHANSON, defaut=None):
+    """Gabarit des fiches de chanson, champs vérifiés et champs liste natifs"""
+    return charger_gabarit(chemin, defaut, CHAMPS_LISTE_CHANSON, CHAMPS_CHANSON)
@@ -9,26 +9,47 @@ import os
 import re
 import sys
 import json
+import hashlib
 from pathlib import Path
 from datetime import datetime
 import tkinter as tk
 from tkinter import messagebox
 from collections import defaultdict
 
-def scan_songs_directory():
+from instrumentation import span, compter
+from outils_fichiers import ecrire_atomique
+import stockage_compact
+from disposition_fiches import lister_fiches
+import playlists_intelligentes
+from morceau import Morceau, en_morceau
+from index_bibliotheque import IndexBibliotheque
+
+MANIFESTE_PLAYLISTS = ".playlists_manifest.json"
+
+def scan_songs_directory(songs_dir="data/output/chansons"):
     """Scanner le dossier des chansons"""
-    songs_dir = Path("data/output/chansons")
+    songs_dir = Path(songs_dir)
     if not songs_dir.exists():
         raise FileNotFoundError(f"Dossier des chansons non trouvé: {songs_dir}")
     
-    return list(songs_dir.glob("*.md"))
+    # Racine et sous-dossiers de répartition (disposition_fiches.py)
+    return lister_fiches(songs_dir)
 
 def parse_song_file(file_path):
     """Parser un fichier de chanson"""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
-        
+            compter('octets_lus', os.fstat(f.fileno()).st_size)
+        compter('fichiers_lus')
+    except Exception as e:
+        print(f"⚠️  Erreur lors du parsing de {file_path}: {str(e)}")
+        return None
+    return parse_song_content(content, file_path)
+
+def parse_song_content(content, file_path):
+    """Parser le contenu d'une fiche (lue depuis le dossier ou le pack de fiches)"""
+    try:
         song_info = {}
         
         # Extraire les informations de base
@@ -75,205 +96,356 @@ def parse_song_file(file_path):
         if mp3_match:
             song_info['fichier_mp3'] = mp3_match.group(1).strip()
         
+        compter('correspondances_regex', len(song_info))
         song_info['file_path'] = file_path
-        return song_info
+        return Morceau.depuis_dict(song_info)
         
     except Exception as e:
         print(f"⚠️  Erreur lors du parsing de {file_path}: {str(e)}")
         return None
 
-def generate_m3u_playlist(songs, playlist_name, output_dir):
-    """Générer une playlist M3U"""
+class LignePlaylist:
+    """Morceau normalisé une seule fois, avec ses fragments M3U/JSON/Markdown pré-rendus
+
+    Un morceau présent dans plusieurs playlists n'est converti et formaté
+    qu'une fois; chaque playlist ne fait plus que concaténer des fragments.
+    """
+    __slots__ = ('song', 'titre', 'artiste', 'bpm', 'energie', 'genres', 'm3u', 'json', 'md', 'empreinte',
+                 'valeurs')
+
+    def __init__(self, song):
+        song = en_morceau(song)
+        title = song.get('titre', 'Titre inconnu')
+        artist = song.get('artiste', 'Artiste inconnu')
+        genres = song.genres
+        fichier_mp3 = song.get('fichier_mp3', '')
+
+        self.song = song
+        self.titre = title
+        self.artiste = artist
+        self.bpm = song.bpm_tri
+        self.energie = song.energie_tri
+        self.genres = genres
+
+        self.m3u = (f"#EXTINF:-1,{artist} - {title}\n"
+                    f"{song.get('fichier_mp3', f'mp3/{artist} - {title}.mp3')}\n\n")
+
+        song_data = {
+            "title": title,
+            "artist": artist,
+            "bpm": self.bpm,
+            "key": song.get('key', 'A'),
+            "energy": self.energie,
+            "genres": genres,
+            "tags": song.get('tags', []),
+            "file_path": fichier_mp3,
+            "date_added": song.get('date_ajout', '')
+        }
+        # Indentation identique à json.dump(..., indent=2) pour un élément de "songs"
+        self.json = "    " + json.dumps(song_data, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+
+        # Le numéro de ligne ("### 3.") dépend de la playlist: il est ajouté à l'écriture
+        self.md = (f"{artist} - {title}\n\n"
+                   f"- **BPM:** {song.get('bpm', 'N/A')}\n"
+                   f"- **Clé:** {song.get('key', 'N/A')}\n"
+                   f"- **Énergie:** {song.get('energie', 'N/A')}/10\n"
+                   f"- **Genres:** {', '.join(genres)}\n"
+                   f"- **Fichier:** `{fichier_mp3}`\n\n")
+        
+        # Tout ce qui finit dans un fichier de playlist est couvert par l'empreinte
+        self.empreinte = hashlib.sha1((self.m3u + self.json + self.md).encode('utf-8')).digest()
+        # Valeurs vues par les règles intelligentes, gardées seulement à la demande
+        self.valeurs = None
+
+def preparer_lignes(songs):
+    """Normaliser chaque morceau une seule fois pour toutes les playlists"""
+    return [LignePlaylist(song) for song in songs]
+
+def _contenu_m3u(lignes, playlist_name, horodatage):
+    """Assembler le contenu M3U depuis les fragments"""
+    entete = ("#EXTM3U\n"
+              f"# Playlist: {playlist_name}\n"
+              f"# Générée le: {horodatage.strftime('%Y-%m-%d %H:%M:%S')}\n"
+              f"# Nombre de morceaux: {len(lignes)}\n\n")
+    return entete + "".join([ligne.m3u for ligne in lignes])
+
+def _contenu_json(lignes, playlist_name, horodatage):
+    """Assembler le contenu JSON depuis les fragments (identique à json.dump indent=2)"""
+    entete = ("{\n"
+              f'  "name": {json.dumps(playlist_name, ensure_ascii=False)},\n'
+              f'  "created": {json.dumps(horodatage.isoformat())},\n'
+              f'  "total_songs": {len(lignes)},\n')
+    if not lignes:
+        return entete + '  "songs": []\n}'
+    return entete + '  "songs": [\n' + ",\n".join([ligne.json for ligne in lignes]) + "\n  ]\n}"
+
+def _contenu_markdown(lignes, playlist_name, horodatage):
+    """Assembler le contenu Markdown (statistiques + morceaux) depuis les fragments"""
+    # Statistiques
+    genres = defaultdict(int)
+    for ligne in lignes:
+        for genre in ligne.genres:
+            genres[genre] += 1
+    bpms = [ligne.bpm for ligne in lignes]
+    energies = [ligne.energie for ligne in lignes]
+    
+    parties = [
+        f"# Playlist: {playlist_name}\n\n",
+        f"**Créée le:** {horodatage.strftime('%Y-%m-%d %H:%M:%S')}\n",
+        f"**Nombre de morceaux:** {len(lignes)}\n\n",
+        "## 📊 Statistiques\n\n",
+        "### Genres\n",
+    ]
+    for genre, count in sorted(genres.items()):
+        parties.append(f"- {genre}: {count} morceaux\n")
+    
+    if bpms:
+        parties.append(f"\n### BPM\n"
+                       f"- Moyenne: {sum(bpms) // len(bpms)} BPM\n"
+                       f"- Min: {min(bpms)} BPM\n"
+                       f"- Max: {max(bpms)} BPM\n")
+    
+    if energies:
+        parties.append(f"\n### Énergie\n"
+                       f"- Moyenne: {sum(energies) // len(energies)}/10\n"
+                       f"- Min: {min(energies)}/10\n"
+                       f"- Max: {max(energies)}/10\n")
+    
+    parties.append("\n## 🎵 Morceaux\n\n")
+    parties.extend([f"### {i}. {ligne.md}" for i, ligne in enumerate(lignes, 1)])
+    return "".join(parties)
+
+# Formats écrits pour chaque playlist: extension → fonction d'assemblage
+FORMATS_PLAYLIST = {
+    'm3u': _contenu_m3u,
+    'json': _contenu_json,
+    'md': _contenu_markdown,
+}
+
+def _ecrire_format(lignes, playlist_name, output_dir, extension):
+    """Écrire un seul format de playlist"""
+    playlist_path = Path(output_dir) / f"{playlist_name}.{extension}"
+    contenu = FORMATS_PLAYLIST[extension](lignes, playlist_name, datetime.now())
+    ecrire_atomique(playlist_path, contenu)
+    compter('fichiers_ecrits')
+    return playlist_path
+
+def empreinte_playlist(lignes, playlist_name):
+    """Empreinte du contenu d'une playlist: nom, membres, ordre et métadonnées"""
+    h = hashlib.sha1(playlist_name.encode('utf-8'))
+    for ligne in lignes:
+        h.update(ligne.empreinte)
+    return h.hexdigest()
+
+class ManifestePlaylists:
+    """Empreintes des playlists déjà écrites, pour ne réécrire que celles qui changent
+
+    Le manifeste vit dans le dossier des playlists; seules les playlists qu'il
+    connaît peuvent être supprimées quand leur groupe disparaît.
+    """
+    
+    def __init__(self, output_dir):
+        self.path = Path(output_dir) / MANIFESTE_PLAYLISTS
+        self.precedentes = {}
+        self.courantes = {}
+        self.ecrites = []
+        self.inchangees = []
+        self.supprimees = []
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.precedentes = json.load(f).get('playlists', {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Manifeste des playlists illisible, régénération complète: {str(e)}")
+    
+    def est_a_jour(self, playlist_name, empreinte, paths):
+        """Vrai si la playlist a déjà été écrite avec cette empreinte"""
+        precedente = self.precedentes.get(playlist_name)
+        return (precedente is not None
+                and precedente.get('empreinte') == empreinte
+                and all(path.exists() for path in paths))
+    
+    def enregistrer(self, playlist_name, empreinte, paths, ecrite):
+        """Noter une playlist produite par cette exécution"""
+        self.courantes[playlist_name] = {
+            'empreinte': empreinte,
+            'fichiers': [path.name for path in paths],
+        }
+        (self.ecrites if ecrite else self.inchangees).append(playlist_name)
+    
+    def supprimer_obsoletes(self, output_dir):
+        """Supprimer les playlists connues dont le groupe a disparu"""
+        for playlist_name, precedente in self.precedentes.items():
+            if playlist_name in self.courantes:
+                continue
+            for nom_fichier in precedente.get('fichiers', []):
+                try:
+                    (Path(output_dir) / nom_fichier).unlink()
+                except FileNotFoundError:
+                    pass
+            self.supprimees.append(playlist_name)
+        return self.supprimees
+    
+    def sauver(self):
+        """Écrire le manifeste de façon atomique"""
+        contenu = json.dumps({'playlists': self.courantes}, ensure_ascii=False, indent=2)
+        ecrire_atomique(self.path, contenu)
+
+def write_playlist(lignes, playlist_name, output_dir, manifeste=None):
+    """Écrire les formats M3U, JSON et Markdown d'une playlist en une passe
+    
+    Avec un manifeste, une playlist dont l'empreinte n'a pas changé n'est pas
+    réécrite; sinon chaque fichier est remplacé atomiquement.
+    """
     try:
-        playlist_path = Path(output_dir) / f"{playlist_name}.m3u"
+        paths = [Path(output_dir) / f"{playlist_name}.{extension}" for extension in FORMATS_PLAYLIST]
         
-        with open(playlist_path, 'w', encoding='utf-8') as f:
-            f.write("#EXTM3U\n")
-            f.write(f"# Playlist: {playlist_name}\n")
-            f.write(f"# Générée le: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"# Nombre de morceaux: {len(songs)}\n\n")
-            
-            for song in songs:
-                title = song.get('titre', 'Titre inconnu')
-                artist = song.get('artiste', 'Artiste inconnu')
-                fichier_mp3 = song.get('fichier_mp3', f"mp3/{artist} - {title}.mp3")
-                
-                f.write(f"#EXTINF:-1,{artist} - {title}\n")
-                f.write(f"{fichier_mp3}\n\n")
+        if manifeste is not None:
+            empreinte = empreinte_playlist(lignes, playlist_name)
+            if manifeste.est_a_jour(playlist_name, empreinte, paths):
+                manifeste.enregistrer(playlist_name, empreinte, paths, ecrite=False)
+                return paths
+        
+        horodatage = datetime.now()
+        for playlist_path, assembler in zip(paths, FORMATS_PLAYLIST.values()):
+            ecrire_atomique(playlist_path, assembler(lignes, playlist_name, horodatage))
+            compter('fichiers_ecrits')
         
-        return playlist_path
+        if manifeste is not None:
+            manifeste.enregistrer(playlist_name, empreinte, paths, ecrite=True)
+        return paths
         
+    except Exception as e:
+        raise Exception(f"Erreur lors de l'écriture de la playlist {playlist_name}: {str(e)}")
+
+def generate_m3u_playlist(songs, playlist_name, output_dir):
+    """Générer une playlist M3U"""
+    try:
+        return _ecrire_format(preparer_lignes(songs), playlist_name, output_dir, 'm3u')
     except Exception as e:
         raise Exception(f"Erreur lors de la génération M3U: {str(e)}")
 
 def generate_json_playlist(songs, playlist_name, output_dir):
     """Générer une playlist JSON"""
     try:
-        playlist_path = Path(output_dir) / f"{playlist_name}.json"
-        
-        playlist_data = {
-            "name": playlist_name,
-            "created": datetime.now().isoformat(),
-            "total_songs": len(songs),
-            "songs": []
-        }
-        
-        for song in songs:
-            song_data = {
-                "title": song.get('titre', 'Titre inconnu'),
-                "artist": song.get('artiste', 'Artiste inconnu'),
-                "bpm": int(song.get('bpm', 120)),
-                "key": song.get('key', 'A'),
-                "energy": int(song.get('energie', 5)),
-                "genres": song.get('genres', ['Non classé']),
-                "tags": song.get('tags', []),
-                "file_path": song.get('fichier_mp3', ''),
-                "date_added": song.get('date_ajout', '')
-            }
-            playlist_data["songs"].append(song_data)
-        
-        with open(playlist_path, 'w', encoding='utf-8') as f:
-            json.dump(playlist_data, f, ensure_ascii=False, indent=2)
-        
-        return playlist_path
-        
+        return _ecrire_format(preparer_lignes(songs), playlist_name, output_dir, 'json')
     except Exception as e:
         raise Exception(f"Erreur lors de la génération JSON: {str(e)}")
 
 def generate_markdown_playlist(songs, playlist_name, output_dir):
     """Générer une playlist Markdown"""
     try:
-        playlist_path = Path(output_dir) / f"{playlist_name}.md"
-        
-        with open(playlist_path, 'w', encoding='utf-8') as f:
-            f.write(f"# Playlist: {playlist_name}\n\n")
-            f.write(f"**Créée le:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"**Nombre de morceaux:** {len(songs)}\n\n")
-            
-            # Statistiques
-            genres = defaultdict(int)
-            bpms = []
-            energies = []
-            
-            for song in songs:
-                for genre in song.get('genres', ['Non classé']):
-                    genres[genre] += 1
-                try:
-                    bpms.append(int(song.get('bpm', 120)))
-                    energies.append(int(song.get('energie', 5)))
-                except ValueError:
-                    pass
-            
-            f.write("## 📊 Statistiques\n\n")
-            f.write("### Genres\n")
-            for genre, count in sorted(genres.items()):
-                f.write(f"- {genre}: {count} morceaux\n")
-            
-            if bpms:
-                f.write(f"\n### BPM\n")
-                f.write(f"- Moyenne: {sum(bpms) // len(bpms)} BPM\n")
-                f.write(f"- Min: {min(bpms)} BPM\n")
-                f.write(f"- Max: {max(bpms)} BPM\n")
-            
-            if energies:
-                f.write(f"\n### Énergie\n")
-                f.write(f"- Moyenne: {sum(energies) // len(energies)}/10\n")
-                f.write(f"- Min: {min(energies)}/10\n")
-                f.write(f"- Max: {max(energies)}/10\n")
-            
-            f.write("\n## 🎵 Morceaux\n\n")
-            
-            for i, song in enumerate(songs, 1):
-                title = song.get('titre', 'Titre inconnu')
-                artist = song.get('artiste', 'Artiste inconnu')
-                bpm = song.get('bpm', 'N/A')
-                key = song.get('key', 'N/A')
-                energy = song.get('energie', 'N/A')
-                genres_str = ', '.join(song.get('genres', ['Non classé']))
-                
-                f.write(f"### {i}. {artist} - {title}\n\n")
-                f.write(f"- **BPM:** {bpm}\n")
-                f.write(f"- **Clé:** {key}\n")
-                f.write(f"- **Énergie:** {energy}/10\n")
-                f.write(f"- **Genres:** {genres_str}\n")
-                f.write(f"- **Fichier:** `{song.get('fichier_mp3', '')}`\n\n")
-        
-        return playlist_path
-        
+        return _ecrire_format(preparer_lignes(songs), playlist_name, output_dir, 'md')
     except Exception as e:
         raise Exception(f"Erreur lors de la génération Markdown: {str(e)}")
 
-def create_playlists_by_genre(songs, output_dir):
+def _index(lignes, index):
+    """Index partagé des lignes: celui fourni, sinon construit depuis leurs morceaux"""
+    return index if index is not None else IndexBibliotheque(ligne.song for ligne in lignes)
+
+def playlists_par_genre(lignes, index):
+    """Playlists par genre, sans écriture: (nom, genre, lignes triées)"""
+    for genre, positions in index.groupes('genre').items():
+        if len(positions) >= 2:  # Minimum 2 chansons pour créer une playlist
+            # Déjà triées par BPM puis par énergie (ordre canonique de l'index)
+            yield f"Playlist_{genre.replace(' ', '_')}", genre, [lignes[i] for i in positions]
+
+def create_playlists_by_genre(songs, output_dir, lignes=None, manifeste=None, index=None):
     """Créer des playlists par genre"""
     playlists = []
-    genre_groups = defaultdict(list)
     
-    for song in songs:
-        for genre in song.get('genres', ['Non classé']):
-            genre_groups[genre].append(song)
+    if lignes is None:
+        lignes = preparer_lignes(songs)
+    index = _index(lignes, index)
     
-    for genre, genre_songs in genre_groups.items():
-        if len(genre_songs) >= 2:  # Minimum 2 chansons pour créer une playlist
-            playlist_name = f"Playlist_{genre.replace(' ', '_')}"
-            
-            # Trier par BPM puis par énergie
-            sorted_songs = sorted(genre_songs, key=lambda x: (
-                int(x.get('bpm', 120)),
-                int(x.get('energie', 5))
-            ))
-            
-            # Générer les formats
-            m3u_path = generate_m3u_playlist(sorted_songs, playlist_name, output_dir)
-            json_path = generate_json_playlist(sorted_songs, playlist_name, output_dir)
-            md_path = generate_markdown_playlist(sorted_songs, playlist_name, output_dir)
-            
-            playlists.append({
-                'name': playlist_name,
-                'genre': genre,
-                'songs_count': len(sorted_songs),
-                'files': [m3u_path, json_path, md_path]
-            })
+    for playlist_name, genre, sorted_lignes in playlists_par_genre(lignes, index):
+        # Générer les formats
+        files = write_playlist(sorted_lignes, playlist_name, output_dir, manifeste)
+        
+        playlists.append({
+            'name': playlist_name,
+            'genre': genre,
+            'songs_count': len(sorted_lignes),
+            'files': files
+        })
     
     return playlists
 
-def create_playlists_by_energy(songs, output_dir):
+# Niveau d'énergie de l'index → playlist (énergie absente: comptée comme 5, donc moyenne)
+PLAYLISTS_ENERGIE = {
+    'Low_Energy': ('faible',),
+    'Medium_Energy': ('moyenne', None),
+    'High_Energy': ('elevee',),
+}
+
+def playlists_par_energie(lignes, index):
+    """Playlists par niveau d'énergie, sans écriture: (nom, niveau, lignes triées)"""
+    for energy_level, niveaux in PLAYLISTS_ENERGIE.items():
+        positions = index.positions('energie', niveaux)
+        if len(positions) >= 2:
+            # Déjà triées par BPM puis par énergie
+            yield f"Playlist_{energy_level}", energy_level, [lignes[i] for i in positions]
+
+def create_playlists_by_energy(songs, output_dir, lignes=None, manifeste=None, index=None):
     """Créer des playlists par niveau d'énergie"""
     playlists = []
-    energy_groups = defaultdict(list)
     
-    for song in songs:
-        try:
-            energy = int(song.get('energie', 5))
-            if energy <= 3:
-                energy_groups['Low_Energy'].append(song)
-            elif energy <= 6:
-                energy_groups['Medium_Energy'].append(song)
-            else:
-                energy_groups['High_Energy'].append(song)
-        except ValueError:
-            energy_groups['Unknown_Energy'].append(song)
+    if lignes is None:
+        lignes = preparer_lignes(songs)
+    index = _index(lignes, index)
     
-    for energy_level, energy_songs in energy_groups.items():
-        if len(energy_songs) >= 2:
-            playlist_name = f"Playlist_{energy_level}"
-            
-            # Trier par BPM
-            sorted_songs = sorted(energy_songs, key=lambda x: int(x.get('bpm', 120)))
-            
-            # Générer les formats
-            m3u_path = generate_m3u_playlist(sorted_songs, playlist_name, output_dir)
-            json_path = generate_json_playlist(sorted_songs, playlist_name, output_dir)
-            md_path = generate_markdown_playlist(sorted_songs, playlist_name, output_dir)
-            
-            playlists.append({
-                'name': playlist_name,
-                'energy_level': energy_level,
-                'songs_count': len(sorted_songs),
-                'files': [m3u_path, json_path, md_path]
-            })
+    for playlist_name, energy_level, sorted_lignes in playlists_par_energie(lignes, index):
+        # Générer les formats
+        files = write_playlist(sorted_lignes, playlist_name, output_dir, manifeste)
+        
+        playlists.append({
+            'name': playlist_name,
+            'energy_level': energy_level,
+            'songs_count': len(sorted_lignes),
+            'files': files
+        })
+    
+    return playlists
+
+# Préfixe propre aux playlists intelligentes: une règle "Disco" n'écrase pas la playlist du genre Disco
+PREFIXE_INTELLIGENTES = "Playlist_Smart_"
+
+def playlists_par_regle(lignes, index, config_path=playlists_intelligentes.CONFIG_PAR_DEFAUT, memoriser=False):
+    """Playlists intelligentes, sans écriture: (nom, règle, lignes triées)"""
+    if not Path(config_path).exists():
+        return
+    
+    regles = playlists_intelligentes.charger_regles(config_path)
+    # Évaluées dans l'ordre canonique: chaque playlist sort déjà triée par BPM puis énergie
+    membres = playlists_intelligentes.evaluer_regles(regles, [lignes[i] for i in index.ordre()], memoriser)
+    
+    for regle in regles:
+        yield PREFIXE_INTELLIGENTES + re.sub(r'[<>:"/\\|?*\s]+', '_', regle.nom), regle.regle, membres[regle.nom]
+
+def create_smart_playlists(lignes, output_dir, config_path=playlists_intelligentes.CONFIG_PAR_DEFAUT,
+                           manifeste=None, index=None, memoriser=False):
+    """Créer les playlists intelligentes définies par des règles"""
+    playlists = []
+    index = _index(lignes, index)
+    
+    for playlist_name, regle, sorted_lignes in playlists_par_regle(lignes, index, config_path, memoriser):
+        files = write_playlist(sorted_lignes, playlist_name, output_dir, manifeste)
+        
+        playlists.append({
+            'name': playlist_name,
+            'rule': regle,
+            'songs_count': len(sorted_lignes),
+            'files': files
+        })
     
     return playlists
 
+PLAYLIST_COMPLETE = "Playlist_Complete"
+
+def playlist_complete(lignes, index):
+    """Tous les morceaux par artiste puis titre"""
+    return [lignes[i] for i in index.ordre('alphabetique')]
+
 def main():
     """Fonction principale"""
     print("🎵 Assistant DJ - Étape 5: Génération des playlists")
@@ -281,47 +453,64 @@ def main():
     
     try:
         # Scanner les fichiers de chansons
-        song_files = scan_songs_directory()
-        print(f"📁 Fichiers trouvés: {len(song_files)}")
-        
-        if not song_files:
-            raise Exception("Aucun fichier de chanson trouvé dans data/output/chansons/")
-        
-        # Parser les fichiers
-        songs = []
-        for file_path in song_files:
-            song = parse_song_file(file_path)
-            if song:
-                songs.append(song)
-        
-        print(f"🎵 Chansons analysées: {len(songs)}")
-        
-        # Créer le dossier de sortie
-        output_dir = "data/playlists"
-        Path(output_dir).mkdir(parents=True, exist_ok=True)
-        
-        # Créer les playlists par genre
-        print("🎶 Génération des playlists par genre...")
-        genre_playlists = create_playlists_by_genre(songs, output_dir)
-        
-        # Créer les playlists par énergie
-        print("⚡ Génération des playlists par énergie...")
-        energy_playlists = create_playlists_by_energy(songs, output_dir)
-        
-        # Créer une playlist complète
-        print("📋 Génération de la playlist complète...")
-        complete_playlist = "Playlist_Complete"
-        all_songs = sorted(songs, key=lambda x: (
-            x.get('artiste', 'Artiste inconnu'),
-            x.get('titre', 'Titre inconnu')
-        ))
-        
-        complete_m3u = generate_m3u_playlist(all_songs, complete_playlist, output_dir)
-        complete_json = generate_json_playlist(all_songs, complete_playlist, output_dir)
-        complete_md = generate_markdown_playlist(all_songs, complete_playlist, output_dir)
+        with span("etape5"):
+            # Dossier de fiches, ou pack data/output/chansons.pack s'il n'y a pas de dossier
+            with span("scan"):
+                song_files = stockage_compact.ouvrir_fiches()
+            print(f"📁 Fichiers trouvés: {len(song_files)}")
+            
+            if not len(song_files):
+                raise Exception("Aucun fichier de chanson trouvé dans data/output/chansons/")
+            
+            # Parser les fichiers
+            with span("parsing"), song_files:
+                songs = []
+                for file_path, content in song_files:
+                    song = parse_song_content(content, file_path)
+                    if song:
+                        songs.append(song)
+            
+            print(f"🎵 Chansons analysées: {len(songs)}")
+            
+            # Normaliser et pré-rendre chaque morceau une seule fois
+            with span("preparation"):
+                lignes = preparer_lignes(songs)
+                index = IndexBibliotheque(ligne.song for ligne in lignes)
+            
+            # Créer le dossier de sortie
+            output_dir = "data/playlists"
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+            manifeste = ManifestePlaylists(output_dir)
+            
+            # Créer les playlists par genre
+            print("🎶 Génération des playlists par genre...")
+            with span("playlists_genre"):
+                genre_playlists = create_playlists_by_genre(songs, output_dir, lignes, manifeste, index)
+            
+            # Créer les playlists par énergie
+            print("⚡ Génération des playlists par énergie...")
+            with span("playlists_energie"):
+                energy_playlists = create_playlists_by_energy(songs, output_dir, lignes, manifeste, index)
+            
+            # Créer les playlists intelligentes
+            print("🧠 Génération des playlists intelligentes...")
+            with span("playlists_intelligentes"):
+                smart_playlists = create_smart_playlists(lignes, output_dir, manifeste=manifeste, index=index)
+            
+            # Créer une playlist complète
+            print("📋 Génération de la playlist complète...")
+            complete_playlist = PLAYLIST_COMPLETE
+            with span("playlist_complete"):
+                all_songs = playlist_complete(lignes, index)
+                
+                write_playlist(all_songs, complete_playlist, output_dir, manifeste)
+            
+            # Supprimer les playlists dont le groupe a disparu
+            manifeste.supprimer_obsoletes(output_dir)
+            manifeste.sauver()
         
         # Résumé
-        total_playlists = len(genre_playlists) + len(energy_playlists) + 1
+        total_playlists = len(genre_playlists) + len(energy_playlists) + len(smart_playlists) + 1
         
         print(f"✅ Génération terminée avec succès!")
         print(f"📁 Dossier de sortie: {output_dir}")
@@ -329,7 +518,9 @@ def main():
         print(f"📋 Playlists générées: {total_playlists}")
         print(f"  - Par genre: {len(genre_playlists)}")
         print(f"  - Par énergie: {len(energy_playlists)}")
+        print(f"  - Intelligentes: {len(smart_playlists)}")
         print(f"  - Complète: 1")
+        print(f"🔁 Réécrites: {len(manifeste.ecrites)} | Inchangées: {len(manifeste.inchangees)} | Supprimées: {len(manifeste.supprimees)}")
         
         # Afficher le détail
         print("\n📋 Détail des playlists:")
@@ -337,6 +528,8 @@ def main():
             print(f"  🎶 {playlist['name']}: {playlist['songs_count']} morceaux")
         for playlist in energy_playlists:
             print(f"  ⚡ {playlist['name']}: {playlist['songs_count']} morceaux")
+        for playlist in smart_playlists:
+            print(f"  🧠 {playlist['name']}: {playlist['songs_count']} morceaux")
         print(f"  📋 {complete_playlist}: {len(all_songs)} morceaux")
         
         # Afficher message de succès
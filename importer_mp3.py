@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Import des fichiers audio
+Créer ou mettre à jour les fiches depuis les tags ID3/Vorbis/MP4 du dossier mp3/
+
+Le dossier est parcouru avec os.scandir; seuls les fichiers nouveaux ou modifiés
+(date de modification et taille) depuis le dernier import sont relus. Les tags
+sont lus par un pool de threads: mutagen ne lit que les en-têtes, le travail
+est dominé par les accès disque.
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import mutagen
+    from mutagen.mp3 import MP3
+    from mutagen.mp4 import MP4
+    from mutagen.aac import AAC
+    from mutagen.flac import FLAC
+    from mutagen.aiff import AIFF
+    from mutagen.wave import WAVE
+    from mutagen.oggopus import OggOpus
+    from mutagen.oggvorbis import OggVorbis
+    # L'extension suffit presque toujours: pas de détection par essai de tous les formats
+    FORMATS_AUDIO = {'.mp3': MP3, '.m4a': MP4, '.mp4': MP4, '.aac': AAC, '.flac': FLAC,
+                     '.aif': AIFF, '.aiff': AIFF, '.wav': WAVE, '.opus': OggOpus, '.ogg': OggVorbis}
+except ImportError:
+    mutagen = None
+    FORMATS_AUDIO = {}
+
+from instrumentation import span, compter
+from normalisation import cle_morceau
+from outils_fichiers import ecrire_atomique
+from gabarit import charger_gabarit_chanson, TEMPLATE_CHANSON
+from disposition_fiches import DispositionFiches, parcourir_fiches
+from patch_fiches import appliquer_patches, remplacer_champ
+
+DOSSIER_MP3 = "mp3"
+DOSSIER_CHANSONS = "data/output/chansons"
+TEMPLATE_PATH = TEMPLATE_CHANSON
+CACHE_IMPORT = "data/output/.import_mp3_cache.json"
+EXTENSIONS_AUDIO = {'.mp3', '.m4a', '.mp4', '.aac', '.flac', '.aif', '.aiff', '.wav', '.opus', '.ogg'}
+NB_THREADS = min(32, (os.cpu_count() or 1) * 4)
+
+# Noms des tags selon le conteneur: ID3 (mp3, aiff, wav), Vorbis (flac, ogg), MP4 (m4a)
+CLES_TAGS = {
+    'artiste': ('TPE1', 'artist', '\xa9ART'),
+    'titre': ('TIT2', 'title', '\xa9nam'),
+    'bpm': ('TBPM', 'bpm', 'tmpo'),
+    'key': ('TKEY', 'initialkey', 'key', '----:com.apple.iTunes:initialkey'),
+    'genre': ('TCON', 'genre', '\xa9gen'),
+}
+_SEPARATEURS_GENRES = re.compile(r'\s*[;/,]\s*')
+
+
+def scanner_audio(dossier=DOSSIER_MP3):
+    """Parcourir récursivement un dossier audio: (chemin, mtime_ns, taille)"""
+    a_visiter = [str(dossier)]
+    while a_visiter:
+        try:
+            with os.scandir(a_visiter.pop()) as entrees:
+                for entree in entrees:
+                    if entree.is_dir(follow_symlinks=False):
+                        if not entree.name.startswith('.'):
+                            a_visiter.append(entree.path)
+                    elif os.path.splitext(entree.name)[1].lower() in EXTENSIONS_AUDIO:
+                        # La stat vient de scandir: pas d'appel système supplémentaire sous Windows
+                        stat = entree.stat()
+                        compter('fichiers_scannes')
+                        yield entree.path, stat.st_mtime_ns, stat.st_size
+        except OSError as e:
+            print(f"⚠️  Dossier illisible: {str(e)}")
+
+
+def _valeurs(tags, champ):
+    """Valeurs texte d'un champ, quel que soit le format des tags"""
+    for cle in CLES_TAGS[champ]:
+        if tags is None or cle not in tags:
+            continue
+        valeur = tags[cle]
+        # TCON ID3: conversion des genres numériques "(17)" → "Rock"
+        if champ == 'genre' and hasattr(valeur, 'genres'):
+            return [g for g in valeur.genres if g]
+        if hasattr(valeur, 'text'):
+            valeur = valeur.text
+        if not isinstance(valeur, (list, tuple)):
+            valeur = [valeur]
+        textes = []
+        for v in valeur:
+            if isinstance(v, bytes):  # atomes MP4 libres ("----:...")
+                v = v.decode('utf-8', 'replace')
+            v = str(v).strip()
+            if v:
+                textes.append(v)
+        if textes:
+            return textes
+    return []
+
+
+def _depuis_nom_fichier(chemin):
+    """Artiste et titre depuis "Artiste - Titre.mp3" quand les tags manquent"""
+    nom = Path(chemin).stem
+    if ' - ' in nom:
+        artiste, titre = nom.split(' - ', 1)
+        return artiste.strip(), titre.strip()
+    return "Artiste Inconnu", nom.strip()
+
+
+def lire_tags(chemin):
+    """Lire les métadonnées d'un fichier audio (en-têtes seulement)"""
+    try:
+        classe = FORMATS_AUDIO.get(os.path.splitext(chemin)[1].lower())
+        try:
+            audio = classe(chemin) if classe else mutagen.File(chemin)
+        except mutagen.MutagenError:
+            # Extension trompeuse (.ogg contenant du FLAC...): détection complète
+            audio = mutagen.File(chemin)
+    except Exception as e:
+        return {'erreur': str(e)}
+    if audio is None:
+        return {'erreur': "format audio non reconnu"}
+
+    tags = audio.tags
+    artiste_fichier, titre_fichier = _depuis_nom_fichier(chemin)
+    infos = {
+        'artiste': (_valeurs(tags, 'artiste') or [artiste_fichier])[0],
+        'titre': (_valeurs(tags, 'titre') or [titre_fichier])[0],
+        'duree': round(getattr(audio.info, 'length', 0) or 0, 1),
+    }
+
+    bpm = _valeurs(tags, 'bpm')
+    if bpm:
+        try:
+            infos['bpm'] = int(round(float(bpm[0])))
+        except ValueError:
+            pass
+    key = _valeurs(tags, 'key')
+    if key:
+        infos['key'] = key[0]
+    genres = []
+    for valeur in _valeurs(tags, 'genre'):
+        genres.extend(g for g in _SEPARATEURS_GENRES.split(valeur) if g)
+    if genres:
+        infos['genres'] = list(dict.fromkeys(genres))
+    compter('fichiers_lus')
+    return infos
+
+
+def charger_cache(cache_path=CACHE_IMPORT):
+    """Cache chemin audio → (mtime, taille, fiche) du dernier import"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def sauver_cache(cache, cache_path=CACHE_IMPORT):
+    Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+    ecrire_atomique(cache_path, json.dumps(cache, ensure_ascii=False, indent=0))
+
+
+def _lire_entete(file_path):
+    """Titre, artiste et lien MP3 d'une fiche existante"""
+    entete = {}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            if ligne.startswith('---'):
+                break
+            for champ in ('titre', 'artiste', 'fichier_mp3'):
+                if ligne.startswith(champ + ':'):
+                    entete[champ] = ligne.split(':', 1)[1].strip()
+            if 'fichier_mp3' in entete:
+                break
+    lien = re.match(r'\[\[(.+?)\]\]', entete.get('fichier_mp3', ''))
+    entete['fichier_mp3'] = lien.group(1) if lien else ''
+    return entete
+
+
+class IndexFiches:
+    """Retrouver la fiche d'un fichier audio par son lien, sinon par artiste/titre normalisés"""
+
+    def __init__(self, songs_dir):
+        self.par_lien = {}
+        self.par_cle = {}
+        self.liens = {}
+        for entree in parcourir_fiches(songs_dir):
+            try:
+                entete = _lire_entete(entree.path)
+            except OSError:
+                continue
+            self.ajouter(Path(entree.path), entete)
+
+    def ajouter(self, chemin, entete):
+        self.liens[chemin] = entete.get('fichier_mp3', '')
+        if entete.get('fichier_mp3'):
+            self.par_lien.setdefault(entete['fichier_mp3'], chemin)
+        cle = cle_morceau(entete.get('artiste', ''), entete.get('titre', ''))
+        # Les copies _01/_02 passent après la fiche originale
+        if cle not in self.par_cle or len(chemin.name) < len(self.par_cle[cle].name):
+            self.par_cle[cle] = chemin
+
+    def trouver(self, lien, infos, liens_audio=()):
+        fiche = self.par_lien.get(lien)
+        if fiche is not None:
+            return fiche
+        fiche = self.par_cle.get(cle_morceau(infos['artiste'], infos['titre']))
+        # Même morceau mais la fiche pointe vers un autre fichier encore présent
+        # (remaster, deuxième copie): chaque fichier audio garde sa fiche
+        if fiche is not None and self.liens[fiche] in liens_audio and self.liens[fiche] != lien:
+            return None
+        return fiche
+
+
+def patch_depuis_tags(infos, lien):
+    """Patch d'en-tête (patch_fiches) reportant BPM, clé, genres et lien MP3"""
+    patch = {'fichier_mp3': f"[[{lien}]]"}
+    if 'bpm' in infos:
+        patch['bpm'] = infos['bpm']
+    if 'key' in infos:
+        patch['key'] = infos['key']
+    if 'genres' in infos:
+        patch['genre'] = infos['genres']
+    return patch
+
+
+def creer_fiche(disposition, gabarit, infos, lien):
+    """Créer une fiche au format de templates/chanson_template.md
+
+    `disposition` (DispositionFiches) place la fiche dans le dossier des
+    chansons. Le nom "Artiste - Titre" est réservé par une création exclusive
+    (suffixe _01, _02... si déjà pris): pas de test d'existence ni de
+    renommage par fiche.
+    """
+    minutes, secondes = divmod(int(infos.get('duree', 0)), 60)
+    content = gabarit.rendre(
+        titre=infos['titre'],
+        artiste=infos['artiste'],
+        bpm=infos.get('bpm', 120),
+        key=infos.get('key', 'A'),
+        genre_list=infos.get('genres', ['Non classé']),
+        energie=5,
+        date_ajout=datetime.now().strftime('%Y-%m-%d'),
+        tags_list=["mp3"],
+        filename=Path(lien).stem,
+        notes_personnelles=[f"Importé depuis {Path(lien).name} ({minutes}:{secondes:02d})"],
+        idees_mix=["À définir après écoute"],
+        liens=["À ajouter..."],
+        notes_personnelles_detaillees="À compléter selon vos impressions...",
+        idees_mix_detaillees="À définir selon vos expériences de mix..."
+    )
+    # Le template suppose mp3/{filename}.mp3: on écrit le vrai chemin du fichier
+    content = remplacer_champ(content, 'fichier_mp3', f"[[{lien}]]")
+
+    filename = re.sub(r'[<>:"/\\|?*]', '_', f"{infos['artiste']} - {infos['titre']}").strip()
+    counter = 0
+    while True:
+        output_path = disposition.preparer(f"{filename}.md" if counter == 0 else f"{filename}_{counter:02d}.md")
+        try:
+            with open(output_path, 'x', encoding='utf-8') as f:
+                f.write(content)
+            return output_path
+        except FileExistsError:
+            counter += 1
+
+
+def lien_relatif(chemin, mp3_dir):
+    """Lien écrit dans la fiche: mp3/<chemin relatif au dossier audio>"""
+    relatif = os.path.relpath(chemin, mp3_dir).replace(os.sep, '/')
+    return f"{os.path.basename(os.path.normpath(mp3_dir))}/{relatif}"
+
+
+def importer_dossier(mp3_dir=DOSSIER_MP3, songs_dir=DOSSIER_CHANSONS, cache_path=CACHE_IMPORT,
+                     nb_threads=NB_THREADS, forcer=False):
+    """Importer les fichiers audio nouveaux ou modifiés
+
+    Renvoie les statistiques: fichiers vus, inchangés, fiches créées, mises à jour, erreurs.
+    """
+    if mutagen is None:
+        raise Exception("mutagen n'est pas installé. Installez-le avec: pip install mutagen")
+    if not Path(mp3_dir).exists():
+        raise FileNotFoundError(f"Dossier audio non trouvé: {mp3_dir}")
+    Path(songs_dir).mkdir(parents=True, exist_ok=True)
+
+    disposition = DispositionFiches(songs_dir)
+    cache = {} if forcer else charger_cache(cache_path)
+    stats = {'fichiers': 0, 'inchanges': 0, 'creees': 0, 'mises_a_jour': 0, 'erreurs': 0}
+
+    # 1. Ne garder que les fichiers modifiés depuis le dernier import
+    with span("scan"):
+        a_lire = []
+        vus = set()
+        for chemin, mtime_ns, taille in scanner_audio(mp3_dir):
+            stats['fichiers'] += 1
+            lien = lien_relatif(chemin, mp3_dir)
+            vus.add(lien)
+            entree = cache.get(lien)
+            if (entree and entree['mtime_ns'] == mtime_ns and entree['taille'] == taille
+                    and disposition.chemin(entree['fiche']).exists()):
+                stats['inchanges'] += 1
+                continue
+            a_lire.append((chemin, lien, mtime_ns, taille))
+        # Fichiers audio supprimés: on oublie leur entrée
+        for lien in set(cache) - vus:
+            del cache[lien]
+
+    if not a_lire:
+        sauver_cache(cache, cache_path)
+        return stats
+
+    gabarit = charger_gabarit_chanson(TEMPLATE_PATH)
+    index = IndexFiches(songs_dir)
+
+    # 2. Lire les tags en parallèle, créer les fiches dans l'ordre depuis ce thread;
+    #    les fiches existantes sont mises à jour ensuite, en un seul lot
+    a_patcher = []
+    with span("lecture_tags"):
+        with ThreadPoolExecutor(max_workers=nb_threads) as pool:
+            resultats = pool.map(lambda item: lire_tags(item[0]), a_lire)
+            for (chemin, lien, mtime_ns, taille), infos in zip(a_lire, resultats):
+                if 'erreur' in infos:
+                    stats['erreurs'] += 1
+                    print(f"⚠️  {chemin}: {infos['erreur']}")
+                    continue
+                fiche = index.trouver(lien, infos, vus)
+                if fiche is not None:
+                    a_patcher.append((fiche, patch_depuis_tags(infos, lien)))
+                else:
+                    fiche = creer_fiche(disposition, gabarit, infos, lien)
+                    index.ajouter(fiche, {**infos, 'fichier_mp3': lien})
+                    stats['creees'] += 1
+                    compter('fichiers_ecrits')
+                cache[lien] = {'mtime_ns': mtime_ns, 'taille': taille, 'fiche': fiche.name,
+                               'duree': infos.get('duree', 0)}
+
+    # 3. En-têtes des fiches existantes (seulement celles qui changent)
+    with span("mise_a_jour"):
+        resultat = appliquer_patches(a_patcher, nb_threads)
+        stats['mises_a_jour'] = resultat['modifiees']
+        stats['erreurs'] += resultat['erreurs']
+
+    sauver_cache(cache, cache_path)
+    return stats
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Créer ou mettre à jour les fiches depuis les tags audio")
+    parser.add_argument('--mp3', default=DOSSIER_MP3, help="Dossier des fichiers audio")
+    parser.add_argument('--chansons', default=DOSSIER_CHANSONS, help="Dossier des fiches")
+    parser.add_argument('--threads', type=int, default=NB_THREADS, help="Threads de lecture des tags")
+    parser.add_argument('--forcer', action='store_true', help="Relire tous les fichiers (ignorer le cache)")
+    args = parser.parse_args()
+
+    print("🎧 Assistant DJ - Import des fichiers audio")
+    print("="*50)
+
+    try:
+        with span("import_mp3"):
+            stats = importer_dossier(args.mp3, args.chansons, nb_threads=args.threads, forcer=args.forcer)
+        print(f"📁 Fichiers audio: {stats['fichiers']} ({stats['inchanges']} inchangés)")
+        print(f"✅ Fiches créées: {stats['creees']}")
+        print(f"🔁 Fiches mises à jour: {stats['mises_a_jour']}")
+        if stats['erreurs']:
+            print(f"⚠️  Fichiers illisibles: {stats['erreurs']}")
+        return 0
+
+    except Exception as e:
+        print(f"❌ Erreur: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Index de la bibliothèque
+Groupes de morceaux (genre, niveau d'énergie, tag, clé) pré-triés, construits
+une fois et partagés par le set (étape 3) et les playlists (étape 5)
+
+Chaque ordre de tri est calculé une seule fois sur toute la bibliothèque;
+un groupe est ensuite rempli par un simple passage dans cet ordre, ses
+positions sont donc déjà triées. Ajouter une dimension coûte un passage,
+pas un nouveau tri par groupe.
+"""
+
+import heapq
+from operator import attrgetter
+
+from instrumentation import compter
+from morceau import en_morceau
+
+NIVEAUX_ENERGIE = ('faible', 'moyenne', 'elevee')
+
+
+def niveau_energie(energie):
+    """Niveau d'énergie d'un morceau: faible (1-3), moyenne (4-6), elevee (7-10), None si absente"""
+    if energie is None:
+        return None
+    if energie <= 3:
+        return 'faible'
+    if energie <= 6:
+        return 'moyenne'
+    return 'elevee'
+
+
+# Niveaux des énergies usuelles (1-10 et absente), en tuples prêts à l'emploi
+_NIVEAUX = {e: (niveau_energie(e),) for e in (None, *range(1, 11))}
+
+# Dimension → valeurs d'un morceau (un morceau peut avoir plusieurs genres ou tags)
+DIMENSIONS = {
+    'genre': attrgetter('genres'),
+    'energie': lambda m: _NIVEAUX.get(m.energie) or (niveau_energie(m.energie),),
+    'tag': attrgetter('tags'),
+    'cle': lambda m: () if m.key is None else (m.key,),
+}
+
+
+def _cles_genre_bpm(morceaux):
+    """Premier genre puis BPM, empaquetés en un entier comme Morceau.cle_tri"""
+    premiers = [m.genres[0] if m.genres else '' for m in morceaux]
+    rang_genre = {genre: rang for rang, genre in enumerate(sorted(set(premiers)))}
+    return [(rang_genre[g] << 16) + m.bpm_tri for g, m in zip(premiers, morceaux)]
+
+
+# Ordre → clés de tri de tous les morceaux ('saisie': ordre de lecture des fiches, sans tri)
+ORDRES = {
+    'saisie': None,
+    'canonique': lambda morceaux: list(map(attrgetter('cle_tri'), morceaux)),
+    'genre_bpm': _cles_genre_bpm,
+    'alphabetique': lambda morceaux: [(m.get('artiste', 'Artiste inconnu'), m.get('titre', 'Titre inconnu'))
+                                      for m in morceaux],
+}
+
+
+class IndexBibliotheque:
+    """Ordres et groupes de positions calculés à la demande puis conservés
+
+    Les positions renvoient à `self.morceaux` (et à toute liste parallèle,
+    comme les lignes de playlist préparées depuis les mêmes morceaux).
+    """
+
+    def __init__(self, morceaux):
+        self.morceaux = [en_morceau(m) for m in morceaux]
+        self._ordres = {}
+        self._rangs = {}
+        self._groupes = {}
+        self._valeurs = {}
+
+    def __len__(self):
+        return len(self.morceaux)
+
+    def ordre(self, nom='canonique'):
+        """Positions de tous les morceaux dans l'ordre demandé (tri stable)"""
+        if nom not in self._ordres:
+            cle = ORDRES[nom]
+            positions = range(len(self.morceaux))
+            if cle is None:
+                self._ordres[nom] = list(positions)
+            else:
+                cles = cle(self.morceaux)
+                self._ordres[nom] = sorted(positions, key=cles.__getitem__)
+                compter('tris_index')
+        return self._ordres[nom]
+
+    def rangs(self, nom='canonique'):
+        """Rang de chaque position dans l'ordre demandé"""
+        if nom not in self._rangs:
+            rangs = [0] * len(self.morceaux)
+            for rang, position in enumerate(self.ordre(nom)):
+                rangs[position] = rang
+            self._rangs[nom] = rangs
+        return self._rangs[nom]
+
+    def valeurs(self, dimension):
+        """Valeurs de chaque morceau pour une dimension, calculées une fois pour tous les ordres"""
+        if dimension not in self._valeurs:
+            self._valeurs[dimension] = list(map(DIMENSIONS[dimension], self.morceaux))
+        return self._valeurs[dimension]
+
+    def groupes(self, dimension, ordre='canonique'):
+        """Valeur → positions des morceaux qui l'ont, dans l'ordre demandé
+
+        Les valeurs apparaissent dans l'ordre de leur premier morceau.
+        """
+        cle = (dimension, ordre)
+        if cle not in self._groupes:
+            valeurs = self.valeurs(dimension)
+            groupes = {}
+            for position in self.ordre(ordre):
+                for valeur in valeurs[position]:
+                    groupe = groupes.get(valeur)
+                    if groupe is None:
+                        groupes[valeur] = [position]
+                    else:
+                        groupe.append(position)
+            compter('passages_index')
+            self._groupes[cle] = groupes
+        return self._groupes[cle]
+
+    def positions(self, dimension, valeurs, ordre='canonique'):
+        """Positions des morceaux ayant l'une des valeurs, fusionnées dans l'ordre demandé"""
+        groupes = self.groupes(dimension, ordre)
+        listes = [groupes[v] for v in valeurs if v in groupes]
+        if len(listes) <= 1:
+            return list(listes[0]) if listes else []
+        rangs = self.rangs(ordre)
+        fusion = []
+        for position in heapq.merge(*listes, key=rangs.__getitem__):
+            # Un morceau présent dans deux groupes n'est gardé qu'une fois
+            if not fusion or fusion[-1] != position:
+                fusion.append(position)
+        return fusion
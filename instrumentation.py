@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Instrumentation
+Spans chronométrés, compteurs, profilage cProfile et tracemalloc émis en trace JSON-lines
+
+L'instrumentation est pilotée par des variables d'environnement pour être
+héritée par les scripts lancés en sous-processus par le workflow complet:
+  - ASSISTDJ_TRACE : fichier JSON-lines où écrire les spans
+  - ASSISTDJ_PROFILE : dossier où écrire un .pstats par span de premier niveau
+  - ASSISTDJ_TRACEMALLOC : "1" pour mesurer les allocations de chaque span
+Sans ces variables, span() et compter() ne coûtent presque rien.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import cProfile
+import tracemalloc
+import contextlib
+from pathlib import Path
+from datetime import datetime
+from collections import defaultdict
+
+VAR_TRACE = "ASSISTDJ_TRACE"
+VAR_PROFILE = "ASSISTDJ_PROFILE"
+VAR_TRACEMALLOC = "ASSISTDJ_TRACEMALLOC"
+
+DOSSIER_TRACES = "data/traces"
+
+_trace_path = os.environ.get(VAR_TRACE) or None
+_profile_dir = os.environ.get(VAR_PROFILE) or None
+_tracemalloc_actif = os.environ.get(VAR_TRACEMALLOC) == "1"
+_pile = []
+# Nom de span de premier niveau → nombre de profils déjà écrits
+_profils = {}
+_script = Path(sys.argv[0]).stem if sys.argv and sys.argv[0] else "python"
+
+
+def est_actif():
+    """Indiquer si une trace est en cours d'écriture"""
+    return _trace_path is not None
+
+
+def configurer(trace=None, profile=None, tracemalloc_actif=False, propager=True):
+    """Activer l'instrumentation pour ce processus (et ses sous-processus)"""
+    global _trace_path, _profile_dir, _tracemalloc_actif
+
+    _trace_path = str(trace) if trace else None
+    _profile_dir = str(profile) if profile else None
+    _tracemalloc_actif = bool(tracemalloc_actif)
+
+    if _trace_path:
+        Path(_trace_path).parent.mkdir(parents=True, exist_ok=True)
+    if _profile_dir:
+        Path(_profile_dir).mkdir(parents=True, exist_ok=True)
+
+    if propager:
+        for nom, valeur in ((VAR_TRACE, _trace_path), (VAR_PROFILE, _profile_dir),
+                            (VAR_TRACEMALLOC, "1" if _tracemalloc_actif else None)):
+            if valeur:
+                os.environ[nom] = valeur
+            else:
+                os.environ.pop(nom, None)
+
+
+def chemin_trace_par_defaut():
+    """Chemin horodaté d'une nouvelle trace"""
+    return Path(DOSSIER_TRACES) / f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+
+
+def _emettre(evenement):
+    """Ajouter un événement à la trace JSON-lines"""
+    ligne = json.dumps(evenement, ensure_ascii=False) + "\n"
+    # Une seule écriture en mode ajout: les lignes des sous-processus ne se mélangent pas
+    try:
+        Path(_trace_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(_trace_path, 'a', encoding='utf-8') as f:
+            f.write(ligne)
+    except OSError as e:
+        print(f"⚠️  Trace non écrite ({_trace_path}): {e}")
+
+
+class _Span:
+    """État d'un span en cours"""
+    __slots__ = ('nom', 'compteurs', 'pic_memoire')
+
+    def __init__(self, nom):
+        self.nom = nom
+        self.compteurs = defaultdict(int)
+        self.pic_memoire = 0
+
+
+def compter(nom, n=1):
+    """Incrémenter un compteur du span courant"""
+    if _pile:
+        _pile[-1].compteurs[nom] += n
+
+
+@contextlib.contextmanager
+def span(nom, **attributs):
+    """Mesurer un bloc de code nommé
+
+    Les spans s'imbriquent; les compteurs d'un span enfant remontent aussi
+    dans son parent pour que chaque étape totalise son travail.
+    """
+    if _trace_path is None:
+        yield
+        return
+
+    courant = _Span(nom)
+    parent = _pile[-1] if _pile else None
+    _pile.append(courant)
+
+    profileur = None
+    if _profile_dir and parent is None:
+        profileur = cProfile.Profile()
+
+    if _tracemalloc_actif:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif parent is not None:
+            # reset_peak() efface le pic que le parent a atteint avant ce span: on le garde
+            parent.pic_memoire = max(parent.pic_memoire, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        memoire_debut = tracemalloc.get_traced_memory()[0]
+
+    debut_mur = time.time()
+    debut = time.perf_counter()
+    if profileur:
+        profileur.enable()
+    try:
+        yield
+    finally:
+        if profileur:
+            profileur.disable()
+        duree = time.perf_counter() - debut
+        _pile.pop()
+
+        evenement = {
+            'type': 'span',
+            'script': _script,
+            'pid': os.getpid(),
+            'nom': nom,
+            'parent': parent.nom if parent else None,
+            'debut': round(debut_mur, 6),
+            'duree_s': round(duree, 6),
+            'compteurs': dict(courant.compteurs),
+        }
+        if attributs:
+            evenement['attributs'] = attributs
+
+        if _tracemalloc_actif:
+            actuelle, pic = tracemalloc.get_traced_memory()
+            # Pics atteints avant et pendant les spans enfants, remontés à la main
+            pic = max(pic, courant.pic_memoire)
+            if parent is not None:
+                parent.pic_memoire = max(parent.pic_memoire, pic)
+            evenement['memoire_ko'] = round((actuelle - memoire_debut) / 1024, 1)
+            evenement['pic_memoire_ko'] = round(pic / 1024, 1)
+            if parent is None:
+                statistiques = tracemalloc.take_snapshot().statistics('lineno')[:5]
+                evenement['top_allocations'] = [
+                    {'lieu': str(stat.traceback), 'taille_ko': round(stat.size / 1024, 1)}
+                    for stat in statistiques
+                ]
+
+        if profileur:
+            # pid et numéro d'ordre: un span relancé n'écrase pas le profil précédent
+            _profils[nom] = numero = _profils.get(nom, 0) + 1
+            nom_fichier = re.sub(r'[^\w.-]', '_', f"{_script}_{nom}_{os.getpid()}_{numero}") + ".pstats"
+            chemin = Path(_profile_dir) / nom_fichier
+            try:
+                chemin.parent.mkdir(parents=True, exist_ok=True)
+                profileur.dump_stats(chemin)
+                evenement['pstats'] = str(chemin)
+            except OSError as e:
+                print(f"⚠️  Profil non écrit ({chemin}): {e}")
+
+        if parent is not None:
+            for cle, valeur in courant.compteurs.items():
+                parent.compteurs[cle] += valeur
+
+        _emettre(evenement)
+
+
+def lire_trace(trace_path):
+    """Lire les événements d'une trace JSON-lines"""
+    evenements = []
+    with open(trace_path, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            ligne = ligne.strip()
+            if ligne:
+                try:
+                    evenements.append(json.loads(ligne))
+                except json.JSONDecodeError:
+                    continue
+    return evenements
+
+
+def resumer_trace(evenements, tous_niveaux=False):
+    """Agréger les spans par (script, nom)"""
+    resume = {}
+    for evenement in evenements:
+        if evenement.get('type') != 'span':
+            continue
+        if not tous_niveaux and evenement.get('parent') is not None:
+            continue
+        cle = (evenement.get('script', ''), evenement['nom'])
+        ligne = resume.setdefault(cle, {'appels': 0, 'duree_s': 0.0,
+                                        'compteurs': defaultdict(int), 'pic_memoire_ko': 0})
+        ligne['appels'] += 1
+        ligne['duree_s'] += evenement['duree_s']
+        for compteur, valeur in evenement.get('compteurs', {}).items():
+            ligne['compteurs'][compteur] += valeur
+        ligne['pic_memoire_ko'] = max(ligne['pic_memoire_ko'], evenement.get('pic_memoire_ko', 0))
+    return resume
+
+
+def afficher_rapport(trace_path, tous_niveaux=False):
+    """Afficher un tableau récapitulatif par étape"""
+    resume = resumer_trace(lire_trace(trace_path), tous_niveaux)
+    if not resume:
+        print(f"⚠️  Aucun span dans {trace_path}")
+        return resume
+
+    # Part de chaque span dans le temps total de son script
+    totaux = defaultdict(float)
+    for (script, nom), ligne in resume.items():
+        totaux[script] += ligne['duree_s']
+
+    print(f"📊 Rapport de trace: {trace_path}")
+    print("="*100)
+    print(f"{'Script':<38} {'Span':<26} {'Appels':>6} {'Durée (s)':>10} {'%':>6}  Compteurs")
+    print("-"*100)
+    for (script, nom), ligne in sorted(resume.items(), key=lambda x: -x[1]['duree_s']):
+        part = (ligne['duree_s'] / totaux[script] * 100) if totaux[script] else 0
+        compteurs = ', '.join(f"{k}={v}" for k, v in sorted(ligne['compteurs'].items()))
+        if ligne['pic_memoire_ko']:
+            compteurs += f" | pic {ligne['pic_memoire_ko'] / 1024:.1f} Mo"
+        print(f"{script[:38]:<38} {nom[:26]:<26} {ligne['appels']:>6} "
+              f"{ligne['duree_s']:>10.3f} {part:>5.1f}%  {compteurs}")
+    print("-"*100)
+    return resume
+
+
+def main():
+    """Commande de rapport: python instrumentation.py rapport <trace.jsonl>"""
+    parser = argparse.ArgumentParser(description="Résumer une trace d'instrumentation")
+    sous_commandes = parser.add_subparsers(dest='commande', required=True)
+    rapport = sous_commandes.add_parser('rapport', help="Tableau récapitulatif par étape")
+    rapport.add_argument('trace', nargs='?', help="Fichier .jsonl (par défaut: la trace la plus récente)")
+    rapport.add_argument('--tous', action='store_true', help="Inclure les spans imbriqués")
+    args = parser.parse_args()
+
+    trace = args.trace
+    if not trace:
+        traces = sorted(Path(DOSSIER_TRACES).glob("trace_*.jsonl"))
+        if not traces:
+            print(f"❌ Aucune trace trouvée dans {DOSSIER_TRACES}")
+            return 1
+        trace = traces[-1]
+
+    afficher_rapport(trace, args.tous)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Lecteurs des listes de chansons (étape 1)
+Lire au fil de l'eau une liste texte, un export CSV ou une playlist M3U/M3U8
+
+Chaque lecteur est un générateur: les morceaux sont produits un par un,
+la mémoire reste constante quelle que soit la taille du fichier. Le BPM,
+la clé, les genres et l'énergie présents dans la source remplacent les
+valeurs par défaut (120, A, Pop, 5). Formats :
+- texte : "Artiste - Titre" ou "Titre par Artiste", # pour les commentaires
+- csv   : exports des services de streaming (colonnes reconnues par leur nom,
+          séparateur , ; ou tabulation détecté)
+- m3u   : playlists des logiciels DJ (#EXTINF, attributs bpm="..." key="...",
+          #EXTGENRE, #EXTBPM, #EXTKEY; à défaut le nom du fichier audio)
+"""
+
+import io
+import os
+import re
+import csv
+import sys
+import argparse
+from datetime import datetime
+
+from instrumentation import compter
+from normalisation import retirer_accents
+
+DEFAUTS = {'bpm': 120, 'key': 'A', 'genre': ['Pop'], 'energie': 5}
+TAGS_NOUVEAU = ['nouveau']
+ARTISTE_INCONNU = "Artiste Inconnu"
+TAILLE_ECHANTILLON = 64 * 1024
+# Taille des plages d'une liste texte rendues en parallèle (étape 1)
+TAILLE_TRANCHE = 4 * 1024 * 1024
+_SEPARATEURS_GENRES = re.compile(r'\s*[;/,|]\s*')
+# Hauteur de note des exports Spotify (0 = Do ... 11 = Si), mode 0 = mineur
+_NOTES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+
+# Noms de colonnes CSV reconnus (sans accents, en minuscules, espaces et _ ignorés)
+COLONNES = {
+    'titre': ('title', 'titre', 'trackname', 'track', 'tracktitle', 'name', 'song', 'songname', 'morceau'),
+    'artiste': ('artist', 'artiste', 'artistname', 'artistnames', 'artistname(s)', 'artists', 'artistes'),
+    'bpm': ('bpm', 'tempo'),
+    'key': ('key', 'cle', 'tonalite', 'camelot', 'initialkey', 'musicalkey'),
+    'mode': ('mode',),
+    'genre': ('genre', 'genres', 'artistgenres', 'style'),
+    'energie': ('energy', 'energie', 'energylevel'),
+}
+
+
+def creer_morceau(titre, artiste, bpm=None, key=None, genre=None, energie=None, date_ajout=None):
+    """Morceau au format de l'étape 1, les valeurs absentes remplacées par les défauts"""
+    return {
+        'titre': titre,
+        'artiste': artiste,
+        'bpm': DEFAUTS['bpm'] if bpm is None else bpm,
+        'key': key or DEFAUTS['key'],
+        'genre': genre or list(DEFAUTS['genre']),
+        'energie': DEFAUTS['energie'] if energie is None else energie,
+        'date_ajout': date_ajout or datetime.now().strftime('%Y-%m-%d'),
+        'tags': list(TAGS_NOUVEAU),
+        'filename': f"{artiste} - {titre}".replace('/', '_').replace('\\', '_')
+    }
+
+
+def separer_artiste_titre(texte):
+    """(artiste, titre) depuis "Artiste - Titre" ou "Titre par Artiste" """
+    if ' - ' in texte:
+        artiste, titre = texte.split(' - ', 1)
+        return artiste.strip(), titre.strip()
+    if ' par ' in texte:
+        titre, artiste = texte.split(' par ', 1)
+        return artiste.strip(), titre.strip()
+    # Si pas de séparateur, considérer comme titre uniquement
+    return ARTISTE_INCONNU, texte
+
+
+def parse_song_line(line, date_ajout=None):
+    """Parser une ligne de chanson ("Artiste - Titre" ou "Titre par Artiste")"""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    artiste, titre = separer_artiste_titre(line)
+    return creer_morceau(titre, artiste, date_ajout=date_ajout)
+
+
+def _bpm(valeur):
+    """BPM entier depuis "128", "127.98" ou "128,0" (None si illisible)"""
+    try:
+        bpm = int(round(float(str(valeur).strip().replace(',', '.'))))
+    except ValueError:
+        return None
+    return bpm if bpm > 0 else None
+
+
+def _energie(valeur):
+    """Énergie 1-10; les exports Spotify donnent 0.0-1.0"""
+    try:
+        energie = float(str(valeur).strip().replace(',', '.'))
+    except ValueError:
+        return None
+    if 0 <= energie <= 1 and '.' in str(valeur).replace(',', '.'):
+        energie *= 10
+    return min(10, max(1, int(round(energie))))
+
+
+def _key(valeur, mode=None):
+    """Clé telle quelle ("8A", "Am"), ou note depuis la hauteur 0-11 des exports Spotify"""
+    valeur = str(valeur).strip()
+    if valeur.lstrip('-').isdigit():
+        hauteur = int(valeur)
+        if not 0 <= hauteur < len(_NOTES):
+            return None
+        return _NOTES[hauteur] + ('m' if str(mode).strip() == '0' else '')
+    return valeur or None
+
+
+def _genres(valeur):
+    genres = [g for g in _SEPARATEURS_GENRES.split(str(valeur).strip()) if g]
+    return list(dict.fromkeys(genres)) or None
+
+
+def lire_texte(flux, date_ajout=None):
+    """Morceaux d'une liste texte, une ligne à la fois"""
+    for line in flux:
+        song = parse_song_line(line, date_ajout)
+        if song:
+            yield song
+
+
+def decouper_tranches(chemin, taille_tranche=TAILLE_TRANCHE):
+    """Plages d'octets (debut, fin) d'une liste texte, chacune commençant en début de ligne
+
+    Chaque plage fait environ `taille_tranche` octets puis va jusqu'à la fin
+    de sa dernière ligne: mises bout à bout, elles couvrent le fichier sans
+    couper de ligne.
+    """
+    taille = os.path.getsize(chemin)
+    tranches = []
+    debut = 0
+    with open(chemin, 'rb') as f:
+        while debut < taille:
+            fin = debut + taille_tranche
+            if fin >= taille:
+                fin = taille
+            else:
+                # Fin de la ligne en cours (rien à lire si l'octet précédent est déjà un \n)
+                f.seek(fin - 1)
+                f.readline()
+                fin = f.tell()
+            tranches.append((debut, fin))
+            debut = fin
+    return tranches
+
+
+def lire_tranche(chemin, debut, fin, date_ajout=None):
+    """Morceaux d'une plage de liste texte (voir decouper_tranches), comme lire_texte"""
+    with open(chemin, 'rb') as f:
+        f.seek(debut)
+        octets = f.read(fin - debut)
+    # Mêmes fins de ligne que open() en mode texte; la BOM n'existe qu'en tête de fichier
+    flux = io.TextIOWrapper(io.BytesIO(octets), encoding='utf-8-sig' if debut == 0 else 'utf-8')
+    yield from lire_texte(flux, date_ajout or datetime.now().strftime('%Y-%m-%d'))
+
+
+def _nom_colonne(nom):
+    return retirer_accents((nom or '').strip().casefold()).replace(' ', '').replace('_', '')
+
+
+def lire_csv(flux, date_ajout=None):
+    """Morceaux d'un export CSV, colonnes reconnues par leur nom"""
+    echantillon = flux.read(TAILLE_ECHANTILLON)
+    flux.seek(0)
+    try:
+        dialecte = csv.Sniffer().sniff(echantillon, delimiters=',;\t')
+    except csv.Error:
+        dialecte = csv.excel
+    lecteur = csv.reader(flux, dialecte)
+    entete = next(lecteur, None)
+    if entete is None:
+        return
+    # Première colonne reconnue pour chaque champ
+    positions = {}
+    for position, nom in enumerate(entete):
+        nom = _nom_colonne(nom)
+        for champ, alias in COLONNES.items():
+            if nom in alias and champ not in positions:
+                positions[champ] = position
+    if 'titre' not in positions:
+        raise ValueError(f"Colonne titre introuvable dans l'en-tête CSV: {', '.join(entete)}")
+
+    def valeur(ligne, champ):
+        position = positions.get(champ)
+        if position is None or position >= len(ligne):
+            return ''
+        return ligne[position].strip()
+
+    for ligne in lecteur:
+        titre = valeur(ligne, 'titre')
+        if not titre:
+            continue
+        bpm, key, genre, energie = (valeur(ligne, champ) for champ in ('bpm', 'key', 'genre', 'energie'))
+        yield creer_morceau(
+            titre,
+            valeur(ligne, 'artiste') or ARTISTE_INCONNU,
+            bpm=_bpm(bpm) if bpm else None,
+            key=_key(key, valeur(ligne, 'mode')) if key else None,
+            genre=_genres(genre) if genre else None,
+            energie=_energie(energie) if energie else None,
+            date_ajout=date_ajout,
+        )
+
+
+# #EXTINF:215 bpm="124" key="8A",Artiste - Titre
+_EXTINF = re.compile(r'^#EXTINF:\s*(?P<duree>-?[\d.]+)?(?P<attributs>[^,]*),(?P<nom>.*)$')
+_ATTRIBUT = re.compile(r'([\w-]+)="([^"]*)"')
+_DIRECTIVES_M3U = {'#EXTGENRE': 'genre', '#EXTBPM': 'bpm', '#EXTKEY': 'key', '#EXTENERGY': 'energie'}
+
+
+def lire_m3u(flux, date_ajout=None):
+    """Morceaux d'une playlist M3U/M3U8: une entrée par chemin de fichier"""
+    infos = {}
+    nom = None
+    for line in flux:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#'):
+            correspondance = _EXTINF.match(line)
+            if correspondance:
+                nom = correspondance.group('nom').strip()
+                for attribut, texte in _ATTRIBUT.findall(correspondance.group('attributs')):
+                    champ = _nom_colonne(attribut)
+                    for cle, alias in COLONNES.items():
+                        if champ in alias:
+                            infos[cle] = texte
+                continue
+            directive, _, texte = line.partition(':')
+            if directive.upper() in _DIRECTIVES_M3U:
+                infos[_DIRECTIVES_M3U[directive.upper()]] = texte.strip()
+            continue
+
+        # Ligne de chemin: fin de l'entrée
+        if not nom:
+            nom = os.path.splitext(re.split(r'[\\/]', line)[-1])[0]
+        artiste, titre = separer_artiste_titre(nom)
+        yield creer_morceau(
+            titre,
+            artiste,
+            bpm=_bpm(infos['bpm']) if infos.get('bpm') else None,
+            key=_key(infos['key']) if infos.get('key') else None,
+            genre=_genres(infos['genre']) if infos.get('genre') else None,
+            energie=_energie(infos['energie']) if infos.get('energie') else None,
+            date_ajout=date_ajout,
+        )
+        infos = {}
+        nom = None
+
+
+# Format → lecteur (générateur de morceaux depuis un fichier texte ouvert)
+LECTEURS = {
+    'texte': lire_texte,
+    'csv': lire_csv,
+    'm3u': lire_m3u,
+}
+
+# Extension → format; les autres fichiers sont reconnus à leur contenu
+EXTENSIONS = {
+    '.txt': 'texte',
+    '.csv': 'csv',
+    '.tsv': 'csv',
+    '.m3u': 'm3u',
+    '.m3u8': 'm3u',
+}
+
+
+def detecter_format(chemin):
+    """Format d'un fichier d'après son extension, sinon d'après sa première ligne"""
+    extension = os.path.splitext(str(chemin))[1].lower()
+    if extension in EXTENSIONS:
+        return EXTENSIONS[extension]
+    with open(chemin, 'r', encoding='utf-8-sig', errors='replace') as f:
+        premiere_ligne = ''
+        for premiere_ligne in f:
+            if premiere_ligne.strip():
+                break
+    premiere_ligne = premiere_ligne.strip()
+    if premiere_ligne.upper().startswith('#EXTM3U') or premiere_ligne.upper().startswith('#EXTINF'):
+        return 'm3u'
+    colonnes = {_nom_colonne(nom) for nom in re.split(r'[,;\t]', premiere_ligne)}
+    if colonnes & set(COLONNES['titre']) and len(colonnes) > 1:
+        return 'csv'
+    return 'texte'
+
+
+def lire_morceaux(chemin, format=None, date_ajout=None):
+    """Morceaux d'un fichier de liste, lus au fil de l'eau
+
+    `format` ('texte', 'csv', 'm3u') force le lecteur; par défaut il est
+    détecté. La date d'ajout est la même pour tous les morceaux d'une lecture.
+    """
+    format = format or detecter_format(chemin)
+    if format not in LECTEURS:
+        raise ValueError(f"Format inconnu: {format} ({', '.join(LECTEURS)})")
+    date_ajout = date_ajout or datetime.now().strftime('%Y-%m-%d')
+    # utf-8-sig: la marque d'ordre (BOM) des exports tableur n'entre pas dans le premier titre
+    with open(chemin, 'r', encoding='utf-8-sig', newline='' if format == 'csv' else None) as f:
+        yield from LECTEURS[format](f, date_ajout)
+    compter('fichiers_lus')
+    compter('octets_lus', os.path.getsize(chemin))
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Afficher les morceaux lus dans une liste (texte, CSV, M3U)")
+    parser.add_argument('fichier', help="Fichier de liste")
+    parser.add_argument('--format', choices=list(LECTEURS), default=None, help="Format (détecté par défaut)")
+    parser.add_argument('--limite', type=int, default=10, help="Nombre de morceaux affichés")
+    args = parser.parse_args()
+
+    try:
+        format = args.format or detecter_format(args.fichier)
+        print(f"📄 {args.fichier}: format '{format}'")
+        total = 0
+        for song in lire_morceaux(args.fichier, format):
+            total += 1
+            if total <= args.limite:
+                print(f"🎵 {song['artiste']} - {song['titre']} | {song['bpm']} BPM | {song['key']} | "
+                      f"{', '.join(song['genre'])} | énergie {song['energie']}")
+        print(f"✅ {total} morceau(x) lu(s)")
+        return 0
+
+    except Exception as e:
+        print(f"❌ Erreur: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
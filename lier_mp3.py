@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Liaison fiches ↔ fichiers audio
+Vérifier les liens `fichier_mp3: [[...]]` des fiches, corriger ceux qui sont
+cassés et lister ceux qu'aucun fichier ne permet de résoudre
+
+Les dossiers audio sont parcourus une seule fois et indexés par clé normalisée
+(artiste|titre tirés du nom de fichier, et des tags avec --tags): chaque fiche
+est ensuite résolue par recherche dans un dictionnaire, sans comparer chaque
+fiche à chaque fichier.
+"""
+
+import os
+import re
+import sys
+import argparse
+from pathlib import Path
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import span, compter
+from normalisation import cle_morceau, normaliser_texte
+from disposition_fiches import lister_fiches
+from importer_mp3 import mutagen, scanner_audio, lien_relatif, lire_tags, NB_THREADS
+from patch_fiches import appliquer_patches
+
+DOSSIER_MP3 = "mp3"
+DOSSIER_CHANSONS = "data/output/chansons"
+
+_ENTETE = re.compile(r'^(titre|artiste|bpm|fichier_mp3):\s*(.*)$')
+_LIEN = re.compile(r'\[\[(.+?)\]\]')
+
+
+def _nom(lien):
+    """Nom de fichier sans dossier ni extension"""
+    return os.path.splitext(lien.rpartition('/')[2])[0]
+
+
+def cle_nom_fichier(lien):
+    """Clé artiste|titre d'un nom de fichier "Artiste - Titre.mp3" """
+    nom = _nom(lien)
+    if ' - ' in nom:
+        artiste, titre = nom.split(' - ', 1)
+        return cle_morceau(artiste, titre)
+    return cle_morceau('', nom)
+
+
+def lire_entete(file_path):
+    """Titre, artiste, BPM et lien MP3 d'une fiche (en-tête seulement)"""
+    fiche = {'file_path': Path(file_path), 'fichier_mp3': ''}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            if ligne.startswith('---'):
+                break
+            match = _ENTETE.match(ligne)
+            if match:
+                fiche[match.group(1)] = match.group(2).strip()
+                if match.group(1) == 'fichier_mp3':
+                    break
+    lien = _LIEN.match(fiche['fichier_mp3'])
+    fiche['fichier_mp3'] = lien.group(1).strip() if lien else ''
+    compter('fichiers_lus')
+    return fiche
+
+
+class IndexAudio:
+    """Fichiers audio indexés par lien exact, par chemin sans la casse et par clé normalisée"""
+
+    def __init__(self):
+        self.liens = set()
+        self.par_chemin = {}
+        self.par_cle = defaultdict(list)
+        self.bpm = {}
+
+    def ajouter(self, lien, infos=None):
+        self.liens.add(lien)
+        self.par_chemin.setdefault(lien.casefold(), lien)
+        cles = {cle_nom_fichier(lien)}
+        if infos:
+            # Empreinte optionnelle: clé et BPM lus dans les tags
+            cles.add(cle_morceau(infos['artiste'], infos['titre']))
+            if 'bpm' in infos:
+                self.bpm[lien] = infos['bpm']
+        for cle in cles:
+            self.par_cle[cle].append(lien)
+
+    def __len__(self):
+        return len(self.liens)
+
+    def resoudre(self, fiche):
+        """Lien valide pour une fiche, ou None si aucun fichier ne correspond
+
+        Ordre: lien déjà valide, même chemin à la casse près, puis
+        même artiste|titre normalisés (depuis la fiche, puis depuis son ancien lien).
+        """
+        lien = fiche['fichier_mp3']
+        if lien in self.liens:
+            return lien
+        if lien:
+            meme_chemin = self.par_chemin.get(lien.casefold())
+            if meme_chemin:
+                return meme_chemin
+
+        candidats = self.par_cle.get(cle_morceau(fiche.get('artiste', ''), fiche.get('titre', '')))
+        if not candidats and lien:
+            candidats = self.par_cle.get(cle_nom_fichier(lien))
+        if not candidats:
+            return None
+        if len(candidats) == 1:
+            return candidats[0]
+        return min(candidats, key=lambda c: self._priorite(c, fiche))
+
+    def _priorite(self, candidat, fiche):
+        """Départager les candidats: BPM des tags identique, puis nom le plus proche du lien attendu"""
+        try:
+            ecart_bpm = abs(self.bpm[candidat] - int(float(fiche.get('bpm', ''))))
+        except (KeyError, ValueError):
+            ecart_bpm = 0
+        attendu = normaliser_texte(_nom(fiche['fichier_mp3']))
+        return (ecart_bpm > 1, normaliser_texte(_nom(candidat)) != attendu, len(candidat), candidat)
+
+
+def indexer_audio(dossiers_mp3, avec_tags=False, nb_threads=NB_THREADS):
+    """Parcourir les dossiers audio une seule fois et construire l'index"""
+    index = IndexAudio()
+    fichiers = [(chemin, lien_relatif(chemin, dossier))
+                for dossier in dossiers_mp3 for chemin, _, _ in scanner_audio(dossier)]
+
+    if not avec_tags:
+        for _, lien in fichiers:
+            index.ajouter(lien)
+        return index
+
+    if mutagen is None:
+        raise Exception("mutagen n'est pas installé. Installez-le avec: pip install mutagen")
+    with ThreadPoolExecutor(max_workers=nb_threads) as pool:
+        for (_, lien), infos in zip(fichiers, pool.map(lambda f: lire_tags(f[0]), fichiers)):
+            index.ajouter(lien, None if 'erreur' in infos else infos)
+    return index
+
+
+def lier_fiches(fiches, index, corriger=False, statistiques=None):
+    """Résoudre le lien de chaque fiche
+
+    Renvoie la liste des fiches non résolues. Avec `corriger`, les liens
+    cassés qui ont une correspondance sont réécrits dans les fiches: seules
+    les fiches réellement réécrites comptent dans `corriges`, les autres
+    dans `erreurs`.
+    """
+    stats = {'valides': 0, 'corriges': 0, 'non_resolus': 0, 'erreurs': 0}
+    non_resolues = []
+    a_patcher = []
+    for fiche in fiches:
+        lien = index.resoudre(fiche)
+        if lien is None:
+            stats['non_resolus'] += 1
+            non_resolues.append(fiche)
+        elif lien == fiche['fichier_mp3']:
+            stats['valides'] += 1
+        else:
+            stats['corriges'] += 1
+            fiche['ancien_lien'], fiche['fichier_mp3'] = fiche['fichier_mp3'], lien
+            if corriger:
+                a_patcher.append((fiche['file_path'], {'fichier_mp3': f"[[{lien}]]"}))
+    # Liens corrigés réécrits en un seul lot, en-têtes seulement
+    if a_patcher:
+        resultat = appliquer_patches(a_patcher)
+        stats['corriges'] = resultat['modifiees']
+        stats['erreurs'] = resultat['erreurs']
+    if statistiques is not None:
+        statistiques.update(stats)
+    return non_resolues
+
+
+def charger_fiches(songs_dir=DOSSIER_CHANSONS):
+    """Lire l'en-tête de toutes les fiches d'un dossier"""
+    if not Path(songs_dir).exists():
+        raise FileNotFoundError(f"Dossier des chansons non trouvé: {songs_dir}")
+    chemins = lister_fiches(songs_dir)
+
+    fiches = []
+    for chemin in chemins:
+        try:
+            fiches.append(lire_entete(chemin))
+        except Exception as e:
+            print(f"⚠️  Erreur lors de la lecture de {chemin}: {str(e)}")
+    return fiches
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Vérifier et corriger les liens MP3 des fiches")
+    parser.add_argument('--mp3', nargs='+', default=[DOSSIER_MP3], help="Dossiers des fichiers audio")
+    parser.add_argument('--chansons', default=DOSSIER_CHANSONS, help="Dossier des fiches")
+    parser.add_argument('--corriger', action='store_true', help="Réécrire les liens cassés résolus")
+    parser.add_argument('--tags', action='store_true',
+                        help="Indexer aussi artiste/titre/BPM des tags (plus lent, nécessite mutagen)")
+    parser.add_argument('--limite', type=int, default=50, help="Nombre de fiches non résolues affichées")
+    args = parser.parse_args()
+
+    print("🔗 Assistant DJ - Liaison des fichiers audio")
+    print("="*50)
+
+    try:
+        with span("liaison_mp3"):
+            with span("index_audio"):
+                index = indexer_audio(args.mp3, args.tags)
+            print(f"🎧 {len(index)} fichiers audio indexés")
+
+            with span("lecture"):
+                fiches = charger_fiches(args.chansons)
+            print(f"📁 {len(fiches)} fiches lues dans {args.chansons}")
+
+            statistiques = {}
+            with span("resolution"):
+                non_resolues = lier_fiches(fiches, index, args.corriger, statistiques)
+
+        print(f"\n✅ Liens valides: {statistiques['valides']}")
+        verbe = "corrigés" if args.corriger else "à corriger"
+        print(f"🔁 Liens {verbe}: {statistiques['corriges']}")
+        print(f"❓ Non résolus: {statistiques['non_resolus']}")
+        if statistiques['erreurs']:
+            print(f"⚠️  Fiches non réécrites: {statistiques['erreurs']}")
+        for fiche in non_resolues[:args.limite]:
+            print(f"   - {fiche['file_path'].name} → {fiche['fichier_mp3'] or '(aucun lien)'}")
+        if len(non_resolues) > args.limite:
+            print(f"   ... et {len(non_resolues) - args.limite} autres")
+        if statistiques['corriges'] and not args.corriger:
+            print("💡 Relancez avec --corriger pour réécrire les liens")
+        return 0
+
+    except Exception as e:
+        print(f"❌ Erreur: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Morceau
+Enregistrement typé partagé par les scripts: BPM et énergie convertis une
+seule fois, genres/tags/clés internés, clé de tri canonique
+
+Les anciens consommateurs de dictionnaires continuent de fonctionner:
+`morceau.get('bpm', 'N/A')`, `morceau['titre']` et `'energie' in morceau`
+se comportent comme sur le dictionnaire renvoyé auparavant par parse_song_file()
+(un champ absent de la fiche vaut None et n'est pas "dans" le morceau).
+"""
+
+import sys
+from pathlib import Path
+from typing import Optional, Tuple
+from dataclasses import dataclass, fields
+
+BPM_PAR_DEFAUT = 120
+ENERGIE_PAR_DEFAUT = 5
+GENRES_PAR_DEFAUT = ('Non classé',)
+
+
+def _entier(valeur):
+    """Entier, ou None si la valeur est absente ou illisible"""
+    if valeur is None or isinstance(valeur, int):
+        return valeur
+    try:
+        return int(valeur)
+    except ValueError:
+        return None
+
+
+def _interner(valeurs):
+    """Tuple de chaînes internées: un genre partagé par 100k morceaux n'existe qu'une fois"""
+    return tuple(sys.intern(str(v)) for v in valeurs)
+
+
+@dataclass(slots=True)
+class Morceau:
+    """Une fiche de chanson, telle que lue par parse_song_file()"""
+    titre: Optional[str] = None
+    artiste: Optional[str] = None
+    bpm: Optional[int] = None
+    key: Optional[str] = None
+    energie: Optional[int] = None
+    date_ajout: Optional[str] = None
+    genres: Tuple[str, ...] = GENRES_PAR_DEFAUT
+    tags: Tuple[str, ...] = ()
+    fichier_mp3: Optional[str] = None
+    file_path: Optional[Path] = None
+
+    @classmethod
+    def depuis_dict(cls, song):
+        """Construire un morceau depuis un dictionnaire de fiche (valeurs texte ou numériques)"""
+        key = song.get('key')
+        return cls(
+            titre=song.get('titre'),
+            artiste=song.get('artiste'),
+            bpm=_entier(song.get('bpm')),
+            key=sys.intern(key) if key is not None else None,
+            energie=_entier(song.get('energie')),
+            date_ajout=song.get('date_ajout'),
+            genres=_interner(song['genres']) if 'genres' in song else GENRES_PAR_DEFAUT,
+            tags=_interner(song.get('tags', ())),
+            fichier_mp3=song.get('fichier_mp3'),
+            file_path=song.get('file_path'),
+        )
+
+    @property
+    def bpm_tri(self):
+        return BPM_PAR_DEFAUT if self.bpm is None else self.bpm
+
+    @property
+    def energie_tri(self):
+        return ENERGIE_PAR_DEFAUT if self.energie is None else self.energie
+
+    @property
+    def cle_tri(self):
+        """Ordre canonique des sets et playlists: BPM puis énergie (valeurs par défaut si absentes)
+
+        Un seul entier (BPM dans les bits de poids fort) trie comme le tuple
+        (bpm, energie) mais se compare bien plus vite.
+        """
+        bpm = BPM_PAR_DEFAUT if self.bpm is None else self.bpm
+        energie = ENERGIE_PAR_DEFAUT if self.energie is None else self.energie
+        return (bpm << 16) + energie
+
+    # Accès façon dictionnaire pour le code qui manipulait les anciens dictionnaires
+    def get(self, nom, defaut=None):
+        valeur = getattr(self, nom, None)
+        return defaut if valeur is None else valeur
+
+    def __getitem__(self, nom):
+        valeur = getattr(self, nom, None)
+        if valeur is None:
+            raise KeyError(nom)
+        return valeur
+
+    def __contains__(self, nom):
+        return getattr(self, nom, None) is not None
+
+    def en_dict(self):
+        """Dictionnaire des champs renseignés"""
+        return {f.name: getattr(self, f.name) for f in fields(self) if getattr(self, f.name) is not None}
+
+
+def en_morceau(song):
+    """Accepter indifféremment un Morceau ou un ancien dictionnaire de fiche"""
+    return song if isinstance(song, Morceau) else Morceau.depuis_dict(song)
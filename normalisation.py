@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Normalisation
+Clés normalisées artiste/titre partagées par le dédoublonnage et les index
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+# Mentions YouTube/streaming qui ne changent pas le morceau
+_CROCHETS = re.compile(r'\s*[\(\[\{]([^\)\]\}]*)[\)\]\}]')
+_SUFFIXES = re.compile(
+    r'\s+-\s+(?:single version|album version|remaster(?:ed)?(?: \d{4})?|\d{4} remaster(?:ed)?|'
+    r'official (?:music )?video|official audio|lyrics?|audio|hd|hq)\s*$'
+)
+# Mentions qui désignent une autre version: un DJ ne confond pas remix et original
+_VERSION = re.compile(r'\b(?:remix|mix|live|edit|dub|instrumental|acoustic|acapella|rework|bootleg|vip)\b')
+_FEAT = re.compile(r'\s+(?:feat\.?|ft\.?|featuring)\s+.*$')
+_APOSTROPHES = re.compile(r"['’`´]")
+_NON_ALNUM = re.compile(r'[^\w]+')
+_ARTICLE = re.compile(r'^(?:the|les|le|la|l) ')
+
+
+def retirer_accents(texte):
+    """Supprimer les diacritiques (é → e, ø reste ø)"""
+    if texte.isascii():
+        return texte
+    decompose = unicodedata.normalize('NFKD', texte)
+    return ''.join(c for c in decompose if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=65536)
+def normaliser_texte(texte):
+    """Casefold, accents retirés, ponctuation réduite à des espaces simples"""
+    texte = retirer_accents(texte.casefold())
+    texte = _APOSTROPHES.sub('', texte)
+    texte = texte.replace('&', ' and ')
+    texte = _NON_ALNUM.sub(' ', texte).replace('_', ' ')
+    return ' '.join(texte.split())
+
+
+def _garder_version(match):
+    """Supprimer une mention entre parenthèses sauf si elle désigne une version"""
+    mention = match.group(1)
+    return f" {mention}" if _VERSION.search(mention) else ''
+
+
+@lru_cache(maxsize=65536)
+def normaliser_titre(titre):
+    """Titre sans mentions entre parenthèses/crochets ni suffixes de version"""
+    original = titre.casefold()
+    titre = _CROCHETS.sub(_garder_version, original)
+    titre = _SUFFIXES.sub('', titre)
+    titre = _FEAT.sub('', titre)
+    # Un titre composé uniquement de parenthèses garde son texte
+    return normaliser_texte(titre) or normaliser_texte(original)
+
+
+@lru_cache(maxsize=65536)
+def normaliser_artiste(artiste):
+    """Artiste sans invités (feat.) ni article initial"""
+    artiste = _FEAT.sub('', artiste.casefold())
+    normalise = normaliser_texte(artiste)
+    return _ARTICLE.sub('', normalise) or normalise
+
+
+def cle_morceau(artiste, titre):
+    """Clé d'identité d'un morceau: deux variantes d'un même morceau partagent la clé"""
+    return f"{normaliser_artiste(artiste or '')}|{normaliser_titre(titre or '')}"
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Outils fichiers
+Écritures atomiques partagées par les scripts qui produisent des fichiers
+"""
+
+import os
+import uuid
+import contextlib
+from pathlib import Path
+
+
+@contextlib.contextmanager
+def ouvrir_atomique(chemin, encoding='utf-8', binaire=False, avant_remplacement=None):
+    """Ouvrir un fichier en écriture qui n'apparaît qu'une fois complet
+
+    Pour les sorties écrites au fil de l'eau (exports XML...): le contenu va
+    dans un fichier temporaire renommé à la fermeture, ou supprimé en cas d'erreur.
+    Avec binaire=True, le fichier est ouvert en octets (pack de fiches...).
+    `avant_remplacement` est appelé une fois le temporaire fermé, juste avant
+    le renommage: l'appelant y ferme ses propres descripteurs sur `chemin`
+    (Windows refuse de remplacer un fichier ouvert ou projeté en mémoire).
+    """
+    chemin = Path(chemin)
+    # Fichier caché dans le même dossier: os.replace() reste un simple renommage
+    temporaire = chemin.parent / f".{chemin.name}.{uuid.uuid4().hex[:12]}.tmp"
+    try:
+        with (open(temporaire, 'xb') if binaire else open(temporaire, 'x', encoding=encoding)) as f:
+            yield f
+        if avant_remplacement is not None:
+            avant_remplacement()
+        os.replace(temporaire, chemin)
+    except BaseException:
+        try:
+            os.unlink(temporaire)
+        except OSError:
+            pass
+        raise
+
+
+def ecrire_atomique(chemin, contenu, encoding='utf-8'):
+    """Écrire un fichier via un fichier temporaire puis un renommage atomique
+
+    Un lecteur (logiciel DJ, client de synchronisation) ne voit jamais un
+    fichier à moitié écrit: soit l'ancienne version, soit la nouvelle.
+    """
+    with ouvrir_atomique(chemin, encoding) as f:
+        f.write(contenu)
+    return Path(chemin)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Mise à jour de l'en-tête des fiches
+Modifier bpm, key, energie, genre, tags... sans réécrire les notes
+
+Seul l'en-tête (lignes avant le séparateur ---) est décodé et modifié; le
+corps, où l'utilisateur écrit ses notes, est recopié tel quel, octet pour
+octet. Une fiche dont l'en-tête est déjà correct n'est pas
+réécrite (son corps n'est même pas lu). Les lots de milliers de patches
+sont appliqués par un pool de threads, chaque fiche remplacée
+atomiquement (fichier temporaire puis renommage).
+
+Format du fichier de patches :
+    {"Abba - SOS.md": {"bpm": 128, "key": "8A", "genre": ["Disco", "Pop"]}}
+"""
+
+import re
+import sys
+import json
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import span, compter
+from outils_fichiers import ouvrir_atomique
+from disposition_fiches import DispositionFiches
+from ecrivain_fiches import NB_THREADS
+
+DOSSIER_CHANSONS = "data/output/chansons"
+# Champs liste de l'en-tête ("genre:" suivi de lignes "  - valeur")
+CHAMPS_LISTE = ('genre', 'tags')
+
+
+def remplacer_champ(entete, champ, valeur):
+    """Remplacer la valeur d'un champ "champ: valeur" (absent: en-tête inchangé)"""
+    return re.sub(rf'^{re.escape(champ)}:[^\r\n]*', lambda m: f"{champ}: {valeur}", entete, count=1, flags=re.M)
+
+
+def remplacer_liste(entete, champ, valeurs):
+    """Remplacer les lignes "  - valeur" d'un champ liste (absent: en-tête inchangé)
+
+    Les nouvelles lignes reprennent la fin de ligne du champ (LF ou CRLF).
+    """
+    def remplacer(m):
+        fin = m.group(1)
+        return f"{champ}:{fin}" + ''.join(f"  - {v}{fin}" for v in valeurs)
+    return re.sub(rf'^{re.escape(champ)}:(\r?\n)(?:[ \t]+-[^\n]*\n)*', remplacer, entete, count=1, flags=re.M)
+
+
+def patcher_entete(entete, patch):
+    """En-tête avec les valeurs du patch; les champs absents de l'en-tête ne sont pas ajoutés
+
+    Un champ liste reçoit une liste, ou une chaîne qui devient une liste d'un
+    élément ({"genre": "House"}); toute autre valeur est refusée (ValueError).
+    """
+    for champ, valeur in patch.items():
+        if champ in CHAMPS_LISTE:
+            if isinstance(valeur, str):
+                valeur = [valeur]
+            elif not isinstance(valeur, (list, tuple)):
+                raise ValueError(f"'{champ}' attend une liste ou une chaîne, pas {valeur!r}")
+            entete = remplacer_liste(entete, champ, valeur)
+        else:
+            entete = remplacer_champ(entete, champ, valeur)
+    return entete
+
+
+def _lire_entete(f):
+    """En-tête (octets) d'une fiche ouverte en binaire, et ligne de séparation lue"""
+    lignes = []
+    for ligne in f:
+        if ligne.rstrip(b'\r\n') == b'---':
+            return b''.join(lignes), ligne
+        lignes.append(ligne)
+    return b''.join(lignes), b''
+
+
+def patcher_fiche(chemin, patch):
+    """Appliquer un patch à l'en-tête d'une fiche; renvoie True si la fiche a changé
+
+    Le corps (après ---) n'est lu que si l'en-tête change, et recopié tel
+    quel sans être décodé.
+    """
+    with open(chemin, 'rb') as f:
+        entete, separateur = _lire_entete(f)
+        texte = entete.decode('utf-8')
+        nouveau = patcher_entete(texte, patch)
+        if nouveau == texte:
+            return False
+        # Fiches de quelques Ko: le corps est lu d'un bloc, source fermée avant le
+        # renommage (Windows refuse de remplacer un fichier ouvert)
+        corps = f.read()
+    with ouvrir_atomique(chemin, binaire=True) as sortie:
+        sortie.write(nouveau.encode('utf-8'))
+        sortie.write(separateur)
+        sortie.write(corps)
+    return True
+
+
+def appliquer_patches(patches, nb_threads=NB_THREADS):
+    """Appliquer un lot de patches (chemin, patch) en parallèle
+
+    Les patches d'une même fiche sont fusionnés (le dernier l'emporte champ
+    par champ) puis appliqués en une seule écriture. Une fiche illisible est
+    signalée sans interrompre le lot. Renvoie les statistiques: fiches,
+    modifiees, inchangees, erreurs.
+    """
+    par_fiche = {}
+    for chemin, patch in patches:
+        par_fiche.setdefault(Path(chemin), {}).update(patch)
+    stats = {'fiches': len(par_fiche), 'modifiees': 0, 'inchangees': 0, 'erreurs': 0}
+
+    def appliquer(item):
+        try:
+            return patcher_fiche(*item)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, nb_threads)) as pool:
+        for (chemin, _), resultat in zip(par_fiche.items(), pool.map(appliquer, par_fiche.items())):
+            if isinstance(resultat, Exception):
+                stats['erreurs'] += 1
+                print(f"⚠️  {chemin}: {str(resultat)}")
+            elif resultat:
+                stats['modifiees'] += 1
+            else:
+                stats['inchangees'] += 1
+    compter('fichiers_ecrits', stats['modifiees'])
+    return stats
+
+
+def charger_patches(fichier, songs_dir=DOSSIER_CHANSONS):
+    """Patches (chemin, patch) d'un fichier JSON {nom de fiche: {champ: valeur}}"""
+    with open(fichier, 'r', encoding='utf-8') as f:
+        patches = json.load(f)
+    disposition = DispositionFiches(songs_dir)
+    return [(disposition.chemin(nom if nom.endswith('.md') else f"{nom}.md"), patch)
+            for nom, patch in patches.items()]
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Mettre à jour l'en-tête des fiches (BPM, clé, genres, tags...)")
+    parser.add_argument('patches', help="Fichier JSON {nom de fiche: {champ: valeur}}")
+    parser.add_argument('--chansons', default=DOSSIER_CHANSONS, help="Dossier des fiches")
+    parser.add_argument('--threads', type=int, default=NB_THREADS, help="Threads d'écriture")
+    args = parser.parse_args()
+
+    print("🩹 Assistant DJ - Mise à jour des en-têtes")
+    print("="*50)
+
+    try:
+        with span("patch_fiches"):
+            patches = charger_patches(args.patches, args.chansons)
+            stats = appliquer_patches(patches, args.threads)
+        print(f"✅ {stats['fiches']} fiche(s): {stats['modifiees']} modifiée(s), "
+              f"{stats['inchangees']} déjà à jour, {stats['erreurs']} erreur(s)")
+        return 1 if stats['erreurs'] else 0
+
+    except Exception as e:
+        print(f"❌ Erreur: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
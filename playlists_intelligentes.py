@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Playlists intelligentes
+Compiler des règles du type "genre in (Disco, Funk) and bpm between 115 and 125"
+et les évaluer toutes en un seul passage sur la bibliothèque
+
+Format du fichier de configuration (une playlist par ligne, # pour les commentaires):
+    Disco_Peak = genre in (Disco, Funk) and bpm between 115 and 125 and energy >= 6
+    Nouveautes_Chill = tag = nouveau and energie <= 4
+Les valeurs contenant un mot-clé (and, or...) se mettent entre guillemets: genre = "Rock and Roll".
+"""
+
+import re
+from collections import defaultdict
+
+CONFIG_PAR_DEFAUT = "data/input/playlists_intelligentes.txt"
+
+# Champs disponibles (alias français/anglais) → nom canonique
+CHAMPS = {
+    'genre': 'genres', 'genres': 'genres',
+    'tag': 'tags', 'tags': 'tags',
+    'bpm': 'bpm',
+    'energy': 'energie', 'energie': 'energie', 'énergie': 'energie',
+    'key': 'key', 'cle': 'key', 'clé': 'key',
+    'artist': 'artiste', 'artiste': 'artiste',
+    'title': 'titre', 'titre': 'titre',
+    'date': 'date_ajout', 'date_ajout': 'date_ajout',
+}
+CHAMPS_MULTIPLES = {'genres', 'tags'}
+CHAMPS_NUMERIQUES = {'bpm', 'energie'}
+
+# Mots-clés en anglais uniquement: "Non classé", "Rhythm et Blues"... restent des valeurs
+MOTS_CLES = {'and', 'or', 'not', 'in', 'between'}
+
+_TOKEN = re.compile(r'''
+    \s*(?:
+        (?P<op>>=|<=|!=|=|<|>)
+      | (?P<ponct>[(),])
+      | "(?P<dq>[^"]*)"
+      | '(?P<sq>[^']*)'
+      | (?P<mot>[^\s(),=!<>"']+)
+    )''', re.VERBOSE)
+
+
+def _tokeniser(regle):
+    """Découper une règle en jetons (type, valeur)"""
+    jetons = []
+    position = 0
+    regle = regle.strip()
+    while position < len(regle):
+        match = _TOKEN.match(regle, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Caractère inattendu à la position {position}: {regle[position:]!r}")
+        position = match.end()
+        if match.group('op'):
+            jetons.append(('op', match.group('op')))
+        elif match.group('ponct'):
+            jetons.append((match.group('ponct'), match.group('ponct')))
+        elif match.group('dq') is not None or match.group('sq') is not None:
+            valeur = match.group('dq') if match.group('dq') is not None else match.group('sq')
+            jetons.append(('valeur', valeur))
+        else:
+            mot = match.group('mot')
+            if mot.lower() in MOTS_CLES:
+                jetons.append(('kw', mot.lower()))
+            else:
+                jetons.append(('mot', mot))
+    return jetons
+
+
+class _Analyseur:
+    """Analyseur descendant récursif qui produit directement des closures"""
+
+    def __init__(self, regle):
+        self.regle = regle
+        self.jetons = _tokeniser(regle)
+        self.position = 0
+
+    def _courant(self):
+        return self.jetons[self.position] if self.position < len(self.jetons) else (None, None)
+
+    def _consommer(self, type_attendu=None, valeur=None):
+        jeton = self._courant()
+        if jeton[0] is None:
+            raise ValueError(f"Règle incomplète: {self.regle!r}")
+        if type_attendu and (jeton[0] != type_attendu or (valeur and jeton[1] != valeur)):
+            attendu = valeur or type_attendu
+            raise ValueError(f"'{attendu}' attendu, trouvé '{jeton[1]}' dans {self.regle!r}")
+        self.position += 1
+        return jeton
+
+    def analyser(self):
+        predicat, genres_requis = self._ou()
+        if self.position != len(self.jetons):
+            raise ValueError(f"Jeton inattendu '{self._courant()[1]}' dans {self.regle!r}")
+        return predicat, genres_requis
+
+    def _ou(self):
+        termes = [self._et()]
+        while self._courant() == ('kw', 'or'):
+            self._consommer()
+            termes.append(self._et())
+        if len(termes) == 1:
+            return termes[0]
+        predicats = tuple(p for p, _ in termes)
+        # Un "ou" ne restreint les genres que si chaque branche les restreint
+        requis = [g for _, g in termes]
+        genres_requis = set().union(*requis) if all(g is not None for g in requis) else None
+        return (lambda m: any(p(m) for p in predicats)), genres_requis
+
+    def _et(self):
+        termes = [self._non()]
+        while self._courant() == ('kw', 'and'):
+            self._consommer()
+            termes.append(self._non())
+        if len(termes) == 1:
+            return termes[0]
+        predicats = tuple(p for p, _ in termes)
+        # Un "et" est restreint par la plus sélective de ses conditions sur le genre
+        requis = [g for _, g in termes if g is not None]
+        genres_requis = min(requis, key=len) if requis else None
+        return (lambda m: all(p(m) for p in predicats)), genres_requis
+
+    def _non(self):
+        if self._courant() == ('kw', 'not'):
+            self._consommer()
+            predicat, _ = self._non()
+            return (lambda m: not predicat(m)), None
+        if self._courant()[0] == '(':
+            self._consommer('(')
+            resultat = self._ou()
+            self._consommer(')')
+            return resultat
+        return self._comparaison()
+
+    def _valeur(self):
+        """Lire une valeur: chaîne entre guillemets ou suite de mots"""
+        jeton = self._courant()
+        if jeton[0] == 'valeur':
+            self._consommer()
+            return jeton[1]
+        mots = []
+        while self._courant()[0] == 'mot':
+            mots.append(self._consommer()[1])
+        if not mots:
+            if jeton[0] is None:
+                raise ValueError(f"Règle incomplète: {self.regle!r}")
+            raise ValueError(f"Valeur attendue, trouvé '{jeton[1]}' dans {self.regle!r}")
+        return ' '.join(mots)
+
+    def _liste(self):
+        self._consommer('(')
+        valeurs = [self._valeur()]
+        while self._courant()[0] == ',':
+            self._consommer(',')
+            valeurs.append(self._valeur())
+        self._consommer(')')
+        return valeurs
+
+    def _nombre(self, champ, texte):
+        if champ not in CHAMPS_NUMERIQUES:
+            return texte.casefold()
+        try:
+            return int(texte)
+        except ValueError:
+            raise ValueError(f"Nombre attendu pour '{champ}', trouvé '{texte}' dans {self.regle!r}")
+
+    def _comparaison(self):
+        mot = self._consommer('mot')[1]
+        champ = CHAMPS.get(mot.lower())
+        if champ is None:
+            raise ValueError(f"Champ inconnu '{mot}' (champs: {', '.join(sorted(set(CHAMPS)))})")
+
+        jeton = self._courant()
+        negation = False
+        if jeton == ('kw', 'not'):
+            self._consommer()
+            negation = True
+            jeton = self._courant()
+            if jeton != ('kw', 'in'):
+                raise ValueError(f"'in' attendu après '{mot} not' dans {self.regle!r}")
+
+        if jeton == ('kw', 'in'):
+            self._consommer()
+            valeurs = frozenset(self._nombre(champ, v) for v in self._liste())
+            predicat = _predicat_dans(champ, valeurs)
+            if negation:
+                return (lambda m: not predicat(m)), None
+            return predicat, (set(valeurs) if champ == 'genres' else None)
+
+        if jeton == ('kw', 'between'):
+            self._consommer()
+            minimum = self._nombre(champ, self._valeur())
+            self._consommer('kw', 'and')
+            maximum = self._nombre(champ, self._valeur())
+            return _predicat_entre(champ, minimum, maximum), None
+
+        operateur = self._consommer('op')[1]
+        valeur = self._nombre(champ, self._valeur())
+        predicat = _predicat_comparaison(champ, operateur, valeur)
+        if champ == 'genres' and operateur == '=':
+            return predicat, {valeur}
+        return predicat, None
+
+
+_OPERATEURS = {
+    '=': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+
+
+def _predicat_comparaison(champ, operateur, valeur):
+    """Closure de comparaison; sur un champ multiple, '=' veut dire 'contient'"""
+    if champ in CHAMPS_MULTIPLES:
+        if operateur == '=':
+            return lambda m: valeur in m[champ]
+        if operateur == '!=':
+            return lambda m: valeur not in m[champ]
+        raise ValueError(f"Opérateur '{operateur}' impossible sur '{champ}' (utilisez =, != ou in)")
+    comparer = _OPERATEURS[operateur]
+    return lambda m: comparer(m[champ], valeur)
+
+
+def _predicat_dans(champ, valeurs):
+    """Closure d'appartenance à une liste de valeurs"""
+    if champ in CHAMPS_MULTIPLES:
+        return lambda m: not valeurs.isdisjoint(m[champ])
+    return lambda m: m[champ] in valeurs
+
+
+def _predicat_entre(champ, minimum, maximum):
+    """Closure d'intervalle (bornes incluses)"""
+    if champ in CHAMPS_MULTIPLES:
+        raise ValueError(f"'between' impossible sur '{champ}'")
+    return lambda m: minimum <= m[champ] <= maximum
+
+
+class RegleCompilee:
+    """Règle de playlist compilée en closure, avec son éventuel filtre de genres"""
+    __slots__ = ('nom', 'regle', 'predicat', 'genres_requis')
+
+    def __init__(self, nom, regle):
+        self.nom = nom
+        self.regle = regle
+        self.predicat, genres = _Analyseur(regle).analyser()
+        # Si la règle exige un genre parmi un ensemble, seuls ces morceaux sont candidats
+        self.genres_requis = frozenset(genres) if genres is not None else None
+
+
+def compiler_regle(nom, regle):
+    """Compiler une règle textuelle"""
+    return RegleCompilee(nom, regle)
+
+
+def charger_regles(config_path=CONFIG_PAR_DEFAUT):
+    """Lire et compiler les playlists intelligentes d'un fichier de configuration"""
+    regles = []
+    with open(config_path, 'r', encoding='utf-8') as f:
+        for numero, ligne in enumerate(f, 1):
+            ligne = ligne.strip()
+            if not ligne or ligne.startswith('#'):
+                continue
+            if '=' not in ligne:
+                raise ValueError(f"{config_path}:{numero}: format attendu 'Nom = règle'")
+            nom, regle = ligne.split('=', 1)
+            nom = nom.strip()
+            if any(existante.nom == nom for existante in regles):
+                raise ValueError(f"{config_path}:{numero}: playlist '{nom}' déjà définie")
+            try:
+                regles.append(compiler_regle(nom, regle.strip()))
+            except ValueError as e:
+                raise ValueError(f"{config_path}:{numero}: {str(e)}")
+    return regles
+
+
+def valeurs_morceau(ligne):
+    """Valeurs normalisées d'un morceau, telles que les voient les règles"""
+    song = ligne.song
+    return {
+        'genres': frozenset(g.casefold() for g in ligne.genres),
+        'tags': frozenset(t.casefold() for t in song.get('tags', [])),
+        'bpm': ligne.bpm,
+        'energie': ligne.energie,
+        'key': song.get('key', '').casefold(),
+        'artiste': ligne.artiste.casefold(),
+        'titre': ligne.titre.casefold(),
+        'date_ajout': song.get('date_ajout', ''),
+    }
+
+
+def evaluer_regles(regles, lignes, memoriser=False):
+    """Évaluer toutes les règles en un seul passage sur la bibliothèque
+
+    Les règles qui exigent un genre sont indexées par genre: un morceau n'est
+    testé que contre les règles de ses genres et les règles sans contrainte
+    de genre, au lieu de toutes les règles. Avec `memoriser`, les valeurs
+    normalisées sont gardées sur chaque ligne pour les évaluations suivantes
+    (surveillance: seules les fiches relues sont normalisées à nouveau).
+    """
+    membres = {regle.nom: [] for regle in regles}
+    par_genre = defaultdict(list)
+    sans_genre = []
+    for regle in regles:
+        if regle.genres_requis is None:
+            sans_genre.append(regle)
+        else:
+            for genre in regle.genres_requis:
+                par_genre[genre].append(regle)
+
+    for ligne in lignes:
+        valeurs = ligne.valeurs if memoriser else None
+        if valeurs is None:
+            valeurs = valeurs_morceau(ligne)
+            if memoriser:
+                ligne.valeurs = valeurs
+        candidates = sans_genre
+        genres = [g for g in valeurs['genres'] if g in par_genre]
+        if genres:
+            # Une règle peut être indexée sous plusieurs genres du morceau
+            vues = {}
+            for genre in genres:
+                for regle in par_genre[genre]:
+                    vues[regle.nom] = regle
+            candidates = sans_genre + list(vues.values())
+        for regle in candidates:
+            if regle.predicat(valeurs):
+                membres[regle.nom].append(ligne)
+
+    return membres
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - API locale
+Serveur HTTP/JSON en lecture seule sur la bibliothèque, pour les tablettes de la cabine
+
+Routes (GET):
+  /api/etat                      nombre de morceaux et de playlists, génération
+  /api/morceaux                  recherche paginée: q, bpm_min, bpm_max, key, energie_min,
+                                 energie_max, genre, tag, page, par_page
+  /api/playlists                 playlists disponibles avec leur ETag
+  /api/playlists/<nom>           morceaux d'une playlist, paginés (ETag / If-None-Match)
+  /api/genres                    genres et nombre de morceaux
+
+Les fiches sont lues une fois en mémoire puis rechargées à chaud par la
+surveillance (seules les fiches touchées sont relues); chaque rechargement
+publie un nouvel état immuable, les requêtes en cours gardent l'ancien.
+Les morceaux réutilisent les fragments JSON déjà rendus pour les playlists,
+les réponses sont mises en cache par état et compressées en gzip à la demande.
+"""
+
+import sys
+import gzip
+import json
+import bisect
+import argparse
+import threading
+from datetime import datetime
+from collections import OrderedDict
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from instrumentation import compter
+from index_bibliotheque import IndexBibliotheque
+import playlists_intelligentes
+import genere_playlists1 as playlists
+from surveillance import SurveillanceBibliotheque, DOSSIER_CHANSONS, INTERVALLE, DELAI_STABILITE
+
+HOTE = "127.0.0.1"
+PORT = 8765
+NB_THREADS = 16
+PAR_PAGE = 50
+PAR_PAGE_MAX = 500
+TAILLE_CACHE = 512
+TAILLE_MIN_GZIP = 1024  # octets: en dessous, la compression ne vaut pas son coût
+
+
+class _CacheLRU:
+    """Petit cache LRU partagé entre les threads du serveur"""
+
+    def __init__(self, taille=TAILLE_CACHE):
+        self.taille = taille
+        self._valeurs = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def obtenir(self, cle, calculer):
+        with self._verrou:
+            if cle in self._valeurs:
+                self._valeurs.move_to_end(cle)
+                compter('cache_api_trouve')
+                return self._valeurs[cle]
+        # Calcul hors verrou: deux requêtes identiques simultanées calculent au pire deux fois
+        valeur = calculer()
+        with self._verrou:
+            self._valeurs[cle] = valeur
+            if len(self._valeurs) > self.taille:
+                self._valeurs.popitem(last=False)
+        return valeur
+
+
+class EtatBibliotheque:
+    """Instantané immuable de la bibliothèque servi par l'API"""
+
+    def __init__(self, lignes, index, generation):
+        self.generation = generation
+        self.charge_le = datetime.now().isoformat(timespec='seconds')
+        # Ordre canonique (BPM puis énergie): un intervalle de BPM est une tranche contiguë
+        self.lignes = [lignes[i] for i in index.ordre()]
+        self.bpms = [ligne.bpm for ligne in self.lignes]
+        self.valeurs = []
+        for ligne in self.lignes:
+            if ligne.valeurs is None:
+                ligne.valeurs = playlists_intelligentes.valeurs_morceau(ligne)
+            self.valeurs.append(ligne.valeurs)
+
+        self.playlists = {}
+        for nom, _, membres in playlists.playlists_par_genre(lignes, index):
+            self.playlists[nom] = membres
+        for nom, _, membres in playlists.playlists_par_energie(lignes, index):
+            self.playlists[nom] = membres
+        for nom, _, membres in playlists.playlists_par_regle(lignes, index, memoriser=True):
+            self.playlists[nom] = membres
+        self.playlists[playlists.PLAYLIST_COMPLETE] = playlists.playlist_complete(lignes, index)
+        self.etags = {nom: playlists.empreinte_playlist(membres, nom)[:20]
+                      for nom, membres in self.playlists.items()}
+        self.genres = {genre: len(positions) for genre, positions in sorted(index.groupes('genre').items())}
+
+        self.recherches = _CacheLRU()
+        self.reponses = _CacheLRU()
+
+    def rechercher(self, filtres):
+        """Positions des morceaux qui passent tous les filtres (mises en cache par état)"""
+        return self.recherches.obtenir(filtres, lambda: self._filtrer(*filtres))
+
+    def _filtrer(self, mots, bpm_min, bpm_max, key, energie_min, energie_max, genre, tag):
+        debut = 0 if bpm_min is None else bisect.bisect_left(self.bpms, bpm_min)
+        fin = len(self.bpms) if bpm_max is None else bisect.bisect_right(self.bpms, bpm_max)
+        positions = []
+        for position in range(debut, fin):
+            valeurs = self.valeurs[position]
+            if energie_min is not None and valeurs['energie'] < energie_min:
+                continue
+            if energie_max is not None and valeurs['energie'] > energie_max:
+                continue
+            if key is not None and valeurs['key'] != key:
+                continue
+            if genre is not None and genre not in valeurs['genres']:
+                continue
+            if tag is not None and tag not in valeurs['tags']:
+                continue
+            if mots:
+                texte = f"{valeurs['artiste']} {valeurs['titre']}"
+                if not all(mot in texte for mot in mots):
+                    continue
+            positions.append(position)
+        return positions
+
+
+class BibliothequeServie(SurveillanceBibliotheque):
+    """Surveillance qui publie un état en mémoire au lieu d'écrire le set et les playlists"""
+
+    def __init__(self, songs_dir=DOSSIER_CHANSONS):
+        super().__init__(songs_dir, importer=False)
+        self.etat = None
+        self.generation = 0
+
+    def regenerer(self):
+        chemins = [chemin for chemin in self.fiches if chemin in self.morceaux]
+        lignes = [self.lignes[chemin] for chemin in chemins]
+        index = IndexBibliotheque(ligne.song for ligne in lignes)
+        # Un simple remplacement de référence: les requêtes en cours finissent sur l'ancien état;
+        # si la construction échoue, l'ancien état reste servi et la génération ne change pas
+        self.etat = EtatBibliotheque(lignes, index, self.generation + 1)
+        self.generation = self.etat.generation
+        return None
+
+    def rafraichir(self, chemins):
+        super().rafraichir(chemins)
+        print(f"🔄 {len(chemins)} fiche(s) relue(s) → génération {self.generation}")
+
+
+def _entier(params, nom, minimum=None, maximum=None):
+    """Paramètre entier optionnel de la requête"""
+    if nom not in params:
+        return None
+    try:
+        valeur = int(params[nom][0])
+    except ValueError:
+        raise ValueError(f"paramètre '{nom}' invalide: {params[nom][0]}")
+    if minimum is not None and valeur < minimum:
+        raise ValueError(f"paramètre '{nom}' doit être ≥ {minimum}")
+    if maximum is not None and valeur > maximum:
+        valeur = maximum
+    return valeur
+
+
+def _texte(params, nom):
+    valeur = params.get(nom, [''])[0].strip().casefold()
+    return valeur or None
+
+
+def _page(params, total):
+    """Numéro de page, taille de page, nombre de pages et tranche à servir"""
+    page = _entier(params, 'page', 1) or 1
+    par_page = _entier(params, 'par_page', 1, PAR_PAGE_MAX) or PAR_PAGE
+    debut = (page - 1) * par_page
+    return page, par_page, max(1, -(-total // par_page)), slice(debut, debut + par_page)
+
+
+def _liste_json(lignes):
+    """Tableau JSON depuis les fragments pré-rendus des lignes"""
+    return "[\n" + ",\n".join([ligne.json for ligne in lignes]) + "\n  ]" if lignes else "[]"
+
+
+def reponse_morceaux(etat, params):
+    """Corps JSON d'une recherche paginée"""
+    filtres = (tuple((_texte(params, 'q') or '').split()),
+               _entier(params, 'bpm_min'), _entier(params, 'bpm_max'), _texte(params, 'key'),
+               _entier(params, 'energie_min'), _entier(params, 'energie_max'),
+               _texte(params, 'genre'), _texte(params, 'tag'))
+    positions = etat.rechercher(filtres)
+    page, par_page, pages, tranche = _page(params, len(positions))
+    lignes = [etat.lignes[i] for i in positions[tranche]]
+    return ('{\n'
+            f'  "total": {len(positions)},\n  "page": {page},\n  "par_page": {par_page},\n  "pages": {pages},\n'
+            f'  "morceaux": {_liste_json(lignes)}\n}}')
+
+
+def reponse_playlist(etat, nom, params):
+    """Corps JSON d'une page de playlist (même forme que les fichiers .json de l'étape 5)"""
+    membres = etat.playlists[nom]
+    page, par_page, pages, tranche = _page(params, len(membres))
+    return ('{\n'
+            f'  "name": {json.dumps(nom, ensure_ascii=False)},\n  "total_songs": {len(membres)},\n'
+            f'  "page": {page},\n  "par_page": {par_page},\n  "pages": {pages},\n'
+            f'  "songs": {_liste_json(membres[tranche])}\n}}')
+
+
+class GestionnaireAPI(BaseHTTPRequestHandler):
+    """Routes GET de l'API; toute autre méthode est refusée (lecture seule)"""
+
+    protocol_version = "HTTP/1.1"  # connexions persistantes pour les tablettes
+    server_version = "AssistDJ-API/1.0"
+    timeout = 10  # une connexion inactive libère son thread
+    # En-têtes et corps partent en deux écritures: sans TCP_NODELAY, Nagle et
+    # l'ACK retardé du client ajoutent ~40 ms à chaque réponse
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbeux:
+            super().log_message(format, *args)
+
+    def _envoyer(self, statut, corps=b'', etag=None, types="application/json; charset=utf-8"):
+        self.send_response(statut)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if statut != 304:
+            if len(corps) >= TAILLE_MIN_GZIP and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                corps = gzip.compress(corps, compresslevel=5)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("Content-Type", types)
+        self.send_header("Content-Length", str(len(corps) if statut != 304 else 0))
+        self.end_headers()
+        if statut != 304:
+            self.wfile.write(corps)
+        compter('requetes_api')
+
+    def _erreur(self, statut, message):
+        self._envoyer(statut, json.dumps({'erreur': message}, ensure_ascii=False).encode('utf-8'))
+
+    def do_GET(self):
+        etat = self.server.bibliotheque.etat
+        url = urlsplit(self.path)
+        chemin = unquote(url.path).rstrip('/')
+        params = parse_qs(url.query)
+        try:
+            if chemin.startswith('/api/playlists/'):
+                nom = chemin[len('/api/playlists/'):]
+                if nom not in etat.playlists:
+                    return self._erreur(404, f"playlist inconnue: {nom}")
+                page = self._page_cle(params)
+                etag = f'"{etat.etags[nom]}-{page[0]}-{page[1]}"'
+                if etag in self.headers.get('If-None-Match', ''):
+                    return self._envoyer(304, etag=etag)
+                corps = etat.reponses.obtenir((chemin, page),
+                                              lambda: reponse_playlist(etat, nom, params).encode('utf-8'))
+                return self._envoyer(200, corps, etag)
+
+            if chemin == '/api/morceaux':
+                cle = (chemin, tuple(sorted((k, tuple(v)) for k, v in params.items())))
+                corps = etat.reponses.obtenir(cle, lambda: reponse_morceaux(etat, params).encode('utf-8'))
+                return self._envoyer(200, corps)
+
+            if chemin == '/api/playlists':
+                corps = etat.reponses.obtenir((chemin,), lambda: json.dumps(
+                    [{'name': nom, 'total_songs': len(membres), 'etag': etat.etags[nom]}
+                     for nom, membres in etat.playlists.items()], ensure_ascii=False, indent=2).encode('utf-8'))
+                return self._envoyer(200, corps)
+
+            if chemin == '/api/genres':
+                corps = etat.reponses.obtenir((chemin,), lambda: json.dumps(
+                    etat.genres, ensure_ascii=False, indent=2).encode('utf-8'))
+                return self._envoyer(200, corps)
+
+            if chemin in ('', '/api', '/api/etat'):
+                return self._envoyer(200, json.dumps({
+                    'morceaux': len(etat.lignes),
+                    'playlists': len(etat.playlists),
+                    'generation': etat.generation,
+                    'charge_le': etat.charge_le,
+                }, ensure_ascii=False).encode('utf-8'))
+
+            return self._erreur(404, f"route inconnue: {url.path}")
+
+        except ValueError as e:
+            return self._erreur(400, str(e))
+
+    @staticmethod
+    def _page_cle(params):
+        """(page, par_page) normalisés, pour l'ETag et le cache d'une page de playlist"""
+        return _entier(params, 'page', 1) or 1, _entier(params, 'par_page', 1, PAR_PAGE_MAX) or PAR_PAGE
+
+    def _lecture_seule(self):
+        self._erreur(405, "API en lecture seule")
+
+    do_POST = do_PUT = do_PATCH = do_DELETE = _lecture_seule
+
+
+class ServeurAPI(HTTPServer):
+    """HTTPServer dont les connexions sont servies par un pool de threads borné"""
+
+    daemon_threads = True
+
+    def __init__(self, adresse, bibliotheque, nb_threads=NB_THREADS, verbeux=False):
+        super().__init__(adresse, GestionnaireAPI)
+        self.bibliotheque = bibliotheque
+        self.verbeux = verbeux
+        self.pool = ThreadPoolExecutor(max_workers=nb_threads, thread_name_prefix="api")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._traiter, request, client_address)
+
+    def _traiter(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def demarrer(songs_dir=DOSSIER_CHANSONS, hote=HOTE, port=PORT, nb_threads=NB_THREADS,
+             rechargement=True, intervalle=INTERVALLE, verbeux=False):
+    """Charger la bibliothèque et lancer le serveur (et la surveillance) en arrière-plan
+
+    Renvoie le serveur; `serveur.shutdown()` puis `serveur.server_close()` l'arrêtent.
+    """
+    bibliotheque = BibliothequeServie(songs_dir)
+    bibliotheque.charger()
+    if not bibliotheque.etat.lignes:
+        raise Exception(f"Aucune fiche lisible dans {songs_dir}")
+
+    serveur = ServeurAPI((hote, port), bibliotheque, nb_threads, verbeux)
+    threading.Thread(target=serveur.serve_forever, name="api-serveur", daemon=True).start()
+    if rechargement:
+        threading.Thread(target=bibliotheque.executer, args=(intervalle, DELAI_STABILITE),
+                         name="api-surveillance", daemon=True).start()
+    return serveur
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="API HTTP/JSON en lecture seule sur la bibliothèque")
+    parser.add_argument('--chansons', default=DOSSIER_CHANSONS, help="Dossier des fiches")
+    parser.add_argument('--hote', default=HOTE, help="Adresse d'écoute (0.0.0.0 pour les tablettes du réseau)")
+    parser.add_argument('--port', type=int, default=PORT, help="Port d'écoute")
+    parser.add_argument('--threads', type=int, default=NB_THREADS, help="Taille du pool de threads")
+    parser.add_argument('--sans-rechargement', action='store_true', help="Ne pas surveiller les fiches")
+    parser.add_argument('--intervalle', type=float, default=INTERVALLE, help="Secondes entre deux vérifications")
+    parser.add_argument('--verbeux', action='store_true', help="Journaliser chaque requête")
+    args = parser.parse_args()
+
+    print("📡 Assistant DJ - API locale")
+    print("="*50)
+
+    try:
+        serveur = demarrer(args.chansons, args.hote, args.port, args.threads,
+                           not args.sans_rechargement, args.intervalle, args.verbeux)
+        etat = serveur.bibliotheque.etat
+        print(f"📁 {len(etat.lignes)} morceaux, {len(etat.playlists)} playlists en mémoire")
+        print(f"🌐 http://{args.hote}:{args.port}/api/morceaux (Ctrl+C pour arrêter)")
+        threading.Event().wait()
+        return 0
+
+    except KeyboardInterrupt:
+        print("\n👋 Serveur arrêté")
+        return 0
+    except Exception as e:
+        print(f"❌ Erreur: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
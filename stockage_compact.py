@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Stockage compact des fiches
+Toute la bibliothèque dans un seul fichier (data/output/chansons.pack) au
+lieu de milliers de petits fichiers .md
+
+- Journal en ajout seul: chaque fiche ajoutée, modifiée ou supprimée ajoute
+  un enregistrement en fin de fichier (rien n'est réécrit en place)
+- Index des positions (chansons.pack.idx, JSON): nom → position dans le journal;
+  s'il est en retard sur le journal (arrêt brutal), la fin du journal est relue
+- Compression par fiche, optionnelle: zlib avec un dictionnaire tiré du
+  gabarit (les fiches partagent l'essentiel de leur texte) ou lzma
+- Lecture par mmap, sans copie du fichier
+- Export vers le dossier de fiches .md à la demande (et `compacter` pour
+  éliminer les anciennes versions)
+
+Les étapes 3 et 5 lisent indifféremment le dossier ou le pack via
+ouvrir_fiches(): même itérateur de (chemin, contenu).
+"""
+
+import os
+import sys
+import json
+import lzma
+import mmap
+import zlib
+import struct
+import argparse
+from pathlib import Path
+
+from instrumentation import compter
+from outils_fichiers import ecrire_atomique, ouvrir_atomique
+from gabarit import TEMPLATE_CHANSON, GABARIT_CHANSON_PAR_DEFAUT
+from disposition_fiches import DispositionFiches, lister_fiches
+
+DOSSIER_CHANSONS = "data/output/chansons"
+EXTENSION_PACK = ".pack"
+EXTENSION_INDEX = ".idx"
+
+MAGIQUE = b"DJFICHE1"
+# En-tête du pack: magique, longueur du dictionnaire zlib (suivi du dictionnaire)
+ENTETE = struct.Struct('<8sI')
+# En-tête d'un enregistrement: compression, longueur du nom, longueur des données, crc32 des données
+ENREGISTREMENT = struct.Struct('<BHII')
+
+AUCUNE, ZLIB, LZMA = 0, 1, 2
+SUPPRESSION = 255
+COMPRESSIONS = {'aucune': AUCUNE, 'zlib': ZLIB, 'lzma': LZMA}
+# Petit dictionnaire LZMA: une fiche fait moins d'1 Ko, inutile d'allouer les 8 Mo du préréglage
+_FILTRES_LZMA = [{'id': lzma.FILTER_LZMA2, 'preset': 6, 'dict_size': 1 << 16}]
+
+
+def _dictionnaire():
+    """Texte commun aux fiches (le gabarit) pour amorcer la compression zlib"""
+    try:
+        with open(TEMPLATE_CHANSON, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return (GABARIT_CHANSON_PAR_DEFAUT or "").encode('utf-8')
+
+
+def _texte(donnees):
+    """Contenu d'une fiche tel que le lirait open(..., 'r'): fins de ligne universelles"""
+    texte = donnees.decode('utf-8')
+    if '\r' in texte:
+        texte = texte.replace('\r\n', '\n').replace('\r', '\n')
+    return texte
+
+
+class StockageCompact:
+    """Pack de fiches: journal en ajout seul, index des positions, lecture par mmap
+
+    S'utilise comme un dictionnaire en lecture (`nom in pack`, `pack.lire(nom)`)
+    et s'itère en (chemin, contenu) dans l'ordre d'ajout des fiches, le chemin
+    étant celui qu'aurait la fiche une fois exportée.
+    """
+
+    def __init__(self, chemin, compression='zlib'):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Compression inconnue: {compression} ({', '.join(COMPRESSIONS)})")
+        self.chemin = Path(chemin)
+        self.chemin_index = self.chemin.with_name(self.chemin.name + EXTENSION_INDEX)
+        self.dossier_virtuel = self.chemin.with_suffix('') if self.chemin.suffix == EXTENSION_PACK else self.chemin
+        self.compression = COMPRESSIONS[compression]
+        self.index = {}
+        self._fichier = None
+        self._carte = None
+        self._index_modifie = False
+        self._queue_invalide = False
+
+        if not self.chemin.exists():
+            self.chemin.parent.mkdir(parents=True, exist_ok=True)
+            dictionnaire = _dictionnaire()
+            with open(self.chemin, 'xb') as f:
+                f.write(ENTETE.pack(MAGIQUE, len(dictionnaire)) + dictionnaire)
+            self._index_modifie = True
+
+        self._fichier = open(self.chemin, 'r+b')
+        magique, longueur = ENTETE.unpack(self._fichier.read(ENTETE.size))
+        if magique != MAGIQUE:
+            self._fichier.close()
+            raise ValueError(f"{self.chemin} n'est pas un pack de fiches")
+        self.dictionnaire = self._fichier.read(longueur)
+        self.debut = ENTETE.size + longueur
+        self.fin = self.debut
+        self._charger_index()
+
+    # --- Index ---
+
+    def _charger_index(self):
+        """Lire l'index, puis rattraper les enregistrements ajoutés après sa sauvegarde"""
+        try:
+            with open(self.chemin_index, 'r', encoding='utf-8') as f:
+                donnees = json.load(f)
+            self.index = {nom: tuple(entree) for nom, entree in donnees['fiches'].items()}
+            self.fin = donnees['fin']
+        except (FileNotFoundError, ValueError, KeyError):
+            self.index = {}
+            self.fin = self.debut
+            self._index_modifie = True
+
+        taille = os.fstat(self._fichier.fileno()).st_size
+        if self.fin > taille:
+            # Index plus récent que le journal (journal remplacé): tout relire
+            self.index = {}
+            self.fin = self.debut
+        if self.fin < taille:
+            self._rattraper(taille)
+
+    def _rattraper(self, taille):
+        """Relire le journal depuis la fin connue
+
+        Une fin tronquée ou corrompue est ignorée, puis écrasée par le prochain ajout.
+        """
+        carte = self._mapper(taille)
+        position = self.fin
+        while position + ENREGISTREMENT.size <= taille:
+            compression, longueur_nom, longueur, crc = ENREGISTREMENT.unpack_from(carte, position)
+            debut_nom = position + ENREGISTREMENT.size
+            debut_donnees = debut_nom + longueur_nom
+            suivant = debut_donnees + longueur
+            if suivant > taille or zlib.crc32(carte[debut_donnees:suivant]) != crc:
+                print(f"⚠️  {self.chemin}: fin de journal incomplète ignorée ({taille - position} octets)")
+                self._queue_invalide = True
+                break
+            nom = carte[debut_nom:debut_donnees].decode('utf-8')
+            if compression == SUPPRESSION:
+                self.index.pop(nom, None)
+            else:
+                self.index[nom] = (debut_donnees, longueur, compression)
+            position = suivant
+        compter('enregistrements_rattrapes')
+        self.fin = position
+        self._index_modifie = True
+
+    def sauver(self):
+        """Écrire l'index (atomique) s'il a changé"""
+        if not self._index_modifie:
+            return
+        self._fichier.flush()
+        ecrire_atomique(self.chemin_index, json.dumps({'fin': self.fin, 'fiches': self.index},
+                                                      ensure_ascii=False, separators=(',', ':')))
+        self._index_modifie = False
+
+    # --- Lecture ---
+
+    def _mapper(self, fin=0):
+        """Projection mémoire du pack, refaite si elle ne couvre pas `fin` (journal agrandi)"""
+        if self._carte is None or len(self._carte) < fin:
+            if self._carte is not None:
+                self._carte.close()
+            self._fichier.flush()
+            self._carte = mmap.mmap(self._fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._carte
+
+    def _decompresser(self, donnees, compression):
+        if compression == ZLIB:
+            return zlib.decompressobj(-zlib.MAX_WBITS, zdict=self.dictionnaire).decompress(donnees)
+        if compression == LZMA:
+            return lzma.decompress(donnees, format=lzma.FORMAT_RAW, filters=_FILTRES_LZMA)
+        return donnees
+
+    def lire_octets(self, nom):
+        """Contenu brut (décompressé) d'une fiche; KeyError si absente"""
+        position, longueur, compression = self.index[nom]
+        carte = self._mapper(position + longueur)
+        donnees = self._decompresser(carte[position:position + longueur], compression)
+        compter('fichiers_lus')
+        compter('octets_lus', len(donnees))
+        return donnees
+
+    def lire(self, nom):
+        """Contenu texte d'une fiche"""
+        return _texte(self.lire_octets(nom))
+
+    def __contains__(self, nom):
+        return nom in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def noms(self):
+        return list(self.index)
+
+    def __iter__(self):
+        """(chemin virtuel, contenu) de chaque fiche, dans l'ordre d'ajout"""
+        for nom in list(self.index):
+            yield self.dossier_virtuel / nom, self.lire(nom)
+
+    # --- Écriture ---
+
+    def _compresser(self, donnees):
+        if self.compression == ZLIB:
+            compresseur = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=self.dictionnaire)
+            return compresseur.compress(donnees) + compresseur.flush()
+        if self.compression == LZMA:
+            return lzma.compress(donnees, format=lzma.FORMAT_RAW, filters=_FILTRES_LZMA)
+        return donnees
+
+    def _ajouter_enregistrement(self, nom, compression, donnees):
+        nom_octets = nom.encode('utf-8')
+        self._fichier.seek(self.fin)
+        self._fichier.write(ENREGISTREMENT.pack(compression, len(nom_octets), len(donnees), zlib.crc32(donnees))
+                            + nom_octets + donnees)
+        position = self.fin + ENREGISTREMENT.size + len(nom_octets)
+        self.fin = position + len(donnees)
+        if self._queue_invalide:
+            self._fichier.truncate(self.fin)  # fin de journal incomplète écrasée
+            self._queue_invalide = False
+        self._index_modifie = True
+        return position
+
+    def ajouter(self, nom, contenu):
+        """Ajouter ou remplacer une fiche (texte ou octets)
+
+        L'ancienne version reste dans le journal jusqu'au prochain compacter().
+        """
+        if isinstance(contenu, str):
+            contenu = contenu.encode('utf-8')
+        if '/' in nom or '\\' in nom or nom in ('', '.', '..'):
+            raise ValueError(f"Nom de fiche invalide: {nom!r}")
+        compression = self.compression
+        donnees = self._compresser(contenu)
+        if compression != AUCUNE and len(donnees) >= len(contenu):
+            compression, donnees = AUCUNE, contenu
+        position = self._ajouter_enregistrement(nom, compression, donnees)
+        self.index[nom] = (position, len(donnees), compression)
+        compter('fiches_empaquetees')
+
+    def supprimer(self, nom):
+        """Retirer une fiche (marque de suppression ajoutée au journal)"""
+        if nom not in self.index:
+            return False
+        self._ajouter_enregistrement(nom, SUPPRESSION, b"")
+        del self.index[nom]
+        return True
+
+    def octets_morts(self):
+        """Place occupée par les anciennes versions et les suppressions"""
+        vivants = sum(ENREGISTREMENT.size + len(nom.encode('utf-8')) + longueur
+                      for nom, (_, longueur, _) in self.index.items())
+        return self.fin - self.debut - vivants
+
+    def compacter(self):
+        """Réécrire le pack avec les seules versions courantes
+
+        Les données sont recopiées sans recompression. Le pack est fermé (carte
+        et fichier) avant d'être remplacé, puis rouvert, même si le
+        remplacement échoue. Renvoie les octets récupérés.
+        """
+        avant = self.fin
+        carte = self._mapper(self.fin)
+        index = {}
+        try:
+            with ouvrir_atomique(self.chemin, binaire=True, avant_remplacement=self._liberer) as f:
+                f.write(ENTETE.pack(MAGIQUE, len(self.dictionnaire)) + self.dictionnaire)
+                fin = self.debut
+                for nom, (position, longueur, compression) in self.index.items():
+                    donnees = carte[position:position + longueur]
+                    nom_octets = nom.encode('utf-8')
+                    f.write(ENREGISTREMENT.pack(compression, len(nom_octets), longueur, zlib.crc32(donnees))
+                            + nom_octets + donnees)
+                    index[nom] = (fin + ENREGISTREMENT.size + len(nom_octets), longueur, compression)
+                    fin += ENREGISTREMENT.size + len(nom_octets) + longueur
+        finally:
+            if self._fichier is None:
+                self._fichier = open(self.chemin, 'r+b')
+        self.index = index
+        self.fin = fin
+        self._index_modifie = True
+        self.sauver()
+        return avant - fin
+
+    def exporter(self, dossier):
+        """Écrire chaque fiche en .md dans un dossier (octets identiques aux originaux),
+        selon la disposition de ce dossier"""
+        dossier = Path(dossier)
+        dossier.mkdir(parents=True, exist_ok=True)
+        disposition = DispositionFiches(dossier)
+        for nom in self.index:
+            with open(disposition.preparer(nom), 'wb') as f:
+                f.write(self.lire_octets(nom))
+            compter('fichiers_ecrits')
+        return len(self.index)
+
+    def _liberer(self):
+        """Fermer la carte mémoire et le fichier du pack"""
+        if self._carte is not None:
+            self._carte.close()
+            self._carte = None
+        self._fichier.close()
+        self._fichier = None
+
+    def fermer(self):
+        """Sauver l'index et libérer le fichier"""
+        if self._fichier is None:
+            return
+        self.sauver()
+        self._liberer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+class DossierFiches:
+    """Dossier de fiches .md (plat ou réparti), avec la même interface de lecture que StockageCompact"""
+
+    def __init__(self, dossier):
+        self.dossier = Path(dossier)
+        self.fichiers = lister_fiches(self.dossier)
+
+    def __len__(self):
+        return len(self.fichiers)
+
+    def __iter__(self):
+        """(chemin, contenu) de chaque fiche lisible, dans l'ordre du dossier"""
+        for chemin in self.fichiers:
+            try:
+                with open(chemin, 'r', encoding='utf-8') as f:
+                    contenu = f.read()
+                    compter('octets_lus', os.fstat(f.fileno()).st_size)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"⚠️  Erreur lors de la lecture de {chemin}: {str(e)}")
+                continue
+            compter('fichiers_lus')
+            yield chemin, contenu
+
+    def fermer(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+def chemin_pack(songs_dir=DOSSIER_CHANSONS):
+    """Pack associé à un dossier de fiches: data/output/chansons → data/output/chansons.pack"""
+    songs_dir = Path(songs_dir)
+    return songs_dir if songs_dir.suffix == EXTENSION_PACK else songs_dir.with_name(songs_dir.name + EXTENSION_PACK)
+
+
+def ouvrir_fiches(songs_dir=DOSSIER_CHANSONS):
+    """Source de fiches à lire: le dossier s'il existe, sinon le pack à côté
+
+    `songs_dir` peut aussi désigner directement un fichier .pack.
+    """
+    songs_dir = Path(songs_dir)
+    if songs_dir.is_dir():
+        return DossierFiches(songs_dir)
+    pack = chemin_pack(songs_dir)
+    if pack.is_file():
+        return StockageCompact(pack)
+    raise FileNotFoundError(f"Dossier des chansons non trouvé: {songs_dir} (ni pack {pack})")
+
+
+def empaqueter(songs_dir=DOSSIER_CHANSONS, pack=None, compression='zlib'):
+    """Copier les fiches d'un dossier dans un pack (les fiches déjà identiques sont ignorées)"""
+    fiches = DossierFiches(songs_dir)
+    ajoutees = 0
+    with StockageCompact(pack or chemin_pack(songs_dir), compression) as stockage:
+        for chemin in fiches.fichiers:
+            with open(chemin, 'rb') as f:
+                contenu = f.read()
+            if chemin.name in stockage and stockage.lire_octets(chemin.name) == contenu:
+                continue
+            stockage.ajouter(chemin.name, contenu)
+            ajoutees += 1
+        return {'fiches': len(stockage), 'ajoutees': ajoutees, 'taille': stockage.fin}
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Stockage compact des fiches dans un seul fichier")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+
+    p = commandes.add_parser('empaqueter', help="Copier un dossier de fiches dans un pack")
+    p.add_argument('dossier', nargs='?', default=DOSSIER_CHANSONS)
+    p.add_argument('--pack', default=None, help="Fichier pack (défaut: <dossier>.pack)")
+    p.add_argument('--compression', choices=list(COMPRESSIONS), default='zlib')
+
+    p = commandes.add_parser('exporter', help="Réécrire les fiches d'un pack en fichiers .md")
+    p.add_argument('pack', nargs='?', default=str(chemin_pack()))
+    p.add_argument('dossier', nargs='?', default=None, help="Dossier de sortie (défaut: pack sans .pack)")
+
+    p = commandes.add_parser('compacter', help="Éliminer les anciennes versions du journal")
+    p.add_argument('pack', nargs='?', default=str(chemin_pack()))
+
+    p = commandes.add_parser('infos', help="Afficher le contenu d'un pack")
+    p.add_argument('pack', nargs='?', default=str(chemin_pack()))
+    args = parser.parse_args()
+
+    print("📦 Assistant DJ - Stockage compact des fiches")
+    print("="*50)
+
+    try:
+        if args.commande == 'empaqueter':
+            stats = empaqueter(args.dossier, args.pack, args.compression)
+            print(f"✅ {stats['ajoutees']} fiche(s) ajoutée(s), {stats['fiches']} dans le pack "
+                  f"({stats['taille'] / 1024:.0f} Ko)")
+            return 0
+
+        if not Path(args.pack).is_file():
+            raise FileNotFoundError(f"Pack non trouvé: {args.pack}")
+        with StockageCompact(args.pack) as stockage:
+            if args.commande == 'exporter':
+                dossier = args.dossier or stockage.dossier_virtuel
+                nombre = stockage.exporter(dossier)
+                print(f"✅ {nombre} fiche(s) exportée(s) dans {dossier}")
+            elif args.commande == 'compacter':
+                recupere = stockage.compacter()
+                print(f"✅ {recupere / 1024:.0f} Ko récupérés, {len(stockage)} fiches")
+            else:
+                print(f"📁 {stockage.chemin}: {len(stockage)} fiches, {stockage.fin / 1024:.0f} Ko "
+                      f"dont {stockage.octets_morts() / 1024:.0f} Ko d'anciennes versions")
+        return 0
+
+    except Exception as e:
+        print(f"❌ Erreur: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assistant DJ - Surveillance de la bibliothèque
+Garder le set (étape 3) et les playlists (étape 5) à jour pendant qu'on édite
+les fiches ou qu'on ajoute des fichiers audio
+
+Sans dépendance: les dossiers sont comparés par instantanés os.scandir
+(date de modification et taille) à intervalle régulier, allongé sur les
+grandes bibliothèques (une seconde au plus) pour que les instantanés ne prennent qu'une petite
+part du temps. Une rafale de
+changements (sauvegarde d'un éditeur, copie d'un album) est regroupée:
+on attend que le dossier soit stable, puis seules les fiches touchées sont
+relues. Le set est réécrit et seules les playlists dont le contenu a changé
+le sont (manifeste de l'étape 5). Un rafraîchissement qui échoue est
+retenté au passage suivant, avec les mêmes fiches.
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib
+from pathlib import Path
+
+from instrumentation import span, compter
+from index_bibliotheque import IndexBibliotheque
+from disposition_fiches import parcourir_fiches
+import importer_mp3
+import genere_playlists1 as playlists
+
+etape3 = importlib.import_module("4_generer_set_classe_depuis_fiches")
+
+DOSSIER_CHANSONS = "data/output/chansons"
+DOSSIER_MP3 = "mp3"
+FICHIER_SET = "data/output/set_dj_classe.md"
+DOSSIER_PLAYLISTS = "data/playlists"
+INTERVALLE = 0.25      # secondes entre deux instantanés (minimum)
+PART_INSTANTANES = 0.1  # part du temps au plus consacrée aux instantanés
+ATTENTE_MAX = 1.0      # secondes entre deux instantanés (maximum): une sauvegarde est vue en une seconde
+DELAI_STABILITE = 0.3  # secondes sans changement avant de rafraîchir
+
+
+def instantane_fiches(songs_dir=DOSSIER_CHANSONS):
+    """Fiches d'un dossier (et de ses sous-dossiers de répartition): chemin → (mtime_ns, taille)"""
+    fiches = {}
+    try:
+        for entree in parcourir_fiches(songs_dir):
+            try:
+                stat = entree.stat()
+            except FileNotFoundError:
+                continue  # supprimée entre la lecture du dossier et la stat
+            fiches[entree.path] = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        pass
+    return fiches
+
+
+def instantane_audio(mp3_dir=DOSSIER_MP3):
+    """Fichiers audio (récursif): chemin → (mtime_ns, taille)"""
+    if not Path(mp3_dir).exists():
+        return {}
+    return {chemin: (mtime, taille) for chemin, mtime, taille in importer_mp3.scanner_audio(mp3_dir)}
+
+
+def comparer(avant, apres):
+    """Chemins ajoutés, modifiés et supprimés entre deux instantanés"""
+    ajoutes = apres.keys() - avant.keys()
+    supprimes = avant.keys() - apres.keys()
+    modifies = {chemin for chemin, signature in apres.items()
+                if chemin in avant and avant[chemin] != signature}
+    return ajoutes, modifies, supprimes
+
+
+class SurveillanceBibliotheque:
+    """Morceaux et lignes de playlist gardés en mémoire, rafraîchis fiche par fiche"""
+
+    def __init__(self, songs_dir=DOSSIER_CHANSONS, mp3_dir=DOSSIER_MP3, set_file=FICHIER_SET,
+                 playlists_dir=DOSSIER_PLAYLISTS, importer=True):
+        self.songs_dir = songs_dir
+        self.mp3_dir = mp3_dir
+        self.set_file = set_file
+        self.playlists_dir = playlists_dir
+        self.importer = importer and importer_mp3.mutagen is not None
+        self.fiches = {}
+        self.audio = {}
+        self.morceaux = {}
+        self.lignes = {}
+        self.sections = {}
+
+    def _relire(self, chemins):
+        """Relire les fiches touchées; celles qui ont disparu sont oubliées"""
+        for chemin in chemins:
+            song = playlists.parse_song_file(Path(chemin)) if chemin in self.fiches else None
+            if song is None:
+                self.morceaux.pop(chemin, None)
+                self.lignes.pop(chemin, None)
+            else:
+                self.morceaux[chemin] = song
+                self.lignes[chemin] = playlists.LignePlaylist(song)
+
+    def charger(self):
+        """Premier passage: lire toutes les fiches et produire les sorties"""
+        self.fiches = instantane_fiches(self.songs_dir)
+        self.audio = instantane_audio(self.mp3_dir) if self.importer else {}
+        with span("chargement"):
+            self._relire(self.fiches)
+        return self.regenerer()
+
+    def regenerer(self):
+        """Réécrire le set et les playlists modifiées depuis les morceaux en mémoire"""
+        # Ordre des noms de fichier, comme les étapes 3 et 5 lancées à la main
+        chemins = sorted((chemin for chemin in self.fiches if chemin in self.morceaux), key=os.path.basename)
+        if not chemins:
+            print(f"⚠️  Aucune fiche lisible dans {self.songs_dir}, sorties inchangées")
+            return None
+
+        with span("regeneration"):
+            lignes = [self.lignes[chemin] for chemin in chemins]
+            index = IndexBibliotheque(ligne.song for ligne in lignes)
+            etape3.generate_set_by_genre(None, self.set_file, index, self.sections)
+
+            Path(self.playlists_dir).mkdir(parents=True, exist_ok=True)
+            manifeste = playlists.ManifestePlaylists(self.playlists_dir)
+            playlists.create_playlists_by_genre(None, self.playlists_dir, lignes, manifeste, index)
+            playlists.create_playlists_by_energy(None, self.playlists_dir, lignes, manifeste, index)
+            playlists.create_smart_playlists(lignes, self.playlists_dir, manifeste=manifeste, index=index,
+                                             memoriser=True)
+            playlists.write_playlist(playlists.playlist_complete(lignes, index),
+                                     playlists.PLAYLIST_COMPLETE, self.playlists_dir, manifeste)
+            manifeste.supprimer_obsoletes(self.playlists_dir)
+            manifeste.sauver()
+        return manifeste
+
+    def _importer_audio(self):
+        """Créer ou mettre à jour les fiches des fichiers audio nouveaux ou modifiés
+
+        Les fiches écrites seront vues au prochain instantané, comme une édition à la main.
+        """
+        if not self.importer:
+            return None
+        try:
+            return importer_mp3.importer_dossier(self.mp3_dir, self.songs_dir)
+        except Exception as e:
+            print(f"⚠️  Import audio impossible: {str(e)}")
+            return None
+
+    def executer(self, intervalle=INTERVALLE, delai=DELAI_STABILITE, duree_max=None):
+        """Boucle de surveillance (Ctrl+C pour arrêter, ou au bout de duree_max secondes)
+
+        L'attente entre deux instantanés vaut au moins `intervalle`, et
+        grandit avec la durée des instantanés (sur 100k fiches, parcourir le
+        dossier quatre fois par seconde occuperait le disque en permanence),
+        sans dépasser ATTENTE_MAX. Après un changement, l'instantané suivant
+        vient dès la fin du `delai` de stabilité, sans attendre un intervalle
+        complet. Le rafraîchissement lui-même reconstruit l'index et toutes
+        les playlists: environ 0.2 s sur 10k fiches, mais 1.2 s sur 50k, où
+        une sauvegarde n'est donc plus reflétée en une seconde.
+        """
+        debut = time.monotonic()
+        fiches_touchees = set()
+        audio_touche = False
+        dernier_changement = None
+        attente = intervalle
+
+        while duree_max is None or time.monotonic() - debut < duree_max:
+            # Rafale en cours: revenir dès que le délai de stabilité peut être écoulé
+            time.sleep(attente if dernier_changement is None else min(attente, max(intervalle, delai)))
+
+            debut_instantane = time.perf_counter()
+            fiches = instantane_fiches(self.songs_dir)
+            ajoutes, modifies, supprimes = comparer(self.fiches, fiches)
+            self.fiches = fiches
+            # Sans import, les fichiers audio n'ont aucun effet: inutile de les parcourir
+            audio_modifie = False
+            if self.importer:
+                audio = instantane_audio(self.mp3_dir)
+                audio_modifie = any(comparer(self.audio, audio))
+                self.audio = audio
+            attente = min(max(intervalle, (time.perf_counter() - debut_instantane) / PART_INSTANTANES),
+                          max(intervalle, ATTENTE_MAX))
+
+            if ajoutes or modifies or supprimes or audio_modifie:
+                fiches_touchees |= ajoutes | modifies | supprimes
+                audio_touche = audio_touche or audio_modifie
+                dernier_changement = time.monotonic()
+                continue
+
+            # Rafale terminée: le dossier est stable depuis `delai` secondes
+            if dernier_changement is None or time.monotonic() - dernier_changement < delai:
+                continue
+            dernier_changement = None
+
+            if audio_touche:
+                audio_touche = False
+                stats = self._importer_audio()
+                if stats and (stats['creees'] or stats['mises_a_jour']):
+                    print(f"🎧 Audio importé: {stats['creees']} fiches créées, {stats['mises_a_jour']} mises à jour")
+            if fiches_touchees:
+                try:
+                    self.rafraichir(fiches_touchees)
+                    fiches_touchees = set()
+                except Exception as e:
+                    # Fiches gardées: nouvel essai une fois le délai de stabilité écoulé
+                    print(f"⚠️  Rafraîchissement impossible, nouvel essai au prochain passage: {str(e)}")
+                    dernier_changement = time.monotonic()
+
+    def rafraichir(self, chemins):
+        """Relire les fiches touchées puis régénérer les sorties"""
+        debut = time.perf_counter()
+        with span("rafraichissement"):
+            self._relire(chemins)
+            compter('fiches_relues', len(chemins))
+            manifeste = self.regenerer()
+        if manifeste is not None:
+            print(f"🔄 {len(chemins)} fiche(s) relue(s) → set réécrit, "
+                  f"{len(manifeste.ecrites)} playlist(s) réécrite(s), {len(manifeste.supprimees)} supprimée(s) "
+                  f"en {time.perf_counter() - debut:.2f}s")
+        return manifeste
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Garder le set et les playlists à jour pendant l'édition des fiches")
+    parser.add_argument('--chansons', default=DOSSIER_CHANSONS, help="Dossier des fiches")
+    parser.add_argument('--mp3', default=DOSSIER_MP3, help="Dossier des fichiers audio")
+    parser.add_argument('--intervalle', type=float, default=INTERVALLE, help="Secondes minimum entre deux vérifications")
+    parser.add_argument('--delai', type=float, default=DELAI_STABILITE,
+                        help="Secondes sans changement avant de rafraîchir (regroupe les rafales)")
+    parser.add_argument('--sans-import', action='store_true',
+                        help="Ne pas créer de fiches pour les nouveaux fichiers audio")
+    parser.add_argument('--duree', type=float, default=None, help="Arrêter après ce nombre de secondes")
+    args = parser.parse_args()
+
+    print("👀 Assistant DJ - Surveillance de la bibliothèque")
+    print("="*50)
+
+    try:
+        surveillance = SurveillanceBibliotheque(args.chansons, args.mp3, importer=not args.sans_import)
+        if not args.sans_import and not surveillance.importer:
+            print("⚠️  mutagen non installé: les nouveaux fichiers audio ne créeront pas de fiches")
+        surveillance.charger()
+        print(f"📁 {len(surveillance.morceaux)} fiches chargées, {len(surveillance.audio)} fichiers audio")
+        print(f"👀 Surveillance de {args.chansons} et {args.mp3} (Ctrl+C pour arrêter)")
+        surveillance.executer(args.intervalle, args.delai, args.duree)
+        return 0
+
+    except KeyboardInterrupt:
+        print("\n👋 Surveillance arrêtée")
+        return 0
+    except Exception as e:
+        print(f"❌ Erreur: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
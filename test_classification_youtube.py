@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de la classification YouTube: description lue en entier, mots entiers, départage par l'ordre des genres
+"""
+
+import sys
+import os
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from extraire_fiches_depuis_youtube1 import guess_genre_from_title, classify_genres, GENRE_PAR_DEFAUT
+
+
+def test_description_lue_en_entier():
+    """Un mot-clé en fin de longue description compte comme au début"""
+    assert guess_genre_from_title("Live", "x" * 2500 + " disco funk") == "Disco"
+    assert guess_genre_from_title("Live", "liens " * 2000 + "“Techno”") == "Electronic"
+
+
+def test_mots_entiers():
+    """Un mot-clé collé à un autre mot n'est pas vu; pluriel, casse et ponctuation sont tolérés"""
+    assert guess_genre_from_title("deephouse housemusic") == GENRE_PAR_DEFAUT
+    assert guess_genre_from_title("Bandcamp", "bandcamp.com") == GENRE_PAR_DEFAUT
+    assert guess_genre_from_title("Deep HOUSE (Remix)") == "Electronic"
+    assert guess_genre_from_title("Best Hip-Hop Beats") == "Hip-Hop"
+
+
+def test_poids_et_ordre():
+    """Le titre pèse plus que la description; à score égal, l'ordre de GENRE_KEYWORDS départage"""
+    assert guess_genre_from_title("Funk night", "house techno") == "Disco"
+    assert guess_genre_from_title("Rock pop") == "Pop"
+    genres = classify_genres("Rock pop", "rock")
+    assert [genre for genre, _ in genres] == ["Rock", "Pop"]
+    assert abs(sum(poids for _, poids in genres) - 1) < 1e-9
+
+
+if __name__ == "__main__":
+    test_description_lue_en_entier()
+    test_mots_entiers()
+    test_poids_et_ordre()
+    print("\n🎉 Tous les tests de la classification YouTube sont passés avec succès!")
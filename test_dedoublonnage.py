@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test du dédoublonnage: groupes de doublons, fusion des notes et des listes d'en-tête, archivage
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dedoublonnage import trouver_doublons, fusionner_groupe, charger_fiches
+
+
+def fiche(titre, notes="  - À compléter...", idees="  - À définir...", liens="  - À ajouter...",
+          corps="À compléter selon vos impressions..."):
+    return (f"titre: {titre}\nartiste: Chic\nbpm: 120\ngenre:\n  - Disco\ntags:\n  - nouveau\n"
+            f"Notes Personnelles:\n{notes}\nIdées de Mix:\n{idees}\nLiens:\n{liens}\n---\n\n"
+            f"## 🎵 Notes Personnelles\n\n{corps}\n")
+
+
+def test_trouver_doublons():
+    """Copies, variantes de titre et fautes de frappe groupées; remix, parties et autres titres distincts"""
+    morceaux = [
+        {'artiste': "Chic", 'titre': "Le Freak"},
+        {'artiste': "CHIC", 'titre': "Le Freak (Official Video)"},
+        {'artiste': "Chic", 'titre': "Le Frek"},
+        {'artiste': "Chic", 'titre': "Le Freak (Remix)"},
+        {'artiste': "Chic", 'titre': "Good Times"},
+        {'artiste': "Daft Punk", 'titre': "Alive Part 1"},
+        {'artiste': "Daft Punk", 'titre': "Alive Part 2"},
+        {'artiste': "Beyoncé", 'titre': "Halo"},
+        {'artiste': "Beyonce", 'titre': "Halo"},
+        {'artiste': "Autre", 'titre': "Le Freak"},
+    ]
+    statistiques = {}
+    groupes = trouver_doublons(morceaux, statistiques=statistiques)
+    assert sorted(sorted(groupe) for groupe in groupes) == [[0, 1, 2], [7, 8]]
+    assert statistiques['groupes'] == 2 and statistiques['doublons'] == 3
+
+
+def test_fusion_notes_et_listes():
+    """La fiche originale reçoit les notes et les éléments de listes des doublons, archivés ensuite"""
+    with tempfile.TemporaryDirectory() as temp:
+        dossier = Path(temp) / "chansons"
+        archive = Path(temp) / "doublons"
+        dossier.mkdir()
+        (dossier / "Chic - Le Freak.md").write_text(fiche("Le Freak", liens="  - https://exemple.fr/freak"),
+                                                    encoding='utf-8')
+        (dossier / "Chic - Le Freak_01.md").write_text(
+            fiche("Le Freak", notes="  - Intro longue\n  - À compléter...", idees="  - Enchaîner avec Good Times",
+                  liens="  - https://exemple.fr/freak", corps="Parfait en fin de set"), encoding='utf-8')
+        (dossier / "Chic - Le Freak (Official Video).md").write_text(
+            fiche("Le Freak (Official Video)", notes="  - Intro longue\n  - Break à 2:40"), encoding='utf-8')
+        # Une fiche du même nom déjà archivée n'est pas écrasée
+        archive.mkdir()
+        (archive / "Chic - Le Freak_01.md").write_text("ancienne archive", encoding='utf-8')
+
+        fiches = charger_fiches(dossier)
+        [groupe] = trouver_doublons(fiches)
+        reference = fusionner_groupe([fiches[i] for i in groupe], archive)
+
+        assert reference['file_path'].name == "Chic - Le Freak.md"
+        assert os.listdir(dossier) == ["Chic - Le Freak.md"]
+        assert sorted(os.listdir(archive)) == ["Chic - Le Freak (Official Video).md", "Chic - Le Freak_01.1.md",
+                                               "Chic - Le Freak_01.md"]
+        contenu = (dossier / "Chic - Le Freak.md").read_text(encoding='utf-8')
+        assert ("Notes Personnelles:\n  - Intro longue\n  - Break à 2:40\n"
+                "Idées de Mix:\n  - Enchaîner avec Good Times\n"
+                "Liens:\n  - https://exemple.fr/freak\n---\n") in contenu
+        assert "## 🔀 Fusionné depuis Chic - Le Freak_01\n\nParfait en fin de set\n" in contenu
+        assert contenu.count("Intro longue") == 1
+
+
+def test_fusion_sans_ajout():
+    """Doublons sans notes propres: la fiche conservée n'est pas modifiée"""
+    with tempfile.TemporaryDirectory() as temp:
+        dossier = Path(temp)
+        originale = dossier / "Chic - Le Freak.md"
+        originale.write_text(fiche("Le Freak"), encoding='utf-8')
+        (dossier / "Chic - Le Freak_01.md").write_text(fiche("Le Freak"), encoding='utf-8')
+        avant = originale.read_bytes()
+        fiches = charger_fiches(dossier)
+        fusionner_groupe(fiches, dossier / "doublons")
+        assert originale.read_bytes() == avant
+
+
+if __name__ == "__main__":
+    test_trouver_doublons()
+    test_fusion_notes_et_listes()
+    test_fusion_sans_ajout()
+    print("\n🎉 Tous les tests du dédoublonnage sont passés avec succès!")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de la disposition des fiches: migration, scan et création dans les sous-dossiers
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import disposition_fiches
+import bibliotheque_synthetique as synth
+from genere_playlists1 import scan_songs_directory
+
+
+def test_migration_et_scan():
+    """Chaque disposition donne le même scan que le dossier plat"""
+    with tempfile.TemporaryDirectory() as temp:
+        chansons = Path(temp) / "chansons"
+        synth.ecrire_dossier_fiches(synth.generer_morceaux(300, 3), chansons)
+        (chansons / "notes.txt").write_text("pas une fiche", encoding='utf-8')
+        plat = [(f.name, f.read_bytes()) for f in scan_songs_directory(chansons)]
+        assert len(plat) == 300
+
+        for nom in ('hachage', 'lettre', 'plat'):
+            stats = disposition_fiches.migrer(chansons, nom)
+            assert stats['conflits'] == 0
+            assert disposition_fiches.lire_disposition(chansons) == nom
+            fichiers = scan_songs_directory(chansons)
+            assert [(f.name, f.read_bytes()) for f in fichiers] == plat
+            sous_dossiers = {f.parent.name for f in fichiers if f.parent != chansons}
+            if nom == 'hachage':
+                assert all(len(s) == 2 for s in sous_dossiers) and len(sous_dossiers) > 100
+            elif nom == 'lettre':
+                assert sous_dossiers <= set('abcdefghijklmnopqrstuvwxyz_') | {'0-9'}
+            else:
+                assert not sous_dossiers and sorted(os.listdir(chansons))[0] == ".disposition"
+
+
+def test_creation_selon_disposition():
+    """Les nouvelles fiches vont dans leur sous-dossier, suffixes _01, _02... compris"""
+    with tempfile.TemporaryDirectory() as temp:
+        chansons = Path(temp) / "chansons"
+        synth.ecrire_dossier_fiches(synth.generer_morceaux(20, 5), chansons, disposition='lettre')
+        assert all(f.parent.parent == chansons for f in scan_songs_directory(chansons))
+
+        disposition = disposition_fiches.DispositionFiches(chansons)
+        premier = disposition.chemin_libre("Élodie - Été")
+        assert premier == chansons / "e" / "Élodie - Été.md"
+        premier.write_text("titre: Été\n", encoding='utf-8')
+        assert disposition.chemin_libre("Élodie - Été") == chansons / "e" / "Élodie - Été_01.md"
+        assert disposition.chemin_libre("2 Unlimited - No Limit").parent.name == "0-9"
+
+
+if __name__ == "__main__":
+    test_migration_et_scan()
+    test_creation_selon_disposition()
+    print("\n🎉 Tous les tests de disposition sont passés avec succès!")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de l'écrivain de fiches: écriture en arrière-plan, erreurs et journal limité
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ecrivain_fiches import EcrivainFiches, JournalLimite
+
+
+def test_ecriture_et_erreurs():
+    """Toutes les fiches sont écrites, sans fichier temporaire restant; une erreur remonte à la fermeture"""
+    with tempfile.TemporaryDirectory() as temp:
+        dossier = Path(temp)
+        lignes = []
+        journal = JournalLimite(lignes_par_seconde=1, afficher=lignes.append)
+        with EcrivainFiches(nb_threads=4, taille_file=8, journal=journal) as ecrivain:
+            for i in range(200):
+                ecrivain.soumettre(dossier / f"fiche_{i:03d}.md", f"titre: {i}\n")
+        assert ecrivain.stats['fiches'] == 200 and ecrivain.stats['erreurs'] == 0
+        assert sorted(os.listdir(dossier)) == [f"fiche_{i:03d}.md" for i in range(200)]
+        assert (dossier / "fiche_042.md").read_text(encoding='utf-8') == "titre: 42\n"
+        # Une ligne par seconde au plus, le reste résumé par terminer()
+        assert 2 <= len(lignes) < 20 and lignes[0].startswith("✅ Écrit: fiche_")
+        assert lignes[-1].startswith("   ... et ") and lignes[-1].endswith("autre(s)")
+
+        ecrivain = EcrivainFiches(nb_threads=2)
+        ecrivain.soumettre(dossier / "absent" / "fiche.md", "titre: perdu\n")
+        ecrivain.soumettre(dossier / "fiche_ok.md", "titre: ok\n")
+        try:
+            ecrivain.fermer()
+            assert False, "l'erreur d'écriture aurait dû remonter"
+        except Exception as e:
+            assert "1 fiche(s) non écrite(s)" in str(e)
+        assert ecrivain.stats['fiches'] == 1 and (dossier / "fiche_ok.md").exists()
+
+
+if __name__ == "__main__":
+    test_ecriture_et_erreurs()
+    print("\n🎉 Tous les tests de l'écrivain de fiches sont passés avec succès!")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de l'étape 1 incrémentale: seuls les morceaux ajoutés sont rendus puis extraits
+"""
+
+import sys
+import os
+import json
+import tempfile
+import importlib
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+step1 = importlib.import_module("1_generer_markdown_depuis_liste")
+step2 = importlib.import_module("2_extraire_chansons_en_fichiers")
+
+
+def test_delta_et_retraits():
+    """Deuxième passage: nouveaux morceaux seulement, retraits dans l'en-tête, pas de _01 à l'étape 2"""
+    with tempfile.TemporaryDirectory() as temp:
+        dossier = Path(temp)
+        liste = dossier / "liste.txt"
+        sortie = dossier / "output" / "morceaux.md"
+        chansons = dossier / "output" / "chansons"
+        liste.write_text("Abba - SOS\nMadonna - Like a Virgin\nABBA - SOS\n", encoding='utf-8')
+        assert step1.generate_markdown_from_list(liste, sortie, incremental=True) == 2
+        assert len(step2.split_markdown_file(sortie, chansons)) == 2
+
+        liste.write_text("Abba - SOS\nBee Gees - Stayin' Alive\nAbba - Waterloo\n", encoding='utf-8')
+        assert step1.generate_markdown_from_list(liste, sortie, incremental=True) == 2
+        contenu = sortie.read_text(encoding='utf-8')
+        assert "Total des morceaux traités: 2\n" in contenu
+        assert "2 nouveau(x), 1 déjà présent(s), 1 retiré(s) de la liste" in contenu
+        assert "Morceaux retirés de la liste:\n- Madonna - Like a Virgin\n" in contenu
+        assert "titre: Waterloo\nartiste: Abba\n" in contenu and "titre: SOS" not in contenu
+
+        extraites = step2.split_markdown_file(sortie, chansons)
+        assert sorted(chemin.name for chemin in extraites) == ["Abba - Waterloo.md", "Bee Gees - Stayin' Alive.md"]
+        assert not any("_01" in nom for nom in os.listdir(chansons))
+
+        manifeste = json.loads(step1.chemin_manifeste(sortie).read_text(encoding='utf-8'))
+        assert sorted(manifeste['morceaux'].values()) == ["Abba - SOS", "Abba - Waterloo", "Bee Gees - Stayin' Alive"]
+
+        # Liste inchangée: rien de nouveau
+        assert step1.generate_markdown_from_list(liste, sortie, incremental=True) == 0
+
+
+def test_passage_complet_parallele():
+    """Un passage complet rendu en parallèle refait le même manifeste qu'en série"""
+    with tempfile.TemporaryDirectory() as temp:
+        dossier = Path(temp)
+        liste = dossier / "liste.txt"
+        lignes = [f"Artiste {i % 150} - Titre {i % 150}" for i in range(200)]
+        liste.write_text("\n".join(lignes) + "\n", encoding='utf-8')
+
+        serie, parallele = dossier / "serie" / "morceaux.md", dossier / "parallele" / "morceaux.md"
+        assert step1.generate_markdown_from_list(liste, serie, incremental=True) == 150
+        # Un passage complet rend aussi les doublons de la liste
+        assert step1.generate_markdown_from_list(liste, parallele, nb_processus=3, taille_tranche=500,
+                                                 refaire_manifeste=True) == 200
+        manifestes = [json.loads(step1.chemin_manifeste(sortie).read_text(encoding='utf-8'))['morceaux']
+                      for sortie in (serie, parallele)]
+        assert list(manifestes[0].items()) == list(manifestes[1].items())
+
+        liste.write_text("\n".join(lignes + ["Abba - SOS"]) + "\n", encoding='utf-8')
+        assert step1.generate_markdown_from_list(liste, parallele, incremental=True) == 1
+
+
+if __name__ == "__main__":
+    test_delta_et_retraits()
+    test_passage_complet_parallele()
+    print("\n🎉 Tous les tests de l'étape 1 incrémentale sont passés avec succès!")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test des exports Rekordbox / Traktor: relecture des fichiers avec iterparse
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+from urllib.parse import unquote
+import xml.etree.ElementTree as ET
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import export_dj
+
+MORCEAUX = [
+    {'titre': "Don't Stop Me Now", 'artiste': 'Queen', 'bpm': '156', 'key': 'F',
+     'genres': ['Rock', 'Pop'], 'energie': '9', 'date_ajout': '2024-03-07',
+     'tags': ['classic'], 'fichier_mp3': "mp3/Queen - Don't Stop Me Now.mp3"},
+    {'titre': 'Le Freak <Edit> & "Dub"', 'artiste': 'Chic', 'bpm': '120', 'key': '8A',
+     'genres': ['Disco'], 'energie': '7', 'date_ajout': '2023-12-25',
+     'tags': [], 'fichier_mp3': 'mp3/Chic - Le Freak.mp3'},
+    {'titre': 'Café\x07 Été', 'artiste': 'Zoé', 'bpm': '98', 'key': 'C#m',
+     'genres': ['Variété Française'], 'energie': '4', 'date_ajout': '2022-01-01',
+     'tags': ['à écouter'], 'fichier_mp3': 'mp3/Zoé - Café Été.mp3'},
+]
+
+# Une copie _01 pointe vers le même MP3 que l'originale
+DOUBLON = dict(MORCEAUX[0])
+
+PLAYLISTS = [
+    ('Playlist_Disco', [MORCEAUX[1]['fichier_mp3']]),
+    ('Playlist_Tout', [m['fichier_mp3'] for m in MORCEAUX] + [MORCEAUX[0]['fichier_mp3'], 'mp3/absent.mp3']),
+]
+
+
+def _playlists():
+    return [(nom, (lambda fichiers=fichiers: iter(fichiers))) for nom, fichiers in PLAYLISTS]
+
+
+def _exporter(exporter, nom_fichier, dossier):
+    output_path = Path(dossier) / nom_fichier
+    total, nb_playlists = exporter(iter(MORCEAUX + [DOUBLON]), _playlists(), output_path, dossier)
+    return output_path, total, nb_playlists
+
+
+def test_export_rekordbox():
+    """Relire le XML Rekordbox et vérifier morceaux et playlists"""
+    print("🧪 Test Export Rekordbox")
+    print("-" * 50)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        output_path, total, nb_playlists = _exporter(export_dj.exporter_rekordbox, "rekordbox.xml", dossier)
+        assert (total, nb_playlists) == (3, 2)
+
+        tracks, playlists, entries = {}, {}, None
+        for evenement, element in ET.iterparse(output_path, events=('start', 'end')):
+            if evenement == 'start' and element.tag == 'COLLECTION':
+                entries = int(element.get('Entries'))
+            elif evenement == 'end' and element.tag == 'TRACK' and element.get('TrackID'):
+                tracks[element.get('Location')] = dict(element.attrib)
+            elif evenement == 'end' and element.tag == 'NODE' and element.get('Type') == '1':
+                assert element.get('KeyType') == '1'
+                cles = [t.get('Key') for t in element.findall('TRACK')]
+                assert int(element.get('Entries')) == len(cles)
+                playlists[element.get('Name')] = cles
+                element.clear()
+
+        assert entries == len(tracks) == 3
+        freak = next(t for t in tracks.values() if t['Artist'] == 'Chic')
+        assert freak['Name'] == 'Le Freak <Edit> & "Dub"'
+        assert freak['AverageBpm'] == '120.00'
+        assert freak['Tonality'] == '8A'
+        assert freak['Genre'] == 'Disco'
+        assert unquote(freak['Location']).endswith('/mp3/Chic - Le Freak.mp3')
+        assert unquote(freak['Location']).startswith('file://localhost/')
+        zoe = next(t for t in tracks.values() if t['Artist'] == 'Zoé')
+        assert zoe['Name'] == 'Café Été'
+
+        # Doublon et MP3 absent de la collection écartés, toutes les clés résolues
+        assert len(playlists['Playlist_Tout']) == 3
+        assert all(cle in tracks for cles in playlists.values() for cle in cles)
+
+    print("✅ Export Rekordbox relu avec succès")
+
+
+def test_export_traktor():
+    """Relire la collection NML et vérifier morceaux et playlists"""
+    print("🧪 Test Export Traktor")
+    print("-" * 50)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        output_path, total, nb_playlists = _exporter(export_dj.exporter_traktor, "collection.nml", dossier)
+        assert (total, nb_playlists) == (3, 2)
+
+        entries, cles_collection, playlists = None, {}, {}
+        for evenement, element in ET.iterparse(output_path, events=('start', 'end')):
+            if evenement == 'start' and element.tag == 'COLLECTION':
+                entries = int(element.get('ENTRIES'))
+            elif evenement == 'end' and element.tag == 'ENTRY' and element.get('TITLE'):
+                location = element.find('LOCATION')
+                cle = location.get('VOLUME') + location.get('DIR') + location.get('FILE')
+                cles_collection[cle] = {
+                    'titre': element.get('TITLE'),
+                    'bpm': element.find('TEMPO').get('BPM'),
+                    'key': element.find('MUSICAL_KEY').get('VALUE'),
+                    'genre': element.find('INFO').get('GENRE'),
+                    'date': element.find('INFO').get('IMPORT_DATE'),
+                }
+                element.clear()
+            elif evenement == 'end' and element.tag == 'PLAYLIST':
+                cles = [pk.get('KEY') for pk in element.iter('PRIMARYKEY')]
+                assert int(element.get('ENTRIES')) == len(cles)
+                playlists[element.get('UUID')] = cles
+
+        assert entries == len(cles_collection) == 3
+        queen = next(v for v in cles_collection.values() if v['titre'] == "Don't Stop Me Now")
+        assert queen['bpm'] == '156.000000'
+        assert queen['key'] == '5'  # F majeur
+        assert queen['genre'] == 'Rock, Pop'
+        assert queen['date'] == '2024/3/7'
+        freak = next(v for v in cles_collection.values() if v['titre'].startswith('Le Freak'))
+        assert freak['key'] == '21'  # 8A = La mineur
+
+        assert sorted(len(cles) for cles in playlists.values()) == [1, 3]
+        assert all(cle in cles_collection for cles in playlists.values() for cle in cles)
+        assert all(cle.startswith('/:') for cle in cles_collection)
+
+    print("✅ Export Traktor relu avec succès")
+
+
+def test_cles_traktor():
+    """Conversion des notations de clé"""
+    assert export_dj.cle_traktor('C') == 0
+    assert export_dj.cle_traktor('Am') == 21
+    assert export_dj.cle_traktor('Bbm') == 22
+    assert export_dj.cle_traktor('11B') == 9
+    assert export_dj.cle_traktor('N/A') is None
+
+
+if __name__ == "__main__":
+    test_export_rekordbox()
+    test_export_traktor()
+    test_cles_traktor()
+    print("\n🎉 Tous les tests d'export sont passés avec succès!")
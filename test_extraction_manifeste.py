@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test du manifeste de l'étape 2: sections inchangées ignorées, notes conservées
+"""
+
+import sys
+import os
+import tempfile
+import importlib
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+step2 = importlib.import_module("2_extraire_chansons_en_fichiers")
+
+SEPARATEUR = "\n\n" + "=" * 50 + "\n\n"
+
+
+def section(titre, artiste, bpm=120):
+    return (f"titre: {titre}\nartiste: {artiste}\nbpm: {bpm}\n"
+            "Notes Personnelles:\n  - À compléter...\n---\n\n## 🎵 Notes Personnelles\n\nÀ compléter...\n")
+
+
+def ecrire_morceaux(chemin, sections):
+    chemin.write_text("# Morceaux DJ - Généré le 2026-01-01 00:00:00\n\nTotal des morceaux traités: "
+                      f"{len(sections)}" + SEPARATEUR + SEPARATEUR.join(sections), encoding='utf-8')
+
+
+def test_resplit_sans_ecriture_et_notes():
+    """Re-split identique: zéro écriture; section modifiée: métadonnées à jour, notes gardées"""
+    with tempfile.TemporaryDirectory() as temp:
+        dossier = Path(temp)
+        morceaux = dossier / "morceaux.md"
+        chansons = dossier / "chansons"
+        ecrire_morceaux(morceaux, [section("SOS", "Abba"), section("SOS", "ABBA"), section("Respect", "Aretha")])
+        assert len(step2.split_markdown_file(morceaux, chansons)) == 3
+        noms = sorted(os.listdir(chansons))
+        assert noms == [step2.FICHIER_MANIFESTE, "ABBA - SOS.md", "Abba - SOS.md", "Aretha - Respect.md"]
+
+        dates = {nom: os.stat(chansons / nom).st_mtime_ns for nom in noms}
+        assert step2.split_markdown_file(morceaux, chansons) == []
+        assert {nom: os.stat(chansons / nom).st_mtime_ns for nom in os.listdir(chansons)} == dates
+
+        # L'utilisateur complète ses notes, puis la section change (BPM détecté)
+        fiche = chansons / "Aretha - Respect.md"
+        fiche.write_text(fiche.read_text(encoding='utf-8').replace("À compléter...", "Parfait en fin de set"),
+                         encoding='utf-8')
+        ecrire_morceaux(morceaux, [section("SOS", "Abba"), section("SOS", "ABBA"), section("Respect", "Aretha", 115),
+                                   section("Nouveau", "Artiste")])
+        ecrits = step2.split_markdown_file(morceaux, chansons)
+        assert sorted(chemin.name for chemin in ecrits) == ["Aretha - Respect.md", "Artiste - Nouveau.md"]
+        contenu = fiche.read_text(encoding='utf-8')
+        assert "bpm: 115\n" in contenu and contenu.count("Parfait en fin de set") == 2
+        assert not any("_02" in nom for nom in os.listdir(chansons))
+
+
+def test_reprise_dossier_existant():
+    """Sans manifeste, les fiches déjà extraites sont reprises au lieu d'être dupliquées"""
+    with tempfile.TemporaryDirectory() as temp:
+        dossier = Path(temp)
+        morceaux = dossier / "morceaux.md"
+        chansons = dossier / "chansons"
+        ecrire_morceaux(morceaux, [section("SOS", "Abba"), section("Respect", "Aretha"), section("SOS", "Abba")])
+        step2.split_markdown_file(morceaux, chansons)
+        (chansons / step2.FICHIER_MANIFESTE).unlink()
+
+        assert step2.split_markdown_file(morceaux, chansons) == []
+        assert sorted(os.listdir(chansons)) == [step2.FICHIER_MANIFESTE, "Abba - SOS.md", "Abba - SOS_01.md",
+                                                "Aretha - Respect.md"]
+
+
+if __name__ == "__main__":
+    test_resplit_sans_ecriture_et_notes()
+    test_reprise_dossier_existant()
+    print("\n🎉 Tous les tests du manifeste d'extraction sont passés avec succès!")
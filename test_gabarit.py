@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test des gabarits compilés: même rendu que str.format, champs refusés, cache par fichier
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gabarit import (Gabarit, charger_gabarit, charger_gabarit_chanson, liste_yaml, GABARIT_CHANSON_PAR_DEFAUT,
+                     TEMPLATE_CHANSON_LIVRE)
+
+# Guillemets, antislashs, accolades échappées et code Python dans le texte littéral
+TEXTE_PIEGE = ('titre: {titre!r} \'\'\' """ \\n \\\\ {{pas_un_champ}}\n'
+               'bpm: [{bpm:>5}] {bpm:03d} {energie!s:<4}|\n'
+               "{{{titre}}}\" + __import__('os').getcwd() + \"\n"
+               'genre:\n{genre_list}\n🎵 fin')
+
+
+def test_meme_rendu_que_format():
+    """Le code f-string généré rend exactement comme str.format, littéraux compris"""
+    gabarit = Gabarit(TEXTE_PIEGE, listes=('genre_list',))
+    valeurs = {'titre': "L'été \"indien\" {x}", 'bpm': 98, 'energie': 7, 'genre_list': ["Disco", "Funk"]}
+    attendu = TEXTE_PIEGE.format(**dict(valeurs, genre_list=liste_yaml(valeurs['genre_list'])))
+    assert gabarit.rendre(**valeurs) == attendu
+    # Une liste déjà formatée est gardée telle quelle; les valeurs en trop sont ignorées
+    assert gabarit.rendre(**dict(valeurs, genre_list="  - Disco\n  - Funk", autre=1)) == attendu
+    assert gabarit.champs == ('titre', 'bpm', 'energie', 'genre_list')
+
+    try:
+        gabarit.rendre(titre="x", bpm=1, genre_list=[])
+        assert False, "un champ manquant aurait dû lever KeyError"
+    except KeyError as e:
+        assert e.args == ('energie',)
+
+
+def test_champs_refuses():
+    """Seuls des noms de champ simples sont compilés (pas d'index, d'attribut ni de mot-clé)"""
+    for texte in ("{0}", "{}", "{a.b}", "{a[0]}", "{_prive}", "{class}", "{bpm:{largeur}}", "{a b}"):
+        try:
+            Gabarit(texte)
+            assert False, f"gabarit accepté: {texte}"
+        except ValueError:
+            pass
+    try:
+        Gabarit("{titre} {couleur}", nom="essai").verifier(('titre',))
+        assert False, "champ inconnu accepté"
+    except ValueError as e:
+        assert "couleur" in str(e)
+
+
+def test_rendre_plusieurs():
+    """Valeurs communes formatées une fois, séparateur entre les morceaux"""
+    gabarit = Gabarit("{titre}: {tags_list}", listes=('tags_list',))
+    tampon = gabarit.rendre_plusieurs([{'titre': "A"}, {'titre': "B", 'tags_list': ["x"]}], separateur="\n",
+                                      tags_list=["nouveau", "disco"])
+    assert tampon.getvalue() == "A:   - nouveau\n  - disco\nB:   - x\n"
+
+
+def test_cache_par_fichier():
+    """Un gabarit est compilé une fois par version du fichier; sans fichier, le texte par défaut"""
+    with tempfile.TemporaryDirectory() as temp:
+        chemin = Path(temp) / "gabarit.md"
+        chemin.write_text("titre: {titre}\n", encoding='utf-8')
+        premier = charger_gabarit(chemin)
+        assert charger_gabarit(chemin) is premier
+        chemin.write_text("artiste: {artiste}\n", encoding='utf-8')
+        os.utime(chemin, ns=(0, os.stat(chemin).st_mtime_ns + 10**9))
+        assert charger_gabarit(chemin).rendre(artiste="Chic") == "artiste: Chic\n"
+        # Un gabarit déjà chargé sans vérification est vérifié pour qui la demande
+        try:
+            charger_gabarit(chemin, champs=('titre',))
+            assert False, "champ inconnu accepté depuis le cache"
+        except ValueError as e:
+            assert "artiste" in str(e)
+
+        absent = Path(temp) / "absent.md"
+        try:
+            charger_gabarit(absent)
+            assert False, "gabarit absent accepté sans texte par défaut"
+        except FileNotFoundError:
+            pass
+        chanson = charger_gabarit_chanson(absent, GABARIT_CHANSON_PAR_DEFAUT)
+        fiche = chanson.rendre(titre="Le Freak", artiste="Chic", bpm=120, key="8A", genre_list=["Disco"],
+                               energie=7, date_ajout="2024-01-01", tags_list=[], filename="Chic - Le Freak",
+                               notes_personnelles=["À compléter..."], idees_mix="  - À définir...",
+                               liens=["À ajouter..."], notes_personnelles_detaillees="", idees_mix_detaillees="")
+        assert "genre:\n  - Disco\nenergie: 7\n" in fiche
+        assert "fichier_mp3: [[mp3/Chic - Le Freak.mp3]]\n" in fiche
+        # Le texte par défaut est celui du gabarit livré, pas une copie
+        assert GABARIT_CHANSON_PAR_DEFAUT == TEMPLATE_CHANSON_LIVRE.read_text(encoding='utf-8')
+
+
+if __name__ == "__main__":
+    test_meme_rendu_que_format()
+    test_champs_refuses()
+    test_rendre_plusieurs()
+    test_cache_par_fichier()
+    print("\n🎉 Tous les tests des gabarits sont passés avec succès!")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de l'import MP3: création, mise à jour des fiches et cache des fichiers inchangés
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import importer_mp3
+import bibliotheque_synthetique as synth
+
+FICHE = """titre: Le Freak
+artiste: Chic
+bpm: 120
+key: A
+genre:
+  - Non classé
+energie: 7
+date_ajout: 2024-01-01
+tags:
+  - disco
+fichier_mp3: [[mp3/Chic - Le Freak.mp3]]
+Notes Personnelles:
+  - bpm: à vérifier
+---
+
+## 🎵 Notes Personnelles
+
+key: ne pas toucher
+"""
+
+
+def test_mise_a_jour_fiche():
+    """Un import sur une fiche existante ne change que l'en-tête, les notes restent intactes"""
+    print("🧪 Test Mise à jour d'une fiche")
+    print("-" * 50)
+
+    if importer_mp3.mutagen is None:
+        print("⚠️  mutagen non installé, test ignoré")
+        return
+
+    with tempfile.TemporaryDirectory() as dossier:
+        dossier = Path(dossier)
+        fiche = dossier / "chansons" / "Chic - Le Freak.md"
+        fiche.parent.mkdir()
+        fiche.write_text(FICHE, encoding='utf-8')
+        morceau = {'artiste': 'Chic', 'titre': 'Le Freak', 'bpm': 119, 'key': '8A', 'genre': ['Disco', 'Funk']}
+        synth.ecrire_dossier_mp3([morceau], dossier / "mp3", profondeur=1)
+        cache = dossier / "cache.json"
+
+        stats = importer_mp3.importer_dossier(dossier / "mp3", dossier / "chansons", cache)
+        assert stats['creees'] == 0 and stats['mises_a_jour'] == 1 and stats['erreurs'] == 0
+        assert [f.name for f in (dossier / "chansons").glob("*.md")] == [fiche.name]
+        contenu = fiche.read_text(encoding='utf-8')
+        assert "bpm: 119\nkey: 8A\ngenre:\n  - Disco\n  - Funk\nenergie: 7" in contenu
+        assert "fichier_mp3: [[mp3/00/Chic - Le Freak.mp3]]" in contenu
+        assert contenu.endswith("  - bpm: à vérifier\n---\n\n## 🎵 Notes Personnelles\n\nkey: ne pas toucher\n")
+
+        # Mêmes tags une seconde fois (cache ignoré): rien à réécrire
+        stats = importer_mp3.importer_dossier(dossier / "mp3", dossier / "chansons", cache, forcer=True)
+        assert stats['creees'] == stats['mises_a_jour'] == 0
+        assert fiche.read_text(encoding='utf-8') == contenu
+
+    print("✅ Fiche mise à jour sans toucher aux notes")
+
+
+def test_import_dossier():
+    """Import d'un dossier tagué puis relance à chaud"""
+    print("🧪 Test Import d'un dossier MP3")
+    print("-" * 50)
+
+    if importer_mp3.mutagen is None:
+        print("⚠️  mutagen non installé, test ignoré")
+        return
+
+    with tempfile.TemporaryDirectory() as dossier:
+        dossier = Path(dossier)
+        morceaux = synth.generer_morceaux(20, 7, 0)
+        synth.ecrire_dossier_mp3(morceaux, dossier / "mp3")
+        cache = dossier / "cache.json"
+
+        stats = importer_mp3.importer_dossier(dossier / "mp3", dossier / "chansons", cache)
+        assert stats['fichiers'] == stats['creees'] == 20
+        fiches = sorted((dossier / "chansons").glob("*.md"))
+        assert len(fiches) == 20
+        contenu = fiches[0].read_text(encoding='utf-8')
+        assert "fichier_mp3: [[mp3/" in contenu and "tags:\n  - mp3" in contenu
+
+        stats = importer_mp3.importer_dossier(dossier / "mp3", dossier / "chansons", cache)
+        assert stats['inchanges'] == 20 and stats['creees'] == stats['mises_a_jour'] == 0
+
+    print("✅ Dossier importé puis ignoré à la relance")
+
+
+if __name__ == "__main__":
+    test_mise_a_jour_fiche()
+    test_import_dossier()
+    print("\n🎉 Tous les tests d'import sont passés avec succès!")
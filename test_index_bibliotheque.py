@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de l'index de la bibliothèque: ordres, groupes pré-triés et fusion de groupes
+"""
+
+import sys
+import os
+import random
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from index_bibliotheque import IndexBibliotheque, niveau_energie
+from morceau import Morceau
+
+GENRES = ["House", "Disco", "Funk", "Techno"]
+TAGS = ["nouveau", "classic", "peak"]
+
+
+def bibliotheque(nombre=300, graine=42):
+    """Morceaux aléatoires, avec des BPM et énergies absents et des ex aequo"""
+    aleatoire = random.Random(graine)
+    return [Morceau.depuis_dict({
+        'titre': f"Titre {aleatoire.randrange(50)}", 'artiste': f"Artiste {aleatoire.randrange(20)}",
+        'bpm': aleatoire.choice([None, 100, 120, 120, 128]), 'energie': aleatoire.choice([None, 0, 2, 5, 7, 10, 12]),
+        'genres': aleatoire.sample(GENRES, aleatoire.randint(1, 2)),
+        'tags': aleatoire.sample(TAGS, aleatoire.randint(0, 2)),
+        'key': aleatoire.choice([None, "8A", "9B"])}) for _ in range(nombre)]
+
+
+def test_ordres():
+    """Chaque ordre est le tri stable des positions selon sa clé"""
+    morceaux = bibliotheque()
+    index = IndexBibliotheque(morceaux)
+    positions = range(len(morceaux))
+    assert index.ordre('saisie') == list(positions)
+    assert index.ordre() == sorted(positions, key=lambda i: (morceaux[i].bpm_tri, morceaux[i].energie_tri))
+    assert index.ordre('genre_bpm') == sorted(positions, key=lambda i: (morceaux[i].genres[0], morceaux[i].bpm_tri))
+    assert index.ordre('alphabetique') == sorted(positions, key=lambda i: (morceaux[i].artiste, morceaux[i].titre))
+    rangs = index.rangs('alphabetique')
+    assert all(index.ordre('alphabetique')[rang] == position for position, rang in enumerate(rangs))
+    # Calculé une seule fois
+    assert index.ordre() is index.ordre()
+
+
+def test_groupes():
+    """Un groupe contient, dans l'ordre demandé, exactement les morceaux ayant la valeur"""
+    morceaux = bibliotheque()
+    index = IndexBibliotheque(morceaux)
+    ordre = index.ordre()
+    for genre in GENRES:
+        assert index.groupes('genre')[genre] == [i for i in ordre if genre in morceaux[i].genres]
+    for tag in TAGS:
+        assert index.groupes('tag', 'alphabetique')[tag] == \
+            [i for i in index.ordre('alphabetique') if tag in morceaux[i].tags]
+    assert set(index.groupes('cle')) == {"8A", "9B"}
+    assert sum(map(len, index.groupes('cle').values())) == sum(m.key is not None for m in morceaux)
+    # Valeurs dans l'ordre de leur premier morceau
+    assert list(index.groupes('genre')) == list(dict.fromkeys(g for i in ordre for g in morceaux[i].genres))
+
+    energies = index.groupes('energie')
+    assert set(energies) == {None, 'faible', 'moyenne', 'elevee'}
+    assert [niveau_energie(e) for e in (None, 0, 3, 4, 6, 7, 12)] == \
+        [None, 'faible', 'faible', 'moyenne', 'moyenne', 'elevee', 'elevee']
+    assert all(niveau_energie(morceaux[i].energie) == niveau for niveau, groupe in energies.items() for i in groupe)
+    assert index.groupes('genre') is index.groupes('genre')
+
+
+def test_fusion_de_groupes():
+    """Positions de plusieurs valeurs: ordre demandé conservé, morceau multi-genres gardé une fois"""
+    morceaux = bibliotheque()
+    index = IndexBibliotheque(morceaux)
+    for ordre in ('canonique', 'alphabetique', 'saisie'):
+        for valeurs in (["House", "Disco"], ["Funk", "Techno", "House"], ["Disco"], ["Inconnu"], []):
+            attendu = [i for i in index.ordre(ordre) if set(valeurs) & set(morceaux[i].genres)]
+            assert index.positions('genre', valeurs, ordre) == attendu
+    # Une liste renvoyée n'est pas le groupe lui-même
+    seul = index.positions('genre', ["Disco"])
+    seul.clear()
+    assert index.groupes('genre')["Disco"]
+
+
+if __name__ == "__main__":
+    test_ordres()
+    test_groupes()
+    test_fusion_de_groupes()
+    print("\n🎉 Tous les tests de l'index de la bibliothèque sont passés avec succès!")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de l'instrumentation: pic mémoire du parent conservé, un profil par exécution de span
+"""
+
+import sys
+import os
+import json
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import instrumentation
+from instrumentation import span, compter
+
+
+def test_pic_parent_et_profils():
+    """Un span enfant n'efface pas le pic atteint avant lui; deux exécutions donnent deux .pstats"""
+    with tempfile.TemporaryDirectory() as temp:
+        dossier = Path(temp)
+        trace = dossier / "trace.jsonl"
+        instrumentation.configurer(trace, dossier / "profils", tracemalloc_actif=True, propager=False)
+        try:
+            for _ in range(2):
+                with span("etape"):
+                    tampon = bytearray(8 * 1024 * 1024)
+                    del tampon
+                    with span("enfant"):
+                        compter('fichiers_lus', 3)
+        finally:
+            instrumentation.configurer(propager=False)
+            tracemalloc.stop()
+
+        evenements = [json.loads(ligne) for ligne in trace.read_text(encoding='utf-8').splitlines()]
+        etapes = [e for e in evenements if e['nom'] == 'etape']
+        assert len(etapes) == 2
+        assert all(e['pic_memoire_ko'] >= 8 * 1024 for e in etapes)
+        assert all(e['compteurs'] == {'fichiers_lus': 3} for e in etapes)
+        assert len(set(e['pstats'] for e in etapes)) == 2
+        assert len(os.listdir(dossier / "profils")) == 2
+
+
+if __name__ == "__main__":
+    test_pic_parent_et_profils()
+    print("\n🎉 Tous les tests de l'instrumentation sont passés avec succès!")
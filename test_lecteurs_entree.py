@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test des lecteurs de listes: texte, CSV et M3U, détection du format, rendu en parallèle
+"""
+
+import sys
+import os
+import tempfile
+import importlib
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import lecteurs_entree
+from lecteurs_entree import lire_morceaux, detecter_format
+
+
+def test_formats_et_valeurs_source():
+    """BPM, clé, genres et énergie de la source remplacent les défauts"""
+    with tempfile.TemporaryDirectory() as temp:
+        dossier = Path(temp)
+        csv_spotify = dossier / "export.csv"
+        csv_spotify.write_text(
+            "\ufeffTrack Name,Artist Name(s),Genres,Tempo,Key,Mode,Energy\n"
+            '"Stayin\' Alive",Bee Gees,"disco,pop",103.5,5,1,0.82\n'
+            "Sans infos,,,,,,\n",
+            encoding='utf-8')
+        tsv = dossier / "liste"
+        tsv.write_text("titre;artiste;bpm;tonalité;genre\nBillie Jean;Michael Jackson;117;10A;Pop/Funk\n",
+                       encoding='utf-8')
+        m3u = dossier / "set.m3u8"
+        m3u.write_text(
+            "#EXTM3U\n"
+            '#EXTINF:215 bpm="124" key="8A",Daft Punk - One More Time\n'
+            "#EXTGENRE:House\n"
+            "mp3/Daft Punk - One More Time.mp3\n\n"
+            "C:\\Musique\\Madonna - Like a Virgin.mp3\n",
+            encoding='utf-8')
+
+        assert detecter_format(csv_spotify) == 'csv' and detecter_format(tsv) == 'csv'
+        assert detecter_format(m3u) == 'm3u'
+        spotify = list(lire_morceaux(csv_spotify))
+        assert spotify[0]['titre'] == "Stayin' Alive" and spotify[0]['artiste'] == "Bee Gees"
+        assert (spotify[0]['bpm'], spotify[0]['key'], spotify[0]['genre'], spotify[0]['energie']) == \
+            (104, 'F', ['disco', 'pop'], 8)
+        assert (spotify[1]['artiste'], spotify[1]['bpm'], spotify[1]['key'], spotify[1]['genre']) == \
+            ("Artiste Inconnu", 120, 'A', ['Pop'])
+        [billie] = lire_morceaux(tsv)
+        assert (billie['bpm'], billie['key'], billie['genre']) == (117, '10A', ['Pop', 'Funk'])
+        daft, madonna = lire_morceaux(m3u)
+        assert (daft['artiste'], daft['titre'], daft['bpm'], daft['key'], daft['genre']) == \
+            ("Daft Punk", "One More Time", 124, '8A', ['House'])
+        assert (madonna['artiste'], madonna['titre'], madonna['bpm']) == ("Madonna", "Like a Virgin", 120)
+
+
+def test_etape1_csv_et_texte():
+    """L'étape 1 lit la liste texte comme avant et reporte les valeurs d'un CSV dans morceaux.md"""
+    step1 = importlib.import_module("1_generer_markdown_depuis_liste")
+    with tempfile.TemporaryDirectory() as temp:
+        dossier = Path(temp)
+        texte = dossier / "liste.txt"
+        texte.write_text("# commentaire\nAbba - SOS\n\nBillie Jean par Michael Jackson\nSans artiste\n",
+                         encoding='utf-8')
+        assert [(s['artiste'], s['titre']) for s in lire_morceaux(texte)] == \
+            [("Abba", "SOS"), ("Michael Jackson", "Billie Jean"), ("Artiste Inconnu", "Sans artiste")]
+        assert step1.parse_song_line("Abba - SOS")['bpm'] == 120
+
+        export = dossier / "export.csv"
+        export.write_text("Title,Artist,BPM,Key,Genre,Energy\nSOS,Abba,128,8A,Disco,7\n", encoding='utf-8')
+        sortie = dossier / "sortie" / "morceaux.md"
+        assert step1.generate_markdown_from_list(export, sortie) == 1
+        contenu = sortie.read_text(encoding='utf-8')
+        assert "Total des morceaux traités: 1\n" in contenu
+        assert "bpm: 128\nkey: 8A\ngenre:\n  - Disco\nenergie: 7\n" in contenu
+        # Pas de fichier temporaire laissé à côté de la sortie
+        assert os.listdir(sortie.parent) == ["morceaux.md"]
+
+        try:
+            list(lire_morceaux(export, 'xml'))
+            assert False, "un format inconnu aurait dû être refusé"
+        except ValueError:
+            pass
+        assert set(lecteurs_entree.LECTEURS) == {'texte', 'csv', 'm3u'}
+
+
+def test_etape1_parallele():
+    """Le rendu par plages en parallèle donne le même morceaux.md que le rendu en série"""
+    step1 = importlib.import_module("1_generer_markdown_depuis_liste")
+    with tempfile.TemporaryDirectory() as temp:
+        dossier = Path(temp)
+        liste = dossier / "liste.txt"
+        lignes = [f"Artiste {i} - Titre {i}" if i % 7 else f"# Section {i}" for i in range(500)]
+        liste.write_bytes(("\ufeff" + "\r\n".join(lignes) + "\n\nTitre par Élodie").encode('utf-8'))
+
+        tranches = lecteurs_entree.decouper_tranches(liste, 1000)
+        assert tranches[0][0] == 0 and tranches[-1][1] == liste.stat().st_size and len(tranches) > 5
+        assert all(fin == debut for (_, fin), (debut, _) in zip(tranches, tranches[1:]))
+
+        assert step1.generate_markdown_from_list(liste, dossier / "serie.md") == 429
+        assert step1.generate_markdown_from_list(liste, dossier / "parallele.md", nb_processus=3,
+                                                 taille_tranche=1000) == 429
+        serie, parallele = ((dossier / nom).read_bytes().split(b"\n", 1) for nom in ("serie.md", "parallele.md"))
+        assert serie[1] == parallele[1]
+        assert sorted(os.listdir(dossier)) == ["liste.txt", "parallele.md", "serie.md"]
+
+
+if __name__ == "__main__":
+    test_formats_et_valeurs_source()
+    test_etape1_csv_et_texte()
+    test_etape1_parallele()
+    print("\n🎉 Tous les tests des lecteurs de listes sont passés avec succès!")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de la liaison MP3: ordre de résolution des liens et statistiques de correction
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lier_mp3 import IndexAudio, lier_fiches, lire_entete
+
+
+def index_audio(*liens):
+    index = IndexAudio()
+    for lien in liens:
+        index.ajouter(lien)
+    return index
+
+
+def fiche(lien, artiste="", titre="", bpm=""):
+    return {'file_path': Path("fiche.md"), 'fichier_mp3': lien, 'artiste': artiste, 'titre': titre, 'bpm': bpm}
+
+
+def test_ordre_de_resolution():
+    """Lien valide, puis même chemin à la casse près, puis clé de la fiche, puis clé de l'ancien lien"""
+    index = index_audio("mp3/Chic - Le Freak.mp3", "mp3/Chic - Good Times.mp3",
+                        "mp3/Donna Summer - I Feel Love.mp3")
+    # Un lien valide est gardé même si l'artiste|titre de la fiche désigne un autre fichier
+    assert index.resoudre(fiche("mp3/Chic - Le Freak.mp3", "Chic", "Good Times")) == "mp3/Chic - Le Freak.mp3"
+    assert index.resoudre(fiche("MP3/chic - le freak.MP3", "Chic", "Good Times")) == "mp3/Chic - Le Freak.mp3"
+    # La clé de la fiche passe avant celle du nom de l'ancien lien
+    assert index.resoudre(fiche("ancien/Donna Summer - I Feel Love.wav", "Chic", "Good Times")) == \
+        "mp3/Chic - Good Times.mp3"
+    assert index.resoudre(fiche("ancien/Donna Summer - I Feel Love.wav", "Inconnu", "Inconnu")) == \
+        "mp3/Donna Summer - I Feel Love.mp3"
+    assert index.resoudre(fiche("", "CHIC", "le freak")) == "mp3/Chic - Le Freak.mp3"
+    assert index.resoudre(fiche("ancien/Inconnu.mp3", "Inconnu", "Inconnu")) is None
+
+
+def test_departage_des_candidats():
+    """Plusieurs fichiers pour une même clé: BPM des tags, puis nom du lien attendu, puis lien le plus court"""
+    index = IndexAudio()
+    index.ajouter("a/Chic - Le Freak.mp3", {'artiste': "Chic", 'titre': "Le Freak", 'bpm': 100})
+    index.ajouter("b/Chic - Le Freak.mp3", {'artiste': "Chic", 'titre': "Le Freak", 'bpm': 120})
+    index.ajouter("c/Freak.mp3", {'artiste': "Chic", 'titre': "Le Freak", 'bpm': 120})
+    assert index.resoudre(fiche("vieux/Chic - Le Freak.mp3", "Chic", "Le Freak", "120")) == "b/Chic - Le Freak.mp3"
+    assert index.resoudre(fiche("vieux/Freak.mp3", "Chic", "Le Freak", "120")) == "c/Freak.mp3"
+    # Sans BPM lisible, le lien le plus court parmi les noms également proches
+    assert index.resoudre(fiche("", "Chic", "Le Freak")) == "c/Freak.mp3"
+
+
+def test_statistiques_de_correction():
+    """Une fiche qui ne peut pas être réécrite compte en erreur, pas en lien corrigé"""
+    with tempfile.TemporaryDirectory() as temp:
+        dossier = Path(temp)
+        chemin = dossier / "Chic - Le Freak.md"
+        chemin.write_text("titre: Le Freak\nartiste: Chic\nfichier_mp3: [[vieux/Chic - Le Freak.mp3]]\n---\n\nNotes\n",
+                          encoding='utf-8')
+        fiches = [lire_entete(chemin),
+                  fiche("vieux/Chic - Le Freak.mp3", "Chic", "Le Freak") | {'file_path': dossier / "absente.md"},
+                  fiche("", "Inconnu", "Inconnu")]
+        statistiques = {}
+        non_resolues = lier_fiches(fiches, index_audio("mp3/Chic - Le Freak.mp3"), corriger=True,
+                                   statistiques=statistiques)
+        assert [f['titre'] for f in non_resolues] == ["Inconnu"]
+        assert statistiques == {'valides': 0, 'corriges': 1, 'non_resolus': 1, 'erreurs': 1}
+        assert "fichier_mp3: [[mp3/Chic - Le Freak.mp3]]\n---\n\nNotes\n" in chemin.read_text(encoding='utf-8')
+
+        # Sans --corriger, les liens à corriger sont comptés sans écriture
+        statistiques = {}
+        lier_fiches([lire_entete(chemin) | {'fichier_mp3': "vieux/Chic - Le Freak.mp3"}],
+                    index_audio("mp3/Chic - Le Freak.mp3"), statistiques=statistiques)
+        assert statistiques == {'valides': 0, 'corriges': 1, 'non_resolus': 0, 'erreurs': 0}
+
+
+if __name__ == "__main__":
+    test_ordre_de_resolution()
+    test_departage_des_candidats()
+    test_statistiques_de_correction()
+    print("\n🎉 Tous les tests de la liaison MP3 sont passés avec succès!")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test du manifeste des playlists: playlists inchangées non réécrites, playlists disparues supprimées
+"""
+
+import sys
+import os
+import tempfile
+import importlib
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+step5 = importlib.import_module("genere_playlists1")
+
+
+def morceau(i, genre, bpm=120):
+    return {'titre': f"Titre {i}", 'artiste': f"Artiste {i}", 'bpm': bpm, 'energie': 5, 'genres': [genre],
+            'file_path': Path(f"Artiste {i} - Titre {i}.md")}
+
+
+def generer(dossier, songs):
+    """Un passage de l'étape 5 (playlists par genre), comme main()"""
+    lignes = step5.preparer_lignes(songs)
+    manifeste = step5.ManifestePlaylists(dossier)
+    step5.create_playlists_by_genre(None, dossier, lignes, manifeste)
+    manifeste.supprimer_obsoletes(dossier)
+    manifeste.sauver()
+    return manifeste
+
+
+def test_reecriture_et_suppression():
+    """Seule la playlist modifiée est réécrite; celle d'un genre disparu est supprimée, pas les autres fichiers"""
+    with tempfile.TemporaryDirectory() as temp:
+        dossier = Path(temp)
+        songs = [morceau(i, 'House' if i < 3 else 'Disco') for i in range(6)]
+        manifeste = generer(dossier, songs)
+        assert sorted(manifeste.ecrites) == ["Playlist_Disco", "Playlist_House"]
+        (dossier / "Ma_playlist.m3u").write_text("#EXTM3U\n", encoding='utf-8')
+        date_house = os.stat(dossier / "Playlist_House.m3u").st_mtime_ns
+
+        manifeste = generer(dossier, songs)
+        assert manifeste.ecrites == [] and sorted(manifeste.inchangees) == ["Playlist_Disco", "Playlist_House"]
+
+        # Un BPM change dans Disco, puis Disco disparaît
+        songs[4]['bpm'] = 128
+        manifeste = generer(dossier, songs)
+        assert manifeste.ecrites == ["Playlist_Disco"] and manifeste.inchangees == ["Playlist_House"]
+        assert os.stat(dossier / "Playlist_House.m3u").st_mtime_ns == date_house
+
+        manifeste = generer(dossier, songs[:3])
+        assert manifeste.supprimees == ["Playlist_Disco"]
+        assert sorted(os.listdir(dossier)) == [step5.MANIFESTE_PLAYLISTS, "Ma_playlist.m3u", "Playlist_House.json",
+                                               "Playlist_House.m3u", "Playlist_House.md"]
+
+        # Fichier supprimé à la main: la playlist est réécrite malgré une empreinte identique
+        (dossier / "Playlist_House.md").unlink()
+        assert generer(dossier, songs[:3]).ecrites == ["Playlist_House"]
+        assert (dossier / "Playlist_House.md").exists()
+
+
+if __name__ == "__main__":
+    test_reecriture_et_suppression()
+    print("\n🎉 Tous les tests du manifeste des playlists sont passés avec succès!")
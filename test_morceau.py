@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test du Morceau: accès façon dictionnaire, conversions, internement et clé de tri
+"""
+
+import sys
+import os
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from morceau import Morceau, en_morceau, GENRES_PAR_DEFAUT
+
+
+def test_acces_facon_dictionnaire():
+    """get, [] et in se comportent comme sur l'ancien dictionnaire de parse_song_file()"""
+    song = {'titre': "Le Freak", 'artiste': "Chic", 'bpm': "120", 'energie': 7, 'tags': ["disco"],
+            'file_path': Path("Chic - Le Freak.md")}
+    morceau = Morceau.depuis_dict(song)
+
+    assert morceau['titre'] == "Le Freak" and morceau.get('bpm', 'N/A') == 120
+    assert morceau.get('key', 'N/A') == 'N/A' and morceau.get('key') is None
+    assert 'energie' in morceau and 'key' not in morceau and 'inconnu' not in morceau
+    for absent in ('key', 'date_ajout', 'inconnu'):
+        try:
+            morceau[absent]
+            assert False, f"{absent} aurait dû lever KeyError"
+        except KeyError:
+            pass
+    # Genres absents de la fiche: valeur par défaut, comme avant
+    assert morceau['genres'] == GENRES_PAR_DEFAUT and morceau['tags'] == ("disco",)
+    assert morceau.en_dict() == {'titre': "Le Freak", 'artiste': "Chic", 'bpm': 120, 'energie': 7,
+                                 'genres': GENRES_PAR_DEFAUT, 'tags': ("disco",),
+                                 'file_path': Path("Chic - Le Freak.md")}
+    assert Morceau.depuis_dict(morceau.en_dict()) == morceau
+
+
+def test_conversions_et_internement():
+    """BPM et énergie illisibles valent None; genres, tags et clés sont partagés entre morceaux"""
+    morceau = Morceau.depuis_dict({'bpm': "rapide", 'energie': None, 'genres': ["House"], 'key': "8A"})
+    assert morceau.bpm is None and morceau.energie is None
+    assert morceau.get('bpm', 'N/A') == 'N/A' and 'bpm' not in morceau
+    assert (morceau.bpm_tri, morceau.energie_tri) == (120, 5)
+
+    autre = Morceau.depuis_dict({'genres': ["".join(["Ho", "use"])], 'key': "".join(["8", "A"])})
+    assert autre.genres[0] is morceau.genres[0] and autre.key is morceau.key
+    assert en_morceau(morceau) is morceau
+    assert en_morceau({'titre': "Halo"}) == Morceau(titre="Halo")
+
+
+def test_cle_de_tri():
+    """La clé entière trie comme le tuple (bpm, énergie), valeurs par défaut comprises"""
+    morceaux = [Morceau.depuis_dict({'bpm': bpm, 'energie': energie})
+                for bpm in (None, 0, 90, 120, 121, 200) for energie in (None, 1, 5, 10)]
+    attendu = sorted(morceaux, key=lambda m: (m.bpm_tri, m.energie_tri))
+    assert sorted(morceaux, key=lambda m: m.cle_tri) == attendu
+
+
+if __name__ == "__main__":
+    test_acces_facon_dictionnaire()
+    test_conversions_et_internement()
+    test_cle_de_tri()
+    print("\n🎉 Tous les tests du Morceau sont passés avec succès!")
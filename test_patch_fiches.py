@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test des patches d'en-tête: corps intact, fiches à jour ignorées, lot en parallèle
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from patch_fiches import patcher_fiche, appliquer_patches, charger_patches
+
+ENTETE = ("titre: Le Freak\nartiste: Chic\nbpm: 120\nkey: A\ngenre:\n  - Pop\nenergie: 5\n"
+          "tags:\n  - nouveau\nNotes Personnelles:\n  - bpm: à vérifier\n")
+# Corps avec fins de ligne Windows et un faux champ: recopié octet pour octet
+CORPS = "---\r\n\r\n## 🎵 Notes Personnelles\r\n\r\nkey: ne pas toucher\r\ngenre:\r\n  - garder\r\n"
+
+
+def test_patch_entete_seulement():
+    """Seuls les champs de l'en-tête changent; une fiche déjà à jour n'est pas réécrite"""
+    with tempfile.TemporaryDirectory() as temp:
+        fiche = Path(temp) / "Chic - Le Freak.md"
+        fiche.write_bytes((ENTETE + CORPS).encode('utf-8'))
+
+        patch = {'bpm': 119, 'key': '8A', 'genre': ['Disco', 'Funk'], 'tags': ['classic'], 'energie': 8}
+        assert patcher_fiche(fiche, patch)
+        contenu = fiche.read_bytes().decode('utf-8')
+        assert contenu.startswith("titre: Le Freak\nartiste: Chic\nbpm: 119\nkey: 8A\ngenre:\n  - Disco\n  - Funk\n"
+                                  "energie: 8\ntags:\n  - classic\nNotes Personnelles:\n  - bpm: à vérifier\n")
+        assert contenu.endswith(CORPS)
+
+        date = os.stat(fiche).st_mtime_ns
+        assert not patcher_fiche(fiche, patch)
+        assert not patcher_fiche(fiche, {'inconnu': 'ajouté?'})
+        assert os.stat(fiche).st_mtime_ns == date and "inconnu" not in fiche.read_text(encoding='utf-8')
+
+
+def test_entete_windows():
+    """Fiche en CRLF: les champs et les lignes de liste réécrits gardent les fins de ligne CRLF"""
+    with tempfile.TemporaryDirectory() as temp:
+        fiche = Path(temp) / "Chic - Le Freak.md"
+        fiche.write_bytes((ENTETE.replace("\n", "\r\n") + CORPS).encode('utf-8'))
+
+        patch = {'bpm': 119, 'genre': ['Disco', 'Funk'], 'tags': []}
+        assert patcher_fiche(fiche, patch)
+        contenu = fiche.read_bytes().decode('utf-8')
+        assert contenu == ("titre: Le Freak\r\nartiste: Chic\r\nbpm: 119\r\nkey: A\r\ngenre:\r\n  - Disco\r\n"
+                           "  - Funk\r\nenergie: 5\r\ntags:\r\nNotes Personnelles:\r\n  - bpm: à vérifier\r\n" + CORPS)
+        assert "\n" not in contenu.replace("\r\n", "")
+        # Appliqué une deuxième fois, le patch ne change plus rien
+        assert not patcher_fiche(fiche, patch)
+
+        # En-tête LF, corps CRLF: chaque partie garde ses fins de ligne
+        fiche.write_bytes((ENTETE + CORPS).encode('utf-8'))
+        assert patcher_fiche(fiche, {'genre': ['Disco']})
+        contenu = fiche.read_bytes().decode('utf-8')
+        assert "genre:\n  - Disco\nenergie: 5\n" in contenu and "\r" not in contenu[:-len(CORPS)]
+
+
+def test_liste_donnee_en_chaine():
+    """{"genre": "House"} (fichier de patches) remplace toute la liste; une valeur non liste est refusée"""
+    with tempfile.TemporaryDirectory() as temp:
+        dossier = Path(temp)
+        fiche = dossier / "Chic - Le Freak.md"
+        fiche.write_bytes((ENTETE.replace("  - Pop\n", "  - Disco\n  - Funk\n") + CORPS).encode('utf-8'))
+        patches = dossier / "patches.json"
+        patches.write_text('{"Chic - Le Freak": {"genre": "House", "tags": "classic"}}', encoding='utf-8')
+
+        assert appliquer_patches(charger_patches(patches, dossier))['modifiees'] == 1
+        contenu = fiche.read_bytes().decode('utf-8')
+        assert "genre:\n  - House\nenergie: 5\ntags:\n  - classic\nNotes Personnelles:\n" in contenu
+        assert "Disco" not in contenu and "Funk" not in contenu
+
+        avant = fiche.read_bytes()
+        assert appliquer_patches([(fiche, {'genre': 128})]) == {'fiches': 1, 'modifiees': 0, 'inchangees': 0,
+                                                                 'erreurs': 1}
+        assert fiche.read_bytes() == avant
+
+
+def test_lot_parallele():
+    """Lot de patches: fusion par fiche, fiches inchangées comptées, erreur isolée"""
+    with tempfile.TemporaryDirectory() as temp:
+        dossier = Path(temp)
+        for i in range(300):
+            (dossier / f"{i:03d}.md").write_text(ENTETE + "---\nnotes\n", encoding='utf-8')
+        patches = [(dossier / f"{i:03d}.md", {'bpm': 100 + i % 50}) for i in range(300)]
+        patches += [(dossier / "000.md", {'key': '5A'}), (dossier / "absente.md", {'bpm': 1})]
+        stats = appliquer_patches(patches, nb_threads=8)
+        # bpm: 120 pour i % 50 == 20: déjà à jour
+        assert stats == {'fiches': 301, 'modifiees': 294, 'inchangees': 6, 'erreurs': 1}
+        assert "bpm: 100\nkey: 5A\n" in (dossier / "000.md").read_text(encoding='utf-8')
+        assert not [nom for nom in os.listdir(dossier) if nom.endswith('.tmp')]
+        assert appliquer_patches(patches[:300], nb_threads=8)['modifiees'] == 0
+
+
+if __name__ == "__main__":
+    test_patch_entete_seulement()
+    test_entete_windows()
+    test_liste_donnee_en_chaine()
+    test_lot_parallele()
+    print("\n🎉 Tous les tests des patches d'en-tête sont passés avec succès!")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test des playlists intelligentes: priorité des opérateurs, not/in, guillemets, filtre par genre, noms
+"""
+
+import sys
+import os
+import tempfile
+import importlib
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from playlists_intelligentes import compiler_regle, charger_regles, evaluer_regles, valeurs_morceau
+from index_bibliotheque import IndexBibliotheque
+
+step5 = importlib.import_module("genere_playlists1")
+
+MORCEAUX = [
+    ("Pop", 100, 3, ["nouveau"]),
+    ("Rock", 130, 8, []),
+    ("Rock", 110, 6, ["classic"]),
+    ("Rock and Roll", 150, 9, []),
+    ("Disco", 120, 7, ["nouveau"]),
+    ("Funk", 118, 5, []),
+]
+
+
+def lignes():
+    return step5.preparer_lignes([
+        {'titre': f"Titre {i}", 'artiste': f"Artiste {i}", 'bpm': bpm, 'energie': energie, 'genres': [genre],
+         'tags': tags, 'key': '8A', 'file_path': Path(f"Artiste {i} - Titre {i}.md")}
+        for i, (genre, bpm, energie, tags) in enumerate(MORCEAUX)])
+
+
+def titres(regle):
+    """Numéros des morceaux retenus par une règle"""
+    membres = evaluer_regles([compiler_regle("R", regle)], lignes())["R"]
+    return [int(ligne.titre.split()[1]) for ligne in membres]
+
+
+def test_priorite_et_negations():
+    """"and" lie plus fort que "or"; not, not in, between et guillemets"""
+    assert titres("genre = Pop or genre = Rock and bpm > 125") == [0, 1]
+    assert titres("(genre = Pop or genre = Rock) and bpm > 105") == [1, 2]
+    assert titres("not genre = Rock and energy >= 5") == [3, 4, 5]
+    assert titres("not (genre = Rock or tag = nouveau)") == [3, 5]
+    assert titres("genre not in (Rock, Pop) and bpm between 115 and 125") == [4, 5]
+    assert titres("genre in (disco, FUNK)") == [4, 5]
+    assert titres('genre = "Rock and Roll"') == [3]
+    assert titres("genre = 'Rock and Roll' or tag = classic") == [2, 3]
+    for invalide in ("genre in (Disco", "bpm > rapide", "couleur = rouge", "bpm between 100", "tag < x"):
+        try:
+            compiler_regle("R", invalide)
+            assert False, f"règle invalide acceptée: {invalide}"
+        except ValueError:
+            pass
+
+
+def test_filtre_par_genre():
+    """Genres requis d'une règle, et même résultat qu'une évaluation de chaque règle sur chaque morceau"""
+    assert compiler_regle("R", "genre in (Disco, Funk) and bpm > 100").genres_requis == {"disco", "funk"}
+    assert compiler_regle("R", "genre = Disco or genre = Pop").genres_requis == {"disco", "pop"}
+    assert compiler_regle("R", "genre = Disco or bpm > 100").genres_requis is None
+    assert compiler_regle("R", "not genre = Disco").genres_requis is None
+    assert compiler_regle("R", "genre not in (Disco)").genres_requis is None
+
+    regles = [compiler_regle(f"R{i}", regle) for i, regle in enumerate((
+        "genre = Rock", "genre in (Rock, Disco) and energy >= 7", "tag = nouveau", "genre = Funk or genre = Pop",
+        "genre != Rock"))]
+    appels = []
+    for regle in regles:
+        predicat = regle.predicat
+        regle.predicat = lambda valeurs, predicat=predicat, nom=regle.nom: appels.append(nom) or predicat(valeurs)
+    membres = evaluer_regles(regles, lignes())
+    for regle in regles:
+        attendus = [l.titre for l in lignes() if compiler_regle("X", regle.regle).predicat(valeurs_morceau(l))]
+        assert [l.titre for l in membres[regle.nom]] == attendus
+    # R0 n'est testée que sur les 2 morceaux Rock, pas sur les 6
+    assert appels.count("R0") == 2 and appels.count("R2") == 6
+
+
+def test_noms_distincts_des_genres():
+    """Une règle nommée comme un genre ne remplace pas la playlist de ce genre"""
+    with tempfile.TemporaryDirectory() as temp:
+        config = Path(temp) / "regles.txt"
+        config.write_text("# commentaire\nRock = genre = Rock and bpm > 120\nPeak Time = energy >= 8\n",
+                          encoding='utf-8')
+        assert [r.nom for r in charger_regles(config)] == ["Rock", "Peak Time"]
+        mes_lignes = lignes()
+        index = IndexBibliotheque(ligne.song for ligne in mes_lignes)
+        genres = [nom for nom, _, _ in step5.playlists_par_genre(mes_lignes, index)]
+        intelligentes = {nom: len(membres) for nom, _, membres in step5.playlists_par_regle(mes_lignes, index, config)}
+        assert genres == ["Playlist_Rock"]
+        assert intelligentes == {"Playlist_Smart_Rock": 1, "Playlist_Smart_Peak_Time": 2}
+
+        config.write_text("Rock = genre = Rock\nRock = bpm > 1\n", encoding='utf-8')
+        try:
+            charger_regles(config)
+            assert False, "une playlist définie deux fois aurait dû être refusée"
+        except ValueError:
+            pass
+
+
+if __name__ == "__main__":
+    test_priorite_et_negations()
+    test_filtre_par_genre()
+    test_noms_distincts_des_genres()
+    print("\n🎉 Tous les tests des playlists intelligentes sont passés avec succès!")
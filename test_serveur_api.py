@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de l'API locale: pagination, filtres, ETag/304, paramètres invalides et rechargement à chaud
+"""
+
+import re
+import sys
+import os
+import json
+import tempfile
+import http.client
+from pathlib import Path
+from urllib.parse import quote
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import serveur_api
+import bibliotheque_synthetique as synth
+
+
+class ClientAPI:
+    """Connexion persistante vers le serveur de test"""
+
+    def __init__(self, serveur):
+        self.connexion = http.client.HTTPConnection(*serveur.server_address[:2], timeout=10)
+
+    def get(self, chemin, **entetes):
+        self.connexion.request("GET", chemin, headers=entetes)
+        reponse = self.connexion.getresponse()
+        corps = reponse.read()
+        return reponse.status, dict(reponse.getheaders()), json.loads(corps) if corps else None
+
+
+def avec_serveur(test):
+    """Lancer le test avec un serveur sur 120 fiches synthétiques, sans surveillance"""
+    def lancer():
+        with tempfile.TemporaryDirectory() as temp:
+            chansons = Path(temp) / "chansons"
+            morceaux = synth.generer_morceaux(120, 42)
+            synth.ecrire_dossier_fiches(morceaux, chansons)
+            serveur = serveur_api.demarrer(chansons, port=0, rechargement=False)
+            try:
+                test(serveur, ClientAPI(serveur), morceaux)
+            finally:
+                serveur.shutdown()
+                serveur.server_close()
+    lancer.__name__ = test.__name__
+    lancer.__doc__ = test.__doc__
+    return lancer
+
+
+@avec_serveur
+def test_pagination_et_filtres(serveur, client, morceaux):
+    """Les pages couvrent tous les résultats, chaque filtre correspond au parcours naïf des morceaux"""
+    statut, _, etat = client.get("/api/etat")
+    assert statut == 200 and etat['morceaux'] == len(morceaux) and etat['generation'] == 1
+
+    vus = []
+    for page in (1, 2, 3):
+        _, _, reponse = client.get(f"/api/morceaux?par_page=50&page={page}")
+        assert (reponse['total'], reponse['pages'], reponse['page']) == (120, 3, page)
+        vus += reponse['morceaux']
+    assert len(vus) == 120 and [m['bpm'] for m in vus] == sorted(m['bpm'] for m in vus)
+    _, _, vide = client.get("/api/morceaux?page=9")
+    assert vide['morceaux'] == [] and vide['total'] == 120
+
+    genre = morceaux[0]['genre'][0]
+    attendus = [m for m in morceaux if 100 <= m['bpm'] <= 140 and m['energie'] >= 6
+                and genre in m['genre']]
+    _, _, reponse = client.get(f"/api/morceaux?bpm_min=100&bpm_max=140&energie_min=6&genre={quote(genre.upper())}"
+                               "&par_page=500")
+    assert reponse['total'] == len(attendus) > 0
+    assert sorted((m['artist'], m['title']) for m in reponse['morceaux']) == \
+        sorted((m['artiste'], m['titre']) for m in attendus)
+
+    mot = morceaux[3]['titre'].split()[0]
+    _, _, reponse = client.get(f"/api/morceaux?q={quote(mot.lower())}&par_page=500")
+    assert reponse['total'] == sum(mot.casefold() in f"{m['artiste']} {m['titre']}".casefold() for m in morceaux)
+
+
+@avec_serveur
+def test_etag_et_erreurs(serveur, client, morceaux):
+    """Une page de playlist inchangée répond 304; paramètres invalides 400, inconnus 404, écriture 405"""
+    _, _, listes = client.get("/api/playlists")
+    nom = listes[0]['name']
+    statut, entetes, page = client.get(f"/api/playlists/{nom}?par_page=10")
+    assert statut == 200 and page['name'] == nom and len(page['songs']) == min(10, page['total_songs'])
+    etag = entetes['ETag']
+    assert etag == f'"{listes[0]["etag"]}-1-10"'
+    statut, entetes, corps = client.get(f"/api/playlists/{nom}?par_page=10", **{'If-None-Match': etag})
+    assert statut == 304 and corps is None and entetes['ETag'] == etag
+    # Une autre page a un autre ETag
+    statut, _, _ = client.get(f"/api/playlists/{nom}?par_page=10&page=2", **{'If-None-Match': etag})
+    assert statut == 200
+
+    for requete in ("/api/morceaux?bpm_min=rapide", "/api/morceaux?page=0", "/api/morceaux?par_page=-1",
+                    f"/api/playlists/{nom}?page=x"):
+        statut, _, corps = client.get(requete)
+        assert statut == 400 and 'erreur' in corps, requete
+    assert client.get("/api/playlists/Inconnue")[0] == 404
+    assert client.get("/api/inconnue")[0] == 404
+    client.connexion.request("DELETE", "/api/morceaux")
+    reponse = client.connexion.getresponse()
+    reponse.read()
+    assert reponse.status == 405
+
+
+@avec_serveur
+def test_rechargement_a_chaud(serveur, client, morceaux):
+    """Une fiche relue publie une nouvelle génération; les ETags des playlists touchées changent"""
+    bibliotheque = serveur.bibliotheque
+    _, _, avant = client.get("/api/playlists")
+    chemin = sorted(bibliotheque.fiches)[0]
+    contenu = Path(chemin).read_text(encoding='utf-8')
+    Path(chemin).write_text(re.sub(r'^bpm: .*$', 'bpm: 60', contenu, count=1, flags=re.M), encoding='utf-8')
+    bibliotheque.rafraichir([chemin])
+
+    _, _, etat = client.get("/api/etat")
+    assert etat['generation'] == 2
+    _, _, reponse = client.get("/api/morceaux?bpm_max=60")
+    assert reponse['total'] == 1 and reponse['morceaux'][0]['bpm'] == 60
+    _, _, apres = client.get("/api/playlists")
+    assert {l['name']: l['etag'] for l in avant}[serveur_api.playlists.PLAYLIST_COMPLETE] != \
+        {l['name']: l['etag'] for l in apres}[serveur_api.playlists.PLAYLIST_COMPLETE]
+
+    # Un état qui ne peut pas être construit laisse l'ancien en service, génération comprise
+    def etat_impossible(*args):
+        raise MemoryError()
+
+    construire = serveur_api.EtatBibliotheque
+    serveur_api.EtatBibliotheque = etat_impossible
+    try:
+        bibliotheque.rafraichir([chemin])
+        assert False, "le rafraîchissement aurait dû échouer"
+    except MemoryError:
+        pass
+    finally:
+        serveur_api.EtatBibliotheque = construire
+    assert client.get("/api/etat")[2]['generation'] == 2
+
+
+if __name__ == "__main__":
+    test_pagination_et_filtres()
+    test_etag_et_erreurs()
+    test_rechargement_a_chaud()
+    print("\n🎉 Tous les tests de l'API locale sont passés avec succès!")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test du set paginé: index, pages par genre et par énergie, pages inchangées non réécrites
+"""
+
+import sys
+import os
+import tempfile
+import importlib
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from morceau import Morceau
+
+step3 = importlib.import_module("4_generer_set_classe_depuis_fiches")
+
+
+def morceau(i, genres, bpm=120, energie=5):
+    return Morceau.depuis_dict({'titre': f"Titre {i}", 'artiste': f"Artiste {i}", 'bpm': bpm, 'key': '8A',
+                                'energie': energie, 'genres': genres,
+                                'file_path': Path(f"Artiste {i} - Titre {i}.md")})
+
+
+def dates(dossier):
+    return {nom: os.stat(dossier / nom).st_mtime_ns for nom in os.listdir(dossier)}
+
+
+def test_index_et_pages():
+    """L'index renvoie vers des pages d'au plus taille_page morceaux, chaînées entre elles"""
+    with tempfile.TemporaryDirectory() as temp:
+        sortie = Path(temp) / "set_dj_classe.md"
+        songs = [morceau(i, ['House'] if i % 3 else ['Hip/Hop'], bpm=100 + i, energie=1 + i % 10)
+                 for i in range(7)]
+        assert step3.generate_set_by_genre(songs, sortie, taille_page=2) == (7, 2)
+
+        pages = step3.dossier_pages(sortie)
+        assert pages.name == "set_dj_classe_pages"
+        assert sorted(os.listdir(pages)) == [
+            step3.MANIFESTE_SET, "energie_Faible_1-3.md", "energie_Faible_1-3_02.md", "energie_Moyenne_4-6.md",
+            "energie_Moyenne_4-6_02.md", "energie_Élevée_7-10.md", "genre_Hip_Hop.md", "genre_Hip_Hop_02.md",
+            "genre_House.md", "genre_House_02.md"]
+        index = sortie.read_text(encoding='utf-8')
+        assert "- [House](<set_dj_classe_pages/genre_House.md>) (4 morceaux, 2 pages)\n" in index
+        assert "- [Élevée (7-10)](<set_dj_classe_pages/energie_Élevée_7-10.md>) (1 morceaux)\n" in index
+        assert "**Set House:**\n- Artiste 1 - Titre 1\n" in index
+
+        page = (pages / "genre_House_02.md").read_text(encoding='utf-8')
+        assert page.startswith("# House (4 morceaux) - page 2/2\n\n[↑ Index](<../set_dj_classe.md>) · "
+                               "[← Page précédente](<genre_House.md>)\n\n")
+        assert "- **Artiste 4 - Titre 4**\n  - BPM: 104 | Clé: 8A | Énergie: 5\n" in page
+        assert "Artiste 1 " not in page
+
+
+def test_noms_sans_collision():
+    """Le genre "Pop 02" ne remplace pas la page 2 de "Pop", ni "pop" la page 1"""
+    with tempfile.TemporaryDirectory() as temp:
+        sortie = Path(temp) / "set_dj_classe.md"
+        songs = [morceau(i, [genre], bpm=100 + i) for i, genre in enumerate(["Pop", "Pop", "Pop 02", "pop", "Pop"])]
+        step3.generate_set_by_genre(songs, sortie, taille_page=2)
+
+        pages = step3.dossier_pages(sortie)
+        titres = {nom: (pages / nom).read_text(encoding='utf-8').split("\n", 1)[0]
+                  for nom in os.listdir(pages) if nom.startswith("genre_")}
+        assert len({nom.lower() for nom in titres}) == len(titres) == 4
+        assert sorted(titres.values()) == ["# Pop (3 morceaux) - page 1/2", "# Pop (3 morceaux) - page 2/2",
+                                           "# Pop 02 (1 morceaux)", "# pop (1 morceaux)"]
+
+
+def test_pages_inchangees_non_reecrites():
+    """Deuxième passage: seules les pages touchées sont réécrites, celles d'un groupe disparu supprimées"""
+    with tempfile.TemporaryDirectory() as temp:
+        sortie = Path(temp) / "set_dj_classe.md"
+        pages = step3.dossier_pages(sortie)
+        songs = [morceau(i, ['Techno' if i < 20 else 'Disco']) for i in range(25)]
+        step3.generate_set_by_genre(songs, sortie, taille_page=10)
+        avant = dates(pages)
+
+        # Un BPM change dans la dernière page Techno, le genre Disco disparaît
+        songs = [morceau(i, ['Techno'], bpm=121 if i == 19 else 120) for i in range(20)]
+        sections = {}
+        step3.generate_set_by_genre(songs, sortie, sections=sections, taille_page=10)
+        apres = dates(pages)
+        assert "genre_Disco.md" not in apres
+        modifiees = sorted(nom for nom in apres if apres[nom] != avant.get(nom))
+        assert modifiees == [step3.MANIFESTE_SET, "energie_Moyenne_4-6.md", "energie_Moyenne_4-6_02.md",
+                             "genre_Techno_02.md"]
+
+        # Surveillance: rien de changé, aucune page ni rendue ni réécrite
+        step3.generate_set_by_genre(songs, sortie, sections=sections, taille_page=10)
+        assert {nom: date for nom, date in dates(pages).items() if nom != step3.MANIFESTE_SET} == \
+            {nom: date for nom, date in apres.items() if nom != step3.MANIFESTE_SET}
+        assert set(sections) == set(apres) - {step3.MANIFESTE_SET}
+
+
+if __name__ == "__main__":
+    test_index_et_pages()
+    test_noms_sans_collision()
+    test_pages_inchangees_non_reecrites()
+    print("\n🎉 Tous les tests du set paginé sont passés avec succès!")
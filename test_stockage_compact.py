@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test du stockage compact: pack de fiches, reprise après arrêt brutal et export
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stockage_compact
+import bibliotheque_synthetique as synth
+from genere_playlists1 import parse_song_file, parse_song_content
+
+
+def test_pack_et_export():
+    """Le pack se lit comme le dossier et s'exporte à l'identique"""
+    with tempfile.TemporaryDirectory() as temp:
+        chansons = Path(temp) / "chansons"
+        synth.ecrire_dossier_fiches(synth.generer_morceaux(200, 7), chansons)
+
+        for compression in stockage_compact.COMPRESSIONS:
+            pack = Path(temp) / f"{compression}.pack"
+            stats = stockage_compact.empaqueter(chansons, pack, compression)
+            assert stats['fiches'] == stats['ajoutees'] == 200
+            # Deuxième passage: rien n'a changé, rien n'est ajouté
+            assert stockage_compact.empaqueter(chansons, pack, compression)['ajoutees'] == 0
+
+            with stockage_compact.StockageCompact(pack) as stockage:
+                for chemin, contenu in stockage:
+                    assert chemin.parent == Path(temp) / compression
+                    assert parse_song_content(contenu, chansons / chemin.name) == parse_song_file(chansons / chemin.name)
+                export = Path(temp) / f"export_{compression}"
+                assert stockage.exporter(export) == 200
+            for fichier in chansons.iterdir():
+                assert (export / fichier.name).read_bytes() == fichier.read_bytes()
+
+        # Sans dossier, le pack voisin est utilisé
+        stockage_compact.empaqueter(chansons)
+        (Path(temp) / "autre").mkdir()
+        os.rename(chansons, Path(temp) / "autre" / "chansons")
+        with stockage_compact.ouvrir_fiches(chansons) as source:
+            assert isinstance(source, stockage_compact.StockageCompact)
+            assert len(source) == 200
+
+
+def test_journal_et_reprise():
+    """Remplacement, suppression, index en retard et fin de journal tronquée"""
+    with tempfile.TemporaryDirectory() as temp:
+        pack = Path(temp) / "chansons.pack"
+        with stockage_compact.StockageCompact(pack) as stockage:
+            stockage.ajouter("a.md", "titre: A\n")
+            stockage.ajouter("b.md", "titre: B\n")
+        taille_index = pack.with_name("chansons.pack.idx").read_bytes()
+
+        # Ajouts après la dernière sauvegarde de l'index, puis arrêt brutal en pleine écriture
+        stockage = stockage_compact.StockageCompact(pack)
+        stockage.ajouter("a.md", "titre: A2\n")
+        stockage.supprimer("b.md")
+        stockage.ajouter("c.md", "titre: C\n")
+        stockage._fichier.flush()
+        pack.with_name("chansons.pack.idx").write_bytes(taille_index)
+        with open(pack, 'ab') as f:
+            f.write(b"\x01\x04\x00")
+
+        with stockage_compact.StockageCompact(pack) as relu:
+            assert relu.noms() == ["a.md", "c.md"]
+            assert relu.lire("a.md") == "titre: A2\n"
+            relu.ajouter("d.md", "titre: D\n")
+            assert relu.octets_morts() > 0
+            assert relu.compacter() > 0
+            assert relu.octets_morts() == 0
+        with stockage_compact.StockageCompact(pack) as relu:
+            assert [contenu for _, contenu in relu] == ["titre: A2\n", "titre: C\n", "titre: D\n"]
+
+
+def test_lecture_apres_compactage():
+    """Le pack est fermé au moment du remplacement (Windows), puis relu et complété sans le rouvrir"""
+    with tempfile.TemporaryDirectory() as temp:
+        pack = Path(temp) / "chansons.pack"
+        with stockage_compact.StockageCompact(pack) as stockage:
+            for i in range(50):
+                stockage.ajouter(f"{i}.md", f"titre: {i}\n" * 20)
+            for i in range(0, 50, 2):
+                stockage.ajouter(f"{i}.md", f"titre: {i} bis\n")
+            stockage.supprimer("1.md")
+            assert stockage.lire("3.md") == "titre: 3\n" * 20
+
+            remplacer = os.replace
+            ouverts = []
+
+            def remplacement_surveille(source, destination):
+                if Path(destination) == pack:
+                    ouverts.append((stockage._fichier, stockage._carte))
+                remplacer(source, destination)
+
+            os.replace = remplacement_surveille
+            try:
+                assert stockage.compacter() > 0
+            finally:
+                os.replace = remplacer
+            assert ouverts == [(None, None)]
+
+            assert len(stockage) == 49 and "1.md" not in stockage
+            assert stockage.lire("2.md") == "titre: 2 bis\n"
+            assert stockage.lire("3.md") == "titre: 3\n" * 20
+            stockage.ajouter("50.md", "titre: 50\n")
+            assert stockage.lire("50.md") == "titre: 50\n"
+        with stockage_compact.StockageCompact(pack) as relu:
+            assert len(relu) == 50 and relu.lire("49.md") == "titre: 49\n" * 20
+
+
+if __name__ == "__main__":
+    test_pack_et_export()
+    test_journal_et_reprise()
+    test_lecture_apres_compactage()
+    print("\n🎉 Tous les tests du stockage compact sont passés avec succès!")
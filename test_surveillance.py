@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de la surveillance: rafraîchissement retenté après une erreur, intervalle adapté à la bibliothèque et plafonné
+"""
+
+import re
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+
+# Ajouter le répertoire courant au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import surveillance
+import bibliotheque_synthetique as synth
+
+
+class SurveillanceFragile(surveillance.SurveillanceBibliotheque):
+    """Premier rafraîchissement en échec (disque plein, fichier verrouillé...)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rafraichissements = []
+
+    def rafraichir(self, chemins):
+        self.rafraichissements.append(set(chemins))
+        if len(self.rafraichissements) == 1:
+            raise OSError("disque plein")
+        return super().rafraichir(chemins)
+
+
+def test_rafraichissement_retente():
+    """Les fiches touchées restent en attente après un échec et sont relues au passage suivant"""
+    with tempfile.TemporaryDirectory() as temp:
+        espace = Path(temp)
+        chansons = espace / "chansons"
+        synth.ecrire_dossier_fiches(synth.generer_morceaux(20, 42), chansons)
+        veille = SurveillanceFragile(chansons, espace / "mp3", espace / "set_dj_classe.md", espace / "playlists",
+                                     importer=False)
+        veille.charger()
+
+        chemin = sorted(veille.fiches)[0]
+        contenu = Path(chemin).read_text(encoding='utf-8')
+        Path(chemin).write_text(re.sub(r'^bpm: .*$', 'bpm: 199', contenu, count=1, flags=re.M), encoding='utf-8')
+        os.utime(chemin, ns=(time.time_ns(), time.time_ns() + 10**9))
+
+        veille.executer(intervalle=0.01, delai=0.02, duree_max=1.0)
+        assert len(veille.rafraichissements) == 2
+        assert veille.rafraichissements[0] == veille.rafraichissements[1] == {chemin}
+        assert veille.morceaux[chemin]['bpm'] == 199
+
+
+def test_intervalle_adapte():
+    """Des instantanés lents espacent les passages; l'intervalle demandé reste le minimum"""
+    with tempfile.TemporaryDirectory() as temp:
+        veille = surveillance.SurveillanceBibliotheque(temp, importer=False)
+        passages = []
+        instantane = surveillance.instantane_fiches
+
+        def instantane_lent(songs_dir):
+            passages.append(time.monotonic())
+            time.sleep(0.02)
+            return instantane(songs_dir)
+
+        surveillance.instantane_fiches = instantane_lent
+        try:
+            veille.executer(intervalle=0.001, delai=0.0, duree_max=0.6)
+        finally:
+            surveillance.instantane_fiches = instantane
+        ecarts = [b - a for a, b in zip(passages, passages[1:])]
+        # 0.02 s d'instantané pour 10 % du temps au plus: environ 0.2 s entre deux passages
+        assert 2 <= len(passages) <= 4
+        assert min(ecarts) >= 0.02 / surveillance.PART_INSTANTANES
+
+
+def test_attente_plafonnee():
+    """Sur une bibliothèque énorme, l'attente ne dépasse pas ATTENTE_MAX"""
+    with tempfile.TemporaryDirectory() as temp:
+        veille = surveillance.SurveillanceBibliotheque(temp, importer=False)
+        passages = []
+        instantane = surveillance.instantane_fiches
+        attente_max = surveillance.ATTENTE_MAX
+
+        def instantane_lent(songs_dir):
+            passages.append(time.monotonic())
+            time.sleep(0.02)
+            return instantane(songs_dir)
+
+        surveillance.instantane_fiches = instantane_lent
+        surveillance.ATTENTE_MAX = 0.05
+        try:
+            veille.executer(intervalle=0.001, delai=0.0, duree_max=0.6)
+        finally:
+            surveillance.instantane_fiches = instantane
+            surveillance.ATTENTE_MAX = attente_max
+        ecarts = [b - a for a, b in zip(passages, passages[1:])]
+        # 0.05 s d'attente + 0.02 s d'instantané entre deux passages; sans plafond, 0.2 s et 4 passages au plus
+        assert len(passages) >= 5
+        assert min(ecarts) >= 0.05
+
+
+if __name__ == "__main__":
+    test_rafraichissement_retente()
+    test_intervalle_adapte()
+    test_attente_plafonnee()
+    print("\n🎉 Tous les tests de la surveillance sont passés avec succès!")